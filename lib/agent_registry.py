@@ -12,6 +12,11 @@ from pathlib import Path
 import sys
 import yaml
 
+try:
+    from .keyword_matcher import KeywordMatcher
+except ImportError:  # pragma: no cover - script mode
+    from keyword_matcher import KeywordMatcher
+
 def _warn(message: str) -> None:
     sys.stderr.write(f"{message}\n")
 
@@ -327,6 +332,9 @@ Focus on:
             config_path: Optional path to YAML configuration file
         """
         self.agents: Dict[str, AgentConfig] = {**self.DEFAULT_AGENTS}
+        # Agent names and capability keywords, rebuilt when agents change
+        self._matcher: Optional[KeywordMatcher] = None
+        self._matcher_agents: tuple = ()
 
         if config_path:
             self._load_config(config_path)
@@ -400,6 +408,19 @@ Focus on:
         AgentCapability.LONG_RUNNING: 2.0,
     }
 
+    def _keyword_matcher(self) -> KeywordMatcher:
+        names = tuple(self.agents)
+        if self._matcher is None or names != self._matcher_agents:
+            matcher = KeywordMatcher()
+            for name in names:
+                matcher.add(name, ("agent", name))
+            for cap, keywords in self.CAPABILITY_KEYWORDS.items():
+                for keyword in keywords:
+                    matcher.add(keyword, ("cap", cap))
+            self._matcher = matcher
+            self._matcher_agents = names
+        return self._matcher
+
     def match_task(self, task: str, files: Optional[List[str]] = None) -> AgentMatch:
         """
         Match a task to the best agent.
@@ -411,7 +432,7 @@ Focus on:
         Returns:
             AgentMatch with the best agent and confidence
         """
-        task_lower = task.lower()
+        hits = self._keyword_matcher().matches(task)
         scores: Dict[str, tuple] = {}  # agent -> (score, matched_capabilities)
 
         for agent_name, agent in self.agents.items():
@@ -422,18 +443,16 @@ Focus on:
             matched_caps = []
 
             # Bonus if agent name appears in task (e.g., "workflow" in "create workflow")
-            if agent_name.lower() in task_lower:
+            if ("agent", agent_name) in hits:
                 score += 3.0  # Strong bonus for explicit agent name match
 
             # Score based on capability keywords with weighted scoring
             for cap in agent.capabilities:
-                keywords = self.CAPABILITY_KEYWORDS.get(cap, [])
-                cap_weight = self.CAPABILITY_WEIGHTS.get(cap, 1.0)
-                for keyword in keywords:
-                    if keyword.lower() in task_lower:
-                        score += cap_weight
-                        if cap not in matched_caps:
-                            matched_caps.append(cap)
+                matched = hits.get(("cap", cap))
+                if matched:
+                    score += self.CAPABILITY_WEIGHTS.get(cap, 1.0) * len(matched)
+                    if cap not in matched_caps:
+                        matched_caps.append(cap)
 
             # Bonus for file pattern matching
             if files:
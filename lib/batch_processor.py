@@ -40,6 +40,11 @@ class BatchTask:
     result: Optional[str] = None
     error: Optional[str] = None
     latency_ms: float = 0.0
+    request_id: Optional[str] = None  # Gateway request, for re-attaching on resume
+
+    @property
+    def finished(self) -> bool:
+        return self.status in (BatchStatus.COMPLETED, BatchStatus.FAILED)
 
     def to_dict(self) -> Dict[str, Any]:
         return {
@@ -67,7 +72,7 @@ class BatchJob:
         """Calculate progress as percentage."""
         if not self.tasks:
             return 0.0
-        completed = sum(1 for t in self.tasks if t.status in [BatchStatus.COMPLETED, BatchStatus.FAILED])
+        completed = sum(1 for t in self.tasks if t.finished)
         return completed / len(self.tasks)
 
     @property
@@ -91,6 +96,26 @@ class BatchJob:
         }
 
 
+@dataclass
+class BatchEvent:
+    """A progress event emitted while a batch job runs."""
+    type: str  # job_started, task_started, task_finished, job_finished
+    job: BatchJob
+    task: Optional[BatchTask] = None
+    timestamp: float = field(default_factory=time.time)
+
+    def to_dict(self) -> Dict[str, Any]:
+        data = {
+            "type": self.type,
+            "job_id": self.job.id,
+            "job_status": self.job.status.value,
+            "progress": self.job.progress,
+            "timestamp": self.timestamp,
+        }
+        if self.task is not None:
+            data["task"] = self.task.to_dict()
+        return data
+
 
 try:
     from .batch_processor_core import BatchProcessorCoreMixin
@@ -12,8 +12,12 @@ from typing import Any, Callable, Dict, List, Optional
 
 try:
     from .batch_processor import BatchJob, BatchStatus, BatchTask, HANDLED_EXCEPTIONS
+    from .batch_runners import BatchTaskRunner, SubprocessTaskRunner
+    from .provider_commands import get_ask_command
 except ImportError:  # pragma: no cover - script mode
     from batch_processor import BatchJob, BatchStatus, BatchTask, HANDLED_EXCEPTIONS
+    from batch_runners import BatchTaskRunner, SubprocessTaskRunner
+    from provider_commands import get_ask_command
 
 
 class BatchProcessorCoreMixin:
@@ -25,6 +29,8 @@ class BatchProcessorCoreMixin:
         default_provider: Optional[str] = None,
         timeout_s: float = 60.0,
         db_path: Optional[str] = None,
+        provider_limits: Optional[Dict[str, int]] = None,
+        runner: Optional[BatchTaskRunner] = None,
     ):
         """
         Initialize the batch processor.
@@ -34,11 +40,16 @@ class BatchProcessorCoreMixin:
             default_provider: Default provider for tasks without explicit provider
             timeout_s: Timeout per task in seconds
             db_path: Path to SQLite database for persistence
+            provider_limits: Per-provider concurrency caps (default: max_concurrent)
+            runner: Task runner (default: local ask commands)
         """
         self.max_concurrent = max_concurrent
         self.default_provider = default_provider
         self.timeout_s = timeout_s
+        self.provider_limits: Dict[str, int] = dict(provider_limits or {})
+        self.runner: BatchTaskRunner = runner or SubprocessTaskRunner(self._get_ask_command)
         self._cancelled: set = set()
+        self._runs: Dict[str, Any] = {}  # job_id -> run executing in this process
 
         # Setup database
         if db_path is None:
@@ -48,13 +59,14 @@ class BatchProcessorCoreMixin:
         self.db_path = db_path
         self._init_db()
 
-        # Load jobs from database into memory cache
+        # Jobs are loaded from the database on first access
         self._jobs: Dict[str, BatchJob] = {}
-        self._load_jobs_from_db()
 
     def _init_db(self):
         """Initialize the SQLite database."""
         with sqlite3.connect(self.db_path) as conn:
+            # Lets other processes read progress while a batch is writing
+            conn.execute("PRAGMA journal_mode=WAL")
             conn.execute("""
                 CREATE TABLE IF NOT EXISTS batch_jobs (
                     id TEXT PRIMARY KEY,
@@ -80,51 +92,69 @@ class BatchProcessorCoreMixin:
             conn.execute("""
                 CREATE INDEX IF NOT EXISTS idx_tasks_job_id ON batch_tasks(job_id)
             """)
+            columns = {row[1] for row in conn.execute("PRAGMA table_info(batch_tasks)")}
+            if "request_id" not in columns:
+                conn.execute("ALTER TABLE batch_tasks ADD COLUMN request_id TEXT")
             conn.commit()
 
-    def _load_jobs_from_db(self, limit: int = 100):
-        """Load recent jobs from database into memory."""
-        with sqlite3.connect(self.db_path) as conn:
-            conn.row_factory = sqlite3.Row
-            # Load recent jobs
-            cursor = conn.execute("""
-                SELECT * FROM batch_jobs
-                ORDER BY created_at DESC
-                LIMIT ?
-            """, (limit,))
-
-            for row in cursor.fetchall():
-                job_id = row["id"]
-                # Load tasks for this job
-                task_cursor = conn.execute("""
-                    SELECT * FROM batch_tasks WHERE job_id = ?
-                """, (job_id,))
-
-                tasks = []
-                for task_row in task_cursor.fetchall():
-                    task = BatchTask(
-                        id=task_row["id"],
-                        message=task_row["message"],
-                        provider=task_row["provider"],
-                        status=BatchStatus(task_row["status"]),
-                        result=task_row["result"],
-                        error=task_row["error"],
-                        latency_ms=task_row["latency_ms"] or 0.0,
-                    )
-                    tasks.append(task)
-
-                job = BatchJob(
-                    id=job_id,
-                    tasks=tasks,
-                    created_at=row["created_at"],
-                    completed_at=row["completed_at"],
-                    status=BatchStatus(row["status"]),
-                    default_provider=row["default_provider"],
-                )
-                self._jobs[job_id] = job
+    def _load_job(self, conn: sqlite3.Connection, job_id: str) -> Optional[BatchJob]:
+        """Read a job and its tasks (in creation order)."""
+        conn.row_factory = sqlite3.Row
+        row = conn.execute("SELECT * FROM batch_jobs WHERE id = ?", (job_id,)).fetchone()
+        if row is None:
+            return None
+
+        tasks = [
+            BatchTask(
+                id=task_row["id"],
+                message=task_row["message"],
+                provider=task_row["provider"],
+                status=BatchStatus(task_row["status"]),
+                result=task_row["result"],
+                error=task_row["error"],
+                latency_ms=task_row["latency_ms"] or 0.0,
+                request_id=task_row["request_id"],
+            )
+            for task_row in conn.execute(
+                "SELECT * FROM batch_tasks WHERE job_id = ? ORDER BY rowid", (job_id,)
+            )
+        ]
+        return BatchJob(
+            id=job_id,
+            tasks=tasks,
+            created_at=row["created_at"],
+            completed_at=row["completed_at"],
+            status=BatchStatus(row["status"]),
+            default_provider=row["default_provider"],
+        )
+
+    def _save_task(self, conn: sqlite3.Connection, task: BatchTask) -> None:
+        """Persist one task's mutable fields (a single-row update)."""
+        conn.execute("""
+            UPDATE batch_tasks
+            SET provider = ?, status = ?, result = ?, error = ?, latency_ms = ?, request_id = ?
+            WHERE id = ?
+        """, (
+            task.provider,
+            task.status.value,
+            task.result,
+            task.error,
+            task.latency_ms,
+            task.request_id,
+            task.id,
+        ))
+        conn.commit()
+
+    def _save_job_status(self, conn: sqlite3.Connection, job: BatchJob) -> None:
+        """Persist a job's status and completion time."""
+        conn.execute(
+            "UPDATE batch_jobs SET status = ?, completed_at = ? WHERE id = ?",
+            (job.status.value, job.completed_at, job.id),
+        )
+        conn.commit()
 
     def _save_job(self, job: BatchJob):
-        """Save a job and its tasks to the database."""
+        """Save a job and all of its tasks to the database."""
         with sqlite3.connect(self.db_path) as conn:
             # Upsert job
             conn.execute("""
@@ -140,12 +170,12 @@ class BatchProcessorCoreMixin:
             ))
 
             # Upsert tasks
-            for task in job.tasks:
-                conn.execute("""
-                    INSERT OR REPLACE INTO batch_tasks
-                    (id, job_id, message, provider, status, result, error, latency_ms)
-                    VALUES (?, ?, ?, ?, ?, ?, ?, ?)
-                """, (
+            conn.executemany("""
+                INSERT OR REPLACE INTO batch_tasks
+                (id, job_id, message, provider, status, result, error, latency_ms, request_id)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+            """, [
+                (
                     task.id,
                     job.id,
                     task.message,
@@ -154,13 +184,20 @@ class BatchProcessorCoreMixin:
                     task.result,
                     task.error,
                     task.latency_ms,
-                ))
+                    task.request_id,
+                )
+                for task in job.tasks
+            ])
 
             conn.commit()
 
     def _get_ask_command(self, provider: str) -> str:
         """Get the ask command for a provider."""
-        return self.PROVIDER_COMMANDS.get(provider, "lask")
+        return get_ask_command(provider)
+
+    def _provider_limit(self, provider: str) -> int:
+        """Concurrency cap for one provider."""
+        return max(1, min(self.provider_limits.get(provider, self.max_concurrent), self.max_concurrent))
 
     def create_batch(
         self,
@@ -1,127 +1,292 @@
 """Auto-split mixins for BatchProcessor."""
 from __future__ import annotations
 
+import asyncio
+import functools
 import json
 import sqlite3
-import subprocess
 import time
 import uuid
-from concurrent.futures import ThreadPoolExecutor, as_completed
+from concurrent.futures import ThreadPoolExecutor
+from collections import deque
 from pathlib import Path
-from typing import Any, Callable, Dict, List, Optional
+from typing import Any, AsyncIterator, Callable, Deque, Dict, List, Optional
 
 try:
-    from .batch_processor import BatchJob, BatchStatus, BatchTask, HANDLED_EXCEPTIONS
+    from .batch_processor import BatchEvent, BatchJob, BatchStatus, BatchTask, HANDLED_EXCEPTIONS
+    from .batch_runners import BatchTaskRunner, TaskOutcome
 except ImportError:  # pragma: no cover - script mode
-    from batch_processor import BatchJob, BatchStatus, BatchTask, HANDLED_EXCEPTIONS
+    from batch_processor import BatchEvent, BatchJob, BatchStatus, BatchTask, HANDLED_EXCEPTIONS
+    from batch_runners import BatchTaskRunner, TaskOutcome
 
+ProgressCallback = Callable[[BatchJob, BatchTask], None]
+EventCallback = Callable[[BatchEvent], None]
 
-class BatchProcessorExecMixin:
-    """Mixin methods extracted from BatchProcessor."""
+# How often a running batch checks for cancellation from other processes
+CANCEL_POLL_S = 1.0
 
-    def _execute_task(self, task: BatchTask) -> BatchTask:
-        """Execute a single task."""
-        if task.id in self._cancelled:
-            task.status = BatchStatus.CANCELLED
-            return task
 
-        provider = task.provider or self.default_provider or "claude"
-        ask_cmd = self._get_ask_command(provider)
-        start_time = time.time()
+class _BatchRun:
+    """
+    A job executing in this process.
 
-        try:
-            cmd = f"{ask_cmd} <<'EOF'\n{task.message}\nEOF"
-            result = subprocess.run(
-                ["bash", "-c", cmd],
-                capture_output=True,
-                text=True,
-                timeout=self.timeout_s,
-            )
+    The run's SQLite connection is only used from its single ``db`` thread,
+    so writes keep their order and never block the event loop (inside the
+    gateway this is the server loop).
+    """
 
-            task.latency_ms = (time.time() - start_time) * 1000
-            task.provider = provider
+    def __init__(self, job: BatchJob, loop: asyncio.AbstractEventLoop):
+        self.job = job
+        self.loop = loop
+        self.cancelled = False
+        self.in_flight: Dict[str, asyncio.Task] = {}
+        self._db = ThreadPoolExecutor(max_workers=1, thread_name_prefix="batch-db")
 
-            if result.returncode == 0:
-                task.status = BatchStatus.COMPLETED
-                task.result = result.stdout
-            else:
-                task.status = BatchStatus.FAILED
-                task.error = result.stderr or f"Exit code: {result.returncode}"
+    async def db(self, func: Callable[..., Any], *args: Any) -> Any:
+        """Run a blocking database call on the run's writer thread."""
+        return await self.loop.run_in_executor(self._db, functools.partial(func, *args))
 
-        except subprocess.TimeoutExpired:
-            task.latency_ms = (time.time() - start_time) * 1000
-            task.status = BatchStatus.FAILED
-            task.error = "Timeout"
-        except HANDLED_EXCEPTIONS as e:
-            task.latency_ms = (time.time() - start_time) * 1000
-            task.status = BatchStatus.FAILED
-            task.error = str(e)
+    def db_nowait(self, func: Callable[..., Any], *args: Any) -> None:
+        """Queue a database call behind the ones already submitted."""
+        self._db.submit(func, *args)
 
-        return task
+    def close_db(self) -> None:
+        self._db.shutdown(wait=False)
 
-    def execute_batch(
+    def cancel(self) -> None:
+        """Stop starting tasks and cancel the running ones (loop thread only)."""
+        self.cancelled = True
+        for task in list(self.in_flight.values()):
+            task.cancel()
+
+
+class BatchProcessorExecMixin:
+    """Mixin methods extracted from BatchProcessor."""
+
+    async def execute_batch_async(
         self,
         job: BatchJob,
-        on_progress: Optional[Callable[[BatchJob, BatchTask], None]] = None,
+        runner: Optional[BatchTaskRunner] = None,
+        on_progress: Optional[ProgressCallback] = None,
+        on_event: Optional[EventCallback] = None,
+        timeout_s: Optional[float] = None,
     ) -> BatchJob:
         """
-        Execute a batch job.
+        Execute a batch job's unfinished tasks.
+
+        Tasks are pulled from per-provider queues by at most
+        ``_provider_limit(provider)`` workers each, and never more than
+        ``max_concurrent`` run at once. Only the changed task row is written
+        after each state change. Tasks left RUNNING by an interrupted run
+        are picked up again, so calling this on a loaded job resumes it.
 
         Args:
             job: The batch job to execute
+            runner: Task runner (default: ``self.runner``)
             on_progress: Optional callback called after each task completes
+            on_event: Optional callback receiving every progress event
+            timeout_s: Timeout per task (default: ``self.timeout_s``)
 
         Returns:
             Updated BatchJob
         """
-        job.status = BatchStatus.RUNNING
-        self._save_job(job)  # Save running status
-
-        with ThreadPoolExecutor(max_workers=self.max_concurrent) as executor:
-            # Submit all tasks
-            future_to_task = {
-                executor.submit(self._execute_task, task): task
-                for task in job.tasks
-            }
-
-            # Collect results
-            for future in as_completed(future_to_task):
-                task = future_to_task[future]
-                try:
-                    completed_task = future.result()
-                    # Update task in job
-                    for i, t in enumerate(job.tasks):
-                        if t.id == completed_task.id:
-                            job.tasks[i] = completed_task
+        runner = runner or self.runner
+        timeout_s = timeout_s or self.timeout_s
+        run = _BatchRun(job, asyncio.get_running_loop())
+        self._runs[job.id] = run
+        self._cancelled.discard(job.id)
+        self._jobs[job.id] = job
+
+        def emit(event_type: str, task: Optional[BatchTask] = None) -> None:
+            if on_event is not None:
+                on_event(BatchEvent(event_type, job, task))
+
+        queues: Dict[str, Deque[BatchTask]] = {}
+        for task in job.tasks:
+            if not task.finished:
+                task.status = BatchStatus.PENDING
+                provider = task.provider or self.default_provider or "claude"
+                queues.setdefault(provider, deque()).append(task)
+
+        conn: Optional[sqlite3.Connection] = None
+        try:
+            conn = await run.db(self._open_run_connection)
+            job.status = BatchStatus.RUNNING
+            job.completed_at = None
+            await run.db(self._save_job_status, conn, job)
+            emit("job_started")
+
+            slots = asyncio.Semaphore(self.max_concurrent)
+
+            async def worker(provider: str, queue: Deque[BatchTask]) -> None:
+                while queue and not run.cancelled:
+                    async with slots:
+                        if run.cancelled or not queue:
                             break
+                        task = queue.popleft()
+                        await self._run_task(run, conn, runner, task, provider, timeout_s, emit, on_progress)
+
+            watcher = asyncio.ensure_future(self._watch_cancellation(run, conn))
+            try:
+                await asyncio.gather(*(
+                    worker(provider, queue)
+                    for provider, queue in queues.items()
+                    for _ in range(min(self._provider_limit(provider), len(queue)))
+                ))
+            finally:
+                watcher.cancel()
+
+            if run.cancelled:
+                for task in job.tasks:
+                    if task.status == BatchStatus.PENDING:
+                        task.status = BatchStatus.CANCELLED
+                await run.db(
+                    conn.executemany,
+                    "UPDATE batch_tasks SET status = ? WHERE id = ?",
+                    [(task.status.value, task.id) for task in job.tasks
+                     if task.status == BatchStatus.CANCELLED],
+                )
+                job.status = BatchStatus.CANCELLED
+            elif job.failed_count == len(job.tasks):
+                job.status = BatchStatus.FAILED
+            else:
+                job.status = BatchStatus.COMPLETED
+
+            job.completed_at = time.time()
+            await run.db(self._save_job_status, conn, job)
+            emit("job_finished")
+        finally:
+            if conn is not None:
+                # Queued after every pending write, so a resume sees them
+                await asyncio.shield(run.db(conn.close))
+            run.close_db()
+            self._runs.pop(job.id, None)
+        return job
+
+    def _open_run_connection(self) -> sqlite3.Connection:
+        # Opened on the run's db thread, which is the only thread using it
+        conn = sqlite3.connect(self.db_path)
+        conn.execute("PRAGMA synchronous=NORMAL")
+        return conn
 
-                    # Save progress to database
-                    self._save_job(job)
+    async def _run_task(
+        self,
+        run: _BatchRun,
+        conn: sqlite3.Connection,
+        runner: BatchTaskRunner,
+        task: BatchTask,
+        provider: str,
+        timeout_s: float,
+        emit: Callable[[str, Optional[BatchTask]], None],
+        on_progress: Optional[ProgressCallback],
+    ) -> None:
+        """Run one task and persist its row before and after."""
+        task.status = BatchStatus.RUNNING
+        task.provider = provider
+        task.error = None
+        await run.db(self._save_task, conn, task)
+        emit("task_started", task)
+
+        def on_submitted(request_id: str) -> None:
+            task.request_id = request_id
+            run.db_nowait(self._save_task, conn, task)
+
+        start_time = time.time()
+        in_flight = asyncio.ensure_future(runner.run(task, provider, timeout_s, on_submitted))
+        run.in_flight[task.id] = in_flight
+        try:
+            outcome = await in_flight
+        except asyncio.CancelledError:
+            if not run.cancelled:
+                raise  # The whole batch is being torn down; resume picks this task up
+            outcome = TaskOutcome(False, error="Cancelled", cancelled=True)
+        except HANDLED_EXCEPTIONS as e:
+            outcome = TaskOutcome(False, error=str(e))
+        finally:
+            run.in_flight.pop(task.id, None)
+
+        task.latency_ms = outcome.latency_ms or (time.time() - start_time) * 1000
+        if outcome.success:
+            task.status = BatchStatus.COMPLETED
+            task.result = outcome.output
+        else:
+            task.status = BatchStatus.CANCELLED if outcome.cancelled else BatchStatus.FAILED
+            task.error = outcome.error
+        await run.db(self._save_task, conn, task)
+
+        if on_progress:
+            on_progress(run.job, task)
+        emit("task_finished", task)
+
+    async def _watch_cancellation(self, run: _BatchRun, conn: sqlite3.Connection) -> None:
+        """Cancel the run when another thread or process cancels its job."""
+        while not run.cancelled:
+            await asyncio.sleep(CANCEL_POLL_S)
+            if run.job.id in self._cancelled:
+                run.cancel()
+                break
+            row = await run.db(self._load_job_status, conn, run.job.id)
+            if row is None or row[0] == BatchStatus.CANCELLED.value:
+                run.cancel()
+
+    @staticmethod
+    def _load_job_status(conn: sqlite3.Connection, job_id: str) -> Optional[tuple]:
+        return conn.execute("SELECT status FROM batch_jobs WHERE id = ?", (job_id,)).fetchone()
+
+    async def stream_batch(
+        self,
+        job: BatchJob,
+        runner: Optional[BatchTaskRunner] = None,
+    ) -> AsyncIterator[BatchEvent]:
+        """
+        Execute a batch job, yielding progress events as they happen.
 
-                    if on_progress:
-                        on_progress(job, completed_task)
+        Closing the iterator early cancels the job's in-flight tasks.
+        """
+        events: asyncio.Queue = asyncio.Queue()
 
-                except HANDLED_EXCEPTIONS as e:
-                    task.status = BatchStatus.FAILED
-                    task.error = str(e)
+        async def drive() -> None:
+            try:
+                await self.execute_batch_async(job, runner, on_event=events.put_nowait)
+            finally:
+                events.put_nowait(None)
 
-                # Check for cancellation
-                if job.id in self._cancelled:
-                    for f in future_to_task:
-                        f.cancel()
-                    job.status = BatchStatus.CANCELLED
+        driver = asyncio.ensure_future(drive())
+        try:
+            while True:
+                event = await events.get()
+                if event is None:
                     break
+                yield event
+            await driver
+        finally:
+            if not driver.done():
+                driver.cancel()
+                try:
+                    await driver
+                except asyncio.CancelledError:
+                    pass
 
-        job.completed_at = time.time()
+    def execute_batch(
+        self,
+        job: BatchJob,
+        on_progress: Optional[ProgressCallback] = None,
+        runner: Optional[BatchTaskRunner] = None,
+    ) -> BatchJob:
+        """
+        Execute a batch job (blocking wrapper around ``execute_batch_async``).
 
-        if job.status != BatchStatus.CANCELLED:
-            if job.failed_count == len(job.tasks):
-                job.status = BatchStatus.FAILED
-            else:
-                job.status = BatchStatus.COMPLETED
+        Must not be called from a running event loop.
 
-        self._save_job(job)  # Save final status
-        return job
+        Args:
+            job: The batch job to execute
+            on_progress: Optional callback called after each task completes
+            runner: Task runner (default: ``self.runner``)
+
+        Returns:
+            Updated BatchJob
+        """
+        return asyncio.run(self.execute_batch_async(job, runner, on_progress))
 
     def get_job(self, job_id: str) -> Optional[BatchJob]:
         """Get a batch job by ID."""
@@ -131,52 +296,27 @@ class BatchProcessorExecMixin:
 
         # Try to load from database
         with sqlite3.connect(self.db_path) as conn:
-            conn.row_factory = sqlite3.Row
-            cursor = conn.execute("""
-                SELECT * FROM batch_jobs WHERE id = ?
-            """, (job_id,))
-            row = cursor.fetchone()
-
-            if row:
-                # Load tasks
-                task_cursor = conn.execute("""
-                    SELECT * FROM batch_tasks WHERE job_id = ?
-                """, (job_id,))
-
-                tasks = []
-                for task_row in task_cursor.fetchall():
-                    task = BatchTask(
-                        id=task_row["id"],
-                        message=task_row["message"],
-                        provider=task_row["provider"],
-                        status=BatchStatus(task_row["status"]),
-                        result=task_row["result"],
-                        error=task_row["error"],
-                        latency_ms=task_row["latency_ms"] or 0.0,
-                    )
-                    tasks.append(task)
-
-                job = BatchJob(
-                    id=job_id,
-                    tasks=tasks,
-                    created_at=row["created_at"],
-                    completed_at=row["completed_at"],
-                    status=BatchStatus(row["status"]),
-                    default_provider=row["default_provider"],
-                )
-                self._jobs[job_id] = job
-                return job
+            job = self._load_job(conn, job_id)
+        if job is not None:
+            self._jobs[job_id] = job
+        return job
 
-        return None
+    def is_running(self, job_id: str) -> bool:
+        """Whether a job is executing in this process."""
+        return job_id in self._runs
 
     def get_progress(self, job_id: str) -> float:
         """Get progress of a batch job."""
-        job = self._jobs.get(job_id)
+        job = self.get_job(job_id)
         return job.progress if job else 0.0
 
     def cancel_batch(self, job_id: str) -> bool:
         """
-        Cancel a batch job.
+        Cancel a batch job, stopping its in-flight tasks.
+
+        A job running in this process is cancelled directly (safe from any
+        thread); one running in another process notices the persisted
+        status within ``CANCEL_POLL_S``.
 
         Args:
             job_id: Job ID to cancel
@@ -184,18 +324,29 @@ class BatchProcessorExecMixin:
         Returns:
             True if job was found and marked for cancellation
         """
-        if job_id in self._jobs:
-            self._cancelled.add(job_id)
-            job = self._jobs[job_id]
-            # Mark pending tasks as cancelled
-            for task in job.tasks:
-                if task.status == BatchStatus.PENDING:
-                    task.status = BatchStatus.CANCELLED
-                    self._cancelled.add(task.id)
-            job.status = BatchStatus.CANCELLED
-            self._save_job(job)  # Persist cancellation
+        job = self.get_job(job_id)
+        if job is None:
+            return False
+
+        self._cancelled.add(job_id)
+        run = self._runs.get(job_id)
+        if run is not None:
+            # The run persists the final task states itself
+            run.loop.call_soon_threadsafe(run.cancel)
             return True
-        return False
+
+        # Mark pending tasks as cancelled
+        cancelled = [task for task in job.tasks if task.status == BatchStatus.PENDING]
+        for task in cancelled:
+            task.status = BatchStatus.CANCELLED
+        job.status = BatchStatus.CANCELLED
+        with sqlite3.connect(self.db_path) as conn:
+            conn.executemany(
+                "UPDATE batch_tasks SET status = ? WHERE id = ?",
+                [(task.status.value, task.id) for task in cancelled],
+            )
+            self._save_job_status(conn, job)
+        return True
 
     def list_jobs(self, limit: int = 20) -> List[BatchJob]:
         """List recent batch jobs from database."""
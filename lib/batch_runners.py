@@ -0,0 +1,298 @@
+"""
+Task runners for the CCB batch engine.
+
+A runner executes one batch task. When the coroutine awaiting ``run`` is
+cancelled the runner stops the work it started (kills the local process
+group, or cancels the gateway request), so cancelling a batch ends
+in-flight provider calls instead of only skipping tasks not yet started.
+"""
+from __future__ import annotations
+
+import asyncio
+import json
+import os
+import signal
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Any, Callable, Dict, Optional
+
+try:
+    from .provider_commands import get_ask_command
+except ImportError:  # pragma: no cover - script mode
+    from provider_commands import get_ask_command
+
+if TYPE_CHECKING:  # pragma: no cover - typing only
+    from batch_processor import BatchTask
+
+
+# Called with the gateway request ID as soon as a task is submitted
+SubmittedCallback = Callable[[str], None]
+
+# Gateway request states that are still in flight
+_ACTIVE_STATUSES = ("queued", "processing", "retrying", "fallback")
+
+
+@dataclass
+class TaskOutcome:
+    """Result of running one batch task."""
+    success: bool
+    output: Optional[str] = None
+    error: Optional[str] = None
+    latency_ms: float = 0.0
+    cancelled: bool = False
+
+
+class BatchTaskRunner:
+    """Base class for batch task runners."""
+
+    name = "base"
+
+    async def run(
+        self,
+        task: BatchTask,
+        provider: str,
+        timeout_s: float,
+        on_submitted: Optional[SubmittedCallback] = None,
+    ) -> TaskOutcome:
+        """
+        Run one task.
+
+        Args:
+            task: Task to run (``task.request_id`` is set when resuming)
+            provider: Provider to send the task to
+            timeout_s: Timeout for the task
+            on_submitted: Receives the gateway request ID, if any
+
+        Returns:
+            TaskOutcome
+        """
+        raise NotImplementedError
+
+    async def close(self) -> None:
+        """Release resources held by the runner."""
+
+
+def _kill_process_group(process: asyncio.subprocess.Process) -> None:
+    try:
+        if hasattr(os, "killpg"):
+            os.killpg(process.pid, signal.SIGKILL)
+        else:  # pragma: no cover - Windows
+            process.kill()
+    except (ProcessLookupError, PermissionError):
+        pass
+
+
+class SubprocessTaskRunner(BatchTaskRunner):
+    """
+    Runs the provider's ask command locally with the message on stdin.
+
+    Each command runs in its own session so that a timeout or cancellation
+    kills the whole process group, including children the ask script spawned.
+    """
+
+    name = "local"
+
+    def __init__(self, command_for: Callable[[str], str] = get_ask_command):
+        """
+        Initialize the runner.
+
+        Args:
+            command_for: Maps a provider to its ask command
+        """
+        self.command_for = command_for
+
+    async def run(
+        self,
+        task: BatchTask,
+        provider: str,
+        timeout_s: float,
+        on_submitted: Optional[SubmittedCallback] = None,
+    ) -> TaskOutcome:
+        start_time = time.time()
+        try:
+            process = await asyncio.create_subprocess_exec(
+                self.command_for(provider),
+                stdin=asyncio.subprocess.PIPE,
+                stdout=asyncio.subprocess.PIPE,
+                stderr=asyncio.subprocess.PIPE,
+                start_new_session=True,
+            )
+        except OSError as e:
+            return TaskOutcome(False, error=str(e), latency_ms=(time.time() - start_time) * 1000)
+
+        try:
+            stdout, stderr = await asyncio.wait_for(
+                process.communicate((task.message + "\n").encode("utf-8")),
+                timeout=timeout_s,
+            )
+        except asyncio.TimeoutError:
+            _kill_process_group(process)
+            await process.wait()
+            return TaskOutcome(False, error="Timeout", latency_ms=(time.time() - start_time) * 1000)
+        except asyncio.CancelledError:
+            _kill_process_group(process)
+            await process.wait()
+            raise
+
+        latency_ms = (time.time() - start_time) * 1000
+        if process.returncode == 0:
+            return TaskOutcome(True, output=stdout.decode("utf-8", errors="replace"), latency_ms=latency_ms)
+        error = stderr.decode("utf-8", errors="replace") or f"Exit code: {process.returncode}"
+        return TaskOutcome(False, error=error, latency_ms=latency_ms)
+
+
+class GatewayTaskRunner(BatchTaskRunner):
+    """
+    Submits tasks to a running CCB gateway's request queue over HTTP.
+
+    The gateway applies its own provider concurrency, retries and caching.
+    Tasks that already carry a ``request_id`` re-attach to that request
+    instead of being submitted again, which is how an interrupted batch
+    resumes without duplicating provider calls.
+    """
+
+    name = "gateway"
+
+    def __init__(
+        self,
+        base_url: Optional[str] = None,
+        api_key: Optional[str] = None,
+        priority: int = 50,
+        max_workers: int = 32,
+    ):
+        """
+        Initialize the runner.
+
+        Args:
+            base_url: Gateway URL (default: $CCB_GATEWAY_URL or localhost:8765)
+            api_key: API key sent as X-API-Key (default: $CCB_API_KEY)
+            priority: Queue priority of submitted requests
+            max_workers: Threads available for blocking HTTP calls
+        """
+        self.base_url = (base_url or os.environ.get("CCB_GATEWAY_URL", "http://localhost:8765")).rstrip("/")
+        self.api_key = api_key or os.environ.get("CCB_API_KEY")
+        self.priority = priority
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="ccb-batch")
+
+    def _call(
+        self,
+        method: str,
+        path: str,
+        body: Optional[Dict[str, Any]] = None,
+        timeout: float = 10.0,
+    ) -> Optional[Dict[str, Any]]:
+        """Blocking JSON request; returns None on 404."""
+        headers = {"Content-Type": "application/json"}
+        if self.api_key:
+            headers["X-API-Key"] = self.api_key
+        req = urllib.request.Request(
+            self.base_url + path,
+            data=json.dumps(body).encode("utf-8") if body is not None else None,
+            headers=headers,
+            method=method,
+        )
+        try:
+            with urllib.request.urlopen(req, timeout=timeout) as response:
+                return json.loads(response.read().decode("utf-8"))
+        except urllib.error.HTTPError as e:
+            if e.code == 404:
+                return None
+            raise
+
+    async def _in_thread(self, func: Callable[..., Any], *args: Any) -> Any:
+        return await asyncio.get_running_loop().run_in_executor(self._executor, func, *args)
+
+    def _submit(self, task: BatchTask, provider: str, timeout_s: float) -> str:
+        result = self._call("POST", "/api/ask", {
+            "message": task.message,
+            "provider": provider,
+            "timeout_s": timeout_s,
+            "priority": self.priority,
+        }) or {}
+        request_id = result.get("request_id")
+        if not request_id:
+            raise ValueError("Gateway returned no request ID")
+        return request_id
+
+    def _reply(self, request_id: str, wait_s: float) -> Optional[Dict[str, Any]]:
+        query = urllib.parse.urlencode({"wait": "true" if wait_s > 0 else "false", "timeout": wait_s})
+        return self._call(
+            "GET",
+            f"/api/reply/{urllib.parse.quote(request_id)}?{query}",
+            timeout=wait_s + 30.0,
+        )
+
+    def _cancel(self, request_id: str) -> None:
+        self._call("DELETE", f"/api/request/{urllib.parse.quote(request_id)}")
+
+    async def run(
+        self,
+        task: BatchTask,
+        provider: str,
+        timeout_s: float,
+        on_submitted: Optional[SubmittedCallback] = None,
+    ) -> TaskOutcome:
+        start_time = time.time()
+        request_id = task.request_id
+        reply: Optional[Dict[str, Any]] = None
+        submit: Optional[asyncio.Future] = None
+        try:
+            if request_id is not None:
+                reply = await self._in_thread(self._reply, request_id, 0.0)
+                if reply is None:
+                    request_id = None  # Gone from the gateway, submit again
+
+            if request_id is None:
+                # Shielded so a cancellation still learns the ID to cancel
+                submit = asyncio.ensure_future(self._in_thread(self._submit, task, provider, timeout_s))
+                request_id = await asyncio.shield(submit)
+                if on_submitted is not None:
+                    on_submitted(request_id)
+
+            deadline = start_time + timeout_s
+            while reply is None or reply.get("status") in _ACTIVE_STATUSES:
+                remaining = deadline - time.time()
+                if remaining <= 0:
+                    await self._in_thread(self._cancel, request_id)
+                    return TaskOutcome(False, error="Timeout", latency_ms=(time.time() - start_time) * 1000)
+                reply = await self._in_thread(self._reply, request_id, remaining)
+                if reply is None:
+                    return TaskOutcome(
+                        False,
+                        error=f"Gateway request {request_id} not found",
+                        latency_ms=(time.time() - start_time) * 1000,
+                    )
+
+        except asyncio.CancelledError:
+            if request_id is None and submit is not None:
+                try:
+                    request_id = await submit
+                except (urllib.error.URLError, OSError, ValueError):
+                    request_id = None
+            if request_id is not None:
+                try:
+                    await self._in_thread(self._cancel, request_id)
+                except (urllib.error.URLError, OSError, ValueError):
+                    pass
+            raise
+        except (urllib.error.URLError, OSError, ValueError) as e:
+            return TaskOutcome(
+                False,
+                error=f"Gateway error: {e}",
+                latency_ms=(time.time() - start_time) * 1000,
+            )
+
+        latency_ms = reply.get("latency_ms") or (time.time() - start_time) * 1000
+        status = reply.get("status")
+        if status == "completed":
+            return TaskOutcome(True, output=reply.get("response") or "", latency_ms=latency_ms)
+        if status == "cancelled":
+            return TaskOutcome(False, error="Cancelled", latency_ms=latency_ms, cancelled=True)
+        return TaskOutcome(False, error=reply.get("error") or f"Request {status}", latency_ms=latency_ms)
+
+    async def close(self) -> None:
+        self._executor.shutdown(wait=False)
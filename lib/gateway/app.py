@@ -140,6 +140,9 @@ def create_app(
     _include_router_if_available(app, export_routes.router, tags=["export"])
     _include_router_if_available(app, cc_switch_routes.router, tags=["cc-switch"])
 
+    # Middleware registered last runs first: auth is registered before rate
+    # limiting so requests with missing or invalid keys are throttled per IP
+    # before they are rejected (rate limiting resolves keys itself)
     if auth_middleware and config.auth.enabled:
 
         @app.middleware("http")
@@ -149,7 +152,11 @@ def create_app(
     if rate_limiter and config.rate_limit.enabled:
         from .rate_limiter import RateLimitMiddleware
 
-        rate_limit_middleware = RateLimitMiddleware(rate_limiter)
+        rate_limit_middleware = RateLimitMiddleware(
+            rate_limiter,
+            key_store=api_key_store,
+            header_name=config.auth.header_name,
+        )
 
         @app.middleware("http")
         async def rate_limit_middleware_handler(request: Request, call_next):
@@ -5,11 +5,17 @@ Provides API key authentication and management.
 """
 from __future__ import annotations
 
+import asyncio
 import hashlib
 import secrets
+import sqlite3
+import threading
 import time
-from dataclasses import dataclass, field
-from typing import Optional, Dict, Any, List, Callable, Awaitable
+from collections import OrderedDict
+from dataclasses import dataclass, field, replace
+from typing import Optional, Dict, Any, List, Callable, Awaitable, Tuple
+
+from lib.common.logging import get_logger
 
 try:
     from fastapi import Request
@@ -18,6 +24,8 @@ try:
 except ImportError:
     HAS_FASTAPI = False
 
+logger = get_logger("gateway.auth")
+
 
 @dataclass
 class AuthConfig:
@@ -33,6 +41,8 @@ class AuthConfig:
         "/docs",
         "/openapi.json",
     ])
+    key_cache_ttl_s: float = 30.0  # How long a verified (or rejected) key is trusted
+    last_used_flush_s: float = 30.0  # How often coalesced last_used_at updates are written
 
 
 @dataclass
@@ -82,16 +92,43 @@ def hash_api_key(raw_key: str) -> str:
 class APIKeyStore:
     """
     Manages API keys with SQLite persistence.
+
+    Verified keys are cached in memory by hash for ``cache_ttl_s``, and
+    ``last_used_at`` updates are coalesced per key and written in one
+    batch every ``flush_interval_s``, so steady-state authentication
+    does not touch the database. Key mutations invalidate the cache.
     """
 
-    def __init__(self, store):
+    def __init__(
+        self,
+        store,
+        cache_ttl_s: float = 30.0,
+        flush_interval_s: float = 30.0,
+        max_cached_keys: int = 1024,
+    ):
         """
         Initialize the API key store.
 
         Args:
             store: StateStore instance for persistence
+            cache_ttl_s: Seconds a validation result is cached (0 = no cache)
+            flush_interval_s: Seconds between last_used_at flushes
+            max_cached_keys: Maximum cached validation results (LRU)
         """
         self.store = store
+        self.cache_ttl_s = cache_ttl_s
+        self.flush_interval_s = flush_interval_s
+        self.max_cached_keys = max_cached_keys
+
+        self._lock = threading.Lock()
+        # key_hash -> (APIKey or None for rejected keys, expires_at)
+        self._cache: "OrderedDict[str, Tuple[Optional[APIKey], float]]" = OrderedDict()
+        self._pending_last_used: Dict[str, float] = {}
+        self._last_flush = time.time()
+        self._flush_task: Optional[asyncio.Task] = None
+        self.cache_hits = 0
+        self.cache_misses = 0
+
         self._init_table()
 
     def _init_table(self) -> None:
@@ -160,6 +197,8 @@ class APIKeyStore:
                 json.dumps(api_key.metadata) if api_key.metadata else None,
             ))
 
+        with self._lock:
+            self._cache.pop(key_hash, None)
         return api_key, raw_key
 
     def validate_key(self, raw_key: str) -> Optional[APIKey]:
@@ -172,37 +211,161 @@ class APIKeyStore:
         Returns:
             APIKey if valid and enabled, None otherwise
         """
-        import json
+        key_hash = hash_api_key(raw_key)
+        now = time.time()
 
+        with self._lock:
+            cached = self._cache.get(key_hash)
+            if cached is not None and cached[1] > now:
+                self._cache.move_to_end(key_hash)
+                self.cache_hits += 1
+                api_key = cached[0]
+                if api_key is not None:
+                    api_key.last_used_at = now
+                    self._pending_last_used[api_key.key_id] = now
+            else:
+                cached = None
+                self.cache_misses += 1
+
+        if cached is None:
+            api_key = self._load_enabled_key(key_hash)
+            if api_key is not None:
+                api_key.last_used_at = now
+            with self._lock:
+                if self.cache_ttl_s > 0:
+                    self._cache[key_hash] = (api_key, now + self.cache_ttl_s)
+                    self._cache.move_to_end(key_hash)
+                    while len(self._cache) > self.max_cached_keys:
+                        self._cache.popitem(last=False)
+                if api_key is not None:
+                    self._pending_last_used[api_key.key_id] = now
+
+        # Without a running flush loop, flush inline once the interval passed
+        if self._flush_task is None and now - self._last_flush >= self.flush_interval_s:
+            self.flush_last_used()
+
+        # Callers get their own copy; the cached entry stays authoritative
+        return replace(api_key) if api_key is not None else None
+
+    def get_cached_key(self, raw_key: str) -> Optional[APIKey]:
+        """
+        Return the APIKey of a key whose verification is cached.
+
+        Never touches the database. Returns None for keys that are not
+        cached, expired, or were rejected.
+        """
         key_hash = hash_api_key(raw_key)
+        with self._lock:
+            cached = self._cache.get(key_hash)
+            if cached is None or cached[1] <= time.time() or cached[0] is None:
+                return None
+            return replace(cached[0])
+
+    def _load_enabled_key(self, key_hash: str) -> Optional[APIKey]:
+        """Read an enabled key by hash (no writes)."""
+        import json
 
         with self.store._get_connection() as conn:
-            cursor = conn.execute(
+            row = conn.execute(
                 "SELECT * FROM api_keys WHERE key_hash = ? AND enabled = 1",
                 (key_hash,)
-            )
-            row = cursor.fetchone()
+            ).fetchone()
+
+        if not row:
+            return None
+        return APIKey(
+            key_id=row["key_id"],
+            key_hash=row["key_hash"],
+            name=row["name"],
+            created_at=row["created_at"],
+            last_used_at=row["last_used_at"],
+            rate_limit_rpm=row["rate_limit_rpm"],
+            enabled=bool(row["enabled"]),
+            metadata=json.loads(row["metadata"]) if row["metadata"] else None,
+        )
 
-            if not row:
-                return None
+    def invalidate(self, key_id: Optional[str] = None) -> None:
+        """
+        Drop cached validation results.
 
-            # Update last_used_at
-            now = time.time()
-            conn.execute(
-                "UPDATE api_keys SET last_used_at = ? WHERE key_id = ?",
-                (now, row["key_id"])
-            )
+        Args:
+            key_id: Only drop this key's entry (plus cached rejections,
+                which a re-enabled key may match); None clears everything
+        """
+        with self._lock:
+            if key_id is None:
+                self._cache.clear()
+                return
+            for key_hash, (api_key, _) in list(self._cache.items()):
+                if api_key is None or api_key.key_id == key_id:
+                    del self._cache[key_hash]
+
+    def flush_last_used(self) -> int:
+        """
+        Write coalesced last_used_at updates in one transaction.
 
-            return APIKey(
-                key_id=row["key_id"],
-                key_hash=row["key_hash"],
-                name=row["name"],
-                created_at=row["created_at"],
-                last_used_at=now,
-                rate_limit_rpm=row["rate_limit_rpm"],
-                enabled=bool(row["enabled"]),
-                metadata=json.loads(row["metadata"]) if row["metadata"] else None,
-            )
+        Returns:
+            Number of keys updated
+        """
+        with self._lock:
+            pending, self._pending_last_used = self._pending_last_used, {}
+            self._last_flush = time.time()
+        if not pending:
+            return 0
+
+        try:
+            with self.store._get_connection() as conn:
+                conn.executemany(
+                    "UPDATE api_keys SET last_used_at = ? WHERE key_id = ?",
+                    [(used_at, key_id) for key_id, used_at in pending.items()],
+                )
+        except (sqlite3.Error, RuntimeError, ValueError, TypeError, KeyError, AttributeError, OSError):
+            logger.exception("Failed to flush API key last_used_at")
+            with self._lock:
+                for key_id, used_at in pending.items():
+                    self._pending_last_used.setdefault(key_id, used_at)
+            return 0
+        return len(pending)
+
+    async def _flush_loop(self) -> None:
+        while True:
+            await asyncio.sleep(self.flush_interval_s)
+            await asyncio.to_thread(self.flush_last_used)
+
+    async def start(self) -> None:
+        """Start flushing last_used_at in the background."""
+        if self._flush_task is None:
+            self._flush_task = asyncio.create_task(self._flush_loop())
+
+    async def stop(self) -> None:
+        """Stop the background flush and write outstanding updates."""
+        task, self._flush_task = self._flush_task, None
+        if task is not None:
+            task.cancel()
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+        self.flush_last_used()
+
+    def _with_pending_last_used(self, api_key: APIKey) -> APIKey:
+        """Overlay a not-yet-flushed last_used_at."""
+        with self._lock:
+            pending = self._pending_last_used.get(api_key.key_id)
+        if pending is not None:
+            api_key.last_used_at = pending
+        return api_key
+
+    def cache_stats(self) -> Dict[str, Any]:
+        """Validation cache statistics."""
+        with self._lock:
+            return {
+                "cached_keys": len(self._cache),
+                "pending_last_used": len(self._pending_last_used),
+                "hits": self.cache_hits,
+                "misses": self.cache_misses,
+                "ttl_s": self.cache_ttl_s,
+            }
 
     def get_key(self, key_id: str) -> Optional[APIKey]:
         """Get an API key by ID."""
@@ -218,7 +381,7 @@ class APIKeyStore:
             if not row:
                 return None
 
-            return APIKey(
+            return self._with_pending_last_used(APIKey(
                 key_id=row["key_id"],
                 key_hash=row["key_hash"],
                 name=row["name"],
@@ -227,7 +390,7 @@ class APIKeyStore:
                 rate_limit_rpm=row["rate_limit_rpm"],
                 enabled=bool(row["enabled"]),
                 metadata=json.loads(row["metadata"]) if row["metadata"] else None,
-            )
+            ))
 
     def list_keys(self) -> List[APIKey]:
         """List all API keys."""
@@ -239,7 +402,7 @@ class APIKeyStore:
             )
             keys = []
             for row in cursor.fetchall():
-                keys.append(APIKey(
+                keys.append(self._with_pending_last_used(APIKey(
                     key_id=row["key_id"],
                     key_hash=row["key_hash"],
                     name=row["name"],
@@ -248,7 +411,7 @@ class APIKeyStore:
                     rate_limit_rpm=row["rate_limit_rpm"],
                     enabled=bool(row["enabled"]),
                     metadata=json.loads(row["metadata"]) if row["metadata"] else None,
-                ))
+                )))
             return keys
 
     def delete_key(self, key_id: str) -> bool:
@@ -258,7 +421,10 @@ class APIKeyStore:
                 "DELETE FROM api_keys WHERE key_id = ?",
                 (key_id,)
             )
-            return cursor.rowcount > 0
+        self.invalidate(key_id)
+        with self._lock:
+            self._pending_last_used.pop(key_id, None)
+        return cursor.rowcount > 0
 
     def disable_key(self, key_id: str) -> bool:
         """Disable an API key."""
@@ -267,7 +433,8 @@ class APIKeyStore:
                 "UPDATE api_keys SET enabled = 0 WHERE key_id = ?",
                 (key_id,)
             )
-            return cursor.rowcount > 0
+        self.invalidate(key_id)
+        return cursor.rowcount > 0
 
     def enable_key(self, key_id: str) -> bool:
         """Enable an API key."""
@@ -276,7 +443,8 @@ class APIKeyStore:
                 "UPDATE api_keys SET enabled = 1 WHERE key_id = ?",
                 (key_id,)
             )
-            return cursor.rowcount > 0
+        self.invalidate(key_id)
+        return cursor.rowcount > 0
 
 
 class AuthMiddleware:
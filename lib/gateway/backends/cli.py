@@ -6,10 +6,11 @@ Executes AI CLI tools as subprocesses (Codex, Gemini CLI, etc.)
 from __future__ import annotations
 
 import asyncio
+import contextlib
 import os
 import shutil
 import time
-from typing import Optional, List
+from typing import AsyncGenerator, Dict, Optional, List
 
 from lib.common.auth import (
     open_auth_terminal as _open_auth_terminal,
@@ -17,16 +18,23 @@ from lib.common.auth import (
 )
 from lib.common.errors import BackendError
 from lib.common.logging import get_logger
-from .extractors.cli_output import clean_cli_output, extract_thinking, process_cli_output
+from .extractors.cli_output import (
+    CLIEventStream,
+    clean_cli_output,
+    extract_thinking,
+    process_cli_output,
+)
 from .executors.cli_process import (
     execute_with_pty as _execute_with_pty_runner,
     execute_with_streaming as _execute_with_streaming_runner,
     execute_with_wezterm as _execute_with_wezterm_runner,
+    stream_process_lines,
 )
 from .base_backend import BaseBackend, BackendResult
 from ..models import GatewayRequest
 from ..gateway_config import ProviderConfig
 from ..stream_output import StreamOutput, get_stream_manager
+from ..streaming import StreamChunk
 
 logger = get_logger("gateway.backends.cli")
 
@@ -48,6 +56,7 @@ class CLIBackend(BaseBackend):
     def __init__(self, config: ProviderConfig):
         super().__init__(config)
         self._cli_path: Optional[str] = None
+        self._env: Optional[Dict[str, str]] = None
 
     async def _ensure_gemini_token(self) -> None:
         """Ensure Gemini OAuth token is valid, refresh if needed."""
@@ -98,6 +107,16 @@ class CLIBackend(BaseBackend):
 
         return None
 
+    def _cli_env(self) -> Dict[str, str]:
+        """Environment for non-interactive execution (built once per backend)."""
+        if self._env is None:
+            env = os.environ.copy()
+            env["TERM"] = "dumb"
+            env["NO_COLOR"] = "1"
+            env["CI"] = "1"  # Many CLIs detect CI mode and disable interactivity
+            self._env = env
+        return self._env
+
     def _build_command(self, message: str) -> List[str]:
         """Build the command line arguments."""
         cli = self._find_cli()
@@ -153,10 +172,7 @@ class CLIBackend(BaseBackend):
             stream.status(f"Executing: {' '.join(cmd[:2])}...")
 
             # Set up environment for non-interactive execution
-            env = os.environ.copy()
-            env["TERM"] = "dumb"
-            env["NO_COLOR"] = "1"
-            env["CI"] = "1"  # Many CLIs detect CI mode and disable interactivity
+            env = self._cli_env()
             cwd = self._resolve_cwd()
             if cwd and not os.path.isdir(cwd):
                 stream.status(f"Configured cwd not found: {cwd}, using default")
@@ -245,6 +261,10 @@ class CLIBackend(BaseBackend):
                     process.communicate(),
                     timeout=request.timeout_s or self.config.timeout_s,
                 )
+            except asyncio.CancelledError:
+                process.kill()
+                await process.wait()
+                raise
             except asyncio.TimeoutError:
                 process.kill()
                 await process.wait()
@@ -295,6 +315,149 @@ class CLIBackend(BaseBackend):
                 error_msg,
                 latency_ms=(time.time() - start_time) * 1000,
             )
+        finally:
+            # No-op after complete(); releases the log file and flusher
+            # registration when the request was cancelled
+            stream.close()
+
+    async def execute_stream(
+        self,
+        request: GatewayRequest,
+    ) -> AsyncGenerator[StreamChunk, None]:
+        """
+        Execute request and yield response chunks as the CLI produces them.
+
+        JSON event output (Codex ``item.completed``, OpenCode ``text``
+        parts) is parsed line by line and every text event is yielded as
+        soon as it is read. Output without text events is cleaned as a
+        whole once the process exits. The final chunk carries the token
+        estimate, or ``metadata["error"]`` on failure.
+        """
+        if self._uses_terminal_mode():
+            # PTY/WezTerm capture only returns once the CLI has finished
+            result = await self.execute(request)
+            async for chunk in self._result_chunks(request, result, 0):
+                yield chunk
+            return
+
+        start_time = time.time()
+        timeout = request.timeout_s or self.config.timeout_s
+        stream = get_stream_manager().create_stream(request.id, self.config.name)
+        stream.status(f"Starting {self.config.name} CLI execution")
+
+        if not self._find_cli():
+            result = BackendResult.fail(f"CLI command not found: {self.config.cli_command}")
+            stream.error(result.error)
+            stream.complete(error=result.error)
+            async for chunk in self._result_chunks(request, result, 0):
+                yield chunk
+            return
+
+        events = CLIEventStream()
+        stderr_lines: List[str] = []
+        chunk_index = 0
+        result: Optional[BackendResult] = None
+        try:
+            if self.config.name == "gemini":
+                await self._ensure_gemini_token()
+
+            cmd = self._build_command(request.message)
+            cwd = self._resolve_cwd()
+            if cwd and not os.path.isdir(cwd):
+                cwd = None
+            stream.status(f"Executing: {' '.join(cmd[:2])}...")
+
+            # aclosing() kills the CLI as soon as the loop exits, including when
+            # the consumer stops iterating, instead of at garbage collection
+            lines = stream_process_lines(cmd, self._cli_env(), timeout, cwd)
+            async with contextlib.aclosing(lines):
+                async for source, line in lines:
+                    if source == "stderr":
+                        stderr_lines.append(line)
+                        stream.chunk(line + "\n", source="stderr")
+                        continue
+                    if source == "timeout":
+                        result = BackendResult.fail(
+                            f"CLI command timed out after {timeout}s",
+                            latency_ms=(time.time() - start_time) * 1000,
+                        )
+                        break
+                    if source == "exit":
+                        result = self._process_output(
+                            events.output,
+                            "\n".join(stderr_lines),
+                            int(line),
+                            (time.time() - start_time) * 1000,
+                            request.message,
+                        )
+                        break
+
+                    stream.chunk(line + "\n", source="stdout")
+                    delta, thinking = events.feed(line)
+                    if thinking:
+                        stream.thinking(thinking)
+                    if delta:
+                        yield StreamChunk(
+                            request_id=request.id,
+                            content=delta,
+                            chunk_index=chunk_index,
+                            provider=self.config.name,
+                        )
+                        chunk_index += 1
+
+        except (RuntimeError, ValueError, TypeError, KeyError, AttributeError, OSError) as exc:
+            logger.exception("CLI streaming error for %s", self.config.name)
+            result = BackendResult.fail(
+                str(BackendError(f"Unexpected backend error: {exc}")),
+                latency_ms=(time.time() - start_time) * 1000,
+            )
+        finally:
+            if result is None:
+                # Client went away before the CLI finished
+                stream.complete(error="Stream cancelled")
+
+        if result.success:
+            stream.complete(response=result.response)
+        else:
+            stream.error(result.error or "Unknown error")
+            stream.complete(error=result.error)
+
+        async for chunk in self._result_chunks(request, result, chunk_index, streamed=events.has_text):
+            yield chunk
+
+    async def _result_chunks(
+        self,
+        request: GatewayRequest,
+        result: BackendResult,
+        chunk_index: int,
+        streamed: bool = False,
+    ) -> AsyncGenerator[StreamChunk, None]:
+        """Yield the rest of ``result`` (unless already streamed) and the final chunk."""
+        if result.success and result.response and not streamed:
+            yield StreamChunk(
+                request_id=request.id,
+                content=result.response,
+                chunk_index=chunk_index,
+                provider=self.config.name,
+            )
+            chunk_index += 1
+        yield StreamChunk(
+            request_id=request.id,
+            content="",
+            chunk_index=chunk_index,
+            is_final=True,
+            tokens_used=result.tokens_used,
+            provider=self.config.name,
+            metadata=None if result.success else {"error": result.error or "Unknown error"},
+        )
+
+    def _uses_terminal_mode(self) -> bool:
+        """Whether execution goes through PTY or WezTerm capture."""
+        if os.environ.get("CCB_CLI_USE_PTY", "0").lower() in ("1", "true", "yes"):
+            return True
+        return self.config.name == "gemini" and os.environ.get(
+            "CCB_GEMINI_USE_WEZTERM", "0"
+        ).lower() in ("1", "true", "yes")
 
     async def _execute_with_streaming(
         self, cmd: List[str], env: dict, timeout: float, stream: StreamOutput, cwd: Optional[str]
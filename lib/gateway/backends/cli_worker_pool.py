@@ -0,0 +1,261 @@
+"""Pool of warm interactive CLI processes for one provider."""
+
+from __future__ import annotations
+
+import asyncio
+import os
+import time
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, List, Optional
+
+from lib.common.logging import get_logger
+
+try:
+    import psutil
+
+    HAS_PSUTIL = True
+except ImportError:  # pragma: no cover - optional dependency
+    psutil = None
+    HAS_PSUTIL = False
+
+
+logger = get_logger("gateway.backends.cli_pool")
+
+SpawnFunc = Callable[[], Awaitable[asyncio.subprocess.Process]]
+
+
+def _process_rss_mb(pid: int) -> Optional[float]:
+    """Resident memory of a process in MiB, or None if unavailable."""
+    if HAS_PSUTIL:
+        try:
+            return psutil.Process(pid).memory_info().rss / (1024 * 1024)
+        except (psutil.Error, OSError):
+            return None
+    try:
+        with open(f"/proc/{pid}/statm", "r", encoding="ascii") as f:
+            pages = int(f.read().split()[1])
+        return pages * os.sysconf("SC_PAGE_SIZE") / (1024 * 1024)
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+class CLIWorker:
+    """One long-lived interactive CLI process."""
+
+    def __init__(self, process: asyncio.subprocess.Process, worker_id: int):
+        self.process = process
+        self.worker_id = worker_id
+        self.started_at = time.time()
+        self.requests_served = 0
+        self.baseline_rss_mb: Optional[float] = None
+        self.busy = False
+
+    @property
+    def alive(self) -> bool:
+        return self.process.returncode is None
+
+    def rss_mb(self) -> Optional[float]:
+        return _process_rss_mb(self.process.pid)
+
+    async def terminate(self, timeout: float = 5.0) -> None:
+        """Stop the process, killing it if it does not exit in time."""
+        if not self.alive:
+            return
+        try:
+            self.process.terminate()
+            await asyncio.wait_for(self.process.wait(), timeout=timeout)
+        except asyncio.TimeoutError:
+            self.process.kill()
+            await self.process.wait()
+        except ProcessLookupError:
+            pass
+
+
+class CLIWorkerPool:
+    """
+    Keeps ``size`` interactive CLI workers warm and hands them out in FIFO order.
+
+    Idle workers sit in an ``asyncio.Queue``, so callers waiting for a
+    worker are served in arrival order. A worker is recycled (terminated
+    and replaced in the background) after ``max_requests`` requests, when
+    its RSS grew by more than ``max_rss_growth_mb`` since it started, when
+    it died, or when the caller reports it as unusable (e.g. a timeout left
+    a half-read response in its pipe). A health loop replaces idle workers
+    that exited.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        spawn: SpawnFunc,
+        size: int = 2,
+        max_requests: int = 100,
+        max_rss_growth_mb: Optional[float] = 512.0,
+        health_check_interval_s: float = 30.0,
+    ):
+        """
+        Initialize the pool (workers start lazily on first use).
+
+        Args:
+            name: Provider name, for logging
+            spawn: Coroutine factory starting one interactive process
+            size: Number of warm workers
+            max_requests: Requests served before a worker is recycled
+            max_rss_growth_mb: RSS growth that triggers recycling (None = off)
+            health_check_interval_s: Period of the idle-worker health check
+        """
+        self.name = name
+        self.size = max(1, size)
+        self.max_requests = max_requests
+        self.max_rss_growth_mb = max_rss_growth_mb
+        self.health_check_interval_s = health_check_interval_s
+
+        self._spawn = spawn
+        self._idle: Optional[asyncio.Queue] = None
+        self._workers: Dict[int, CLIWorker] = {}
+        self._next_id = 0
+        self._start_lock: Optional[asyncio.Lock] = None
+        self._started = False
+        self._closed = False
+        self._health_task: Optional[asyncio.Task] = None
+        self._pending_spawns: List[asyncio.Task] = []
+
+        self.recycled = 0
+        self.spawn_failures = 0
+
+    async def start(self) -> None:
+        """Spawn the initial workers (idempotent)."""
+        if self._start_lock is None:
+            self._start_lock = asyncio.Lock()
+        async with self._start_lock:
+            if self._started:
+                return
+            self._idle = asyncio.Queue()
+            results = await asyncio.gather(
+                *(self._spawn_worker() for _ in range(self.size)), return_exceptions=True
+            )
+            if not any(isinstance(r, CLIWorker) for r in results):
+                errors = [r for r in results if isinstance(r, BaseException)]
+                raise RuntimeError(f"Could not start any {self.name} CLI worker: {errors[:1]}")
+            self._started = True
+            self._health_task = asyncio.create_task(self._health_loop())
+
+    @asynccontextmanager
+    async def acquire(self, timeout: Optional[float] = None) -> AsyncIterator[CLIWorker]:
+        """
+        Borrow a worker for one request.
+
+        Raise ``asyncio.TimeoutError`` if none frees up within ``timeout``.
+        Call ``discard(worker)`` inside the block if the worker must not be
+        reused.
+        """
+        if self._closed:
+            raise RuntimeError(f"{self.name} CLI worker pool is shut down")
+        await self.start()
+        worker = await asyncio.wait_for(self._idle.get(), timeout)
+        while not worker.alive:
+            if worker.worker_id in self._workers:
+                self._retire(worker)
+            worker = await asyncio.wait_for(self._idle.get(), timeout)
+        worker.busy = True
+        try:
+            yield worker
+        finally:
+            worker.busy = False
+            worker.requests_served += 1
+            self._release(worker)
+
+    def discard(self, worker: CLIWorker) -> None:
+        """Mark a borrowed worker for recycling when it is released."""
+        worker.requests_served = max(worker.requests_served, self.max_requests)
+
+    def _release(self, worker: CLIWorker) -> None:
+        if self._closed:
+            asyncio.ensure_future(worker.terminate())
+            return
+        if self._should_recycle(worker):
+            self._retire(worker)
+        else:
+            self._idle.put_nowait(worker)
+
+    def _should_recycle(self, worker: CLIWorker) -> bool:
+        if not worker.alive or worker.requests_served >= self.max_requests:
+            return True
+        if self.max_rss_growth_mb is not None and worker.baseline_rss_mb is not None:
+            rss = worker.rss_mb()
+            if rss is not None and rss - worker.baseline_rss_mb > self.max_rss_growth_mb:
+                logger.info(
+                    "Recycling %s worker %s: RSS grew to %.0f MiB",
+                    self.name, worker.worker_id, rss,
+                )
+                return True
+        return False
+
+    def _retire(self, worker: CLIWorker) -> None:
+        """Drop a worker and spawn its replacement in the background."""
+        self._workers.pop(worker.worker_id, None)
+        self.recycled += 1
+        asyncio.ensure_future(worker.terminate())
+        if not self._closed:
+            task = asyncio.ensure_future(self._replace())
+            self._pending_spawns.append(task)
+            task.add_done_callback(self._pending_spawns.remove)
+
+    async def _replace(self) -> None:
+        delay = 0.5
+        while not self._closed:
+            try:
+                worker = await self._spawn_worker()
+                if self._closed:
+                    await worker.terminate()
+                return
+            except (RuntimeError, ValueError, TypeError, KeyError, AttributeError, OSError) as e:
+                self.spawn_failures += 1
+                logger.warning("Failed to respawn %s CLI worker: %s", self.name, e)
+                await asyncio.sleep(delay)
+                delay = min(delay * 2, 30.0)
+
+    async def _spawn_worker(self) -> CLIWorker:
+        process = await self._spawn()
+        self._next_id += 1
+        worker = CLIWorker(process, self._next_id)
+        worker.baseline_rss_mb = worker.rss_mb()
+        self._workers[worker.worker_id] = worker
+        self._idle.put_nowait(worker)
+        return worker
+
+    async def _health_loop(self) -> None:
+        """Replace idle workers whose process exited."""
+        while not self._closed:
+            await asyncio.sleep(self.health_check_interval_s)
+            for worker in list(self._workers.values()):
+                if not worker.busy and not worker.alive:
+                    logger.warning(
+                        "%s CLI worker %s exited with %s, replacing",
+                        self.name, worker.worker_id, worker.process.returncode,
+                    )
+                    # Stays in the idle queue; acquire() skips dead workers
+                    self._retire(worker)
+
+    async def shutdown(self) -> None:
+        """Terminate all workers."""
+        self._closed = True
+        if self._health_task is not None:
+            self._health_task.cancel()
+        for task in list(self._pending_spawns):
+            task.cancel()
+        workers = list(self._workers.values())
+        self._workers.clear()
+        await asyncio.gather(*(w.terminate() for w in workers), return_exceptions=True)
+
+    def stats(self) -> Dict[str, Any]:
+        """Pool statistics."""
+        return {
+            "size": self.size,
+            "workers": len(self._workers),
+            "idle": self._idle.qsize() if self._idle is not None else 0,
+            "busy": sum(1 for w in self._workers.values() if w.busy),
+            "recycled": self.recycled,
+            "spawn_failures": self.spawn_failures,
+            "max_requests": self.max_requests,
+        }
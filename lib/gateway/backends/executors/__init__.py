@@ -1,6 +1,11 @@
 """Execution helpers for backend transports and request flows."""
 
-from .cli_process import execute_with_pty, execute_with_streaming, execute_with_wezterm
+from .cli_process import (
+    execute_with_pty,
+    execute_with_streaming,
+    execute_with_wezterm,
+    stream_process_lines,
+)
 from .http_request import (
     execute_anthropic_request,
     execute_gemini_request,
@@ -12,6 +17,7 @@ __all__ = [
     "execute_with_streaming",
     "execute_with_wezterm",
     "execute_with_pty",
+    "stream_process_lines",
     "execute_anthropic_request",
     "execute_gemini_request",
     "execute_openai_compatible_request",
@@ -5,14 +5,22 @@ from __future__ import annotations
 import asyncio
 import os
 import re
+import signal
 import subprocess
 import time
 import uuid
 from logging import Logger
-from typing import List, Optional
+from typing import AsyncIterator, List, Optional, Tuple
+
+from lib.common.logging import get_logger
 
 from ...stream_output import StreamOutput
 
+logger = get_logger("gateway.backends.cli_process")
+
+# Longest single output line (JSON events can carry a whole message)
+_LINE_LIMIT = 16 * 1024 * 1024
+
 
 async def execute_with_streaming(
     cmd: List[str],
@@ -64,10 +72,16 @@ async def execute_with_streaming(
                     continue
 
         # Read both streams concurrently
-        await asyncio.gather(
-            read_stream(process.stdout, stdout_parts, "stdout"),
-            read_stream(process.stderr, stderr_parts, "stderr"),
-        )
+        try:
+            await asyncio.gather(
+                read_stream(process.stdout, stdout_parts, "stdout"),
+                read_stream(process.stderr, stderr_parts, "stderr"),
+            )
+        except asyncio.CancelledError:
+            # Request cancelled: don't leave the CLI running
+            process.kill()
+            await process.wait()
+            raise
 
         # Flush remaining buffer
         if chunk_buffer:
@@ -88,6 +102,92 @@ async def execute_with_streaming(
         return None
 
 
+async def stream_process_lines(
+    cmd: List[str],
+    env: dict,
+    timeout: float,
+    cwd: Optional[str],
+) -> AsyncIterator[Tuple[str, str]]:
+    """
+    Run a command and yield its output line by line as it is produced.
+
+    Yields ``("stdout", line)`` and ``("stderr", line)`` items (without the
+    trailing newline), then a final ``("exit", "<returncode>")``, or
+    ``("timeout", "")`` once ``timeout`` elapsed. The process group is
+    killed when the generator finishes or is closed early.
+    """
+    process = await asyncio.create_subprocess_exec(
+        *cmd,
+        stdout=asyncio.subprocess.PIPE,
+        stderr=asyncio.subprocess.PIPE,
+        stdin=asyncio.subprocess.DEVNULL,
+        env=env,
+        cwd=cwd,
+        limit=_LINE_LIMIT,
+        # Own process group, so helpers the CLI spawned die with it
+        start_new_session=True,
+    )
+    lines: asyncio.Queue = asyncio.Queue()
+
+    async def pump(reader: asyncio.StreamReader, source: str) -> None:
+        try:
+            while True:
+                try:
+                    line = await reader.readline()
+                except ValueError as exc:
+                    # LimitOverrunError, re-raised by readline() after it
+                    # discarded the buffered part of the overlong line
+                    logger.warning(
+                        "Dropped %s line over %d bytes from %s: %s",
+                        source, _LINE_LIMIT, os.path.basename(cmd[0]), exc,
+                    )
+                    continue
+                if not line:
+                    break
+                await lines.put((source, line.decode("utf-8", errors="replace").rstrip("\r\n")))
+        finally:
+            await lines.put((source, None))
+
+    readers = [
+        asyncio.ensure_future(pump(process.stdout, "stdout")),
+        asyncio.ensure_future(pump(process.stderr, "stderr")),
+    ]
+    deadline = time.monotonic() + timeout
+    try:
+        open_streams = len(readers)
+        while open_streams:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                yield "timeout", ""
+                return
+            try:
+                source, line = await asyncio.wait_for(lines.get(), timeout=remaining)
+            except asyncio.TimeoutError:
+                continue
+            if line is None:
+                open_streams -= 1
+                continue
+            yield source, line
+
+        try:
+            await asyncio.wait_for(process.wait(), timeout=max(0.1, deadline - time.monotonic()))
+        except asyncio.TimeoutError:
+            yield "timeout", ""
+            return
+        yield "exit", str(process.returncode or 0)
+    finally:
+        for task in readers:
+            task.cancel()
+        try:
+            os.killpg(process.pid, signal.SIGKILL)
+        except (ProcessLookupError, PermissionError):
+            pass
+        try:
+            await asyncio.wait_for(process.wait(), timeout=5.0)
+        except asyncio.TimeoutError:
+            pass
+
+
 async def execute_with_wezterm(
     cmd: List[str],
     timeout: float,
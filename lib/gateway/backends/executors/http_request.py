@@ -14,6 +14,7 @@ ExtractFn = Callable[[str, Dict[str, Any]], Tuple[str, Optional[int]]]
 async def execute_anthropic_request(
     *,
     session,
+    timeout,
     request: GatewayRequest,
     api_key: str,
     api_base_url: str,
@@ -36,7 +37,7 @@ async def execute_anthropic_request(
         "messages": [{"role": "user", "content": request.message}],
     }
 
-    async with session.post(url, json=payload, headers=headers) as resp:
+    async with session.post(url, json=payload, headers=headers, timeout=timeout) as resp:
         if resp.status != 200:
             error_text = await resp.text()
             return BackendResult.fail(f"API error {resp.status}: {error_text}")
@@ -54,6 +55,7 @@ async def execute_anthropic_request(
 async def execute_gemini_request(
     *,
     session,
+    timeout,
     request: GatewayRequest,
     api_key: str,
     api_base_url: str,
@@ -76,7 +78,7 @@ async def execute_gemini_request(
         },
     }
 
-    async with session.post(url, json=payload, headers=headers) as resp:
+    async with session.post(url, json=payload, headers=headers, timeout=timeout) as resp:
         if resp.status != 200:
             error_text = await resp.text()
             return BackendResult.fail(f"Gemini API error {resp.status}: {error_text}")
@@ -98,6 +100,7 @@ async def execute_gemini_request(
 async def execute_openai_compatible_request(
     *,
     session,
+    timeout,
     request: GatewayRequest,
     api_key: str,
     api_base_url: str,
@@ -119,7 +122,7 @@ async def execute_openai_compatible_request(
         "messages": [{"role": "user", "content": request.message}],
     }
 
-    async with session.post(url, json=payload, headers=headers) as resp:
+    async with session.post(url, json=payload, headers=headers, timeout=timeout) as resp:
         if resp.status != 200:
             error_text = await resp.text()
             return BackendResult.fail(f"API error {resp.status}: {error_text}")
@@ -18,12 +18,10 @@ async def stream_anthropic_response(
     api_base_url: str,
     model: str,
     max_tokens: int,
-    timeout_s: float,
+    timeout,
     provider_name: str,
 ) -> AsyncGenerator[StreamChunk, None]:
     """Stream response from Anthropic Messages API."""
-    import aiohttp
-
     url = f"{api_base_url}/messages"
 
     headers = {
@@ -42,8 +40,6 @@ async def stream_anthropic_response(
     chunk_index = 0
     total_tokens = 0
 
-    timeout = aiohttp.ClientTimeout(total=timeout_s)
-
     async with session.post(url, json=payload, headers=headers, timeout=timeout) as resp:
         if resp.status != 200:
             error_text = await resp.text()
@@ -121,12 +117,10 @@ async def stream_openai_compatible_response(
     api_base_url: str,
     model: str,
     max_tokens: int,
-    timeout_s: float,
+    timeout,
     provider_name: str,
 ) -> AsyncGenerator[StreamChunk, None]:
     """Stream response from OpenAI-compatible chat completion API."""
-    import aiohttp
-
     url = f"{api_base_url}/chat/completions"
 
     headers = {
@@ -144,8 +138,6 @@ async def stream_openai_compatible_response(
     chunk_index = 0
     total_tokens = 0
 
-    timeout = aiohttp.ClientTimeout(total=timeout_s)
-
     async with session.post(url, json=payload, headers=headers, timeout=timeout) as resp:
         if resp.status != 200:
             error_text = await resp.text()
@@ -4,7 +4,7 @@ from __future__ import annotations
 
 import json
 import re
-from typing import Optional, Tuple
+from typing import List, Optional, Tuple
 
 from lib.common.auth import (
     extract_auth_url,
@@ -67,6 +67,88 @@ def extract_thinking(text: str) -> Tuple[str, Optional[str]]:
     return cleaned_text.strip(), thinking
 
 
+def parse_cli_event(line: str) -> Optional[Tuple[str, str]]:
+    """
+    Classify one line of a CLI's JSON event output.
+
+    Recognizes Codex ``item.completed`` items and OpenCode ``text``/
+    ``thinking`` events.
+
+    Returns:
+        ``("text", text)`` or ``("thinking", text)`` for content events,
+        ``("", "")`` for any other JSON object, None for non-JSON lines
+    """
+    line = line.strip()
+    if not line.startswith("{"):
+        return None
+    try:
+        data = json.loads(line)
+    except json.JSONDecodeError:
+        return None
+    if not isinstance(data, dict):
+        return None
+
+    event_type = data.get("type")
+    if event_type == "item.completed":
+        item = data.get("item", {})
+        if item.get("type") == "agent_message":
+            return "text", item.get("text", "")
+        if item.get("type") == "thinking":
+            return "thinking", item.get("text", "")
+    elif event_type == "thinking":
+        return "thinking", data.get("text", "")
+    elif event_type == "text":
+        part = data.get("part", {})
+        if part.get("type") in ("text", "thinking") and part.get("text"):
+            return part["type"], part["text"]
+    return "", ""
+
+
+class CLIEventStream:
+    """
+    Incremental counterpart of ``clean_cli_output`` for line-by-line output.
+
+    ``feed`` each output line as it is read; text events come back as
+    deltas whose concatenation equals the response ``clean_cli_output``
+    would extract from the whole output.
+    """
+
+    def __init__(self) -> None:
+        self.lines: List[str] = []
+        self.text_parts: List[str] = []
+        self.thinking_parts: List[str] = []
+
+    def feed(self, line: str) -> Tuple[Optional[str], Optional[str]]:
+        """
+        Consume one output line.
+
+        Returns:
+            Tuple of (text delta, thinking text), either None if absent
+        """
+        self.lines.append(line)
+        event = parse_cli_event(line)
+        if event is None:
+            return None, None
+        kind, text = event
+        if kind == "text":
+            delta = text if not self.text_parts else "\n" + text
+            self.text_parts.append(text)
+            return delta, None
+        if kind == "thinking":
+            self.thinking_parts.append(text)
+            return None, text
+        return None, None
+
+    @property
+    def has_text(self) -> bool:
+        """Whether any text event was seen (otherwise clean the full output)."""
+        return bool(self.text_parts)
+
+    @property
+    def output(self) -> str:
+        return "\n".join(self.lines)
+
+
 def clean_cli_output(output: str, provider_name: str) -> Tuple[str, Optional[str]]:
     """Clean raw CLI output and optionally extract reasoning content."""
     if provider_name == "qoder":
@@ -86,39 +168,18 @@ def clean_cli_output(output: str, provider_name: str) -> Tuple[str, Optional[str
             cleaned_lines.append(line)
         return "\n".join(cleaned_lines).strip(), None
 
-    lines = output.strip().split("\n")
     text_parts = []
     thinking_parts = []
 
-    for line in lines:
-        line = line.strip()
-        if not line:
+    for line in output.strip().split("\n"):
+        event = parse_cli_event(line)
+        if event is None:
             continue
-
-        try:
-            data = json.loads(line)
-        except json.JSONDecodeError:
-            continue
-
-        if not isinstance(data, dict):
-            continue
-
-        if data.get("type") == "item.completed":
-            item = data.get("item", {})
-            if item.get("type") == "agent_message":
-                text_parts.append(item.get("text", ""))
-            elif item.get("type") == "thinking":
-                thinking_parts.append(item.get("text", ""))
-
-        if data.get("type") == "thinking":
-            thinking_parts.append(data.get("text", ""))
-
-        if data.get("type") == "text":
-            part = data.get("part", {})
-            if part.get("type") == "text" and part.get("text"):
-                text_parts.append(part.get("text"))
-            elif part.get("type") == "thinking" and part.get("text"):
-                thinking_parts.append(part.get("text"))
+        kind, text = event
+        if kind == "text":
+            text_parts.append(text)
+        elif kind == "thinking":
+            thinking_parts.append(text)
 
     if text_parts:
         response = "\n".join(text_parts)
@@ -14,6 +14,7 @@ from lib.common.errors import BackendError
 from lib.common.logging import get_logger
 from .base_backend import BaseBackend, BackendResult
 from ..gateway_config import ProviderConfig
+from ..http_client import get_http_client
 from ..models import GatewayRequest
 from ..streaming import StreamChunk
 from .executors.http_request import (
@@ -37,7 +38,7 @@ class HTTPBackend(BaseBackend):
 
     def __init__(self, config: ProviderConfig):
         super().__init__(config)
-        self._session = None
+        self._http = get_http_client()
         self._api_key: Optional[str] = None
         self._extractors = {
             "anthropic": AnthropicExtractor(),
@@ -61,16 +62,8 @@ class HTTPBackend(BaseBackend):
         return self._api_key
 
     async def _get_session(self):
-        """Get or create aiohttp session."""
-        if self._session is None:
-            try:
-                import aiohttp
-
-                timeout = aiohttp.ClientTimeout(total=self.config.timeout_s)
-                self._session = aiohttp.ClientSession(timeout=timeout)
-            except ImportError:
-                raise ImportError("aiohttp is required for HTTP backend. Install with: pip install aiohttp")
-        return self._session
+        """Get the gateway-wide pooled aiohttp session."""
+        return await self._http.get_session()
 
     def _detect_api_kind(self) -> str:
         """Detect provider API format family."""
@@ -153,6 +146,7 @@ class HTTPBackend(BaseBackend):
         session = await self._get_session()
         return await execute_anthropic_request(
             session=session,
+            timeout=self._http.timeout(self.config.timeout_s),
             request=request,
             api_key=api_key,
             api_base_url=profile.api_base_url,
@@ -171,6 +165,7 @@ class HTTPBackend(BaseBackend):
         session = await self._get_session()
         return await execute_gemini_request(
             session=session,
+            timeout=self._http.timeout(self.config.timeout_s),
             request=request,
             api_key=api_key,
             api_base_url=profile.api_base_url,
@@ -189,6 +184,7 @@ class HTTPBackend(BaseBackend):
         session = await self._get_session()
         return await execute_openai_compatible_request(
             session=session,
+            timeout=self._http.timeout(self.config.timeout_s),
             request=request,
             api_key=api_key,
             api_base_url=profile.api_base_url,
@@ -207,13 +203,11 @@ class HTTPBackend(BaseBackend):
             if "anthropic" in (self.config.api_base_url or "").lower():
                 return True
 
-            import aiohttp
-
             session = await self._get_session()
             url = f"{self.config.api_base_url}/models"
             headers = {"Authorization": f"Bearer {api_key}"}
 
-            async with session.get(url, headers=headers, timeout=aiohttp.ClientTimeout(total=10)) as resp:
+            async with session.get(url, headers=headers, timeout=self._http.timeout(10)) as resp:
                 return resp.status == 200
 
         except (RuntimeError, ValueError, TypeError, KeyError, AttributeError, OSError):
@@ -221,10 +215,8 @@ class HTTPBackend(BaseBackend):
             return False
 
     async def shutdown(self) -> None:
-        """Close the HTTP session."""
-        if self._session:
-            await self._session.close()
-            self._session = None
+        """Nothing to release; the shared session is closed with the gateway."""
+        pass
 
     async def _execute_stream_by_api_kind(
         self,
@@ -309,7 +301,7 @@ class HTTPBackend(BaseBackend):
             api_base_url=profile.api_base_url,
             model=profile.model,
             max_tokens=profile.max_tokens,
-            timeout_s=profile.timeout_s,
+            timeout=self._http.timeout(profile.timeout_s),
             provider_name=profile.provider_name,
         ):
             yield chunk
@@ -329,7 +321,7 @@ class HTTPBackend(BaseBackend):
             api_base_url=profile.api_base_url,
             model=profile.model,
             max_tokens=profile.max_tokens,
-            timeout_s=profile.timeout_s,
+            timeout=self._http.timeout(profile.timeout_s),
             provider_name=profile.provider_name,
         ):
             yield chunk
@@ -3,15 +3,19 @@
 from __future__ import annotations
 
 import asyncio
+import codecs
 import time
-from typing import Optional
+from typing import Any, AsyncGenerator, AsyncIterator, Dict, Optional
 
 from lib.common.errors import BackendError
 from lib.common.logging import get_logger
 from .base_backend import BackendResult
 from .cli_backend import CLIBackend
+from .cli_worker_pool import CLIWorker, CLIWorkerPool
+from .extractors.cli_output import CLIEventStream
 from ..gateway_config import ProviderConfig
 from ..models import GatewayRequest
+from ..streaming import StreamChunk
 
 
 logger = get_logger("gateway.backends.cli")
@@ -23,91 +27,224 @@ class InteractiveCLIBackend(CLIBackend):
 
     This is useful for tools like Codex that can maintain context
     across multiple requests.
+
+    Requests are served by a pool of ``config.cli_workers`` warm processes
+    (at least one) started with ``config.interactive_args``, so several
+    requests run concurrently without paying CLI startup per request. A
+    response ends when the CLI prints its prompt again.
     """
 
+    # Prompt markers that end a response (the prompt has no trailing newline)
+    PROMPT_MARKERS = (">>> ", "> ")
+    _READ_CHUNK = 4096
+
     def __init__(self, config: ProviderConfig):
-        super().__init__(config)
-        self._process: Optional[asyncio.subprocess.Process] = None
-        self._lock = asyncio.Lock()
-
-    async def _ensure_process(self) -> asyncio.subprocess.Process:
-        """Ensure the interactive process is running."""
-        if self._process is None or self._process.returncode is not None:
-            cli = self._find_cli()
-            if not cli:
-                raise ValueError(f"CLI command not found: {self.config.cli_command}")
-
-            cmd = [cli]
-            if self.config.cli_args:
-                cmd.extend(self.config.cli_args)
-
-            self._process = await asyncio.create_subprocess_exec(
-                *cmd,
-                stdout=asyncio.subprocess.PIPE,
-                stderr=asyncio.subprocess.PIPE,
-                stdin=asyncio.subprocess.PIPE,
+        if config.interactive_args is None:
+            raise ValueError(
+                f"{config.name}: cli_workers requires interactive_args "
+                "(the arguments that start the CLI as a REPL)"
             )
-
-        return self._process
+        super().__init__(config)
+        self._pool = CLIWorkerPool(
+            config.name,
+            self._spawn_process,
+            size=max(1, config.cli_workers),
+            max_requests=config.cli_worker_max_requests,
+            max_rss_growth_mb=config.cli_worker_max_rss_growth_mb,
+        )
+
+    async def _spawn_process(self) -> asyncio.subprocess.Process:
+        """Start one interactive CLI process and wait for its first prompt."""
+        cli = self._find_cli()
+        if not cli:
+            raise ValueError(f"CLI command not found: {self.config.cli_command}")
+
+        if self.config.name == "gemini":
+            await self._ensure_gemini_token()
+
+        env = dict(self._cli_env())
+        env.pop("CI", None)  # CI=1 makes many CLIs refuse to run as a REPL
+        process = await asyncio.create_subprocess_exec(
+            cli,
+            *self.config.interactive_args,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.DEVNULL,
+            stdin=asyncio.subprocess.PIPE,
+            env=env,
+            cwd=self._resolve_cwd(),
+        )
+        try:
+            # Drop the banner so it does not prefix the first response
+            async for _line in self._read_until_prompt(process, self.config.timeout_s):
+                pass
+        except BaseException as e:
+            if process.returncode is None:
+                process.kill()
+                await process.wait()
+            if isinstance(e, asyncio.TimeoutError):
+                raise RuntimeError(
+                    f"{self.config.name} CLI showed no prompt within {self.config.timeout_s}s"
+                ) from e
+            raise
+        return process
 
     async def execute(self, request: GatewayRequest) -> BackendResult:
-        """Execute request via interactive CLI session."""
+        """Execute request via a pooled interactive CLI session."""
         start_time = time.time()
+        timeout = request.timeout_s or self.config.timeout_s
+        acquired = False
+
+        try:
+            if self.config.name == "gemini":
+                await self._ensure_gemini_token()
+            async with self._pool.acquire(timeout=timeout) as worker:
+                acquired = True
+                remaining = timeout - (time.time() - start_time)
+                response_text = await self._run_on_worker(worker, request.message, remaining)
+
+            latency_ms = (time.time() - start_time) * 1000
+            return BackendResult.ok(
+                response=self._clean_output(response_text)[0],
+                latency_ms=latency_ms,
+            )
 
-        async with self._lock:
-            try:
-                process = await self._ensure_process()
-
-                message = request.message + "\n"
-                process.stdin.write(message.encode("utf-8"))
-                await process.stdin.drain()
+        except asyncio.TimeoutError:
+            return BackendResult.fail(
+                self._timeout_message(acquired, timeout),
+                latency_ms=(time.time() - start_time) * 1000,
+            )
+        except (RuntimeError, ValueError, TypeError, KeyError, AttributeError, OSError):
+            logger.exception("Interactive CLI execution error for %s", self.config.name)
+            return BackendResult.fail(
+                str(BackendError(f"Unexpected interactive backend error: {self.config.name}")),
+                latency_ms=(time.time() - start_time) * 1000,
+            )
 
-                response_lines = []
-                timeout = request.timeout_s or self.config.timeout_s
+    def _timeout_message(self, acquired: bool, timeout: float) -> str:
+        if acquired:
+            return f"{self.config.name} CLI did not finish its response within {timeout}s"
+        return f"No {self.config.name} CLI worker became available within {timeout}s"
 
+    async def execute_stream(
+        self,
+        request: GatewayRequest,
+    ) -> AsyncGenerator[StreamChunk, None]:
+        """Stream a pooled session's JSON text events as the CLI prints them."""
+        start_time = time.time()
+        timeout = request.timeout_s or self.config.timeout_s
+        events = CLIEventStream()
+        chunk_index = 0
+        acquired = False
+        try:
+            if self.config.name == "gemini":
+                await self._ensure_gemini_token()
+            async with self._pool.acquire(timeout=timeout) as worker:
+                acquired = True
+                remaining = timeout - (time.time() - start_time)
+                finished = False
                 try:
-                    while True:
-                        line = await asyncio.wait_for(
-                            process.stdout.readline(),
-                            timeout=timeout,
-                        )
-                        if not line:
-                            break
-
-                        decoded = line.decode("utf-8", errors="replace").rstrip()
-                        response_lines.append(decoded)
-
-                        if self._is_response_complete(decoded):
-                            break
-
-                except asyncio.TimeoutError:
-                    pass
-
-                latency_ms = (time.time() - start_time) * 1000
-                response_text = "\n".join(response_lines)
-
-                return BackendResult.ok(
-                    response=self._clean_output(response_text)[0],
-                    latency_ms=latency_ms,
-                )
-
-            except (RuntimeError, ValueError, TypeError, KeyError, AttributeError, OSError):
-                logger.exception("Interactive CLI execution error for %s", self.config.name)
-                return BackendResult.fail(
-                    str(BackendError(f"Unexpected interactive backend error: {self.config.name}")),
-                    latency_ms=(time.time() - start_time) * 1000,
-                )
-
-    def _is_response_complete(self, line: str) -> bool:
-        """Check if the response is complete based on line content."""
-        return line.endswith("> ") or line.endswith(">>> ")
+                    async for line in self._iter_worker_lines(worker, request.message, remaining):
+                        delta, _thinking = events.feed(line)
+                        if delta:
+                            yield StreamChunk(
+                                request_id=request.id,
+                                content=delta,
+                                chunk_index=chunk_index,
+                                provider=self.config.name,
+                            )
+                            chunk_index += 1
+                    finished = True
+                finally:
+                    if not finished:
+                        # Unread output would leak into the next request
+                        self._pool.discard(worker)
+
+            result = BackendResult.ok(
+                response="\n".join(events.text_parts) if events.has_text
+                else self._clean_output(events.output)[0],
+                latency_ms=(time.time() - start_time) * 1000,
+            )
+        except asyncio.TimeoutError:
+            result = BackendResult.fail(
+                self._timeout_message(acquired, timeout),
+                latency_ms=(time.time() - start_time) * 1000,
+            )
+        except (RuntimeError, ValueError, TypeError, KeyError, AttributeError, OSError):
+            logger.exception("Interactive CLI streaming error for %s", self.config.name)
+            result = BackendResult.fail(
+                str(BackendError(f"Unexpected interactive backend error: {self.config.name}")),
+                latency_ms=(time.time() - start_time) * 1000,
+            )
+
+        async for chunk in self._result_chunks(request, result, chunk_index, streamed=events.has_text):
+            yield chunk
+
+    async def _run_on_worker(self, worker: CLIWorker, message: str, timeout: float) -> str:
+        """Send one prompt and read lines until the CLI prompt returns."""
+        return "\n".join([line async for line in self._iter_worker_lines(worker, message, timeout)])
+
+    async def _iter_worker_lines(
+        self, worker: CLIWorker, message: str, timeout: float
+    ) -> AsyncIterator[str]:
+        """
+        Send one prompt and yield response lines until the CLI prompt returns.
+
+        Raise ``asyncio.TimeoutError`` if the prompt does not come back in
+        time. A worker whose response was not read to the end is discarded,
+        since the rest would leak into the next request.
+        """
+        process = worker.process
+        try:
+            process.stdin.write((message + "\n").encode("utf-8"))
+            await process.stdin.drain()
+            async for line in self._read_until_prompt(process, timeout):
+                yield line
+        except BaseException:
+            self._pool.discard(worker)
+            raise
+
+    async def _read_until_prompt(
+        self, process: asyncio.subprocess.Process, timeout: float
+    ) -> AsyncIterator[str]:
+        """
+        Yield output lines until the unterminated tail of the output is a prompt.
+
+        Output is read in raw chunks rather than with ``readline()``: the
+        prompt has no trailing newline, so it only ever shows up as the tail
+        of the buffer.
+        """
+        deadline = time.monotonic() + timeout
+        decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+        pending = ""
+        while True:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                raise asyncio.TimeoutError()
+            chunk = await asyncio.wait_for(process.stdout.read(self._READ_CHUNK), remaining)
+            if not chunk:
+                raise RuntimeError(f"{self.config.name} CLI exited before returning its prompt")
+
+            *lines, pending = (pending + decoder.decode(chunk)).split("\n")
+            for line in lines:
+                yield line.rstrip()
+
+            before_prompt = self._strip_prompt(pending)
+            if before_prompt is not None:
+                if before_prompt.strip():
+                    yield before_prompt.rstrip()
+                return
+
+    def _strip_prompt(self, tail: str) -> Optional[str]:
+        """Return ``tail`` without its trailing prompt, or None if it has none."""
+        for marker in self.PROMPT_MARKERS:
+            if tail.endswith(marker):
+                return tail[: -len(marker)]
+        return None
+
+    def pool_stats(self) -> Dict[str, Any]:
+        """Worker pool statistics."""
+        return self._pool.stats()
 
     async def shutdown(self) -> None:
-        """Terminate the interactive process."""
-        if self._process and self._process.returncode is None:
-            self._process.terminate()
-            try:
-                await asyncio.wait_for(self._process.wait(), timeout=5.0)
-            except asyncio.TimeoutError:
-                self._process.kill()
-            self._process = None
+        """Terminate the interactive processes."""
+        await self._pool.shutdown()
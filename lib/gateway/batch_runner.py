@@ -0,0 +1,115 @@
+"""
+Batch task runner backed by the gateway request queue.
+
+Batch jobs started inside the gateway submit each task straight to the
+in-process ``RequestQueue``, so they share the queue's priorities, backend
+concurrency, retries and caching with ``/api/ask`` traffic, and cancelling
+a task stops its backend call. A resumed task re-attaches to its request,
+or resubmits it when the request was lost with a previous gateway process.
+"""
+from __future__ import annotations
+
+import asyncio
+import time
+from typing import TYPE_CHECKING, Optional
+
+from lib.batch_runners import BatchTaskRunner, SubmittedCallback, TaskOutcome
+from lib.common.logging import get_logger
+
+from .models import GatewayRequest, RequestStatus
+from .request_queue import RequestQueue
+
+if TYPE_CHECKING:  # pragma: no cover - typing only
+    from lib.batch_processor import BatchTask
+
+logger = get_logger("gateway.batch_runner")
+
+_ACTIVE_STATUSES = (
+    RequestStatus.QUEUED,
+    RequestStatus.PROCESSING,
+    RequestStatus.RETRYING,
+    RequestStatus.FALLBACK,
+)
+
+# Extra time allowed past the request timeout for the queue to report back
+_WAIT_GRACE_S = 30.0
+
+
+class QueueTaskRunner(BatchTaskRunner):
+    """Runs batch tasks as gateway requests on the in-process queue."""
+
+    name = "queue"
+
+    def __init__(self, queue: RequestQueue, priority: int = 50, batch_id: Optional[str] = None):
+        """
+        Initialize the runner.
+
+        Args:
+            queue: Gateway request queue
+            priority: Queue priority of batch requests
+            batch_id: Job ID recorded in request metadata (see /api/batch/pending)
+        """
+        self.queue = queue
+        self.priority = priority
+        self.batch_id = batch_id
+
+    async def run(
+        self,
+        task: BatchTask,
+        provider: str,
+        timeout_s: float,
+        on_submitted: Optional[SubmittedCallback] = None,
+    ) -> TaskOutcome:
+        start_time = time.time()
+        request_id = task.request_id
+        existing = await self.queue.store.aio.get_request(request_id) if request_id else None
+        if (
+            existing is not None
+            and existing.status in _ACTIVE_STATUSES
+            and not self.queue.is_tracked(request_id)
+        ):
+            # Left active by a previous gateway process: nothing will finish it
+            logger.info("Resubmitting batch task %s: request %s was lost", task.id, request_id)
+            await self.queue.store.aio.update_request_status(request_id, RequestStatus.FAILED)
+            existing = None
+
+        if existing is None:
+            request = GatewayRequest.create(
+                provider=provider,
+                message=task.message,
+                priority=self.priority,
+                timeout_s=timeout_s,
+                metadata={"batch_id": self.batch_id, "batch_task": task.id},
+            )
+            if not await self.queue.enqueue(request):
+                return TaskOutcome(False, error="Queue is full", latency_ms=(time.time() - start_time) * 1000)
+            request_id = request.id
+            if on_submitted is not None:
+                on_submitted(request_id)
+
+        status = existing.status if existing is not None else RequestStatus.QUEUED
+        completion = self.queue.completions.get_result(request_id)
+        try:
+            if completion is None and status in _ACTIVE_STATUSES:
+                completion = await self.queue.completions.wait(request_id, timeout_s + _WAIT_GRACE_S)
+                if completion is None:
+                    self.queue.cancel(request_id)
+                    return TaskOutcome(False, error="Timeout", latency_ms=(time.time() - start_time) * 1000)
+        except asyncio.CancelledError:
+            self.queue.cancel(request_id)
+            raise
+
+        if completion is not None:
+            status = completion.status
+        response = completion.response if completion is not None and completion.response else None
+        if response is None:
+            response = await self.queue.store.aio.get_response(request_id)
+
+        latency_ms = response.latency_ms if response and response.latency_ms else (time.time() - start_time) * 1000
+        if status == RequestStatus.COMPLETED and response is not None:
+            return TaskOutcome(True, output=response.response or "", latency_ms=latency_ms)
+        if status == RequestStatus.CANCELLED:
+            return TaskOutcome(False, error="Cancelled", latency_ms=latency_ms, cancelled=True)
+        error = response.error if response is not None and response.error else f"Request {status.value}"
+        logger.debug("Batch task %s request %s ended with %s", task.id, request_id, status.value)
+        return TaskOutcome(False, error=error, latency_ms=latency_ms)
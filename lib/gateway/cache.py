@@ -20,6 +20,16 @@ class CacheConfig:
     enabled: bool = True
     default_ttl_s: float = 3600.0  # 1 hour default
     max_entries: int = 10000
+    # In-process L1 tier in front of the SQLite table
+    l1_max_entries: int = 1000
+    l1_max_bytes: int = 32 * 1024 * 1024
+    # How often aggregated hit counters are written back to SQLite
+    hit_flush_interval_s: float = 5.0
+    # Semantic tier: serve cached answers for paraphrased prompts
+    semantic_enabled: bool = False
+    semantic_threshold: float = 0.92
+    semantic_max_entries: int = 5000
+    semantic_model: str = "all-MiniLM-L6-v2"
     # TTL by provider (some responses may be more stable)
     provider_ttl_s: Dict[str, float] = field(default_factory=lambda: {
         "claude": 3600.0,
@@ -102,6 +112,13 @@ class CacheStats:
     newest_entry: Optional[float] = None
     next_expiration: Optional[float] = None
     avg_ttl_remaining_s: Optional[float] = None
+    l1_entries: int = 0
+    l1_size_bytes: int = 0
+    l1_hits: int = 0
+    semantic_hits: int = 0
+    semantic_misses: int = 0
+    semantic_false_positives: int = 0
+    semantic_entries: int = 0
 
     @property
     def hit_rate(self) -> float:
@@ -125,6 +142,13 @@ class CacheStats:
             "newest_entry": self.newest_entry,
             "next_expiration": self.next_expiration,
             "avg_ttl_remaining_s": self.avg_ttl_remaining_s,
+            "l1_entries": self.l1_entries,
+            "l1_size_bytes": self.l1_size_bytes,
+            "l1_hits": self.l1_hits,
+            "semantic_hits": self.semantic_hits,
+            "semantic_misses": self.semantic_misses,
+            "semantic_false_positives": self.semantic_false_positives,
+            "semantic_entries": self.semantic_entries,
         }
 
 
@@ -1,18 +1,30 @@
 """Auto-split mixins for gateway CacheManager."""
 from __future__ import annotations
 
+import asyncio
+import json
 import sqlite3
+import threading
 import time
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, List, Optional, Tuple
+
+from lib.common.logging import get_logger
 
 try:
     from .cache import CacheConfig, CacheEntry, CacheStats, generate_cache_key, generate_message_hash
+    from .cache_memory import MemoryCacheTier
+    from .cache_semantic import SemanticCacheIndex
     from .state_store import StateStore
 except ImportError:  # pragma: no cover - script mode
     from cache import CacheConfig, CacheEntry, CacheStats, generate_cache_key, generate_message_hash
+    from cache_memory import MemoryCacheTier
+    from cache_semantic import SemanticCacheIndex
     from state_store import StateStore
 
 
+logger = get_logger("gateway.cache")
+
+
 class CacheManagerCoreMixin:
     """Mixin methods extracted from CacheManager."""
 
@@ -27,6 +39,26 @@ class CacheManagerCoreMixin:
         self.store = store
         self.config = config or CacheConfig()
         self._stats = CacheStats()
+
+        # L1: in-process LRU in front of the response_cache table (L2)
+        self._l1 = MemoryCacheTier(
+            max_entries=getattr(self.config, "l1_max_entries", 1000),
+            max_bytes=getattr(self.config, "l1_max_bytes", 32 * 1024 * 1024),
+        )
+        self._hit_flush_interval_s = getattr(self.config, "hit_flush_interval_s", 5.0)
+        self._last_hit_flush = time.time()
+        self._flush_lock = threading.Lock()
+        self._flush_task: Optional[asyncio.Task] = None
+
+        # Optional embedding-similarity tier (in-memory index of cached prompts)
+        self._semantic: Optional[SemanticCacheIndex] = None
+        if getattr(self.config, "semantic_enabled", False):
+            self._semantic = SemanticCacheIndex(
+                threshold=getattr(self.config, "semantic_threshold", 0.92),
+                max_entries_per_partition=getattr(self.config, "semantic_max_entries", 5000),
+                model_name=getattr(self.config, "semantic_model", "all-MiniLM-L6-v2"),
+            )
+
         self._init_cache_table()
 
     def _init_cache_table(self) -> None:
@@ -70,40 +102,167 @@ class CacheManagerCoreMixin:
             return None
 
         cache_key = generate_cache_key(provider, message, model)
+        now = time.time()
+
+        entry = self._l1.get(cache_key, now)
+        if entry is None:
+            entry = self._load_from_l2(cache_key, now)
+            if entry is None:
+                self._stats.misses += 1
+                self._maybe_flush_hits(now)
+                return None
+            self._l1.put(entry)
+
+        # Hit counters are aggregated in memory and flushed to L2 in batches
+        self._l1.record_hit(cache_key, now)
+        self._stats.hits += 1
+        if entry.tokens_used:
+            self._stats.total_tokens_saved += entry.tokens_used
+
+        entry.hit_count += 1
+        entry.last_hit_at = now
+        self._maybe_flush_hits(now)
+        return entry
+
+    def get_semantic(
+        self,
+        provider: str,
+        message: str,
+        model: Optional[str] = None,
+    ) -> Optional[Tuple[CacheEntry, float]]:
+        """
+        Get a cached response for a semantically similar prompt.
+
+        Intended as a fallback after an exact ``get()`` miss. Embedding the
+        prompt is CPU-bound, so async callers should run this off the loop.
+
+        Returns:
+            (CacheEntry, similarity) on a hit, None otherwise
+        """
+        if not self.config.enabled or self._semantic is None:
+            return None
+        if not self.config.should_cache_message(message):
+            return None
+
+        vector = self._semantic.embed(message)
+        if vector is None:
+            return None
 
+        now = time.time()
+        match = self._semantic.search(provider, model, vector, now)
+        if match is None:
+            self._stats.semantic_misses += 1
+            return None
+
+        cache_key, similarity = match
+        entry = self._l1.get(cache_key, now)
+        if entry is None:
+            entry = self._load_from_l2(cache_key, now)
+            if entry is None:
+                # Exact tiers no longer hold the response
+                self._semantic.discard(cache_key)
+                self._stats.semantic_misses += 1
+                return None
+            self._l1.put(entry)
+
+        self._l1.record_hit(cache_key, now)
+        self._stats.semantic_hits += 1
+        if entry.tokens_used:
+            self._stats.total_tokens_saved += entry.tokens_used
+        entry.hit_count += 1
+        entry.last_hit_at = now
+        self._maybe_flush_hits(now)
+        return entry, similarity
+
+    def report_semantic_false_positive(self, cache_key: str) -> bool:
+        """
+        Record that a semantic hit returned an unsuitable answer.
+
+        The prompt is dropped from the semantic index so it stops matching
+        paraphrases; the exact-match entry is kept.
+        """
+        self._stats.semantic_false_positives += 1
+        if self._semantic is None:
+            return False
+        return self._semantic.discard(cache_key)
+
+    def _load_from_l2(self, cache_key: str, now: float) -> Optional[CacheEntry]:
+        """Read a live entry from the SQLite tier, deleting it if expired."""
         with self.store._get_connection() as conn:
             cursor = conn.execute(
                 "SELECT * FROM response_cache WHERE cache_key = ?",
                 (cache_key,)
             )
             row = cursor.fetchone()
-
             if not row:
-                self._stats.misses += 1
                 return None
 
             entry = self._row_to_entry(row)
-
-            if entry.is_expired():
-                # Delete expired entry
+            if now > entry.expires_at:
                 conn.execute("DELETE FROM response_cache WHERE cache_key = ?", (cache_key,))
-                self._stats.misses += 1
                 return None
+            return entry
 
-            # Update hit count
-            now = time.time()
-            conn.execute(
-                "UPDATE response_cache SET hit_count = hit_count + 1, last_hit_at = ? WHERE cache_key = ?",
-                (now, cache_key)
-            )
+    def _maybe_flush_hits(self, now: float) -> None:
+        """Without a running flush loop, queue a flush once the interval passed."""
+        if self._flush_task is None and now - self._last_hit_flush >= self._hit_flush_interval_s:
+            self.flush_hit_counts(wait=False)
 
-            self._stats.hits += 1
-            if entry.tokens_used:
-                self._stats.total_tokens_saved += entry.tokens_used
+    def flush_hit_counts(self, wait: bool = True) -> int:
+        """
+        Write aggregated hit counters to the SQLite tier in one batch.
 
-            entry.hit_count += 1
-            entry.last_hit_at = now
-            return entry
+        Args:
+            wait: Block until committed; otherwise only queue the write
+
+        Returns:
+            Number of cache keys updated
+        """
+        with self._flush_lock:
+            self._last_hit_flush = time.time()
+            rows = self._l1.drain_pending_hits()
+            if not rows:
+                return 0
+            try:
+                self.store._write(
+                    """
+                    UPDATE response_cache
+                    SET hit_count = hit_count + ?,
+                        last_hit_at = MAX(COALESCE(last_hit_at, 0), ?)
+                    WHERE cache_key = ?
+                    """,
+                    rows,
+                    wait=wait,
+                    many=True,
+                )
+            except sqlite3.Error:
+                self._l1.restore_pending_hits(rows)
+                raise
+            return len(rows)
+
+    async def _flush_loop(self) -> None:
+        while True:
+            await asyncio.sleep(self._hit_flush_interval_s)
+            try:
+                await asyncio.to_thread(self.flush_hit_counts)
+            except sqlite3.Error:
+                logger.exception("Failed to flush cache hit counts")
+
+    async def start(self) -> None:
+        """Start flushing hit counters in the background."""
+        if self._flush_task is None:
+            self._flush_task = asyncio.create_task(self._flush_loop())
+
+    async def stop(self) -> None:
+        """Stop the background flush and write outstanding hit counters."""
+        task, self._flush_task = self._flush_task, None
+        if task is not None:
+            task.cancel()
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+        self.flush_hit_counts()
 
     def put(
         self,
@@ -177,6 +336,13 @@ class CacheManagerCoreMixin:
                 json.dumps(entry.metadata) if entry.metadata else None,
             ))
 
+        self._l1.put(entry)
+
+        if self._semantic is not None:
+            vector = self._semantic.embed(message)
+            if vector is not None:
+                self._semantic.add(provider, model, cache_key, vector, expires_at)
+
         return entry
 
     def invalidate(self, cache_key: str) -> bool:
@@ -189,12 +355,15 @@ class CacheManagerCoreMixin:
         Returns:
             True if entry was deleted
         """
+        in_l1 = self._l1.discard(cache_key)
+        if self._semantic is not None:
+            self._semantic.discard(cache_key)
         with self.store._get_connection() as conn:
             cursor = conn.execute(
                 "DELETE FROM response_cache WHERE cache_key = ?",
                 (cache_key,)
             )
-            return cursor.rowcount > 0
+            return cursor.rowcount > 0 or in_l1
 
     def clear(self, provider: Optional[str] = None) -> int:
         """
@@ -206,6 +375,9 @@ class CacheManagerCoreMixin:
         Returns:
             Number of entries cleared
         """
+        self._l1.clear(provider)
+        if self._semantic is not None:
+            self._semantic.clear(provider)
         with self.store._get_connection() as conn:
             if provider:
                 cursor = conn.execute(
@@ -224,6 +396,10 @@ class CacheManagerCoreMixin:
             Number of entries removed
         """
         now = time.time()
+        self.flush_hit_counts()
+        self._l1.purge_expired(now)
+        if self._semantic is not None:
+            self._semantic.purge_expired(now)
         with self.store._get_connection() as conn:
             cursor = conn.execute(
                 "DELETE FROM response_cache WHERE expires_at < ?",
@@ -253,6 +429,7 @@ class CacheManagerCoreMixin:
         Returns:
             Number of entries removed
         """
+        self.flush_hit_counts()
         with self.store._get_connection() as conn:
             cursor = conn.execute("SELECT COUNT(*) FROM response_cache")
             count = cursor.fetchone()[0]
@@ -262,13 +439,23 @@ class CacheManagerCoreMixin:
 
             # Remove oldest entries (by created_at) to get under limit
             excess = count - self.config.max_entries
-            cursor = conn.execute("""
-                DELETE FROM response_cache
-                WHERE cache_key IN (
-                    SELECT cache_key FROM response_cache
-                    ORDER BY created_at ASC
-                    LIMIT ?
-                )
-            """, (excess,))
-            return cursor.rowcount
+            evicted = [
+                row[0] for row in conn.execute(
+                    "SELECT cache_key FROM response_cache ORDER BY created_at ASC LIMIT ?",
+                    (excess,),
+                ).fetchall()
+            ]
+            conn.executemany(
+                "DELETE FROM response_cache WHERE cache_key = ?",
+                [(key,) for key in evicted],
+            )
+
+        # Keep L1 coherent with the rows evicted from L2
+        self._l1.discard_many(evicted)
+        if self._semantic is not None:
+            self._semantic.discard_many(evicted)
+        return len(evicted)
 
+    def get_l1_stats(self) -> Dict[str, int]:
+        """Get statistics for the in-memory L1 tier."""
+        return self._l1.stats()
@@ -50,6 +50,12 @@ class CacheManagerStatsMixin:
             self._stats.next_expiration = row["next_expiration"]
             self._stats.avg_ttl_remaining_s = row["avg_ttl_remaining"]
 
+        l1_stats = self._l1.stats()
+        self._stats.l1_entries = l1_stats["entries"]
+        self._stats.l1_size_bytes = l1_stats["bytes"]
+        self._stats.l1_hits = l1_stats["hits"]
+        self._stats.semantic_entries = len(self._semantic) if self._semantic is not None else 0
+
         return self._stats
 
     def list_entries(
@@ -97,6 +103,7 @@ class CacheManagerStatsMixin:
         Returns:
             List of CacheEntry objects sorted by hit_count descending
         """
+        self.flush_hit_counts()
         now = time.time()
         with self.store._get_connection() as conn:
             cursor = conn.execute("""
@@ -114,6 +121,7 @@ class CacheManagerStatsMixin:
         Returns:
             Dict of provider -> stats
         """
+        self.flush_hit_counts()
         now = time.time()
         stats: Dict[str, Dict[str, Any]] = {}
 
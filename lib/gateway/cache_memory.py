@@ -0,0 +1,169 @@
+"""
+In-process L1 tier for the gateway response cache.
+
+Sits in front of the SQLite ``response_cache`` table (L2). Entries are kept
+in LRU order and bounded by both entry count and approximate payload bytes;
+expired entries are dropped on access or during ``purge_expired``.
+"""
+from __future__ import annotations
+
+import threading
+import time
+from collections import OrderedDict
+from typing import TYPE_CHECKING, Dict, Iterable, List, Optional, Tuple
+
+if TYPE_CHECKING:  # pragma: no cover - typing only (cache.py imports this module)
+    from .cache import CacheEntry
+
+
+def _entry_size(entry: CacheEntry) -> int:
+    """Approximate memory footprint of an entry's payload in bytes."""
+    return len(entry.response.encode("utf-8")) + len(entry.cache_key)
+
+
+class MemoryCacheTier:
+    """
+    Size- and byte-bounded LRU of ``CacheEntry`` objects with TTL awareness.
+
+    Also aggregates hit counters in memory so the L2 table only sees one
+    batched UPDATE per flush instead of a write per cache hit.
+    """
+
+    def __init__(self, max_entries: int = 1000, max_bytes: int = 32 * 1024 * 1024):
+        """
+        Initialize the tier.
+
+        Args:
+            max_entries: Maximum number of entries held in memory
+            max_bytes: Maximum approximate payload bytes held in memory
+        """
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+
+        self._entries: "OrderedDict[str, Tuple[CacheEntry, int]]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+        # cache_key -> (pending hit count, last hit timestamp)
+        self._pending_hits: Dict[str, Tuple[int, float]] = {}
+
+        self.hits = 0
+        self.evictions = 0
+
+    def get(self, cache_key: str, now: Optional[float] = None) -> Optional[CacheEntry]:
+        """Get a live entry and mark it most recently used."""
+        now = now if now is not None else time.time()
+        with self._lock:
+            item = self._entries.get(cache_key)
+            if item is None:
+                return None
+            entry, size = item
+            if now > entry.expires_at:
+                self._remove_locked(cache_key)
+                return None
+            self._entries.move_to_end(cache_key)
+            self.hits += 1
+            return entry
+
+    def put(self, entry: CacheEntry) -> None:
+        """Insert or replace an entry, evicting LRU entries past the bounds."""
+        size = _entry_size(entry)
+        if self.max_entries <= 0 or size > self.max_bytes:
+            self.discard(entry.cache_key)
+            return
+
+        with self._lock:
+            self._remove_locked(entry.cache_key)
+            self._entries[entry.cache_key] = (entry, size)
+            self._bytes += size
+            while self._entries and (
+                len(self._entries) > self.max_entries or self._bytes > self.max_bytes
+            ):
+                oldest_key = next(iter(self._entries))
+                self._remove_locked(oldest_key)
+                self.evictions += 1
+
+    def discard(self, cache_key: str) -> bool:
+        """Remove an entry and any pending hits for it."""
+        with self._lock:
+            self._pending_hits.pop(cache_key, None)
+            return self._remove_locked(cache_key)
+
+    def discard_many(self, cache_keys: Iterable[str]) -> int:
+        """Remove several entries. Returns how many were present."""
+        removed = 0
+        with self._lock:
+            for cache_key in cache_keys:
+                self._pending_hits.pop(cache_key, None)
+                if self._remove_locked(cache_key):
+                    removed += 1
+        return removed
+
+    def clear(self, provider: Optional[str] = None) -> int:
+        """Remove all entries, or only those for one provider."""
+        with self._lock:
+            if provider is None:
+                count = len(self._entries)
+                self._entries.clear()
+                self._pending_hits.clear()
+                self._bytes = 0
+                return count
+            keys = [key for key, (entry, _size) in self._entries.items() if entry.provider == provider]
+            for key in keys:
+                self._pending_hits.pop(key, None)
+                self._remove_locked(key)
+            return len(keys)
+
+    def purge_expired(self, now: Optional[float] = None) -> int:
+        """Drop expired entries. Returns the number removed."""
+        now = now if now is not None else time.time()
+        with self._lock:
+            expired = [key for key, (entry, _size) in self._entries.items() if now > entry.expires_at]
+            for key in expired:
+                self._pending_hits.pop(key, None)
+                self._remove_locked(key)
+            return len(expired)
+
+    def record_hit(self, cache_key: str, now: float) -> None:
+        """Aggregate a hit for a later batched flush to L2."""
+        with self._lock:
+            count, _last = self._pending_hits.get(cache_key, (0, now))
+            self._pending_hits[cache_key] = (count + 1, now)
+
+    def drain_pending_hits(self) -> List[Tuple[int, float, str]]:
+        """Take all aggregated hits as ``(count, last_hit_at, cache_key)`` rows."""
+        with self._lock:
+            pending = self._pending_hits
+            self._pending_hits = {}
+        return [(count, last_hit, key) for key, (count, last_hit) in pending.items()]
+
+    def restore_pending_hits(self, rows: List[Tuple[int, float, str]]) -> None:
+        """Put drained hits back after a failed flush."""
+        with self._lock:
+            for count, last_hit, key in rows:
+                prev_count, prev_last = self._pending_hits.get(key, (0, last_hit))
+                self._pending_hits[key] = (prev_count + count, max(prev_last, last_hit))
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._entries)
+
+    def stats(self) -> Dict[str, int]:
+        """Get L1 statistics."""
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "max_entries": self.max_entries,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "evictions": self.evictions,
+                "pending_hit_keys": len(self._pending_hits),
+            }
+
+    def _remove_locked(self, cache_key: str) -> bool:
+        item = self._entries.pop(cache_key, None)
+        if item is None:
+            return False
+        self._bytes -= item[1]
+        return True
@@ -0,0 +1,264 @@
+"""
+Semantic (embedding-similarity) tier for the gateway response cache.
+
+Exact cache keys only match prompts that are identical after normalization.
+This tier embeds prompts with the memory system's ``EmbeddingProvider`` and
+looks up the nearest cached prompt per provider/model in a vectorized NumPy
+index. A match above the configured cosine-similarity threshold is served
+through the normal cache path with ``cached: "semantic"`` metadata.
+
+NumPy and sentence-transformers are optional; without them the tier reports
+itself unavailable and every lookup is a miss.
+"""
+from __future__ import annotations
+
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+
+from lib.common.logging import get_logger
+
+try:
+    import numpy as np
+
+    HAS_NUMPY = True
+except ImportError:  # pragma: no cover - optional dependency
+    np = None
+    HAS_NUMPY = False
+
+try:
+    from lib.memory.vector_search_embeddings import EmbeddingProvider
+
+    HAS_EMBEDDINGS = True
+except ImportError:  # pragma: no cover - optional dependency
+    EmbeddingProvider = None
+    HAS_EMBEDDINGS = False
+
+logger = get_logger("gateway.cache_semantic")
+
+
+class _Partition:
+    """Contiguous float32 matrix of unit-normalized prompt embeddings."""
+
+    def __init__(self, dimension: int, capacity: int = 64):
+        self.dimension = dimension
+        self.vectors = np.zeros((capacity, dimension), dtype=np.float32)
+        self.expires_at = np.zeros(capacity, dtype=np.float64)
+        self.keys: List[Optional[str]] = [None] * capacity
+        self.size = 0
+        self.rows: Dict[str, int] = {}
+
+    def add(self, cache_key: str, vector: "np.ndarray", expires_at: float) -> None:
+        row = self.rows.get(cache_key)
+        if row is None:
+            if self.size == len(self.keys):
+                self._grow()
+            row = self.size
+            self.size += 1
+            self.rows[cache_key] = row
+        self.vectors[row] = vector
+        self.expires_at[row] = expires_at
+        self.keys[row] = cache_key
+
+    def remove(self, cache_key: str) -> bool:
+        """Swap-remove a row so the live rows stay contiguous."""
+        row = self.rows.pop(cache_key, None)
+        if row is None:
+            return False
+        last = self.size - 1
+        if row != last:
+            moved_key = self.keys[last]
+            self.vectors[row] = self.vectors[last]
+            self.expires_at[row] = self.expires_at[last]
+            self.keys[row] = moved_key
+            self.rows[moved_key] = row
+        self.keys[last] = None
+        self.expires_at[last] = 0.0
+        self.size = last
+        return True
+
+    def best_match(self, query: "np.ndarray", now: float) -> Optional[Tuple[str, float]]:
+        if self.size == 0:
+            return None
+        scores = self.vectors[:self.size] @ query
+        scores[self.expires_at[:self.size] <= now] = -np.inf
+        row = int(np.argmax(scores))
+        score = float(scores[row])
+        if score == -np.inf:
+            return None
+        return self.keys[row], score
+
+    def oldest_key(self) -> Optional[str]:
+        if self.size == 0:
+            return None
+        return self.keys[int(np.argmin(self.expires_at[:self.size]))]
+
+    def _grow(self) -> None:
+        capacity = max(64, len(self.keys) * 2)
+        vectors = np.zeros((capacity, self.dimension), dtype=np.float32)
+        vectors[:self.size] = self.vectors[:self.size]
+        expires_at = np.zeros(capacity, dtype=np.float64)
+        expires_at[:self.size] = self.expires_at[:self.size]
+        self.vectors = vectors
+        self.expires_at = expires_at
+        self.keys.extend([None] * (capacity - len(self.keys)))
+
+
+class SemanticCacheIndex:
+    """
+    Nearest-neighbour index of cached prompts, partitioned by provider/model.
+
+    Only stores embeddings and cache keys; the cached responses themselves
+    stay in the exact-match tiers and are loaded by key on a hit.
+    """
+
+    def __init__(
+        self,
+        threshold: float = 0.92,
+        max_entries_per_partition: int = 5000,
+        model_name: str = "all-MiniLM-L6-v2",
+    ):
+        """
+        Initialize the index.
+
+        Args:
+            threshold: Minimum cosine similarity for a hit
+            max_entries_per_partition: Bound per provider/model partition
+            model_name: Sentence-transformers model used for embeddings
+        """
+        self.threshold = threshold
+        self.max_entries_per_partition = max_entries_per_partition
+        self.model_name = model_name
+
+        self._partitions: Dict[Tuple[str, str], _Partition] = {}
+        self._key_partition: Dict[str, Tuple[str, str]] = {}
+        self._lock = threading.Lock()
+        self._embedder = None
+        self._embedder_failed = False
+
+    @property
+    def available(self) -> bool:
+        """Whether NumPy and an embedding model are usable."""
+        return HAS_NUMPY and HAS_EMBEDDINGS and self._get_embedder() is not None
+
+    def _get_embedder(self):
+        if self._embedder is None and not self._embedder_failed:
+            if not (HAS_NUMPY and HAS_EMBEDDINGS):
+                self._embedder_failed = True
+                return None
+            embedder = EmbeddingProvider(self.model_name)
+            if getattr(embedder, "_model", None) is None:
+                logger.info("Semantic cache disabled: embedding model unavailable")
+                self._embedder_failed = True
+                return None
+            self._embedder = embedder
+        return self._embedder
+
+    def embed(self, text: str) -> Optional["np.ndarray"]:
+        """Embed and unit-normalize a prompt."""
+        embedder = self._get_embedder()
+        if embedder is None:
+            return None
+        vector = embedder.embed(text.strip().lower())
+        if vector is None:
+            return None
+        array = np.asarray(vector, dtype=np.float32)
+        norm = float(np.linalg.norm(array))
+        if norm == 0.0:
+            return None
+        return array / norm
+
+    def add(
+        self,
+        provider: str,
+        model: Optional[str],
+        cache_key: str,
+        vector: "np.ndarray",
+        expires_at: float,
+    ) -> None:
+        """Index a cached prompt embedding."""
+        partition_key = (provider, model or "")
+        with self._lock:
+            partition = self._partitions.get(partition_key)
+            if partition is None:
+                partition = _Partition(vector.shape[0])
+                self._partitions[partition_key] = partition
+            if cache_key not in partition.rows and partition.size >= self.max_entries_per_partition:
+                oldest = partition.oldest_key()
+                if oldest is not None:
+                    partition.remove(oldest)
+                    self._key_partition.pop(oldest, None)
+            partition.add(cache_key, vector, expires_at)
+            self._key_partition[cache_key] = partition_key
+
+    def search(
+        self,
+        provider: str,
+        model: Optional[str],
+        vector: "np.ndarray",
+        now: Optional[float] = None,
+    ) -> Optional[Tuple[str, float]]:
+        """
+        Find the most similar live prompt for a provider/model.
+
+        Returns:
+            (cache_key, similarity) if above the threshold, else None
+        """
+        now = now if now is not None else time.time()
+        with self._lock:
+            partition = self._partitions.get((provider, model or ""))
+            if partition is None:
+                return None
+            match = partition.best_match(vector, now)
+        if match is None or match[1] < self.threshold:
+            return None
+        return match
+
+    def discard(self, cache_key: str) -> bool:
+        """Remove a cache key from the index."""
+        with self._lock:
+            partition_key = self._key_partition.pop(cache_key, None)
+            if partition_key is None:
+                return False
+            partition = self._partitions.get(partition_key)
+            return bool(partition and partition.remove(cache_key))
+
+    def discard_many(self, cache_keys: List[str]) -> int:
+        """Remove several cache keys. Returns how many were indexed."""
+        return sum(1 for key in cache_keys if self.discard(key))
+
+    def clear(self, provider: Optional[str] = None) -> int:
+        """Drop all partitions, or those of one provider."""
+        with self._lock:
+            if provider is None:
+                count = len(self._key_partition)
+                self._partitions.clear()
+                self._key_partition.clear()
+                return count
+            removed = 0
+            for partition_key in [k for k in self._partitions if k[0] == provider]:
+                partition = self._partitions.pop(partition_key)
+                for cache_key in list(partition.rows):
+                    self._key_partition.pop(cache_key, None)
+                removed += partition.size
+            return removed
+
+    def purge_expired(self, now: Optional[float] = None) -> int:
+        """Drop expired rows from every partition."""
+        now = now if now is not None else time.time()
+        removed = 0
+        with self._lock:
+            for partition in self._partitions.values():
+                expired = [
+                    partition.keys[row]
+                    for row in np.nonzero(partition.expires_at[:partition.size] <= now)[0]
+                ]
+                for cache_key in expired:
+                    partition.remove(cache_key)
+                    self._key_partition.pop(cache_key, None)
+                removed += len(expired)
+        return removed
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._key_partition)
@@ -14,10 +14,10 @@ from pathlib import Path
 from typing import Optional, Dict, Any, List
 import os
 
-import aiohttp
-
 from lib.common.logging import get_logger
 
+from .http_client import get_http_client
+
 
 logger = get_logger("gateway.cc_switch")
 
@@ -199,46 +199,47 @@ class CCSwitch:
         start_time = time.time()
 
         try:
-            async with aiohttp.ClientSession() as session:
-                headers = {
-                    "Authorization": f"Bearer {provider.api_key}",
-                    "Content-Type": "application/json",
-                }
-
-                payload = {
-                    "model": "claude-sonnet-4-5-20250929",
-                    "messages": [{"role": "user", "content": message}],
-                    "max_tokens": 4096,
-                }
-
-                async with session.post(
-                    f"{provider.api_base}/v1/messages",
-                    headers=headers,
-                    json=payload,
-                    timeout=aiohttp.ClientTimeout(total=timeout_s)
-                ) as resp:
-                    latency_ms = (time.time() - start_time) * 1000
-
-                    if resp.status == 200:
-                        data = await resp.json()
-                        content = data.get("content", [{}])[0].get("text", "")
-                        tokens = data.get("usage", {}).get("output_tokens", 0)
-
-                        return CCTestResult(
-                            provider_name=provider.provider_name,
-                            success=True,
-                            response=content,
-                            latency_ms=latency_ms,
-                            tokens_used=tokens,
-                        )
-                    else:
-                        error_text = await resp.text()
-                        return CCTestResult(
-                            provider_name=provider.provider_name,
-                            success=False,
-                            error=f"HTTP {resp.status}: {error_text}",
-                            latency_ms=latency_ms,
-                        )
+            http = get_http_client()
+            session = await http.get_session()
+            headers = {
+                "Authorization": f"Bearer {provider.api_key}",
+                "Content-Type": "application/json",
+            }
+
+            payload = {
+                "model": "claude-sonnet-4-5-20250929",
+                "messages": [{"role": "user", "content": message}],
+                "max_tokens": 4096,
+            }
+
+            async with session.post(
+                f"{provider.api_base}/v1/messages",
+                headers=headers,
+                json=payload,
+                timeout=http.timeout(timeout_s),
+            ) as resp:
+                latency_ms = (time.time() - start_time) * 1000
+
+                if resp.status == 200:
+                    data = await resp.json()
+                    content = data.get("content", [{}])[0].get("text", "")
+                    tokens = data.get("usage", {}).get("output_tokens", 0)
+
+                    return CCTestResult(
+                        provider_name=provider.provider_name,
+                        success=True,
+                        response=content,
+                        latency_ms=latency_ms,
+                        tokens_used=tokens,
+                    )
+                else:
+                    error_text = await resp.text()
+                    return CCTestResult(
+                        provider_name=provider.provider_name,
+                        success=False,
+                        error=f"HTTP {resp.status}: {error_text}",
+                        latency_ms=latency_ms,
+                    )
 
         except asyncio.TimeoutError:
             return CCTestResult(
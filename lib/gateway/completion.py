@@ -0,0 +1,181 @@
+"""
+Completion Registry for CCB Gateway.
+
+In-process registry that lets synchronous API callers (``/api/ask?wait=true``,
+``/api/reply?wait=true``) wait for a request to finish without polling SQLite.
+Request handlers resolve entries when a request reaches a terminal state and
+the final response is kept in a bounded in-memory result slot.
+"""
+from __future__ import annotations
+
+import asyncio
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Dict, List, Optional
+
+from .models import GatewayResponse, RequestStatus
+
+
+@dataclass
+class CompletionResult:
+    """Final outcome of a request held in the result slot."""
+    request_id: str
+    status: RequestStatus
+    response: Optional[GatewayResponse] = None
+    completed_at: float = 0.0
+
+
+class CompletionRegistry:
+    """
+    Per-request completion futures with an in-memory result slot.
+
+    Features:
+    - Waiters wake as soon as the request is resolved (no DB reads)
+    - Results resolved before anyone waits are kept for late waiters
+    - Bounded LRU + TTL retention for completed results
+    - Safe to resolve from any thread
+    """
+
+    def __init__(self, max_results: int = 2048, result_ttl_s: float = 600.0):
+        """
+        Initialize the registry.
+
+        Args:
+            max_results: Maximum number of completed results kept in memory
+            result_ttl_s: Seconds a completed result stays available
+        """
+        self.max_results = max_results
+        self.result_ttl_s = result_ttl_s
+
+        self._lock = threading.Lock()
+        self._waiters: Dict[str, List[asyncio.Future]] = {}
+        self._results: "OrderedDict[str, CompletionResult]" = OrderedDict()
+
+    def resolve(
+        self,
+        request_id: str,
+        status: RequestStatus,
+        response: Optional[GatewayResponse] = None,
+    ) -> None:
+        """
+        Record the final outcome of a request and wake all waiters.
+
+        A later resolve with a response replaces a status-only result for the
+        same request (e.g. queue bookkeeping followed by the full response).
+        """
+        result = CompletionResult(
+            request_id=request_id,
+            status=status,
+            response=response,
+            completed_at=time.time(),
+        )
+
+        with self._lock:
+            existing = self._results.get(request_id)
+            if existing is not None and existing.response is not None and response is None:
+                result = existing
+            self._results[request_id] = result
+            self._results.move_to_end(request_id)
+            self._evict_locked(result.completed_at)
+            waiters = self._waiters.pop(request_id, [])
+
+        for future in waiters:
+            self._set_future_result(future, result)
+
+    def get_result(self, request_id: str) -> Optional[CompletionResult]:
+        """Get the completed result for a request if it is still retained."""
+        with self._lock:
+            return self._get_result_locked(request_id)
+
+    async def wait(self, request_id: str, timeout: float) -> Optional[CompletionResult]:
+        """
+        Wait for a request to be resolved.
+
+        Args:
+            request_id: Request to wait for
+            timeout: Maximum seconds to wait
+
+        Returns:
+            CompletionResult, or None if the timeout elapsed first
+        """
+        loop = asyncio.get_running_loop()
+
+        with self._lock:
+            result = self._get_result_locked(request_id)
+            if result is not None:
+                return result
+            future = loop.create_future()
+            self._waiters.setdefault(request_id, []).append(future)
+
+        try:
+            return await asyncio.wait_for(asyncio.shield(future), timeout=max(0.0, timeout))
+        except asyncio.TimeoutError:
+            return None
+        finally:
+            if not future.done():
+                future.cancel()
+            with self._lock:
+                waiters = self._waiters.get(request_id)
+                if waiters is not None:
+                    if future in waiters:
+                        waiters.remove(future)
+                    if not waiters:
+                        self._waiters.pop(request_id, None)
+
+    def waiter_count(self, request_id: Optional[str] = None) -> int:
+        """Number of pending waiters, optionally for a single request."""
+        with self._lock:
+            if request_id is not None:
+                return len(self._waiters.get(request_id, []))
+            return sum(len(waiters) for waiters in self._waiters.values())
+
+    def stats(self) -> Dict[str, int]:
+        """Get registry statistics."""
+        with self._lock:
+            return {
+                "pending_requests": len(self._waiters),
+                "pending_waiters": sum(len(w) for w in self._waiters.values()),
+                "retained_results": len(self._results),
+            }
+
+    def _get_result_locked(self, request_id: str) -> Optional[CompletionResult]:
+        """Look up a retained result, dropping it if expired. Caller must hold the lock."""
+        result = self._results.get(request_id)
+        if result is None:
+            return None
+        if time.time() - result.completed_at > self.result_ttl_s:
+            self._results.pop(request_id, None)
+            return None
+        return result
+
+    def _evict_locked(self, now: float) -> None:
+        """Drop expired and overflow results. Caller must hold the lock."""
+        cutoff = now - self.result_ttl_s
+        while self._results:
+            oldest_id, oldest = next(iter(self._results.items()))
+            if len(self._results) > self.max_results or oldest.completed_at < cutoff:
+                self._results.pop(oldest_id, None)
+            else:
+                break
+
+    @staticmethod
+    def _set_future_result(future: asyncio.Future, result: CompletionResult) -> None:
+        """Complete a waiter future on its own event loop."""
+        def _apply() -> None:
+            if not future.done():
+                future.set_result(result)
+
+        loop = future.get_loop()
+        if loop.is_closed():
+            return
+        try:
+            running = asyncio.get_running_loop()
+        except RuntimeError:
+            running = None
+
+        if running is loop:
+            _apply()
+        else:
+            loop.call_soon_threadsafe(_apply)
@@ -56,6 +56,13 @@ class ProviderConfig:
     cli_command: Optional[str] = None
     cli_args: List[str] = field(default_factory=list)
     cli_cwd: Optional[str] = None
+    # Warm interactive CLI workers (0 = spawn a process per request).
+    # Requires interactive_args: the arguments that start the CLI as a REPL
+    # reading prompts from stdin (cli_args run it one-shot).
+    cli_workers: int = 0
+    interactive_args: Optional[List[str]] = None
+    cli_worker_max_requests: int = 100
+    cli_worker_max_rss_growth_mb: Optional[float] = 512.0
     fifo_path: Optional[str] = None
     terminal_pane_id: Optional[str] = None
     # Model config
@@ -96,6 +103,16 @@ class CacheConfig:
     enabled: bool = True
     default_ttl_s: float = 3600.0  # 1 hour default
     max_entries: int = 10000
+    # In-process L1 tier in front of the SQLite table
+    l1_max_entries: int = 1000
+    l1_max_bytes: int = 32 * 1024 * 1024
+    # How often aggregated hit counters are written back to SQLite
+    hit_flush_interval_s: float = 5.0
+    # Semantic tier: serve cached answers for paraphrased prompts
+    semantic_enabled: bool = False
+    semantic_threshold: float = 0.92
+    semantic_max_entries: int = 5000
+    semantic_model: str = "all-MiniLM-L6-v2"
     # TTL by provider
     provider_ttl_s: Dict[str, float] = field(default_factory=lambda: {
         "gemini": 3600.0,
@@ -158,6 +175,8 @@ class AuthConfig:
         "/docs",
         "/openapi.json",
     ])
+    key_cache_ttl_s: float = 30.0  # How long a verified (or rejected) key is trusted
+    last_used_flush_s: float = 30.0  # How often coalesced last_used_at updates are written
 
 @dataclass
 class RateLimitConfig:
@@ -173,6 +192,8 @@ class RateLimitConfig:
         "/api/ask/stream": 30,
         "/api/admin": 10,  # Very restrictive for admin endpoints
     })
+    shards: int = 16  # Bucket table shards (rounded up to a power of two)
+    idle_ttl_s: float = 3600.0  # Evict buckets unused for this long
 
 @dataclass
 class MetricsConfig:
@@ -181,6 +202,16 @@ class MetricsConfig:
     endpoint: str = "/metrics"
     use_prometheus_client: bool = True  # Use prometheus_client if available
 
+@dataclass
+class HTTPClientConfig:
+    """Configuration for the shared HTTP connection pool of HTTP backends."""
+    max_connections: int = 100  # Across all hosts (0 = unlimited)
+    max_connections_per_host: int = 20
+    keepalive_timeout_s: float = 60.0  # Idle time before a pooled connection is closed
+    dns_cache_ttl_s: Optional[float] = 300.0  # None caches forever
+    connect_timeout_s: float = 10.0
+    force_close: bool = False  # Disable keep-alive entirely
+
 @dataclass
 class GatewayConfig:
     """Gateway configuration."""
@@ -195,6 +226,8 @@ class GatewayConfig:
     # Queue settings
     max_queue_size: int = 1000
     max_concurrent_requests: int = 10
+    # Attach identical in-flight prompts to a single provider call
+    coalesce_requests: bool = True
     # Provider configs
     providers: Dict[str, ProviderConfig] = field(default_factory=dict)
     # Default provider for auto-routing
@@ -213,6 +246,7 @@ class GatewayConfig:
     auth: AuthConfig = field(default_factory=AuthConfig)
     rate_limit: RateLimitConfig = field(default_factory=RateLimitConfig)
     metrics: MetricsConfig = field(default_factory=MetricsConfig)
+    http_client: HTTPClientConfig = field(default_factory=HTTPClientConfig)
     # Health check configuration
     health_check: Dict[str, Any] = field(default_factory=dict)
 
@@ -272,6 +306,7 @@ class GatewayConfig:
             queue = data.get("queue", {})
             self.max_queue_size = queue.get("max_size", self.max_queue_size)
             self.max_concurrent_requests = queue.get("max_concurrent", self.max_concurrent_requests)
+            self.coalesce_requests = queue.get("coalesce", self.coalesce_requests)
 
             # Default provider
             self.default_provider = data.get("default_provider", self.default_provider)
@@ -286,6 +321,19 @@ class GatewayConfig:
             self.log_level = logging.get("level", self.log_level)
             self.log_file = logging.get("file", self.log_file)
 
+            # Shared HTTP connection pool
+            http_client = data.get("http_client", {})
+            for key in (
+                "max_connections",
+                "max_connections_per_host",
+                "keepalive_timeout_s",
+                "dns_cache_ttl_s",
+                "connect_timeout_s",
+                "force_close",
+            ):
+                if key in http_client:
+                    setattr(self.http_client, key, http_client[key])
+
             # Health check configuration
             self.health_check = data.get("health_check", {})
 
@@ -304,6 +352,16 @@ class GatewayConfig:
         except ValueError:
             backend_type = BackendType.CLI_EXEC
 
+        cli_workers = data.get("cli_workers", 0)
+        interactive_args = data.get("interactive_args")
+        if cli_workers > 0 and interactive_args is None:
+            logger.warning(
+                "Provider %s: cli_workers needs interactive_args; "
+                "serving it one process per request",
+                name,
+            )
+            cli_workers = 0
+
         return ProviderConfig(
             name=name,
             backend_type=backend_type,
@@ -316,6 +374,10 @@ class GatewayConfig:
             cli_command=data.get("cli_command"),
             cli_args=data.get("cli_args", []),
             cli_cwd=data.get("cli_cwd"),
+            cli_workers=cli_workers,
+            interactive_args=interactive_args,
+            cli_worker_max_requests=data.get("cli_worker_max_requests", 100),
+            cli_worker_max_rss_growth_mb=data.get("cli_worker_max_rss_growth_mb", 512.0),
             fifo_path=data.get("fifo_path"),
             terminal_pane_id=data.get("terminal_pane_id"),
             model=data.get("model"),
@@ -479,6 +541,7 @@ class GatewayConfig:
             "queue": {
                 "max_size": self.max_queue_size,
                 "max_concurrent": self.max_concurrent_requests,
+                "coalesce": self.coalesce_requests,
             },
             "default_provider": self.default_provider,
             "websocket": {
@@ -489,6 +552,14 @@ class GatewayConfig:
                 "level": self.log_level,
                 "file": self.log_file,
             },
+            "http_client": {
+                "max_connections": self.http_client.max_connections,
+                "max_connections_per_host": self.http_client.max_connections_per_host,
+                "keepalive_timeout_s": self.http_client.keepalive_timeout_s,
+                "dns_cache_ttl_s": self.http_client.dns_cache_ttl_s,
+                "connect_timeout_s": self.http_client.connect_timeout_s,
+                "force_close": self.http_client.force_close,
+            },
             "providers": {
                 name: {
                     "backend_type": p.backend_type.value,
@@ -0,0 +1,197 @@
+"""
+Shared HTTP client for CCB Gateway.
+
+All HTTP backends (and the CC Switch tester) send requests through one
+``aiohttp.ClientSession`` whose connector keeps connections alive, caps
+connections per host and caches DNS lookups, so repeated calls to the
+same provider reuse an open TLS connection instead of handshaking again.
+Connection reuse is counted and exported through ``GatewayMetrics``.
+"""
+from __future__ import annotations
+
+import asyncio
+from typing import TYPE_CHECKING, Any, Dict, Optional
+
+from lib.common.logging import get_logger
+
+from .gateway_config import HTTPClientConfig
+
+try:
+    import aiohttp
+
+    HAS_AIOHTTP = True
+except ImportError:  # pragma: no cover - optional dependency
+    aiohttp = None
+    HAS_AIOHTTP = False
+
+if TYPE_CHECKING:  # pragma: no cover - typing only
+    from .metrics import GatewayMetrics
+
+logger = get_logger("gateway.http_client")
+
+
+class HTTPClientPool:
+    """
+    Lazily created, process-wide ``aiohttp`` session with a tuned connector.
+
+    The session is bound to the event loop that first used it; a caller on
+    a different loop gets a fresh session (the old one is left to that
+    loop's owner).
+    """
+
+    def __init__(
+        self,
+        config: Optional[HTTPClientConfig] = None,
+        metrics: Optional["GatewayMetrics"] = None,
+    ):
+        """
+        Initialize the pool.
+
+        Args:
+            config: Connector limits and timeouts
+            metrics: Collector receiving connection reuse counters
+        """
+        self.config = config or HTTPClientConfig()
+        self.metrics = metrics
+
+        self._session = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._lock: Optional[asyncio.Lock] = None
+
+        self.requests = 0
+        self.connections_created = 0
+        self.connections_reused = 0
+        self.dns_cache_hits = 0
+        self.dns_cache_misses = 0
+
+    async def get_session(self):
+        """
+        Get the shared session, creating it on first use.
+
+        Raises:
+            ImportError: If aiohttp is not installed
+        """
+        if not HAS_AIOHTTP:
+            raise ImportError("aiohttp is required for HTTP backend. Install with: pip install aiohttp")
+
+        loop = asyncio.get_running_loop()
+        if self._session is not None and not self._session.closed and self._loop is loop:
+            return self._session
+
+        if self._lock is None or self._loop is not loop:
+            self._lock = asyncio.Lock()
+        async with self._lock:
+            if self._session is None or self._session.closed or self._loop is not loop:
+                self._session = self._create_session()
+                self._loop = loop
+        return self._session
+
+    def timeout(self, total_s: Optional[float]):
+        """Per-request timeout with the configured connect timeout."""
+        return aiohttp.ClientTimeout(total=total_s, connect=self.config.connect_timeout_s)
+
+    def _create_session(self):
+        cfg = self.config
+        connector = aiohttp.TCPConnector(
+            limit=cfg.max_connections,
+            limit_per_host=cfg.max_connections_per_host,
+            keepalive_timeout=None if cfg.force_close else cfg.keepalive_timeout_s,
+            force_close=cfg.force_close,
+            use_dns_cache=True,
+            ttl_dns_cache=cfg.dns_cache_ttl_s,
+            enable_cleanup_closed=True,
+        )
+        return aiohttp.ClientSession(
+            connector=connector,
+            timeout=aiohttp.ClientTimeout(total=None, connect=cfg.connect_timeout_s),
+            trace_configs=[self._trace_config()],
+        )
+
+    def _trace_config(self):
+        trace = aiohttp.TraceConfig()
+
+        async def on_request_start(session, ctx, params) -> None:
+            self.requests += 1
+            ctx.host = params.url.host or ""
+
+        async def on_connection_create_end(session, ctx, params) -> None:
+            self.connections_created += 1
+            if self.metrics is not None:
+                self.metrics.inc_http_connections(getattr(ctx, "host", ""), "new")
+
+        async def on_connection_reuseconn(session, ctx, params) -> None:
+            self.connections_reused += 1
+            if self.metrics is not None:
+                self.metrics.inc_http_connections(getattr(ctx, "host", ""), "reused")
+
+        async def on_dns_cache_hit(session, ctx, params) -> None:
+            self.dns_cache_hits += 1
+
+        async def on_dns_cache_miss(session, ctx, params) -> None:
+            self.dns_cache_misses += 1
+
+        trace.on_request_start.append(on_request_start)
+        trace.on_connection_create_end.append(on_connection_create_end)
+        trace.on_connection_reuseconn.append(on_connection_reuseconn)
+        trace.on_dns_cache_hit.append(on_dns_cache_hit)
+        trace.on_dns_cache_miss.append(on_dns_cache_miss)
+        return trace
+
+    async def close(self) -> None:
+        """Close the shared session and its pooled connections."""
+        session, self._session = self._session, None
+        if session is not None and not session.closed:
+            await session.close()
+
+    def stats(self) -> Dict[str, Any]:
+        """Connection pool statistics."""
+        connections = self.connections_created + self.connections_reused
+        open_connections = 0
+        if self._session is not None and not self._session.closed:
+            connector = self._session.connector
+            open_connections = sum(len(conns) for conns in getattr(connector, "_conns", {}).values())
+        return {
+            "requests": self.requests,
+            "connections_created": self.connections_created,
+            "connections_reused": self.connections_reused,
+            "reuse_ratio": self.connections_reused / connections if connections else 0.0,
+            "idle_connections": open_connections,
+            "dns_cache_hits": self.dns_cache_hits,
+            "dns_cache_misses": self.dns_cache_misses,
+            "max_connections": self.config.max_connections,
+            "max_connections_per_host": self.config.max_connections_per_host,
+        }
+
+
+# Global instance
+_http_client: Optional[HTTPClientPool] = None
+
+
+def get_http_client() -> HTTPClientPool:
+    """Get the global HTTP client pool."""
+    global _http_client
+    if _http_client is None:
+        _http_client = HTTPClientPool()
+    return _http_client
+
+
+def configure_http_client(
+    config: HTTPClientConfig,
+    metrics: Optional["GatewayMetrics"] = None,
+) -> HTTPClientPool:
+    """
+    Apply gateway configuration to the global HTTP client pool.
+
+    Takes effect for sessions created afterwards.
+    """
+    client = get_http_client()
+    client.config = config
+    if metrics is not None:
+        client.metrics = metrics
+    return client
+
+
+async def close_http_client() -> None:
+    """Close the global HTTP client pool's session."""
+    if _http_client is not None:
+        await _http_client.close()
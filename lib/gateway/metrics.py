@@ -163,6 +163,14 @@ class GatewayMetrics:
             registry=self._registry,
         )
 
+        # Outbound HTTP connections by host, "new" or "reused" from the pool
+        self.http_connections_total = Counter(
+            "gateway_http_connections_total",
+            "Outbound HTTP connections acquired by HTTP backends",
+            ["host", "kind"],
+            registry=self._registry,
+        )
+
     def _init_fallback_metrics(self) -> None:
         """Initialize fallback metrics (no prometheus_client)."""
         self._counters: Dict[str, Dict[tuple, int]] = defaultdict(lambda: defaultdict(int))
@@ -227,6 +235,13 @@ class GatewayMetrics:
         else:
             self._counters["errors_total"][(provider, error_type)] += 1
 
+    def inc_http_connections(self, host: str, kind: str) -> None:
+        """Increment outbound connection counter (kind is "new" or "reused")."""
+        if self._use_native:
+            self.http_connections_total.labels(host=host, kind=kind).inc()
+        else:
+            self._counters["http_connections_total"][(host, kind)] += 1
+
     # ==================== Gauge Methods ====================
 
     def set_queue_depth(self, provider: str, depth: int) -> None:
@@ -328,6 +343,7 @@ class GatewayMetrics:
             "rate_limit_hits": ["key_type"],
             "tokens_used": ["provider"],
             "errors_total": ["provider", "error_type"],
+            "http_connections_total": ["host", "kind"],
             "queue_depth": ["provider"],
             "request_latency": ["provider"],
         }
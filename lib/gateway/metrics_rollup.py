@@ -0,0 +1,240 @@
+"""
+Time-bucketed provider metrics for the gateway state store.
+
+Every metric event updates one bucket per resolution tier (1s, 1m, 1h by
+default) holding the event count, error count and a ``LatencySketch``
+(which carries the exact latency count, sum, min and max). Each tier keeps
+its buckets only for its own retention; a fine bucket can be dropped as soon
+as it expires because the coarser tiers already hold its totals, so the
+data is downsampled automatically as it ages.
+
+A window query combines whole coarse buckets with finer ones at its leading
+edge, so it merges at most a few hundred buckets whatever the traffic. The
+store persists changed buckets as one compact row each and reloads them at
+startup.
+"""
+from __future__ import annotations
+
+import math
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+from lib.latency_sketch import LatencySketch
+
+
+@dataclass(frozen=True)
+class RollupTier:
+    """One bucket resolution and how long its buckets are kept."""
+    resolution_s: int
+    retention_s: float
+
+    def bucket_start(self, timestamp: float) -> float:
+        return math.floor(timestamp / self.resolution_s) * self.resolution_s
+
+
+def default_tiers(hourly_retention_s: float = 168 * 3600.0) -> Tuple[RollupTier, ...]:
+    """1s buckets for 10 minutes, 1m buckets for 48 hours, 1h buckets beyond."""
+    return (
+        RollupTier(1, 600.0),
+        RollupTier(60, min(48 * 3600.0, hourly_retention_s)),
+        RollupTier(3600, hourly_retention_s),
+    )
+
+
+class RollupBucket:
+    """Totals of the events that fell into one time bucket."""
+
+    __slots__ = ("count", "errors", "latency")
+
+    def __init__(self, count: int = 0, errors: int = 0, latency: Optional[LatencySketch] = None):
+        self.count = count
+        self.errors = errors
+        self.latency = latency if latency is not None else LatencySketch()
+
+    def merge(self, other: "RollupBucket") -> None:
+        self.count += other.count
+        self.errors += other.errors
+        self.latency.merge(other.latency)
+
+
+# (resolution_s, provider, bucket_start)
+BucketKey = Tuple[int, str, float]
+
+
+class MetricsRollup:
+    """
+    Thread-safe in-memory rollup of provider metric events.
+
+    Buckets changed since the last ``drain_dirty`` are tracked so the owner
+    can persist just those.
+    """
+
+    def __init__(self, tiers: Optional[Iterable[RollupTier]] = None):
+        """
+        Initialize the rollup.
+
+        Args:
+            tiers: Resolution tiers (default: ``default_tiers()``)
+        """
+        self.tiers = tuple(sorted(tiers or default_tiers(), key=lambda t: t.resolution_s))
+        if not self.tiers:
+            raise ValueError("MetricsRollup needs at least one tier")
+        # resolution_s -> provider -> bucket_start -> bucket
+        self._buckets: Dict[int, Dict[str, Dict[float, RollupBucket]]] = {
+            tier.resolution_s: {} for tier in self.tiers
+        }
+        self._dirty: Set[BucketKey] = set()
+        self._lock = threading.Lock()
+
+    def record(
+        self,
+        provider: str,
+        success: bool = True,
+        latency_ms: Optional[float] = None,
+        timestamp: Optional[float] = None,
+    ) -> None:
+        """Count one event in every tier."""
+        ts = time.time() if timestamp is None else timestamp
+        with self._lock:
+            for tier in self.tiers:
+                start = tier.bucket_start(ts)
+                buckets = self._buckets[tier.resolution_s].setdefault(provider, {})
+                bucket = buckets.get(start)
+                if bucket is None:
+                    bucket = buckets[start] = RollupBucket()
+                bucket.count += 1
+                if not success:
+                    bucket.errors += 1
+                if latency_ms is not None:
+                    bucket.latency.add(latency_ms)
+                self._dirty.add((tier.resolution_s, provider, start))
+
+    def load(self, resolution_s: int, provider: str, bucket_start: float, bucket: RollupBucket) -> None:
+        """Merge a persisted bucket back in (buckets of unknown tiers are ignored)."""
+        with self._lock:
+            tier_buckets = self._buckets.get(resolution_s)
+            if tier_buckets is None:
+                return
+            buckets = tier_buckets.setdefault(provider, {})
+            existing = buckets.get(bucket_start)
+            if existing is None:
+                buckets[bucket_start] = bucket
+            else:
+                existing.merge(bucket)
+
+    def mark_dirty(self) -> None:
+        """Mark every bucket as changed (e.g. after folding in legacy data)."""
+        with self._lock:
+            for resolution_s, providers in self._buckets.items():
+                for provider, buckets in providers.items():
+                    self._dirty.update((resolution_s, provider, start) for start in buckets)
+
+    def drain_dirty(self) -> List[Tuple[BucketKey, RollupBucket]]:
+        """
+        Take the buckets changed since the last call.
+
+        Returns:
+            ``((resolution_s, provider, bucket_start), bucket)`` pairs; the
+            buckets are copies, safe to serialize outside the lock
+        """
+        with self._lock:
+            dirty, self._dirty = self._dirty, set()
+            result = []
+            for key in dirty:
+                resolution_s, provider, start = key
+                bucket = self._buckets[resolution_s].get(provider, {}).get(start)
+                if bucket is not None:
+                    result.append((key, RollupBucket(bucket.count, bucket.errors, bucket.latency.copy())))
+            return result
+
+    def prune(self, now: Optional[float] = None, max_age_s: Optional[float] = None) -> Dict[int, float]:
+        """
+        Drop buckets that ended before their tier's retention.
+
+        Args:
+            now: Reference time (default: now)
+            max_age_s: Additional cap on the age of kept buckets in every tier
+
+        Returns:
+            ``{resolution_s: cutoff}``; buckets that started before the
+            cutoff were dropped
+        """
+        now = time.time() if now is None else now
+        cutoffs = {}
+        with self._lock:
+            for tier in self.tiers:
+                age = tier.retention_s if max_age_s is None else min(tier.retention_s, max_age_s)
+                # A bucket is kept while any part of it is inside the retention
+                cutoff = tier.bucket_start(now - age)
+                cutoffs[tier.resolution_s] = cutoff
+                providers = self._buckets[tier.resolution_s]
+                for provider in list(providers):
+                    buckets = providers[provider]
+                    for start in [s for s in buckets if s < cutoff]:
+                        del buckets[start]
+                        self._dirty.discard((tier.resolution_s, provider, start))
+                    if not buckets:
+                        del providers[provider]
+        return cutoffs
+
+    def _covering_buckets(self, provider: str, since: Optional[float], now: float) -> List[RollupBucket]:
+        """
+        Buckets that together cover ``[since, now]`` exactly once.
+
+        Whole buckets of the coarsest tier are used back to the first
+        boundary after ``since``, then each finer tier fills the gap before
+        that boundary. The finest tier still retaining ``since`` rounds the
+        window out to its bucket edge.
+        """
+        coarsest = self.tiers[-1]
+        if since is None:
+            return list(self._buckets[coarsest.resolution_s].get(provider, {}).values())
+
+        covering = [t for t in self.tiers if since >= now - t.retention_s] or [coarsest]
+        finest = covering[0]
+        result: List[RollupBucket] = []
+        upper = math.inf
+        for tier in reversed(self.tiers):
+            if tier.resolution_s < finest.resolution_s:
+                break
+            if tier is finest:
+                lower = tier.bucket_start(since)
+            else:
+                lower = math.ceil(since / tier.resolution_s) * tier.resolution_s
+            result.extend(
+                bucket for start, bucket in self._buckets[tier.resolution_s].get(provider, {}).items()
+                if lower <= start < upper
+            )
+            upper = min(upper, lower)
+        return result
+
+    def summary(self, provider: str, since: Optional[float] = None, now: Optional[float] = None) -> RollupBucket:
+        """
+        Merge ``provider``'s events from ``since`` until now.
+
+        Returns:
+            A new bucket with the window's totals and latency sketch
+        """
+        now = time.time() if now is None else now
+        result = RollupBucket()
+        with self._lock:
+            for bucket in self._covering_buckets(provider, since, now):
+                result.merge(bucket)
+        return result
+
+    def providers(self) -> List[str]:
+        with self._lock:
+            return sorted({p for providers in self._buckets.values() for p in providers})
+
+    def stats(self) -> Dict[str, Any]:
+        """Bucket counts per tier."""
+        with self._lock:
+            return {
+                "buckets": {
+                    f"{resolution_s}s": sum(len(b) for b in providers.values())
+                    for resolution_s, providers in self._buckets.items()
+                },
+                "dirty": len(self._dirty),
+            }
@@ -3,6 +3,9 @@
 import asyncio
 import json
 import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 from pathlib import Path
 from typing import Any, Dict, List, Optional
@@ -23,6 +26,19 @@ except ImportError:
 
 logger = get_logger("gateway.middleware.memory")
 
+# Per-stage deadlines for pre_request (ms); stages that miss them are skipped
+DEFAULT_STAGE_TIMEOUTS_MS = {
+    "keywords": 1000,
+    "skills": 800,
+    "retrieval": 500,
+    "system_context": 300,
+    "recommendation": 300,
+}
+
+# Stages that call out to Ollama / npx; they get their own small pool so a
+# slow external service cannot occupy the workers of in-process stages
+EXTERNAL_STAGES = frozenset({"keywords", "skills"})
+
 
 class MemoryMiddlewareCoreMixin:
     """Mixin methods extracted from MemoryMiddleware."""
@@ -59,6 +75,39 @@ class MemoryMiddlewareCoreMixin:
             except (RuntimeError, ValueError, TypeError, KeyError, AttributeError, OSError) as e:
                 logger.info(f"Heuristic retriever init error: {e}")
 
+        # pre_request stages run on dedicated pools so they never block the
+        # event loop. External stages (Ollama, npx) get a separate pool, and a
+        # stage whose pool has no free worker is shed instead of queued.
+        memory_config = self.config.get("memory", {})
+        self.injection_budget_s = memory_config.get("injection_budget_ms", 1500) / 1000.0
+        self.stage_timeouts_s = {
+            stage: timeout_ms / 1000.0
+            for stage, timeout_ms in {
+                **DEFAULT_STAGE_TIMEOUTS_MS,
+                **memory_config.get("stage_timeouts_ms", {}),
+            }.items()
+        }
+        stage_workers = memory_config.get("stage_workers", 8)
+        external_workers = memory_config.get("external_stage_workers", 2)
+        self._stage_executor = ThreadPoolExecutor(
+            max_workers=stage_workers,
+            thread_name_prefix="memory-stage",
+        )
+        self._external_executor = ThreadPoolExecutor(
+            max_workers=external_workers,
+            thread_name_prefix="memory-external",
+        )
+        # Free workers per pool; abandoned stages hold theirs until they return
+        self._stage_slots = threading.Semaphore(stage_workers)
+        self._external_slots = threading.Semaphore(external_workers)
+        # Injection tracking is a DB write; it must not compete with stages
+        self._tracking_executor = ThreadPoolExecutor(
+            max_workers=1,
+            thread_name_prefix="memory-tracking",
+        )
+        self.stage_timeouts: Dict[str, int] = {}
+        self.stage_shed: Dict[str, int] = {}
+
         logger.info(f"Initialized (enabled={self.enabled}, heuristic={self.heuristic_retriever is not None})")
         logger.info(f"System context preloaded: {self.system_context.get_stats()}")
         logger.info(f"Skills discovery: {self.enable_skill_discovery}")
@@ -80,7 +129,9 @@ class MemoryMiddlewareCoreMixin:
                 "max_injected_memories": 5,
                 "inject_system_context": True,  # 新增：注入系统上下文
                 "injection_strategy": "recent_plus_relevant",
-                "use_heuristic_retrieval": True  # v2.0: 使用启发式检索
+                "use_heuristic_retrieval": True,  # v2.0: 使用启发式检索
+                "injection_budget_ms": 1500,  # pre_request 总延迟预算
+                "stage_timeouts_ms": dict(DEFAULT_STAGE_TIMEOUTS_MS)
             },
             "skills": {
                 "auto_discover": True,  # 🆕 自动发现相关技能
@@ -103,6 +154,10 @@ class MemoryMiddlewareCoreMixin:
         2. 搜索相关记忆
         3. 推荐最佳 Provider
         4. 注入上下文到 prompt
+
+        Stages run concurrently on the stage pool with per-stage deadlines
+        and a total ``injection_budget_ms``; injection proceeds with whatever
+        stages finished in time.
         """
         if not self.enabled or not self.auto_inject:
             return request
@@ -113,97 +168,90 @@ class MemoryMiddlewareCoreMixin:
 
         logger.info(f"Pre-request: provider={provider}, message_len={len(message)}")
 
-        # 1. 提取任务关键词
-        keywords = self._extract_keywords(message)
-        logger.info(f"Extracted keywords: {keywords}")
+        started = time.monotonic()
+        deadline = started + self.injection_budget_s
+        skipped: List[str] = []
 
-        # 🆕 1.5. Skills Discovery - 发现相关技能
-        skill_recommendations = None
+        # Keywords and skills discovery only need the message: start both now
+        keywords_future = self._start_stage(
+            "keywords", skipped, self._extract_keywords, message,
+            timeout_s=self._stage_budget_s("keywords", deadline),
+        )
+        skills_future = None
         if self.enable_skill_discovery:
-            try:
-                skill_recommendations = self.skills_discovery.get_recommendations(message)
-                if skill_recommendations['found']:
-                    logger.info(f"{skill_recommendations['message']}")
-            except (RuntimeError, ValueError, TypeError, KeyError, AttributeError, OSError) as e:
-                logger.info(f"Skills discovery error: {e}")
+            skills_future = self._start_stage(
+                "skills", skipped, self.skills_discovery.get_recommendations, message,
+                remote_timeout_s=self._stage_budget_s("skills", deadline),
+            )
+
+        # 1. 提取任务关键词 (regex fallback if the keyword model is too slow)
+        keywords = await self._await_stage("keywords", keywords_future, deadline, skipped)
+        if keywords is None:
+            keywords = self._extract_keywords_regex(message)
+        logger.info(f"Extracted keywords: {keywords}")
 
-        # 2. 搜索相关记忆 (v2.0: 使用启发式检索)
-        relevant_memories = []
-        heuristic_results = []  # v2.0: 保存评分结果
+        # 2-4. Keyword-dependent stages run concurrently
+        retrieval_future = None
         if keywords:
-            try:
-                if self.heuristic_retriever:
-                    # v2.0: 使用 HeuristicRetriever 的 αR + βI + γT 评分
-                    heuristic_results = self.heuristic_retriever.retrieve(
-                        " ".join(keywords),
-                        limit=self.max_injected,
-                        request_id=request.get("request_id"),
-                        track_access=True
-                    )
-                    # 转换为兼容格式
-                    relevant_memories = [
-                        {
-                            "id": m.memory_id,
-                            "message_id": m.memory_id,
-                            "provider": m.provider,
-                            "question": "",
-                            "answer": m.content[:300] if m.role == 'assistant' else m.content[:300],
-                            "timestamp": m.timestamp,
-                            "relevance_score": m.relevance_score,
-                            "importance_score": m.importance_score,
-                            "recency_score": m.recency_score,
-                            "final_score": m.final_score
-                        }
-                        for m in heuristic_results
-                    ]
-                    logger.info(f"Heuristic search: found {len(relevant_memories)} memories")
-                else:
-                    # 回退到基本搜索
-                    relevant_memories = self.memory.search_conversations(
-                        " ".join(keywords),
-                        limit=self.max_injected
-                    )
-                    logger.info(f"Basic search: found {len(relevant_memories)} memories")
-            except (RuntimeError, ValueError, TypeError, KeyError, AttributeError, OSError) as e:
-                logger.info(f"Search error: {e}")
-
-        # 3. 推荐最佳 Provider（如果启用）
-        logger.info(f"Provider before recommendation: {provider}")
+            retrieval_future = self._start_stage(
+                "retrieval", skipped,
+                self._search_relevant_memories, keywords, request.get("request_id"),
+            )
+
+        system_future = None
+        if self.inject_system_context:
+            system_future = self._start_stage(
+                "system_context", skipped,
+                self.system_context.get_relevant_context,
+                keywords,
+                provider or request.get("provider", "unknown"),
+            )
+
+        recommendation_future = None
         recommendation_config = self.config.get("recommendation", {})
         if recommendation_config.get("enabled", True) and provider in ["auto", None]:
             logger.info(f"Entering recommendation logic (provider={provider})")
-            try:
-                recommendations = self.registry.recommend_provider(keywords)
-                if recommendations:
-                    recommended_provider = recommendations[0]["provider"]
-                    reason = recommendations[0]["reason"]
-
-                    logger.info(f"Recommended: {recommended_provider} ({reason})")
-
-                    if recommendation_config.get("auto_switch_provider", False):
-                        logger.info(f"Auto-switching provider: {provider} -> {recommended_provider}")
-                        request["provider"] = recommended_provider
-                        request["_recommendation"] = {
-                            "provider": recommended_provider,
-                            "reason": reason,
-                            "auto_switched": True
-                        }
-            except (RuntimeError, ValueError, TypeError, KeyError, AttributeError, OSError) as e:
-                logger.info(f"Recommendation error: {e}")
+            recommendation_future = self._start_stage(
+                "recommendation", skipped, self.registry.recommend_provider, keywords
+            )
+
+        relevant_memories = await self._await_stage("retrieval", retrieval_future, deadline, skipped) or []
+        system_ctx = await self._await_stage("system_context", system_future, deadline, skipped)
+        recommendations = await self._await_stage("recommendation", recommendation_future, deadline, skipped)
+
+        # 🆕 1.5. Skills Discovery - 发现相关技能
+        skill_recommendations = await self._await_stage("skills", skills_future, deadline, skipped)
+        if skill_recommendations and skill_recommendations.get('found'):
+            logger.info(f"{skill_recommendations['message']}")
+
+        # 3. 推荐最佳 Provider（如果启用）
+        logger.info(f"Provider before recommendation: {provider}")
+        try:
+            if recommendations:
+                recommended_provider = recommendations[0]["provider"]
+                reason = recommendations[0]["reason"]
+
+                logger.info(f"Recommended: {recommended_provider} ({reason})")
+
+                if recommendation_config.get("auto_switch_provider", False):
+                    logger.info(f"Auto-switching provider: {provider} -> {recommended_provider}")
+                    request["provider"] = recommended_provider
+                    request["_recommendation"] = {
+                        "provider": recommended_provider,
+                        "reason": reason,
+                        "auto_switched": True
+                    }
+        except (RuntimeError, ValueError, TypeError, KeyError, AttributeError, OSError) as e:
+            logger.info(f"Recommendation error: {e}")
 
         # 4. 注入上下文（包括系统上下文和相关记忆）
         try:
             context_parts = []
 
             # 4a. 注入预埋的系统上下文（Skills、MCP、Providers）
-            if self.inject_system_context:
-                system_ctx = self.system_context.get_relevant_context(
-                    keywords,
-                    provider or request.get("provider", "unknown")
-                )
-                if system_ctx:
-                    context_parts.append(system_ctx)
-                    logger.info(f"System context injected")
+            if system_ctx:
+                context_parts.append(system_ctx)
+                logger.info(f"System context injected")
 
             # 4b. 注入相关记忆
             if relevant_memories:
@@ -235,36 +283,154 @@ class MemoryMiddlewareCoreMixin:
 """
                 request["_memory_injected"] = True
                 request["_memory_count"] = len(relevant_memories)
-                request["_system_context_injected"] = self.inject_system_context
+                request["_system_context_injected"] = bool(system_ctx)
                 request["_skills_recommended"] = bool(skill_recommendations and skill_recommendations['found'])
 
                 # 🆕 Phase 1: 追踪注入详情（如果有 request_id）
                 request_id = request.get("request_id")
                 if request_id:
-                    self._track_injection(
+                    # Bookkeeping write; don't hold up the request for it
+                    self._tracking_executor.submit(
+                        self._track_injection,
                         request_id=request_id,
                         provider=provider,
                         original_message=message,
                         memories=relevant_memories,
                         skills=skill_recommendations,
-                        system_context_injected=self.inject_system_context
+                        system_context_injected=bool(system_ctx)
                     )
 
         except (RuntimeError, ValueError, TypeError, KeyError, AttributeError, OSError) as e:
             logger.info(f"Context injection error: {e}")
 
+        request["_injection_ms"] = round((time.monotonic() - started) * 1000, 1)
+        if skipped:
+            request["_injection_skipped_stages"] = skipped
+            logger.info(f"Injection stages over budget: {skipped}")
+
         return request
 
-    def _extract_keywords(self, text: str) -> List[str]:
-        """提取任务关键词（v3: 使用本地 LLM 提取语义关键词）"""
+    def _start_stage(
+        self, name: str, skipped: List[str], func, *args, **kwargs
+    ) -> Optional[asyncio.Future]:
+        """
+        Run a blocking pre_request stage on its pool.
+
+        Returns None (and records the stage as skipped) when every worker of
+        the pool is busy, e.g. with stages abandoned by earlier requests, so
+        work is shed instead of queueing behind them.
+        """
+        if name in EXTERNAL_STAGES:
+            executor, slots = self._external_executor, self._external_slots
+        else:
+            executor, slots = self._stage_executor, self._stage_slots
+        if not slots.acquire(blocking=False):
+            skipped.append(name)
+            self.stage_shed[name] = self.stage_shed.get(name, 0) + 1
+            return None
+
+        def _run():
+            try:
+                return func(*args, **kwargs)
+            finally:
+                slots.release()
+
+        loop = asyncio.get_running_loop()
+        try:
+            return loop.run_in_executor(executor, _run)
+        except RuntimeError:
+            # Executor already shut down
+            slots.release()
+            raise
+
+    def _stage_budget_s(self, name: str, deadline: float) -> float:
+        """Time a stage may still take: its own timeout capped by the deadline."""
+        return max(0.0, min(self.stage_timeouts_s.get(name, self.injection_budget_s), deadline - time.monotonic()))
+
+    def close(self) -> None:
+        """Stop the stage and tracking pools (running stages are not waited for)."""
+        for executor in (self._stage_executor, self._external_executor, self._tracking_executor):
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    async def _await_stage(
+        self,
+        name: str,
+        future: Optional[asyncio.Future],
+        deadline: float,
+        skipped: List[str],
+    ) -> Any:
+        """
+        Wait for a stage until its own timeout or the shared deadline.
+
+        Returns None if the stage was not started, failed, or ran out of
+        time (the worker thread finishes in the background and is ignored).
+        """
+        if future is None:
+            return None
+
+        try:
+            return await asyncio.wait_for(asyncio.shield(future), timeout=self._stage_budget_s(name, deadline))
+        except asyncio.TimeoutError:
+            skipped.append(name)
+            self.stage_timeouts[name] = self.stage_timeouts.get(name, 0) + 1
+            return None
+        except (RuntimeError, ValueError, TypeError, KeyError, AttributeError, OSError) as e:
+            logger.info(f"Pre-request stage {name} error: {e}")
+            return None
+
+    def _search_relevant_memories(self, keywords: List[str], request_id: Optional[str]) -> List[Dict[str, Any]]:
+        """搜索相关记忆 (v2.0: 使用启发式检索)"""
+        try:
+            if self.heuristic_retriever:
+                # v2.0: 使用 HeuristicRetriever 的 αR + βI + γT 评分
+                heuristic_results = self.heuristic_retriever.retrieve(
+                    " ".join(keywords),
+                    limit=self.max_injected,
+                    request_id=request_id,
+                    track_access=True
+                )
+                # 转换为兼容格式
+                relevant_memories = [
+                    {
+                        "id": m.memory_id,
+                        "message_id": m.memory_id,
+                        "provider": m.provider,
+                        "question": "",
+                        "answer": m.content[:300] if m.role == 'assistant' else m.content[:300],
+                        "timestamp": m.timestamp,
+                        "relevance_score": m.relevance_score,
+                        "importance_score": m.importance_score,
+                        "recency_score": m.recency_score,
+                        "final_score": m.final_score
+                    }
+                    for m in heuristic_results
+                ]
+                logger.info(f"Heuristic search: found {len(relevant_memories)} memories")
+            else:
+                # 回退到基本搜索
+                relevant_memories = self.memory.search_conversations(
+                    " ".join(keywords),
+                    limit=self.max_injected
+                )
+                logger.info(f"Basic search: found {len(relevant_memories)} memories")
+            return relevant_memories
+        except (RuntimeError, ValueError, TypeError, KeyError, AttributeError, OSError) as e:
+            logger.info(f"Search error: {e}")
+            return []
+
+    def _extract_keywords(self, text: str, timeout_s: Optional[float] = None) -> List[str]:
+        """提取任务关键词（v3: 使用本地 LLM 提取语义关键词）
+
+        ``timeout_s`` caps the total time spent on LLM calls.
+        """
         # 尝试使用 LLM 提取，如果失败则回退到正则提取
         try:
-            return self._extract_keywords_with_llm(text)
+            return self._extract_keywords_with_llm(text, timeout_s)
         except (RuntimeError, ValueError, TypeError, KeyError, AttributeError, OSError) as e:
             logger.info(f"LLM extraction failed: {e}, fallback to regex")
             return self._extract_keywords_regex(text)
 
-    def _extract_keywords_with_llm(self, text: str) -> List[str]:
+    def _extract_keywords_with_llm(self, text: str, timeout_s: Optional[float] = None) -> List[str]:
         """
         使用 Ollama 智能路由提取关键词
 
@@ -272,6 +438,9 @@ class MemoryMiddlewareCoreMixin:
         1. 首选本地 qwen2.5:7b（快速，无网络依赖）
         2. 本地超时/失败 → 自动切换云端 deepseek-v3.1:671b-cloud
         3. 云端失败 → 回退到正则提取
+
+        With ``timeout_s``, each call's timeout is capped by the time left and
+        no further model is tried once it is used up.
         """
         import requests
         import re
@@ -305,11 +474,17 @@ class MemoryMiddlewareCoreMixin:
             }
         ]
 
+        deadline = time.monotonic() + timeout_s if timeout_s is not None else None
         last_error = None
         for model_config in models:
             model_name = model_config['name']
             timeout = model_config['timeout']
             location = model_config['location']
+            if deadline is not None:
+                timeout = min(timeout, deadline - time.monotonic())
+                if timeout <= 0:
+                    last_error = "deadline"
+                    break
 
             try:
                 response = requests.post(
@@ -358,7 +533,7 @@ class MemoryMiddlewareCoreMixin:
                 continue  # 尝试下一个模型
 
         # 所有模型都失败
-        raise Exception(f"LLM extraction failed, fallback to regex")
+        raise RuntimeError(f"LLM extraction failed ({last_error}), fallback to regex")
 
     def _extract_keywords_regex(self, text: str) -> List[str]:
         """正则提取关键词（回退方案）"""
@@ -150,7 +150,10 @@ class MemoryMiddlewarePostMixin:
             "auto_inject": self.auto_inject,
             "auto_record": self.auto_record,
             "memory_stats": self.memory.get_stats(),
-            "heuristic_enabled": self.heuristic_retriever is not None
+            "heuristic_enabled": self.heuristic_retriever is not None,
+            "injection_budget_ms": self.injection_budget_s * 1000,
+            "stage_timeouts": dict(self.stage_timeouts),
+            "stage_shed": dict(self.stage_shed)
         }
 
         # v2.0: 添加启发式检索统计
@@ -36,6 +36,7 @@ __all__ = [
     "BatchCancelRequest",
     "BatchStatusRequest",
     "BatchReplyRequest",
+    "BatchJobRequest",
     "ParallelResponse",
     "CreateAPIKeyRequest",
     "CreateAPIKeyResponse",
@@ -1,7 +1,7 @@
 """Pydantic request/response models for gateway HTTP API."""
 from __future__ import annotations
 
-from typing import Optional, Dict, Any, List
+from typing import Optional, Dict, Any, List, Union
 
 from .models_base import BaseModel, Field
 
@@ -21,7 +21,7 @@ class AskResponse(BaseModel):
     request_id: str
     provider: str
     status: str
-    cached: bool = False
+    cached: Union[bool, str] = False
     parallel: bool = False
     agent: Optional[str] = None
 
@@ -32,7 +32,7 @@ class ReplyResponse(BaseModel):
     response: Optional[str] = None
     error: Optional[str] = None
     latency_ms: Optional[float] = None
-    cached: bool = False
+    cached: Union[bool, str] = False
     retry_info: Optional[Dict[str, Any]] = None
     thinking: Optional[str] = None
     raw_output: Optional[str] = None
@@ -74,6 +74,13 @@ class BatchReplyRequest(BaseModel):
     """Request body for batch reply query."""
     request_ids: List[str] = Field(..., min_length=1, max_length=100, description="List of request IDs to fetch replies")
 
+class BatchJobRequest(BaseModel):
+    """Request body for starting a gateway-run batch job."""
+    messages: List[str] = Field(..., min_length=1, description="Messages to process, one task each")
+    provider: Optional[str] = Field(None, description="Provider for all tasks (default provider if not specified)")
+    timeout_s: float = Field(300.0, description="Timeout per task in seconds")
+    priority: int = Field(40, description="Queue priority of the batch's requests (below default /api/ask traffic)")
+
 class ParallelResponse(BaseModel):
     """Response body for parallel query results."""
     request_id: str
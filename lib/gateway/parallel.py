@@ -8,10 +8,11 @@ from __future__ import annotations
 
 import asyncio
 import time
-from dataclasses import dataclass, field
+from dataclasses import dataclass, field, replace
 from enum import Enum
 from typing import Optional, Dict, Any, List, TYPE_CHECKING
 
+from .cache import generate_cache_key
 from .parallel_utils import compare_responses, parse_provider_spec
 
 if TYPE_CHECKING:
@@ -111,6 +112,8 @@ class ParallelExecutor:
         """
         self.config = config
         self.backends = backends
+        # (provider, prompt) calls in flight, shared by overlapping fan-outs
+        self._inflight: Dict[str, asyncio.Future] = {}
 
     async def execute_parallel(
         self,
@@ -167,8 +170,46 @@ class ParallelExecutor:
         request: "GatewayRequest",
         provider: str,
     ) -> ProviderResponse:
-        """Execute request on a single provider."""
-        from .backends.base_backend import BackendResult
+        """
+        Execute request on a single provider.
+
+        Concurrent fan-outs that send the same prompt to the same provider
+        share one backend call; joiners get a copy marked ``coalesced``.
+        """
+        model = request.metadata.get("model") if request.metadata else None
+        key = generate_cache_key(provider, request.message, model)
+
+        inflight = self._inflight.get(key)
+        if inflight is not None:
+            start_time = time.time()
+            shared = await asyncio.shield(inflight)
+            if shared is not None:
+                return replace(
+                    shared,
+                    latency_ms=(time.time() - start_time) * 1000,
+                    metadata={**(shared.metadata or {}), "coalesced": True},
+                )
+            # The shared call was cancelled before finishing; run our own
+
+        future: asyncio.Future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        response: Optional[ProviderResponse] = None
+        try:
+            response = await self._run_single(request, provider)
+            return response
+        finally:
+            if self._inflight.get(key) is future:
+                self._inflight.pop(key, None)
+            if not future.done():
+                future.set_result(response)
+
+    async def _run_single(
+        self,
+        request: "GatewayRequest",
+        provider: str,
+    ) -> ProviderResponse:
+        """Call one provider's backend for a parallel request."""
+        from .models import GatewayRequest
 
         backend = self.backends.get(provider)
         if not backend:
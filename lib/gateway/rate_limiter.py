@@ -2,12 +2,19 @@
 Rate Limiter for CCB Gateway.
 
 Implements token bucket algorithm for request rate limiting.
+
+Buckets live in a sharded table keyed by client (API key, else IP) and
+endpoint class. Tokens are refilled lazily when a bucket is checked, and
+idle buckets are evicted by a per-shard timing wheel, so a check is O(1)
+and never scans the table.
 """
 from __future__ import annotations
 
+import math
+import threading
 import time
 from dataclasses import dataclass, field
-from typing import Optional, Dict, Any, Callable, Awaitable
+from typing import Optional, Dict, Any, Callable, Awaitable, List, Set, Tuple
 
 try:
     from fastapi import Request
@@ -31,6 +38,8 @@ class RateLimitConfig:
         "/api/ask/stream": 30,
         "/api/admin": 10,  # Very restrictive for admin endpoints
     })
+    shards: int = 16  # Bucket table shards (rounded up to a power of two)
+    idle_ttl_s: float = 3600.0  # Evict buckets unused for this long
 
 
 @dataclass
@@ -40,6 +49,7 @@ class TokenBucket:
     tokens: float  # Current tokens
     refill_rate: float  # Tokens per second
     last_refill: float  # Last refill timestamp
+    requests_per_minute: int = 0  # Limit the refill rate was derived from
 
     @classmethod
     def create(cls, requests_per_minute: int, burst_size: int) -> "TokenBucket":
@@ -51,6 +61,7 @@ class TokenBucket:
             tokens=float(burst_size),  # Start full
             refill_rate=refill_rate,
             last_refill=now,
+            requests_per_minute=requests_per_minute,
         )
 
     def refill(self) -> None:
@@ -92,6 +103,33 @@ class TokenBucket:
         needed = tokens - self.tokens
         return needed / self.refill_rate
 
+    def peek(self, now: float, tokens: float = 1.0) -> float:
+        """
+        Refill to ``now`` without consuming anything.
+
+        Returns:
+            0.0 if the tokens are available, else seconds until they are
+        """
+        elapsed = now - self.last_refill
+        if elapsed > 0:
+            self.tokens = min(self.capacity, self.tokens + elapsed * self.refill_rate)
+            self.last_refill = now
+        if self.tokens >= tokens:
+            return 0.0
+        return (tokens - self.tokens) / self.refill_rate if self.refill_rate > 0 else math.inf
+
+    def take(self, now: float, tokens: float = 1.0) -> float:
+        """
+        Refill to ``now`` and try to consume tokens in one step.
+
+        Returns:
+            0.0 if the tokens were consumed, else seconds until they are available
+        """
+        wait = self.peek(now, tokens)
+        if wait == 0.0:
+            self.tokens -= tokens
+        return wait
+
 
 @dataclass
 class RateLimitInfo:
@@ -104,11 +142,73 @@ class RateLimitInfo:
 
     def to_headers(self) -> Dict[str, str]:
         """Convert to rate limit headers."""
-        return {
+        headers = {
             "X-RateLimit-Limit": str(self.limit),
             "X-RateLimit-Remaining": str(max(0, self.remaining)),
             "X-RateLimit-Reset-After": f"{self.reset_after_s:.1f}",
         }
+        if not self.allowed:
+            headers["Retry-After"] = str(max(1, math.ceil(self.reset_after_s)))
+        return headers
+
+
+class TimingWheel:
+    """
+    Hashed timing wheel of bucket keys due for an idle check.
+
+    A key is scheduled into the slot of its deadline tick; deadlines past
+    the wheel's span wrap around, so callers re-check the real deadline
+    when a key fires and reschedule it if needed.
+    """
+
+    def __init__(self, tick_s: float = 10.0, size: int = 64, now: Optional[float] = None):
+        """
+        Initialize the wheel.
+
+        Args:
+            tick_s: Slot width in seconds
+            size: Number of slots
+            now: Current time (default: time.time())
+        """
+        self.tick_s = tick_s
+        self.size = size
+        self._slots: List[Set[str]] = [set() for _ in range(size)]
+        self._tick = int((time.time() if now is None else now) // tick_s)
+        self.next_advance = (self._tick + 1) * tick_s
+
+    def __len__(self) -> int:
+        return sum(len(slot) for slot in self._slots)
+
+    def schedule(self, key: str, deadline: float) -> None:
+        """Fire ``key`` at the first tick at or after ``deadline``."""
+        tick = max(math.ceil(deadline / self.tick_s), self._tick + 1)
+        self._slots[tick % self.size].add(key)
+
+    def advance(self, now: float) -> List[str]:
+        """Move to ``now`` and return the keys of every slot passed."""
+        target = int(now // self.tick_s)
+        fired: List[str] = []
+        # Each slot is visited at most once per advance, however long it was idle
+        for tick in range(self._tick + 1, min(target, self._tick + self.size) + 1):
+            slot = self._slots[tick % self.size]
+            if slot:
+                fired.extend(slot)
+                slot.clear()
+        self._tick = max(self._tick, target)
+        self.next_advance = (self._tick + 1) * self.tick_s
+        return fired
+
+
+class _BucketShard:
+    """One shard of the bucket table with its own lock and timing wheel."""
+
+    __slots__ = ("lock", "buckets", "wheel", "evicted")
+
+    def __init__(self, tick_s: float, now: float):
+        self.lock = threading.Lock()
+        self.buckets: Dict[str, TokenBucket] = {}
+        self.wheel = TimingWheel(tick_s=tick_s, now=now)
+        self.evicted = 0
 
 
 class RateLimiter:
@@ -116,6 +216,9 @@ class RateLimiter:
     Token bucket rate limiter.
 
     Supports per-key and per-IP rate limiting with configurable limits.
+    A request is limited per API key when it carries one (using the key's
+    ``rate_limit_rpm`` when set), otherwise per client IP, and separately
+    per endpoint class (the matching ``endpoint_limits`` prefix).
     """
 
     def __init__(self, config: Optional[RateLimitConfig] = None):
@@ -126,61 +229,62 @@ class RateLimiter:
             config: Rate limit configuration
         """
         self.config = config or RateLimitConfig()
-        self._buckets: Dict[str, TokenBucket] = {}
-        self._cleanup_interval = 300.0  # Cleanup every 5 minutes
-        self._last_cleanup = time.time()
+        shards = 1
+        while shards < max(1, self.config.shards):
+            shards <<= 1
+        self._shard_mask = shards - 1
+        # Wheel ticks are a fraction of the idle TTL, so eviction lags by at most one tick
+        tick_s = max(1.0, self.config.idle_ttl_s / 32)
+        now = time.time()
+        self._shards = [_BucketShard(tick_s, now) for _ in range(shards)]
+        # Longest prefix first, so "/api/ask/stream" wins over "/api/ask"
+        self._endpoint_limits: List[Tuple[str, int]] = sorted(
+            self.config.endpoint_limits.items(), key=lambda item: len(item[0]), reverse=True,
+        )
 
     def _get_bucket_key(
         self,
         api_key_id: Optional[str],
         ip_address: Optional[str],
-        endpoint: Optional[str] = None,
+        endpoint_class: str,
     ) -> str:
         """Generate a bucket key for the request."""
-        parts = []
         if self.config.by_api_key and api_key_id:
-            parts.append(f"key:{api_key_id}")
+            return f"key:{api_key_id}:ep:{endpoint_class}"
         if self.config.by_ip and ip_address:
-            parts.append(f"ip:{ip_address}")
-        if endpoint:
-            parts.append(f"ep:{endpoint}")
-        return ":".join(parts) if parts else "global"
+            return f"ip:{ip_address}:ep:{endpoint_class}"
+        return f"global:ep:{endpoint_class}"
+
+    def _classify_endpoint(self, path: Optional[str]) -> Tuple[str, int]:
+        """Endpoint class (matched prefix, or "*") and its limit."""
+        if path:
+            for prefix, limit in self._endpoint_limits:
+                if path.startswith(prefix):
+                    return prefix, limit
+        return "*", self.config.requests_per_minute
 
     def _get_limit_for_endpoint(self, path: str) -> int:
         """Get the rate limit for a specific endpoint."""
-        for prefix, limit in self.config.endpoint_limits.items():
-            if path.startswith(prefix):
-                return limit
-        return self.config.requests_per_minute
-
-    def _get_or_create_bucket(
-        self,
-        key: str,
-        requests_per_minute: int,
-    ) -> TokenBucket:
-        """Get or create a token bucket for the key."""
-        if key not in self._buckets:
-            self._buckets[key] = TokenBucket.create(
-                requests_per_minute=requests_per_minute,
-                burst_size=self.config.burst_size,
-            )
-        return self._buckets[key]
-
-    def _maybe_cleanup(self) -> None:
-        """Periodically cleanup old buckets."""
-        now = time.time()
-        if now - self._last_cleanup < self._cleanup_interval:
-            return
-
-        self._last_cleanup = now
-        # Remove buckets that haven't been used in a while
-        stale_threshold = now - 3600  # 1 hour
-        stale_keys = [
-            key for key, bucket in self._buckets.items()
-            if bucket.last_refill < stale_threshold
-        ]
-        for key in stale_keys:
-            del self._buckets[key]
+        return self._classify_endpoint(path)[1]
+
+    def _evict_idle(self, shard: _BucketShard, now: float) -> None:
+        """Drop buckets whose idle deadline passed (shard lock held)."""
+        for key in shard.wheel.advance(now):
+            bucket = shard.buckets.get(key)
+            if bucket is None:
+                continue
+            deadline = bucket.last_refill + self._idle_ttl(bucket)
+            if deadline <= now:
+                del shard.buckets[key]
+                shard.evicted += 1
+            else:
+                shard.wheel.schedule(key, deadline)
+
+    def _idle_ttl(self, bucket: TokenBucket) -> float:
+        # Never evict a bucket before it has refilled completely
+        if bucket.refill_rate <= 0:
+            return self.config.idle_ttl_s
+        return max(self.config.idle_ttl_s, bucket.capacity / bucket.refill_rate)
 
     def check(
         self,
@@ -188,6 +292,7 @@ class RateLimiter:
         ip_address: Optional[str] = None,
         endpoint: Optional[str] = None,
         key_rate_limit: Optional[int] = None,
+        consume: bool = True,
     ) -> RateLimitInfo:
         """
         Check if a request is allowed.
@@ -197,6 +302,8 @@ class RateLimiter:
             ip_address: Optional IP address
             endpoint: Optional endpoint path
             key_rate_limit: Optional per-key rate limit override
+            consume: Take a token if allowed; False only reports whether
+                one is available (and does not create the bucket)
 
         Returns:
             RateLimitInfo with allow/deny decision
@@ -210,44 +317,68 @@ class RateLimiter:
                 key="disabled",
             )
 
-        self._maybe_cleanup()
-
-        # Determine rate limit
-        if key_rate_limit:
+        endpoint_class, limit = self._classify_endpoint(endpoint)
+        if key_rate_limit and api_key_id:
             limit = key_rate_limit
-        elif endpoint:
-            limit = self._get_limit_for_endpoint(endpoint)
-        else:
-            limit = self.config.requests_per_minute
+        bucket_key = self._get_bucket_key(api_key_id, ip_address, endpoint_class)
 
-        # Get bucket key
-        bucket_key = self._get_bucket_key(api_key_id, ip_address, endpoint)
-
-        # Get or create bucket
-        bucket = self._get_or_create_bucket(bucket_key, limit)
-
-        # Try to consume a token
-        allowed = bucket.consume(1.0)
-        reset_after = bucket.time_until_available(1.0) if not allowed else 0.0
+        now = time.time()
+        shard = self._shards[hash(bucket_key) & self._shard_mask]
+        with shard.lock:
+            if now >= shard.wheel.next_advance:
+                self._evict_idle(shard, now)
+
+            bucket = shard.buckets.get(bucket_key)
+            if bucket is None and not consume:
+                # A new bucket would start full
+                return RateLimitInfo(
+                    allowed=True,
+                    limit=limit,
+                    remaining=self.config.burst_size,
+                    reset_after_s=0.0,
+                    key=bucket_key,
+                )
+            if bucket is None:
+                bucket = shard.buckets[bucket_key] = TokenBucket.create(
+                    requests_per_minute=limit,
+                    burst_size=self.config.burst_size,
+                )
+                shard.wheel.schedule(bucket_key, now + self._idle_ttl(bucket))
+            elif bucket.requests_per_minute != limit:
+                # The key's limit changed since the bucket was created
+                bucket.requests_per_minute = limit
+                bucket.refill_rate = limit / 60.0
+
+            wait = bucket.take(now) if consume else bucket.peek(now)
+            remaining = int(bucket.tokens)
 
         return RateLimitInfo(
-            allowed=allowed,
+            allowed=wait == 0.0,
             limit=limit,
-            remaining=int(bucket.tokens),
-            reset_after_s=reset_after,
+            remaining=remaining,
+            reset_after_s=wait,
             key=bucket_key,
         )
 
     def get_stats(self) -> Dict[str, Any]:
         """Get rate limiter statistics."""
+        total = 0
+        evicted = 0
+        for shard in self._shards:
+            with shard.lock:
+                total += len(shard.buckets)
+                evicted += shard.evicted
         return {
             "enabled": self.config.enabled,
-            "total_buckets": len(self._buckets),
+            "total_buckets": total,
+            "shards": len(self._shards),
+            "evicted_buckets": evicted,
             "config": {
                 "requests_per_minute": self.config.requests_per_minute,
                 "burst_size": self.config.burst_size,
                 "by_api_key": self.config.by_api_key,
                 "by_ip": self.config.by_ip,
+                "idle_ttl_s": self.config.idle_ttl_s,
             },
         }
 
@@ -257,14 +388,24 @@ class RateLimitMiddleware:
     FastAPI middleware for rate limiting.
     """
 
-    def __init__(self, limiter: RateLimiter):
+    def __init__(
+        self,
+        limiter: RateLimiter,
+        key_store: Optional[Any] = None,
+        header_name: str = "X-API-Key",
+    ):
         """
         Initialize the rate limit middleware.
 
         Args:
             limiter: RateLimiter instance
+            key_store: APIKeyStore used to identify API keys (this middleware
+                runs before auth)
+            header_name: Header carrying the API key
         """
         self.limiter = limiter
+        self.key_store = key_store
+        self.header_name = header_name
 
     async def __call__(
         self,
@@ -282,34 +423,34 @@ class RateLimitMiddleware:
         if request.headers.get("upgrade", "").lower() == "websocket":
             return await call_next(request)
 
-        # Get identifiers
-        api_key_id = None
-        key_rate_limit = None
-        if hasattr(request.state, "api_key") and request.state.api_key:
-            api_key_id = request.state.api_key.key_id
-            key_rate_limit = request.state.api_key.rate_limit_rpm
-
         ip_address = request.client.host if request.client else None
         endpoint = request.url.path
 
-        # Check rate limit
+        # Get identifiers
+        key_info = getattr(request.state, "api_key", None)
+        raw_key = request.headers.get(self.header_name)
+        if key_info is None and raw_key and self.key_store is not None and self.limiter.config.by_api_key:
+            key_info = self.key_store.get_cached_key(raw_key)
+            if key_info is None:
+                # Keys not verified yet are refused without a key table
+                # lookup once the client IP is out of tokens, so floods of
+                # bad keys are throttled like unauthenticated traffic. The
+                # IP is only charged below if the key turns out invalid.
+                ip_result = self.limiter.check(ip_address=ip_address, endpoint=endpoint, consume=False)
+                if not ip_result.allowed:
+                    return self._reject(ip_result)
+                key_info = self.key_store.validate_key(raw_key)
+
+        # Check rate limit (per key for valid keys, else per IP)
         result = self.limiter.check(
-            api_key_id=api_key_id,
+            api_key_id=key_info.key_id if key_info else None,
             ip_address=ip_address,
             endpoint=endpoint,
-            key_rate_limit=key_rate_limit,
+            key_rate_limit=key_info.rate_limit_rpm if key_info else None,
         )
 
         if not result.allowed:
-            return JSONResponse(
-                status_code=429,
-                content={
-                    "error": "Rate limit exceeded",
-                    "detail": f"Too many requests. Try again in {result.reset_after_s:.1f} seconds.",
-                    "retry_after": result.reset_after_s,
-                },
-                headers=result.to_headers(),
-            )
+            return self._reject(result)
 
         # Add rate limit headers to response
         response = await call_next(request)
@@ -319,3 +460,15 @@ class RateLimitMiddleware:
             response.headers[key] = value
 
         return response
+
+    @staticmethod
+    def _reject(result: RateLimitInfo):
+        return JSONResponse(
+            status_code=429,
+            content={
+                "error": "Rate limit exceeded",
+                "detail": f"Too many requests. Try again in {result.reset_after_s:.1f} seconds.",
+                "retry_after": result.reset_after_s,
+            },
+            headers=result.to_headers(),
+        )
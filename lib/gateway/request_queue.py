@@ -8,14 +8,21 @@ from __future__ import annotations
 import asyncio
 import threading
 import time
-from dataclasses import dataclass
+from dataclasses import dataclass, replace
 from typing import Optional, List, Dict, Callable, Awaitable, Any
 from queue import PriorityQueue, Empty
 import heapq
+import sqlite3
 
-from .models import GatewayRequest, RequestStatus
+from lib.common.logging import get_logger
+
+from .cache import generate_cache_key
+from .completion import CompletionRegistry
+from .models import GatewayRequest, GatewayResponse, RequestStatus
 from .state_store import StateStore
 
+logger = get_logger("gateway.request_queue")
+
 
 @dataclass(order=True)
 class PrioritizedRequest:
@@ -41,6 +48,8 @@ class RequestQueue:
     - Persistence via StateStore
     - Concurrent processing with limits
     - Timeout handling
+    - Completion notification for synchronous waiters
+    - Single-flight coalescing of identical in-flight prompts
     """
 
     def __init__(
@@ -48,6 +57,7 @@ class RequestQueue:
         store: StateStore,
         max_size: int = 1000,
         max_concurrent: int = 10,
+        coalesce: bool = True,
     ):
         """
         Initialize the request queue.
@@ -56,10 +66,13 @@ class RequestQueue:
             store: StateStore for persistence
             max_size: Maximum queue size
             max_concurrent: Maximum concurrent requests
+            coalesce: Attach duplicates of a queued/processing request to it
+                instead of running them separately
         """
         self.store = store
         self.max_size = max_size
         self.max_concurrent = max_concurrent
+        self.coalesce = coalesce
 
         # In-memory priority queue
         self._queue: List[PrioritizedRequest] = []
@@ -69,8 +82,24 @@ class RequestQueue:
         self._processing: Dict[str, GatewayRequest] = {}
         self._processing_lock = threading.Lock()
 
+        # Completion notification for waiting API callers
+        self.completions = CompletionRegistry()
+
+        # Single-flight state (guarded by _lock):
+        # coalesce key -> leader request id, leader id -> attached followers
+        self._inflight: Dict[str, str] = {}
+        self._leader_keys: Dict[str, str] = {}
+        self._leaders: Dict[str, GatewayRequest] = {}
+        self._followers: Dict[str, List[GatewayRequest]] = {}
+        # leader id -> when it started processing (follower timeouts)
+        self._leader_started: Dict[str, float] = {}
+        self._coalesced_total = 0
+        # Slots taken by leaders whose row is still being written
+        self._reserved = 0
+
         # Callbacks
         self._on_request_ready: Optional[Callable[[GatewayRequest], Awaitable[None]]] = None
+        self._cancel_listeners: List[Callable[[str], None]] = []
 
         # Load pending requests from store
         self._load_pending()
@@ -81,27 +110,120 @@ class RequestQueue:
         with self._lock:
             for request in pending:
                 heapq.heappush(self._queue, PrioritizedRequest(request))
+                key = self._coalesce_key(request)
+                if key and key not in self._inflight:
+                    self._register_leader_locked(key, request)
 
-    def enqueue(self, request: GatewayRequest) -> bool:
+    def _coalesce_key(self, request: GatewayRequest) -> Optional[str]:
+        """
+        Build the single-flight key for a request.
+
+        Uses the response-cache key of the original prompt, so requests that
+        would share a cache entry also share an in-flight provider call.
+        Parallel requests are keyed by their provider set and strategy.
+        """
+        if not self.coalesce:
+            return None
+        metadata = request.metadata or {}
+        if metadata.get("cache_bypass") or metadata.get("coalesce") is False:
+            return None
+
+        message = metadata.get("original_message") or request.message
+        scope = request.provider
+        if metadata.get("parallel"):
+            providers = ",".join(metadata.get("providers") or [])
+            strategy = metadata.get("aggregation_strategy") or ""
+            scope = f"parallel[{providers}|{strategy}]"
+        if metadata.get("agent"):
+            scope = f"{scope}@{metadata['agent']}"
+        return generate_cache_key(scope, message, metadata.get("model"))
+
+    def _register_leader_locked(self, key: str, request: GatewayRequest) -> None:
+        self._inflight[key] = request.id
+        self._leader_keys[request.id] = key
+        self._leaders[request.id] = request
+
+    def _release_leader_locked(self, request_id: str) -> List[GatewayRequest]:
+        """Forget a leader and return its followers. Caller holds ``_lock``."""
+        key = self._leader_keys.pop(request_id, None)
+        if key is not None and self._inflight.get(key) == request_id:
+            self._inflight.pop(key, None)
+        self._leaders.pop(request_id, None)
+        self._leader_started.pop(request_id, None)
+        return self._followers.pop(request_id, [])
+
+    def _occupancy_locked(self) -> int:
+        """Queued, reserved and coalesced requests. Caller holds ``_lock``."""
+        return len(self._queue) + self._reserved + sum(len(f) for f in self._followers.values())
+
+    def _promote_priority_locked(self, leader_id: str, priority: int) -> None:
+        """Raise a leader to a follower's priority, re-ordering it if queued."""
+        leader = self._leaders.get(leader_id)
+        if leader is None or leader.priority >= priority:
+            return
+        leader.priority = priority
+        for i, item in enumerate(self._queue):
+            if item.request.id == leader_id:
+                self._queue[i] = PrioritizedRequest(leader)
+                heapq.heapify(self._queue)
+                break
+
+    async def enqueue(self, request: GatewayRequest) -> bool:
         """
         Add a request to the queue.
 
+        If an identical request is already queued or processing, the new
+        request is persisted but attached to that leader instead of being
+        queued; it completes with a copy of the leader's response. Attached
+        requests count against ``max_size``, raise the leader to their
+        priority, and time out on their own ``timeout_s``.
+
+        The queue slot (or the attachment) is reserved under the lock, and
+        the row is written on the store's thread pool, so the event loop
+        never waits on the writer thread. A request becomes visible to
+        ``dequeue`` only once its row is committed.
+
         Args:
             request: The request to enqueue
 
         Returns:
-            True if enqueued, False if queue is full
+            True if enqueued (or coalesced), False if queue is full
         """
+        key = self._coalesce_key(request)
+
         with self._lock:
-            if len(self._queue) >= self.max_size:
+            if self._occupancy_locked() >= self.max_size:
                 return False
+            leader_id = self._inflight.get(key) if key else None
+            if leader_id is not None:
+                if request.metadata is None:
+                    request.metadata = {}
+                request.metadata["coalesced_with"] = leader_id
+                self._followers.setdefault(leader_id, []).append(request)
+                self._coalesced_total += 1
+                self._promote_priority_locked(leader_id, request.priority)
+            else:
+                self._reserved += 1
+                if key:
+                    self._register_leader_locked(key, request)
 
-            # Persist to store
-            self.store.create_request(request)
-
-            # Add to in-memory queue
-            heapq.heappush(self._queue, PrioritizedRequest(request))
-            return True
+        try:
+            await self.store.aio.create_request(request)
+        except BaseException:
+            if leader_id is not None:
+                self._detach_follower(request.id)
+            else:
+                with self._lock:
+                    self._reserved -= 1
+                # Duplicates that attached meanwhile still want an answer
+                await self.store.aio.run(self._promote_followers, request.id)
+            raise
+
+        if leader_id is None:
+            with self._lock:
+                self._reserved -= 1
+                heapq.heappush(self._queue, PrioritizedRequest(request))
+        return True
 
     def dequeue(self) -> Optional[GatewayRequest]:
         """
@@ -167,7 +289,13 @@ class RequestQueue:
         return result
 
     def mark_processing(self, request_id: str) -> bool:
-        """Mark a request as processing."""
+        """Mark a request (and any requests coalesced onto it) as processing."""
+        with self._lock:
+            if request_id in self._leaders:
+                self._leader_started.setdefault(request_id, time.time())
+            followers = list(self._followers.get(request_id, []))
+        for follower in followers:
+            self.store.update_request_status(follower.id, RequestStatus.PROCESSING)
         return self.store.update_request_status(request_id, RequestStatus.PROCESSING)
 
     def mark_completed(
@@ -175,29 +303,121 @@ class RequestQueue:
         request_id: str,
         response: Optional[str] = None,
         error: Optional[str] = None,
+        result: Optional[GatewayResponse] = None,
     ) -> bool:
-        """Mark a request as completed or failed."""
+        """
+        Mark a request as completed or failed.
+
+        Args:
+            request_id: The request that finished
+            response: Response text (informational)
+            error: Error message; marks the request as failed when set
+            result: Full response, handed to waiters via the completion registry
+        """
         with self._processing_lock:
             self._processing.pop(request_id, None)
 
-        if error:
-            return self.store.update_request_status(request_id, RequestStatus.FAILED)
-        return self.store.update_request_status(request_id, RequestStatus.COMPLETED)
+        status = RequestStatus.FAILED if error else RequestStatus.COMPLETED
+        updated = self.store.update_request_status(request_id, status)
+        self.completions.resolve(request_id, status, result)
+
+        with self._lock:
+            followers = self._release_leader_locked(request_id)
+        for follower in followers:
+            self._complete_follower(follower, request_id, status, error, result)
+        return updated
+
+    def _complete_follower(
+        self,
+        follower: GatewayRequest,
+        leader_id: str,
+        status: RequestStatus,
+        error: Optional[str] = None,
+        result: Optional[GatewayResponse] = None,
+    ) -> None:
+        """Finish a coalesced request with a copy of its leader's outcome."""
+        if result is not None:
+            metadata = dict(result.metadata or {})
+            metadata["coalesced_from"] = leader_id
+            follower_response = replace(result, request_id=follower.id, metadata=metadata)
+        else:
+            follower_response = GatewayResponse(
+                request_id=follower.id,
+                status=status,
+                error=error,
+                metadata={"coalesced_from": leader_id},
+            )
+
+        try:
+            self.store.save_response(follower_response)
+        except (sqlite3.Error, RuntimeError, ValueError, TypeError, KeyError, AttributeError, OSError) as e:
+            logger.exception("Failed to save response of coalesced request %s", follower.id)
+            status = RequestStatus.FAILED
+            follower_response = GatewayResponse(
+                request_id=follower.id,
+                status=status,
+                error=f"Failed to save coalesced response: {e}",
+                metadata={"coalesced_from": leader_id},
+            )
+        self.store.update_request_status(follower.id, status)
+        self.completions.resolve(follower.id, status, follower_response)
+
+    def _promote_followers(self, leader_id: str) -> None:
+        """Re-queue the followers of a leader that will not produce a result."""
+        with self._lock:
+            followers = self._release_leader_locked(leader_id)
+            if not followers:
+                return
+            new_leader, rest = followers[0], followers[1:]
+            new_leader.metadata.pop("coalesced_with", None)
+            new_leader.priority = max(f.priority for f in followers)
+            for follower in rest:
+                follower.metadata["coalesced_with"] = new_leader.id
+            heapq.heappush(self._queue, PrioritizedRequest(new_leader))
+            key = self._coalesce_key(new_leader)
+            if key:
+                self._register_leader_locked(key, new_leader)
+            if rest:
+                self._followers[new_leader.id] = rest
+        self.store.update_request_status(new_leader.id, RequestStatus.QUEUED)
+
+    def _detach_follower(self, request_id: str) -> None:
+        """Remove a request from whichever leader it is coalesced onto."""
+        with self._lock:
+            for leader_id, followers in list(self._followers.items()):
+                remaining = [f for f in followers if f.id != request_id]
+                if len(remaining) != len(followers):
+                    if remaining:
+                        self._followers[leader_id] = remaining
+                    else:
+                        self._followers.pop(leader_id, None)
+
+    def add_cancel_listener(self, listener: Callable[[str], None]) -> None:
+        """Register a callback invoked with the ID of each cancelled request."""
+        self._cancel_listeners.append(listener)
 
     def cancel(self, request_id: str) -> bool:
-        """Cancel a request."""
+        """Cancel a request, stopping its execution if it is processing."""
         with self._processing_lock:
             self._processing.pop(request_id, None)
 
-        # Remove from in-memory queue
+        # Remove from in-memory queue (or detach a coalesced follower)
         with self._lock:
             self._queue = [
                 item for item in self._queue
                 if item.request.id != request_id
             ]
             heapq.heapify(self._queue)
+        self._detach_follower(request_id)
 
-        return self.store.cancel_request(request_id)
+        cancelled = self.store.cancel_request(request_id)
+        if cancelled:
+            self.completions.resolve(request_id, RequestStatus.CANCELLED)
+            # Duplicates waiting on this request still want an answer
+            self._promote_followers(request_id)
+            for listener in self._cancel_listeners:
+                listener(request_id)
+        return cancelled
 
     def get_queue_depth(self, provider: Optional[str] = None) -> int:
         """Get current queue depth, optionally filtered by provider."""
@@ -214,6 +434,23 @@ class RequestQueue:
         with self._processing_lock:
             return len(self._processing)
 
+    def is_tracked(self, request_id: str) -> bool:
+        """
+        Whether this queue is still queuing, running or coalescing a request.
+
+        Rows left active by a previous process (e.g. PROCESSING at a
+        restart) are not tracked, and nothing will ever complete them.
+        """
+        with self._processing_lock:
+            if request_id in self._processing:
+                return True
+        with self._lock:
+            if request_id in self._leaders:
+                return True
+            if any(item.request.id == request_id for item in self._queue):
+                return True
+            return any(f.id == request_id for followers in self._followers.values() for f in followers)
+
     def get_processing_requests(self) -> List[GatewayRequest]:
         """Get list of currently processing requests."""
         with self._processing_lock:
@@ -234,6 +471,45 @@ class RequestQueue:
                         # Update DB while holding lock to prevent race conditions
                         self.store.update_request_status(request_id, RequestStatus.TIMEOUT)
 
+        for request_id in timed_out:
+            self.completions.resolve(request_id, RequestStatus.TIMEOUT)
+            with self._lock:
+                followers = self._release_leader_locked(request_id)
+            for follower in followers:
+                self._complete_follower(
+                    follower,
+                    request_id,
+                    RequestStatus.TIMEOUT,
+                    error="Coalesced request timed out",
+                )
+
+        # Followers give up on their own timeout, counted from when the
+        # leader started processing (or from when they attached, if later)
+        with self._lock:
+            expired = []
+            for leader_id, started_at in self._leader_started.items():
+                followers = self._followers.get(leader_id)
+                if not followers:
+                    continue
+                waiting = []
+                for follower in followers:
+                    if now - max(started_at, follower.created_at) > follower.timeout_s:
+                        expired.append((follower, leader_id))
+                    else:
+                        waiting.append(follower)
+                if waiting:
+                    self._followers[leader_id] = waiting
+                else:
+                    del self._followers[leader_id]
+        for follower, leader_id in expired:
+            timed_out.append(follower.id)
+            self._complete_follower(
+                follower,
+                leader_id,
+                RequestStatus.TIMEOUT,
+                error="Coalesced request timed out",
+            )
+
         return timed_out
 
     def peek(self, count: int = 10) -> List[GatewayRequest]:
@@ -246,8 +522,12 @@ class RequestQueue:
         """Clear all queued requests."""
         with self._lock:
             count = len(self._queue)
-            for item in self._queue:
-                self.store.cancel_request(item.request.id)
+            cleared = [item.request for item in self._queue]
+            for request in cleared:
+                cleared.extend(self._release_leader_locked(request.id))
+            for request in cleared:
+                self.store.cancel_request(request.id)
+                self.completions.resolve(request.id, RequestStatus.CANCELLED)
             self._queue.clear()
             return count
 
@@ -264,6 +544,9 @@ class RequestQueue:
                 by_provider[provider] = by_provider.get(provider, 0) + 1
                 by_priority[priority] = by_priority.get(priority, 0) + 1
 
+            coalesced_waiting = sum(len(f) for f in self._followers.values())
+            coalesced_total = self._coalesced_total
+
         with self._processing_lock:
             processing_count = len(self._processing)
 
@@ -274,6 +557,8 @@ class RequestQueue:
             "max_concurrent": self.max_concurrent,
             "by_provider": by_provider,
             "by_priority": by_priority,
+            "coalesced_waiting": coalesced_waiting,
+            "coalesced_total": coalesced_total,
         }
 
 
@@ -291,12 +576,15 @@ class AsyncRequestQueue:
         self._task: Optional[asyncio.Task] = None
         self._active_tasks: Dict[str, asyncio.Task] = {}
         self._tasks_lock = asyncio.Lock()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        queue.add_cancel_listener(self.cancel_active)
 
     async def start(
         self,
         handler: Callable[[GatewayRequest], Awaitable[None]],
     ) -> None:
         """Start the async queue processor."""
+        self._loop = asyncio.get_running_loop()
         self._running = True
         self._task = asyncio.create_task(self._process_loop(handler))
 
@@ -322,23 +610,38 @@ class AsyncRequestQueue:
         """Notify that new requests are available."""
         self._event.set()
 
+    def cancel_active(self, request_id: str) -> None:
+        """
+        Cancel the handler task of a processing request.
+
+        Backends kill their subprocess or close their HTTP request when
+        cancelled. Safe to call from any thread.
+        """
+        task = self._active_tasks.get(request_id)
+        if task is None or task.done() or self._loop is None:
+            return
+        try:
+            if asyncio.get_running_loop() is self._loop:
+                task.cancel()
+                return
+        except RuntimeError:
+            pass
+        self._loop.call_soon_threadsafe(task.cancel)
+
     async def _process_loop(
         self,
         handler: Callable[[GatewayRequest], Awaitable[None]],
     ) -> None:
         """Main processing loop with true concurrent execution and batch dequeue support."""
         while self._running:
-            # Check for timeouts
-            self.queue.check_timeouts()
-
             # Clean up completed tasks
             await self._cleanup_completed_tasks()
 
-            # Try batch dequeue for better efficiency
-            requests = self.queue.batch_dequeue(max_batch=5)
+            # Timeouts, batch dequeue and status writes hit SQLite; keep them
+            # off the event loop
+            requests = await self.queue.store.aio.run(self._take_ready)
             if requests:
                 for request in requests:
-                    self.queue.mark_processing(request.id)
                     # Spawn task for concurrent execution (don't await!)
                     task = asyncio.create_task(
                         self._handle_request(handler, request)
@@ -353,6 +656,14 @@ class AsyncRequestQueue:
                 except asyncio.TimeoutError:
                     pass
 
+    def _take_ready(self) -> List[GatewayRequest]:
+        """Expire timed-out requests and claim the next batch (blocking)."""
+        self.queue.check_timeouts()
+        requests = self.queue.batch_dequeue(max_batch=5)
+        for request in requests:
+            self.queue.mark_processing(request.id)
+        return requests
+
     async def _handle_request(
         self,
         handler: Callable[[GatewayRequest], Awaitable[None]],
@@ -362,7 +673,7 @@ class AsyncRequestQueue:
         try:
             await handler(request)
         except (RuntimeError, ValueError, TypeError, KeyError, AttributeError, OSError) as e:
-            self.queue.mark_completed(request.id, error=str(e))
+            await self.queue.store.aio.run(self.queue.mark_completed, request.id, error=str(e))
         finally:
             # Remove from active tasks
             async with self._tasks_lock:
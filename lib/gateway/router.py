@@ -11,6 +11,9 @@ import time
 from dataclasses import dataclass, field
 from typing import Optional, List, Dict, Any, Tuple, Callable
 
+from lib.keyword_matcher import KeywordMatcher
+from lib.latency_sketch import SketchWindow
+
 
 @dataclass
 class RoutingRule:
@@ -38,6 +41,7 @@ class ProviderPerformance:
     """Real-time performance metrics for a provider."""
     provider: str
     avg_latency_ms: float = 0.0
+    p95_latency_ms: float = 0.0  # Last hour, from latency_window
     success_rate: float = 1.0
     cost_per_request: float = 0.0
     total_requests: int = 0
@@ -45,7 +49,22 @@ class ProviderPerformance:
     last_success: Optional[float] = None
     last_failure: Optional[float] = None
     is_healthy: bool = True
-    latency_samples: List[float] = field(default_factory=list)
+    latency_window: SketchWindow = field(
+        default_factory=lambda: SketchWindow(bucket_s=300.0, retention_s=3600.0),
+        repr=False,
+    )
+
+    @classmethod
+    def from_metrics(cls, provider: str, metrics: Dict[str, Any]) -> "ProviderPerformance":
+        """Build from a ``StateStore.get_provider_metrics`` dict."""
+        success_rate = metrics.get("success_rate")
+        return cls(
+            provider=provider,
+            avg_latency_ms=float(metrics.get("avg_latency_ms", 0.0) or 0.0),
+            p95_latency_ms=float(metrics.get("p95_latency_ms", 0.0) or 0.0),
+            success_rate=1.0 if success_rate is None else float(success_rate),
+            total_requests=int(metrics.get("total_requests", 0) or 0),
+        )
 
     def record_request(self, latency_ms: float, success: bool) -> None:
         """Record a request result."""
@@ -54,11 +73,10 @@ class ProviderPerformance:
 
         if success:
             self.last_success = time.time()
-            # Update latency samples
-            self.latency_samples.append(latency_ms)
-            if len(self.latency_samples) > 50:
-                self.latency_samples = self.latency_samples[-50:]
-            self.avg_latency_ms = sum(self.latency_samples) / len(self.latency_samples)
+            self.latency_window.add(self.provider, latency_ms, self.last_success)
+            sketch = self.latency_window.merged(self.provider, since=self.last_success - 3600)
+            self.avg_latency_ms = sketch.mean
+            self.p95_latency_ms = sketch.quantile(0.95)
         else:
             self.last_failure = time.time()
 
@@ -75,8 +93,9 @@ class ProviderPerformance:
         cost_weight: float = 0.2,
     ) -> float:
         """Calculate overall performance score (0.0 to 1.0, higher is better)."""
-        # Normalize latency (assuming 30s is worst case)
-        latency_score = max(0, 1 - (self.avg_latency_ms / 30000))
+        # Normalize tail latency when known (assuming 30s is worst case)
+        latency_ms = self.p95_latency_ms or self.avg_latency_ms
+        latency_score = max(0, 1 - (latency_ms / 30000))
 
         # Success rate is already 0-1
         success_score = self.success_rate
@@ -244,6 +263,17 @@ class SmartRouter:
 
         # Sort rules by priority (highest first)
         self.rules.sort(key=lambda r: r.priority, reverse=True)
+        # Keywords of all rules, tagged by rule index (rebuilt on rule changes)
+        self._matcher: Optional[KeywordMatcher] = None
+
+    def _keyword_matcher(self) -> KeywordMatcher:
+        if self._matcher is None:
+            matcher = KeywordMatcher()
+            for index, rule in enumerate(self.rules):
+                for keyword in rule.keywords:
+                    matcher.add(keyword, index)
+            self._matcher = matcher
+        return self._matcher
 
     def set_metrics_getter(self, getter: Callable[[str], Dict[str, Any]]) -> None:
         """Set function to get external metrics for a provider."""
@@ -275,21 +305,16 @@ class SmartRouter:
         Returns:
             RoutingDecision with selected provider and metadata
         """
-        message_lower = message.lower()
-
-        # Find matching rules
+        # Find matching rules (one scan for all rules' keywords)
+        hits = self._keyword_matcher().matches(message)
         matches: List[Tuple[RoutingRule, List[str], float]] = []
 
-        for rule in self.rules:
+        for index, rule in enumerate(self.rules):
             # Skip if provider not available
             if self.available_providers and rule.provider not in self.available_providers:
                 continue
 
-            matched_keywords = []
-            for keyword in rule.keywords:
-                if keyword.lower() in message_lower:
-                    matched_keywords.append(keyword)
-
+            matched_keywords = hits.get(index)
             if matched_keywords:
                 # Calculate confidence based on keyword matches
                 confidence = len(matched_keywords) / len(rule.keywords)
@@ -320,7 +345,10 @@ class SmartRouter:
                 # Try to get external metrics
                 try:
                     metrics = self._metrics_getter(rule.provider)
-                    perf_score = max(0.5, metrics.get("success_rate", 1.0))
+                    perf_score = max(
+                        0.5,
+                        ProviderPerformance.from_metrics(rule.provider, metrics).calculate_score(),
+                    )
                 except (RuntimeError, ValueError, TypeError, KeyError, AttributeError, OSError):
                     perf_score = 0.8  # Neutral if metrics unavailable
             else:
@@ -368,12 +396,14 @@ class SmartRouter:
         """Add a new routing rule."""
         self.rules.append(rule)
         self.rules.sort(key=lambda r: r.priority, reverse=True)
+        self._matcher = None
 
     def remove_rule(self, keywords: List[str]) -> bool:
         """Remove a rule by its keywords."""
         for i, rule in enumerate(self.rules):
             if set(rule.keywords) == set(keywords):
                 self.rules.pop(i)
+                self._matcher = None
                 return True
         return False
 
@@ -399,6 +429,7 @@ class SmartRouter:
         return {
             provider: {
                 "avg_latency_ms": round(perf.avg_latency_ms, 2),
+                "p95_latency_ms": round(perf.p95_latency_ms, 2),
                 "success_rate": round(perf.success_rate, 3),
                 "total_requests": perf.total_requests,
                 "recent_requests": perf.recent_requests,
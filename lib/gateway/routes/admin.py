@@ -150,6 +150,19 @@ if HAS_FASTAPI:
         }
 
 
+    @cache_router.post("/semantic/false-positive")
+    async def report_semantic_false_positive(
+        cache_key: str = Query(..., description="Cache key returned with a semantic hit"),
+        cache_manager=Depends(get_cache_manager),
+    ) -> Dict[str, Any]:
+        """Report a bad semantic cache hit and stop matching paraphrases to it."""
+        if not cache_manager:
+            raise_cache_not_enabled()
+
+        removed = cache_manager.report_semantic_false_positive(cache_key)
+        return {"cache_key": cache_key, "removed": removed}
+
+
     @router.post("/keys", response_model=CreateAPIKeyResponse)
     async def create_api_key(
         request: CreateAPIKeyRequest,
@@ -1,24 +1,33 @@
 """Batch operation routes for gateway API."""
 from __future__ import annotations
 
+import asyncio
 from typing import Any, Callable, Dict, List, Optional, Tuple
 
 try:
-    from fastapi import APIRouter, Depends, Query, Request
+    from fastapi import APIRouter, Depends, HTTPException, Query, Request
 
     HAS_FASTAPI = True
 except ImportError:  # pragma: no cover - optional FastAPI dependency
     HAS_FASTAPI = False
 
+from lib.batch_processor import BatchEvent, BatchProcessor, BatchStatus
+
+from ..batch_runner import QueueTaskRunner
 from ..models import (
     GatewayRequest,
     RequestStatus,
+    WebSocketEvent,
     BatchAskRequest,
     BatchCancelRequest,
     BatchStatusRequest,
     BatchReplyRequest,
+    BatchJobRequest,
 )
 
+# Queue priority of batch job requests (below interactive /api/ask traffic)
+BATCH_JOB_PRIORITY = 40
+
 if HAS_FASTAPI:
     router = APIRouter()
 else:  # pragma: no cover - API unavailable without FastAPI
@@ -41,6 +50,42 @@ def get_router_func(request: Request):
     return getattr(request.app.state, "router_func", None)
 
 
+def get_ws_manager(request: Request):
+    return getattr(request.app.state, "ws_manager", None)
+
+
+def get_batch_processor(request: Request) -> BatchProcessor:
+    """Batch processor shared with ``ccb batch`` (same job database)."""
+    processor = getattr(request.app.state, "batch_processor", None)
+    if processor is None:
+        config = request.app.state.config
+        processor = BatchProcessor(
+            max_concurrent=config.max_concurrent_requests,
+            default_provider=config.default_provider,
+        )
+        request.app.state.batch_processor = processor
+    return processor
+
+
+def start_batch_job(
+    processor: BatchProcessor,
+    job: Any,
+    queue: Any,
+    ws_manager: Any,
+    priority: int = BATCH_JOB_PRIORITY,
+    timeout_s: Optional[float] = None,
+) -> None:
+    """Run a job in the background, broadcasting its progress."""
+    def on_event(event: BatchEvent) -> None:
+        if ws_manager and event.type != "task_started":
+            asyncio.ensure_future(ws_manager.broadcast(
+                WebSocketEvent(type="batch_progress", data=event.to_dict())
+            ))
+
+    runner = QueueTaskRunner(queue, priority=priority, batch_id=job.id)
+    asyncio.create_task(processor.execute_batch_async(job, runner, on_event=on_event, timeout_s=timeout_s))
+
+
 def parse_provider_spec(config: Any, spec: str) -> Tuple[List[str], bool]:
     """Parse provider specification (single provider or @group)."""
     if spec.startswith("@"):
@@ -111,7 +156,7 @@ if HAS_FASTAPI:
                     },
                 )
 
-                if queue.enqueue(gw_request):
+                if await queue.enqueue(gw_request):
                     results.append(
                         {
                             "index": i,
@@ -345,3 +390,75 @@ if HAS_FASTAPI:
                 for r in all_pending
             ],
         }
+
+
+    @router.post("/jobs")
+    async def create_batch_job(
+        job_request: BatchJobRequest,
+        config=Depends(get_config),
+        queue=Depends(get_queue),
+        processor=Depends(get_batch_processor),
+        ws_manager=Depends(get_ws_manager),
+    ) -> Dict[str, Any]:
+        """
+        Start a batch job whose tasks run through the request queue.
+
+        Progress is broadcast as ``batch_progress`` WebSocket events.
+        """
+        provider = job_request.provider or config.default_provider
+        if provider not in config.providers:
+            raise HTTPException(status_code=400, detail=f"Unknown provider: {provider}")
+
+        job = processor.create_batch(job_request.messages, provider=provider)
+        start_batch_job(
+            processor, job, queue, ws_manager,
+            priority=job_request.priority,
+            timeout_s=job_request.timeout_s,
+        )
+        return {"job_id": job.id, "task_count": len(job.tasks), "status": BatchStatus.RUNNING.value}
+
+
+    @router.get("/jobs/{job_id}")
+    async def get_batch_job(
+        job_id: str,
+        include_tasks: bool = Query(False, description="Include per-task status"),
+        processor=Depends(get_batch_processor),
+    ) -> Dict[str, Any]:
+        """Get a batch job's progress."""
+        job = processor.get_job(job_id)
+        if job is None:
+            raise HTTPException(status_code=404, detail=f"Batch job not found: {job_id}")
+        data = job.to_dict()
+        if include_tasks:
+            data["tasks"] = [task.to_dict() for task in job.tasks]
+        return data
+
+
+    @router.post("/jobs/{job_id}/resume")
+    async def resume_batch_job(
+        job_id: str,
+        queue=Depends(get_queue),
+        processor=Depends(get_batch_processor),
+        ws_manager=Depends(get_ws_manager),
+    ) -> Dict[str, Any]:
+        """Resume an interrupted or cancelled batch job."""
+        job = processor.get_job(job_id)
+        if job is None:
+            raise HTTPException(status_code=404, detail=f"Batch job not found: {job_id}")
+        if processor.is_running(job_id):
+            raise HTTPException(status_code=409, detail=f"Batch job is already running: {job_id}")
+
+        remaining = sum(1 for task in job.tasks if not task.finished)
+        start_batch_job(processor, job, queue, ws_manager)
+        return {"job_id": job.id, "remaining": remaining, "status": BatchStatus.RUNNING.value}
+
+
+    @router.delete("/jobs/{job_id}")
+    async def cancel_batch_job(
+        job_id: str,
+        processor=Depends(get_batch_processor),
+    ) -> Dict[str, Any]:
+        """Cancel a batch job, stopping its in-flight requests."""
+        if not processor.cancel_batch(job_id):
+            raise HTTPException(status_code=404, detail=f"Batch job not found: {job_id}")
+        return {"success": True, "job_id": job_id}
@@ -349,13 +349,7 @@ if HAS_FASTAPI:
         for provider in available:
             metrics = store.get_provider_metrics(provider, hours=hours)
 
-            perf = ProviderPerformance(
-                provider=provider,
-                avg_latency_ms=float(metrics.get("avg_latency_ms", 0.0) or 0.0),
-                success_rate=float(metrics.get("success_rate", 1.0) or 1.0),
-                total_requests=int(metrics.get("total_requests", 0) or 0),
-                is_healthy=True,
-            )
+            perf = ProviderPerformance.from_metrics(provider, metrics)
 
             reliability = reliability_scores.get(provider) or {}
             if reliability:
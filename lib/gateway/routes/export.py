@@ -1,18 +1,32 @@
 """Data export routes for gateway API."""
 from __future__ import annotations
 
+import base64
+import csv
+import io
+import json
 import time
-from typing import Optional
+from datetime import datetime
+from itertools import islice
+from typing import Any, Dict, Iterable, Iterator, Optional, Tuple
 
 try:
-    from fastapi import APIRouter, Depends, Query, Request
-    from fastapi.responses import JSONResponse, Response
+    from fastapi import APIRouter, Depends, HTTPException, Query, Request
+    from fastapi.responses import JSONResponse, Response, StreamingResponse
 
     HAS_FASTAPI = True
 except ImportError:  # pragma: no cover - optional FastAPI dependency
     HAS_FASTAPI = False
 
-from ..models import DiscussionStatus, RequestStatus
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    HAS_PYARROW = True
+except ImportError:  # pragma: no cover - optional dependency
+    HAS_PYARROW = False
+
+from ..models import DiscussionStatus, GatewayRequest, RequestStatus
 
 if HAS_FASTAPI:
     router = APIRouter()
@@ -24,97 +38,272 @@ def get_store(request: Request):
     return request.app.state.store
 
 
+# format -> (media type, file suffix)
+EXPORT_FORMATS: Dict[str, Tuple[str, str]] = {
+    "json": ("application/json", "json"),
+    "ndjson": ("application/x-ndjson", "ndjson"),
+    "csv": ("text/csv", "csv"),
+    "parquet": ("application/vnd.apache.parquet", "parquet"),
+    "arrow": ("application/vnd.apache.arrow.stream", "arrow"),
+}
+
+CSV_COLUMNS = [
+    "id",
+    "provider",
+    "status",
+    "created_at",
+    "updated_at",
+    "priority",
+    "timeout_s",
+    "started_at",
+    "completed_at",
+    "message_preview",
+    "cursor",
+]
+
+# Rows buffered before a chunk is sent
+EXPORT_CHUNK_ROWS = 500
+
+
+def encode_export_cursor(request: GatewayRequest) -> str:
+    """Opaque token for resuming an export after ``request``."""
+    raw = json.dumps([request.created_at, request.id], separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_export_cursor(token: str) -> Tuple[float, str]:
+    """
+    Decode an export cursor into ``(created_at, id)``.
+
+    Raises:
+        ValueError: If the token is malformed
+    """
+    try:
+        raw = base64.urlsafe_b64decode(token + "=" * (-len(token) % 4))
+        created_at, request_id = json.loads(raw)
+        return float(created_at), str(request_id)
+    except (TypeError, ValueError, UnicodeDecodeError) as e:
+        raise ValueError(f"invalid export cursor: {e}") from e
+
+
+def _iso(ts: Optional[float]) -> str:
+    return datetime.fromtimestamp(ts).isoformat() if ts else ""
+
+
+def _export_record(request: GatewayRequest) -> Dict[str, Any]:
+    return {
+        **request.to_dict(),
+        "created_at_iso": _iso(request.created_at),
+        "cursor": encode_export_cursor(request),
+    }
+
+
+def iter_requests_json(
+    requests: Iterable[GatewayRequest],
+    days: int,
+    filters: Dict[str, Any],
+) -> Iterator[str]:
+    """Stream the legacy JSON export document, with the count at the end."""
+    yield (
+        "{"
+        f'"export_time": {json.dumps(datetime.now().isoformat())}, '
+        f'"days": {days}, '
+        f'"filters": {json.dumps(filters)}, '
+        '"requests": ['
+    )
+    count = 0
+    chunk = []
+    for request in requests:
+        chunk.append(("," if count else "") + json.dumps(_export_record(request)))
+        count += 1
+        if len(chunk) >= EXPORT_CHUNK_ROWS:
+            yield "".join(chunk)
+            chunk = []
+    chunk.append(f'], "total_count": {count}}}')
+    yield "".join(chunk)
+
+
+def iter_requests_ndjson(requests: Iterable[GatewayRequest]) -> Iterator[str]:
+    """Stream one JSON object per line."""
+    chunk = []
+    for request in requests:
+        chunk.append(json.dumps(_export_record(request)) + "\n")
+        if len(chunk) >= EXPORT_CHUNK_ROWS:
+            yield "".join(chunk)
+            chunk = []
+    if chunk:
+        yield "".join(chunk)
+
+
+def iter_requests_csv(requests: Iterable[GatewayRequest]) -> Iterator[str]:
+    """Stream CSV rows (header first)."""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(CSV_COLUMNS)
+    rows = 0
+    for request in requests:
+        writer.writerow(
+            [
+                request.id,
+                request.provider,
+                request.status.value,
+                _iso(request.created_at),
+                _iso(request.updated_at),
+                request.priority,
+                request.timeout_s,
+                _iso(request.started_at),
+                _iso(request.completed_at),
+                request.message[:100] if request.message else "",
+                encode_export_cursor(request),
+            ]
+        )
+        rows += 1
+        if rows % EXPORT_CHUNK_ROWS == 0:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+    yield buffer.getvalue()
+
+
+class _ChunkSink(io.RawIOBase):
+    """Write-only file collecting bytes until they are drained."""
+
+    def __init__(self) -> None:
+        super().__init__()
+        self._chunks = []
+        self._position = 0
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data) -> int:
+        data = bytes(data)
+        self._chunks.append(data)
+        self._position += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        return self._position
+
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks = []
+        return data
+
+
+def _arrow_schema():
+    return pa.schema([
+        ("id", pa.string()),
+        ("provider", pa.string()),
+        ("status", pa.string()),
+        ("priority", pa.int64()),
+        ("timeout_s", pa.float64()),
+        ("created_at", pa.float64()),
+        ("updated_at", pa.float64()),
+        ("started_at", pa.float64()),
+        ("completed_at", pa.float64()),
+        ("backend_type", pa.string()),
+        ("message", pa.string()),
+        ("metadata", pa.string()),
+        ("cursor", pa.string()),
+    ])
+
+
+def iter_requests_arrow(requests: Iterable[GatewayRequest], parquet: bool) -> Iterator[bytes]:
+    """Stream requests as Parquet (one row group per chunk) or an Arrow IPC stream."""
+    schema = _arrow_schema()
+    sink = _ChunkSink()
+    writer = pq.ParquetWriter(sink, schema) if parquet else pa.ipc.new_stream(sink, schema)
+
+    def write(batch):
+        columns = {name: [row[name] for row in batch] for name in schema.names}
+        writer.write_table(pa.Table.from_pydict(columns, schema=schema))
+
+    batch = []
+    for request in requests:
+        batch.append({
+            "id": request.id,
+            "provider": request.provider,
+            "status": request.status.value,
+            "priority": request.priority,
+            "timeout_s": request.timeout_s,
+            "created_at": request.created_at,
+            "updated_at": request.updated_at,
+            "started_at": request.started_at,
+            "completed_at": request.completed_at,
+            "backend_type": request.backend_type.value if request.backend_type else None,
+            "message": request.message,
+            "metadata": json.dumps(request.metadata) if request.metadata else None,
+            "cursor": encode_export_cursor(request),
+        })
+        if len(batch) >= EXPORT_CHUNK_ROWS:
+            write(batch)
+            batch = []
+            yield sink.drain()
+    if batch:
+        write(batch)
+    writer.close()
+    yield sink.drain()
+
+
 if HAS_FASTAPI:
     @router.get("/api/export/requests")
     async def export_requests(
-        format: str = Query("json", description="Export format: json or csv"),
+        format: str = Query("json", description="Export format: json, ndjson, csv, parquet or arrow"),
         status: Optional[str] = Query(None, description="Filter by status"),
         provider: Optional[str] = Query(None, description="Filter by provider"),
         days: int = Query(7, ge=1, le=90, description="Number of days to export"),
+        cursor: Optional[str] = Query(None, description="Resume after the row carrying this cursor"),
+        limit: Optional[int] = Query(None, ge=1, description="Maximum rows in this response"),
         store=Depends(get_store),
     ):
         """
-        Export requests to JSON or CSV format.
+        Export requests, streamed newest first.
+
+        Rows are read from SQLite in batches and written as they are read,
+        so memory use does not grow with the export size. Every row carries
+        a ``cursor``; pass the last one received to continue an export that
+        was cut off or limited with ``limit``.
 
         Useful for analytics, backup, and external processing.
         """
-        import csv
-        from datetime import datetime
-        from io import StringIO
-
-        since = time.time() - (days * 86400)
+        if format not in EXPORT_FORMATS:
+            raise HTTPException(status_code=400, detail=f"Unknown export format: {format}")
+        if format in ("parquet", "arrow") and not HAS_PYARROW:
+            raise HTTPException(status_code=400, detail=f"{format} export requires pyarrow")
+        try:
+            after = decode_export_cursor(cursor) if cursor else None
+        except ValueError:
+            raise HTTPException(status_code=400, detail="Invalid export cursor")
 
         status_enum = RequestStatus(status) if status else None
-        all_requests = store.list_requests(
+        rows = store.iter_requests(
             status=status_enum,
             provider=provider,
-            limit=10000,
-            order_by="created_at",
-            order_desc=True,
+            since=time.time() - (days * 86400),
+            after=after,
         )
-
-        requests = [request for request in all_requests if request.created_at >= since]
-
-        if format == "csv":
-            output = StringIO()
-            writer = csv.writer(output)
-
-            writer.writerow(
-                [
-                    "id",
-                    "provider",
-                    "status",
-                    "created_at",
-                    "updated_at",
-                    "priority",
-                    "timeout_s",
-                    "started_at",
-                    "completed_at",
-                    "message_preview",
-                ]
-            )
-
-            for request in requests:
-                writer.writerow(
-                    [
-                        request.id,
-                        request.provider,
-                        request.status.value,
-                        datetime.fromtimestamp(request.created_at).isoformat(),
-                        datetime.fromtimestamp(request.updated_at).isoformat() if request.updated_at else "",
-                        request.priority,
-                        request.timeout_s,
-                        datetime.fromtimestamp(request.started_at).isoformat() if request.started_at else "",
-                        datetime.fromtimestamp(request.completed_at).isoformat() if request.completed_at else "",
-                        request.message[:100] if request.message else "",
-                    ]
-                )
-
-            return Response(
-                content=output.getvalue(),
-                media_type="text/csv",
-                headers={
-                    "Content-Disposition": (
-                        f'attachment; filename="requests_export_{datetime.now().strftime("%Y%m%d")}.csv"'
-                    ),
-                },
-            )
-
-        data = [
-            {
-                **request.to_dict(),
-                "created_at_iso": datetime.fromtimestamp(request.created_at).isoformat(),
-            }
-            for request in requests
-        ]
-
-        return JSONResponse(
-            content={
-                "export_time": datetime.now().isoformat(),
-                "total_count": len(data),
-                "days": days,
-                "filters": {"status": status, "provider": provider},
-                "requests": data,
+        if limit:
+            rows = islice(rows, limit)
+
+        media_type, suffix = EXPORT_FORMATS[format]
+        if format == "json":
+            body = iter_requests_json(rows, days=days, filters={"status": status, "provider": provider})
+        elif format == "ndjson":
+            body = iter_requests_ndjson(rows)
+        elif format == "csv":
+            body = iter_requests_csv(rows)
+        else:
+            body = iter_requests_arrow(rows, parquet=format == "parquet")
+
+        # A sync iterator runs in the threadpool, keeping SQLite reads off the event loop
+        return StreamingResponse(
+            body,
+            media_type=media_type,
+            headers={
+                "Content-Disposition": (
+                    f'attachment; filename="requests_export_{datetime.now().strftime("%Y%m%d")}.{suffix}"'
+                ),
             },
         )
 
@@ -130,8 +319,6 @@ if HAS_FASTAPI:
 
         Exports provider performance metrics and cost data.
         """
-        import csv
-        from datetime import datetime
         from io import StringIO
 
         cost_by_provider = store.get_cost_by_provider(days=days)
@@ -210,8 +397,6 @@ if HAS_FASTAPI:
 
         Exports all discussion sessions with their messages.
         """
-        from datetime import datetime
-
         since = time.time() - (days * 86400)
 
         status_enum = DiscussionStatus(status) if status else None
@@ -88,6 +88,9 @@ if HAS_FASTAPI:
                     "requests": requests,
                     "success_rate": float(metrics.get("success_rate", 1.0) or 1.0),
                     "avg_latency_ms": float(metrics.get("avg_latency_ms", 0.0) or 0.0),
+                    "p50_latency_ms": float(metrics.get("p50_latency_ms", 0.0) or 0.0),
+                    "p95_latency_ms": float(metrics.get("p95_latency_ms", 0.0) or 0.0),
+                    "p99_latency_ms": float(metrics.get("p99_latency_ms", 0.0) or 0.0),
                     "errors": errors,
                     "enabled": bool(getattr(config.providers.get(provider_name), "enabled", True)),
                 }
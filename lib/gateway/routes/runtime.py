@@ -153,6 +153,18 @@ if HAS_FASTAPI:
                 hash(request.message),
                 cached is not None,
             )
+            cache_kind: Any = True
+            cache_meta: Dict[str, Any] = {}
+            if cached is None and getattr(config.cache, "semantic_enabled", False):
+                # Embedding the prompt is CPU-bound; keep it off the event loop
+                semantic = await asyncio.to_thread(
+                    cache_manager.get_semantic, providers[0], request.message
+                )
+                if semantic is not None:
+                    cached, similarity = semantic
+                    cache_kind = "semantic"
+                    cache_meta = {"similarity": round(similarity, 4)}
+                    logger.debug("Semantic cache hit similarity=%.4f", similarity)
             if cached:
                 logger.debug("Cache hit; returning cached response")
                 gw_request = GatewayRequest.create(
@@ -160,11 +172,11 @@ if HAS_FASTAPI:
                     message=request.message,
                     priority=request.priority,
                     timeout_s=effective_timeout_s,
-                    metadata={"cached": True, "cache_key": cached.cache_key},
+                    metadata={"cached": cache_kind, "cache_key": cached.cache_key, **cache_meta},
                 )
-                store.create_request(gw_request)
-                store.update_request_status(gw_request.id, RequestStatus.COMPLETED)
-                store.save_response(
+                await store.aio.create_request(gw_request)
+                await store.aio.update_request_status(gw_request.id, RequestStatus.COMPLETED)
+                await store.aio.save_response(
                     GatewayResponse(
                         request_id=gw_request.id,
                         status=RequestStatus.COMPLETED,
@@ -172,7 +184,7 @@ if HAS_FASTAPI:
                         provider=providers[0],
                         latency_ms=0.0,
                         tokens_used=cached.tokens_used,
-                        metadata={"cached": True},
+                        metadata={"cached": cache_kind, "cache_key": cached.cache_key, **cache_meta},
                     )
                 )
 
@@ -181,18 +193,19 @@ if HAS_FASTAPI:
                         "request_id": gw_request.id,
                         "provider": providers[0],
                         "status": "completed",
-                        "cached": True,
+                        "cached": cache_kind,
                         "parallel": False,
                         "response": cached.response,
                         "error": None,
                         "latency_ms": 0.0,
+                        **({"cache_key": cached.cache_key, **cache_meta} if cache_meta else {}),
                     }
 
                 return AskResponse(
                     request_id=gw_request.id,
                     provider=providers[0],
                     status="completed",
-                    cached=True,
+                    cached=cache_kind,
                     parallel=False,
                 )
 
@@ -214,10 +227,11 @@ if HAS_FASTAPI:
                 "providers": providers if is_parallel else None,
                 "aggregation_strategy": request.aggregation_strategy,
                 "agent": request.agent,
+                "cache_bypass": request.cache_bypass,
             },
         )
 
-        if not queue.enqueue(gw_request):
+        if not await queue.enqueue(gw_request):
             raise HTTPException(
                 status_code=503,
                 detail="Request queue is full. Try again later.",
@@ -238,38 +252,25 @@ if HAS_FASTAPI:
             )
 
         if wait:
-            deadline = time.time() + timeout
-            poll_interval = 0.5
-            max_poll_interval = 2.0
-
-            while time.time() < deadline:
-                await asyncio.sleep(poll_interval)
-                stored_request = store.get_request(gw_request.id)
-
-                if not stored_request:
-                    break
-
-                if stored_request.status in (
-                    RequestStatus.COMPLETED,
-                    RequestStatus.FAILED,
-                    RequestStatus.TIMEOUT,
-                ):
-                    response = store.get_response(gw_request.id)
-                    return {
-                        "request_id": gw_request.id,
-                        "provider": provider_spec,
-                        "status": stored_request.status.value,
-                        "cached": False,
-                        "parallel": is_parallel,
-                        "response": response.response if response else None,
-                        "error": response.error if response else None,
-                        "latency_ms": response.latency_ms if response else None,
-                        "retry_info": response.metadata.get("retry_info") if response and response.metadata else None,
-                        "thinking": response.thinking if response else None,
-                        "raw_output": response.raw_output if response else None,
-                    }
-
-                poll_interval = min(poll_interval * 1.5, max_poll_interval)
+            # Woken by the queue's completion registry; no DB polling while waiting
+            completion = await queue.completions.wait(gw_request.id, timeout)
+            if completion is not None:
+                response = completion.response
+                if response is None:
+                    response = await store.aio.get_response(gw_request.id)
+                return {
+                    "request_id": gw_request.id,
+                    "provider": provider_spec,
+                    "status": completion.status.value,
+                    "cached": False,
+                    "parallel": is_parallel,
+                    "response": response.response if response else None,
+                    "error": response.error if response else None,
+                    "latency_ms": response.latency_ms if response else None,
+                    "retry_info": response.metadata.get("retry_info") if response and response.metadata else None,
+                    "thinking": response.thinking if response else None,
+                    "raw_output": response.raw_output if response else None,
+                }
 
             return {
                 "request_id": gw_request.id,
@@ -298,33 +299,34 @@ if HAS_FASTAPI:
         wait: bool = Query(False, description="Wait for completion"),
         timeout: float = Query(300.0, description="Wait timeout in seconds"),
         store=Depends(get_store),
+        queue=Depends(get_queue),
     ) -> ReplyResponse:
         """
         Get the response for a request.
 
         If wait=true, blocks until the request completes or times out.
         """
-        request = store.get_request(request_id)
-        if not request:
-            raise_request_not_found()
-
-        if wait and request.status in (RequestStatus.QUEUED, RequestStatus.PROCESSING, RequestStatus.RETRYING):
-            deadline = time.time() + timeout
-            while time.time() < deadline:
-                await asyncio.sleep(0.5)
-                request = store.get_request(request_id)
-                if not request or request.status not in (
-                    RequestStatus.QUEUED,
-                    RequestStatus.PROCESSING,
-                    RequestStatus.RETRYING,
-                ):
-                    break
-
-        response = store.get_response(request_id)
+        completion = queue.completions.get_result(request_id)
+        status: Optional[str] = completion.status.value if completion else None
+
+        if completion is None:
+            request = await store.aio.get_request(request_id)
+            if not request:
+                raise_request_not_found()
+            status = request.status.value
+
+            if wait and request.status in (RequestStatus.QUEUED, RequestStatus.PROCESSING, RequestStatus.RETRYING):
+                completion = await queue.completions.wait(request_id, timeout)
+                if completion is not None:
+                    status = completion.status.value
+
+        response = completion.response if completion and completion.response else None
+        if response is None:
+            response = await store.aio.get_response(request_id)
 
         return ReplyResponse(
             request_id=request_id,
-            status=request.status.value if request else "unknown",
+            status=status or "unknown",
             response=response.response if response else None,
             error=response.error if response else None,
             latency_ms=response.latency_ms if response else None,
@@ -410,19 +412,19 @@ if HAS_FASTAPI:
     ) -> StatusResponse:
         """Get gateway and provider status."""
         uptime = time.time() - start_time
-        stats = store.get_stats()
+        stats = await store.aio.get_stats()
         queue_stats = queue.stats()
 
         cache_stats = None
         if cache_manager:
             cache_stats = cache_manager.get_stats().to_dict()
 
-        token_data = {provider_stats["provider"]: provider_stats for provider_stats in store.get_cost_by_provider(days=30)}
+        token_data = {provider_stats["provider"]: provider_stats for provider_stats in await store.aio.get_cost_by_provider(days=30)}
 
         providers = []
         for name, pconfig in config.providers.items():
-            pstatus = store.get_provider_status(name)
-            metrics = store.get_provider_metrics(name, hours=24)
+            pstatus = await store.aio.get_provider_status(name)
+            metrics = await store.aio.get_provider_metrics(name, hours=24)
             cost_info = token_data.get(name, {})
 
             providers.append(
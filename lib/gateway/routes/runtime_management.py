@@ -1,10 +1,12 @@
 """Management and listing routes for runtime API."""
 from __future__ import annotations
 
+import json
 from typing import Any, Dict, List, Optional
 
 try:
-    from fastapi import Depends, HTTPException, Query
+    from fastapi import Depends, HTTPException, Query, Request, WebSocket, WebSocketDisconnect
+    from fastapi.responses import StreamingResponse
 
     HAS_FASTAPI = True
 except ImportError:  # pragma: no cover - optional FastAPI dependency
@@ -12,6 +14,14 @@ except ImportError:  # pragma: no cover - optional FastAPI dependency
 
 from ..error_handlers import raise_request_not_found, raise_stream_not_found
 from ..models import RequestStatus
+from ..stream_bus import get_stream_bus, iter_stream_events
+
+
+def _sse_event(event: Optional[Dict[str, Any]]) -> str:
+    """Format a stream event (or a None heartbeat) as an SSE frame."""
+    if event is None:
+        return ": keepalive\n\n"
+    return f"id: {event.get('seq', '')}\ndata: {json.dumps(event, ensure_ascii=False)}\n\n"
 
 
 def register_runtime_management_routes(*, router, get_config, get_store, get_queue) -> Dict[str, Any]:
@@ -77,17 +87,68 @@ def register_runtime_management_routes(*, router, get_config, get_store, get_que
     @router.get("/api/stream/{request_id}")
     async def get_stream_output(
         request_id: str,
+        request: Request,
         from_line: int = Query(0, ge=0, description="Start reading from this line"),
-    ) -> Dict[str, Any]:
-        """Get stream output for a request."""
+        from_offset: Optional[int] = Query(
+            None, ge=0, description="Resume from a byte offset (next_offset of a previous call)"
+        ),
+        after_seq: int = Query(-1, ge=-1, description="SSE: resume after this event seq"),
+        config=Depends(get_config),
+    ):
+        """
+        Get stream output for a request.
+
+        With ``Accept: text/event-stream`` the response is a live SSE feed
+        of the request's events (honouring ``Last-Event-ID``) instead of a
+        JSON page of the log.
+        """
         from ..stream_output import get_stream_manager as get_runtime_stream_manager
 
         stream_manager = get_runtime_stream_manager()
+        bus = get_stream_bus()
+
+        if "text/event-stream" in request.headers.get("accept", ""):
+            last_event_id = request.headers.get("last-event-id", "")
+            if last_event_id.isdigit():
+                after_seq = int(last_event_id)
+            if bus.last_seq(request_id) is None and not stream_manager.stream_exists(request_id):
+                raise_stream_not_found()
+
+            async def generate_events():
+                async for event in iter_stream_events(
+                    bus,
+                    request_id,
+                    after_seq,
+                    stream_manager=stream_manager,
+                    heartbeat_s=config.streaming.heartbeat_interval_s,
+                ):
+                    yield _sse_event(event)
+
+            return StreamingResponse(
+                generate_events(),
+                media_type="text/event-stream",
+                headers={
+                    "Cache-Control": "no-cache",
+                    "Connection": "keep-alive",
+                    "X-Accel-Buffering": "no",
+                },
+            )
 
         status = stream_manager.get_stream_status(request_id)
         if not status.get("exists"):
             raise_stream_not_found()
 
+        if from_offset is not None:
+            entries, next_offset = stream_manager.read_stream_from(request_id, from_offset)
+            return {
+                "request_id": request_id,
+                "status": status,
+                "from_offset": from_offset,
+                "entries": entries,
+                "entry_count": len(entries),
+                "next_offset": next_offset,
+            }
+
         entries = stream_manager.read_stream(request_id, from_line)
         return {
             "request_id": request_id,
@@ -98,6 +159,38 @@ def register_runtime_management_routes(*, router, get_config, get_store, get_que
             "next_line": from_line + len(entries),
         }
 
+    @router.websocket("/api/stream/{request_id}")
+    async def stream_output_ws(
+        websocket: WebSocket,
+        request_id: str,
+        after_seq: int = -1,
+    ):
+        """Live WebSocket feed of a request's stream events (JSON per event)."""
+        from ..stream_output import get_stream_manager as get_runtime_stream_manager
+
+        stream_manager = get_runtime_stream_manager()
+        bus = get_stream_bus()
+        if bus.last_seq(request_id) is None and not stream_manager.stream_exists(request_id):
+            await websocket.close(code=4404)
+            return
+
+        config = websocket.app.state.config
+        await websocket.accept()
+        try:
+            async for event in iter_stream_events(
+                bus,
+                request_id,
+                after_seq,
+                stream_manager=stream_manager,
+                heartbeat_s=config.streaming.heartbeat_interval_s,
+            ):
+                await websocket.send_json(event if event is not None else {"type": "ping"})
+            await websocket.close()
+        except WebSocketDisconnect:
+            pass
+        except (RuntimeError, ValueError, TypeError, KeyError, AttributeError, OSError):
+            pass
+
     @router.get("/api/stream/{request_id}/tail")
     async def tail_stream(
         request_id: str,
@@ -112,13 +205,12 @@ def register_runtime_management_routes(*, router, get_config, get_store, get_que
         if not status.get("exists"):
             raise_stream_not_found()
 
-        all_entries = stream_manager.read_stream(request_id)
-        tail_entries = all_entries[-lines:] if len(all_entries) > lines else all_entries
+        tail_entries = stream_manager.read_stream_tail(request_id, lines)
 
         return {
             "request_id": request_id,
             "status": status,
-            "total_entries": len(all_entries),
+            "total_entries": status.get("entries", len(tail_entries)),
             "entries": tail_entries,
         }
 
@@ -222,6 +314,7 @@ def register_runtime_management_routes(*, router, get_config, get_store, get_que
         "list_providers": list_providers,
         "list_provider_groups": list_provider_groups,
         "get_stream_output": get_stream_output,
+        "stream_output_ws": stream_output_ws,
         "tail_stream": tail_stream,
         "list_streams": list_streams,
         "cleanup_streams": cleanup_streams,
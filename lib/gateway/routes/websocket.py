@@ -2,7 +2,12 @@
 from __future__ import annotations
 
 import asyncio
-from typing import Any, Set
+import json
+import time
+from collections import deque
+from typing import Any, Deque, Dict, Optional, Set, Tuple
+
+from lib.common.logging import get_logger
 
 try:
     from fastapi import APIRouter, Depends, WebSocket, WebSocketDisconnect
@@ -22,51 +27,190 @@ else:  # pragma: no cover - API unavailable without FastAPI
     router = None
 
 
+logger = get_logger("gateway.routes.websocket")
+
+
+class _Connection:
+    """A client socket with its bounded send queue and writer task."""
+
+    __slots__ = ("websocket", "queue", "ready", "task", "dropped", "full_since")
+
+    def __init__(self, websocket: WebSocket):
+        self.websocket = websocket
+        # (coalesce key, serialized event)
+        self.queue: Deque[Tuple[Optional[str], str]] = deque()
+        self.ready = asyncio.Event()
+        self.task: Optional[asyncio.Task] = None
+        self.dropped = 0
+        # When the queue last overflowed without draining since
+        self.full_since: Optional[float] = None
+
+
+def _coalesce_key(event: WebSocketEvent) -> Optional[str]:
+    """Events about the same request/discussion supersede each other when a client lags."""
+    data = event.data if isinstance(event.data, dict) else {}
+    entity = data.get("request_id") or data.get("discussion_id")
+    return str(entity) if entity else None
+
+
 class WebSocketManager:
-    """Manages WebSocket connections for real-time updates."""
+    """
+    Manages WebSocket connections for real-time updates.
+
+    ``broadcast``/``publish`` serialize an event once and append it to an
+    outbox; a dispatcher task fans it out to per-connection bounded queues
+    drained by one writer task per client, so a slow client never delays
+    the caller or other clients. When a client's queue is full the newest
+    event replaces a pending one for the same request/discussion, otherwise
+    the oldest pending event is dropped. A client whose queue stays full
+    for ``send_timeout_s``, or whose send stalls that long, is disconnected.
+    """
 
-    def __init__(self):
+    def __init__(
+        self,
+        max_queue: int = 256,
+        send_timeout_s: float = 10.0,
+    ):
         self.active_connections: Set[WebSocket] = set()
-        self._lock: asyncio.Lock | None = None
+        self.max_queue = max_queue
+        self.send_timeout_s = send_timeout_s
 
-    def _get_lock(self) -> asyncio.Lock:
-        if self._lock is None:
-            self._lock = asyncio.Lock()
-        return self._lock
+        self._connections: Dict[WebSocket, _Connection] = {}
+        self._outbox: Deque[Tuple[Optional[str], str]] = deque()
+        self._outbox_ready: Optional[asyncio.Event] = None
+        self._dispatcher: Optional[asyncio.Task] = None
+        self.events_published = 0
+        self.events_dropped = 0
+        self.events_coalesced = 0
+        self.slow_disconnects = 0
 
     async def connect(self, websocket: WebSocket) -> None:
         """Accept a new WebSocket connection."""
         await websocket.accept()
-        async with self._get_lock():
-            self.active_connections.add(websocket)
+        conn = _Connection(websocket)
+        conn.task = asyncio.create_task(self._writer(conn))
+        self._connections[websocket] = conn
+        self.active_connections.add(websocket)
+        self._ensure_dispatcher()
 
     async def disconnect(self, websocket: WebSocket) -> None:
         """Remove a WebSocket connection."""
-        async with self._get_lock():
-            self.active_connections.discard(websocket)
+        self._remove(websocket)
 
-    async def broadcast(self, event: WebSocketEvent) -> None:
-        """Broadcast an event to all connected clients."""
-        if not self.active_connections:
-            return
+    def _remove(self, websocket: WebSocket) -> Optional[_Connection]:
+        self.active_connections.discard(websocket)
+        conn = self._connections.pop(websocket, None)
+        if conn is not None and conn.task is not None and conn.task is not asyncio.current_task():
+            conn.task.cancel()
+        return conn
 
-        message = event.to_dict()
-        async with self._get_lock():
-            dead_connections = set()
-            for connection in self.active_connections:
-                try:
-                    await connection.send_json(message)
-                except (RuntimeError, ValueError, TypeError, KeyError, AttributeError, OSError):
-                    dead_connections.add(connection)
+    def publish(self, event: WebSocketEvent) -> None:
+        """Queue an event for all clients without waiting (O(1), loop thread only)."""
+        if not self._connections:
+            return
+        self._outbox.append((_coalesce_key(event), json.dumps(event.to_dict(), default=str)))
+        self.events_published += 1
+        if self._outbox_ready is not None:
+            self._outbox_ready.set()
 
-            self.active_connections -= dead_connections
+    async def broadcast(self, event: WebSocketEvent) -> None:
+        """Broadcast an event to all connected clients (returns immediately)."""
+        self.publish(event)
 
     async def send_to(self, websocket: WebSocket, event: WebSocketEvent) -> None:
         """Send an event to a specific client."""
+        conn = self._connections.get(websocket)
+        if conn is None:
+            try:
+                await websocket.send_json(event.to_dict())
+            except (RuntimeError, ValueError, TypeError, KeyError, AttributeError, OSError):
+                await self.disconnect(websocket)
+            return
+        self._enqueue(conn, _coalesce_key(event), json.dumps(event.to_dict(), default=str))
+
+    def stats(self) -> Dict[str, int]:
+        """Connection and delivery counters."""
+        return {
+            "connections": len(self._connections),
+            "queued": sum(len(c.queue) for c in self._connections.values()),
+            "outbox": len(self._outbox),
+            "events_published": self.events_published,
+            "events_dropped": self.events_dropped,
+            "events_coalesced": self.events_coalesced,
+            "slow_disconnects": self.slow_disconnects,
+        }
+
+    def _ensure_dispatcher(self) -> None:
+        if self._outbox_ready is None:
+            self._outbox_ready = asyncio.Event()
+        if self._dispatcher is None or self._dispatcher.done():
+            self._dispatcher = asyncio.create_task(self._dispatch())
+
+    async def _dispatch(self) -> None:
+        """Fan outbox events out to every connection's queue."""
+        while True:
+            await self._outbox_ready.wait()
+            self._outbox_ready.clear()
+            while self._outbox:
+                key, message = self._outbox.popleft()
+                for conn in list(self._connections.values()):
+                    self._enqueue(conn, key, message)
+
+    def _enqueue(self, conn: _Connection, key: Optional[str], message: str) -> None:
+        if len(conn.queue) >= self.max_queue:
+            now = time.monotonic()
+            if conn.full_since is None:
+                conn.full_since = now
+            elif now - conn.full_since > self.send_timeout_s:
+                self._drop_slow(conn)
+                return
+            replaced = False
+            if key is not None:
+                for i, (pending_key, _message) in enumerate(conn.queue):
+                    if pending_key == key:
+                        del conn.queue[i]
+                        self.events_coalesced += 1
+                        replaced = True
+                        break
+            if not replaced:
+                conn.queue.popleft()
+                conn.dropped += 1
+                self.events_dropped += 1
+        conn.queue.append((key, message))
+        conn.ready.set()
+
+    def _drop_slow(self, conn: _Connection) -> None:
+        logger.warning("Disconnecting slow WebSocket client (queue full, %s events dropped)", conn.dropped)
+        self.slow_disconnects += 1
+        self._remove(conn.websocket)
+        asyncio.ensure_future(self._close_quietly(conn.websocket))
+
+    @staticmethod
+    async def _close_quietly(websocket: WebSocket) -> None:
+        try:
+            await websocket.close(code=1013)
+        except (RuntimeError, ValueError, TypeError, KeyError, AttributeError, OSError):
+            pass
+
+    async def _writer(self, conn: _Connection) -> None:
+        """Drain one connection's queue; a failed or stalled send disconnects it."""
         try:
-            await websocket.send_json(event.to_dict())
+            while True:
+                if not conn.queue:
+                    conn.full_since = None
+                    conn.ready.clear()
+                    await conn.ready.wait()
+                    continue
+                _key, message = conn.queue.popleft()
+                await asyncio.wait_for(conn.websocket.send_text(message), self.send_timeout_s)
+        except asyncio.CancelledError:
+            raise
+        except asyncio.TimeoutError:
+            self.slow_disconnects += 1
+            self._remove(conn.websocket)
+            await self._close_quietly(conn.websocket)
         except (RuntimeError, ValueError, TypeError, KeyError, AttributeError, OSError):
-            await self.disconnect(websocket)
+            self._remove(conn.websocket)
 
 
 def get_ws_manager(websocket: WebSocket):
@@ -26,7 +26,7 @@ from .models import (
 from .state_store import StateStore
 from .request_queue import RequestQueue, AsyncRequestQueue
 from .gateway_config import GatewayConfig
-from .backends import BaseBackend, HTTPBackend, CLIBackend, ObsidianBackend
+from .backends import BaseBackend, HTTPBackend, CLIBackend, InteractiveCLIBackend, ObsidianBackend
 from .backends.base_backend import BackendResult
 from .server_requests import (
     process_request as process_request_impl,
@@ -52,6 +52,7 @@ from .parallel import ParallelExecutor, ParallelConfig, AggregationStrategy
 from .auth import AuthMiddleware, APIKeyStore
 from .rate_limiter import RateLimiter, RateLimitMiddleware
 from .metrics import GatewayMetrics
+from .http_client import configure_http_client
 from .discussion import DiscussionExecutor
 
 logger = get_logger("gateway.server")
@@ -120,6 +121,7 @@ class GatewayServer:
             self.store,
             max_size=self.config.max_queue_size,
             max_concurrent=self.config.max_concurrent_requests,
+            coalesce=self.config.coalesce_requests,
         )
         self.async_queue: Optional[AsyncRequestQueue] = None
 
@@ -182,6 +184,8 @@ class GatewayServer:
                 elif pconfig.backend_type == BackendType.CLI_EXEC:
                     if name == "obsidian":
                         self.backends[name] = ObsidianBackend(pconfig)
+                    elif pconfig.cli_workers > 0:
+                        self.backends[name] = InteractiveCLIBackend(pconfig)
                     else:
                         self.backends[name] = CLIBackend(pconfig)
                 # FIFO and Terminal backends can be added later
@@ -239,6 +243,7 @@ class GatewayServer:
         """Initialize security and observability features."""
         # Metrics (always enabled for observability)
         self.metrics = GatewayMetrics()
+        configure_http_client(self.config.http_client, metrics=self.metrics)
 
     def _init_memory_features(self) -> None:
         """Initialize memory middleware for context injection and recording."""
@@ -253,7 +258,11 @@ class GatewayServer:
             logger.info("Memory Middleware not available")
 
         # API Key store (always created, auth can be toggled)
-        self.api_key_store = APIKeyStore(self.store)
+        self.api_key_store = APIKeyStore(
+            self.store,
+            cache_ttl_s=self.config.auth.key_cache_ttl_s,
+            flush_interval_s=self.config.auth.last_used_flush_s,
+        )
 
         # Auth middleware
         if self.config.auth:
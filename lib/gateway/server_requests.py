@@ -2,6 +2,7 @@
 
 from __future__ import annotations
 
+import asyncio
 import time
 from typing import Any, Dict, Optional
 
@@ -15,6 +16,21 @@ from .parallel import AggregationStrategy
 logger = get_logger("gateway.server")
 
 
+async def _finish_request(
+    self,
+    request_id: str,
+    gw_response: GatewayResponse,
+    response: Optional[str] = None,
+    error: Optional[str] = None,
+) -> None:
+    """Save the response and mark the request done without blocking the event loop."""
+    def _finish() -> None:
+        self.store.save_response(gw_response)
+        self.queue.mark_completed(request_id, response=response, error=error, result=gw_response)
+
+    await self.store.aio.run(_finish)
+
+
 async def process_request(self, request: GatewayRequest) -> None:
     """
     Process a single request.
@@ -97,12 +113,13 @@ async def _process_single_request(self, request: GatewayRequest) -> None:
         backend = self.backends.get(provider)
 
         if not backend:
-            self.store.update_request_status(request.id, RequestStatus.FAILED)
-            self.store.save_response(GatewayResponse(
+            error = f"No backend available for provider: {provider}"
+            gw_response = GatewayResponse(
                 request_id=request.id,
                 status=RequestStatus.FAILED,
-                error=f"No backend available for provider: {provider}",
-            ))
+                error=error,
+            )
+            await _finish_request(self, request.id, gw_response, error=error)
             return
 
         try:
@@ -159,12 +176,13 @@ async def _process_single_request(self, request: GatewayRequest) -> None:
 async def _process_parallel_request(self, request: GatewayRequest) -> None:
     """Process a parallel request across multiple providers."""
     if not self.parallel_executor:
-        self.store.update_request_status(request.id, RequestStatus.FAILED)
-        self.store.save_response(GatewayResponse(
+        error = "Parallel execution not enabled"
+        gw_response = GatewayResponse(
             request_id=request.id,
             status=RequestStatus.FAILED,
-            error="Parallel execution not enabled",
-        ))
+            error=error,
+        )
+        await _finish_request(self, request.id, gw_response, error=error)
         return
 
     providers = request.metadata.get("providers", [])
@@ -197,8 +215,7 @@ async def _process_parallel_request(self, request: GatewayRequest) -> None:
     latency_ms = (time.time() - start_time) * 1000
 
     if result.success:
-        self.store.update_request_status(request.id, RequestStatus.COMPLETED)
-        self.store.save_response(GatewayResponse(
+        gw_response = GatewayResponse(
             request_id=request.id,
             status=RequestStatus.COMPLETED,
             response=result.selected_response,
@@ -209,8 +226,8 @@ async def _process_parallel_request(self, request: GatewayRequest) -> None:
                 "strategy": strategy.value,
                 "all_responses": {k: v.to_dict() for k, v in result.all_responses.items()},
             },
-        ))
-        self.queue.mark_completed(request.id, response=result.selected_response)
+        )
+        await _finish_request(self, request.id, gw_response, response=result.selected_response)
 
         # Cache the selected response
         if self.cache_manager and result.selected_provider:
@@ -218,7 +235,9 @@ async def _process_parallel_request(self, request: GatewayRequest) -> None:
             if request.metadata:
                 cache_message = request.metadata.get("original_message", request.message)
             logger.debug("Saving parallel result to cache provider=%s message_hash=%s", result.selected_provider, hash(cache_message))
-            self.cache_manager.put(
+            # Embedding the prompt for the semantic tier is CPU-bound; keep it off the event loop
+            await asyncio.to_thread(
+                self.cache_manager.put,
                 result.selected_provider,
                 cache_message,
                 result.selected_response,
@@ -227,8 +246,7 @@ async def _process_parallel_request(self, request: GatewayRequest) -> None:
         else:
             logger.debug("Skipping parallel cache save cache_manager=%s provider=%s", self.cache_manager is not None, result.selected_provider)
     else:
-        self.store.update_request_status(request.id, RequestStatus.FAILED)
-        self.store.save_response(GatewayResponse(
+        gw_response = GatewayResponse(
             request_id=request.id,
             status=RequestStatus.FAILED,
             error=result.error,
@@ -238,8 +256,8 @@ async def _process_parallel_request(self, request: GatewayRequest) -> None:
                 "strategy": strategy.value,
                 "all_responses": {k: v.to_dict() for k, v in result.all_responses.items()},
             },
-        ))
-        self.queue.mark_completed(request.id, error=result.error)
+        )
+        await _finish_request(self, request.id, gw_response, error=result.error)
 
     # Broadcast completion (wrapped in try-except to prevent status overwrite)
     try:
@@ -266,13 +284,11 @@ async def _handle_success(
     """Handle successful request completion."""
     provider = request.provider
 
-    self.store.update_request_status(request.id, RequestStatus.COMPLETED)
-
     metadata = result.metadata or {}
     if retry_info:
         metadata["retry_info"] = retry_info
 
-    self.store.save_response(GatewayResponse(
+    gw_response = GatewayResponse(
         request_id=request.id,
         status=RequestStatus.COMPLETED,
         response=result.response,
@@ -282,8 +298,9 @@ async def _handle_success(
         metadata=metadata,
         thinking=result.thinking,
         raw_output=result.raw_output,
-    ))
-    self.queue.mark_completed(request.id, response=result.response)
+    )
+    # Sets COMPLETED in the store and wakes synchronous waiters
+    await _finish_request(self, request.id, gw_response, response=result.response)
 
     # === Memory Middleware: Post-Response Hook ===
     if self.memory_middleware:
@@ -315,7 +332,9 @@ async def _handle_success(
         cache_message = request.message
         if request.metadata:
             cache_message = request.metadata.get("original_message", request.message)
-        self.cache_manager.put(
+        # Embedding the prompt for the semantic tier is CPU-bound; keep it off the event loop
+        await asyncio.to_thread(
+            self.cache_manager.put,
             provider,
             cache_message,
             result.response,
@@ -325,8 +344,6 @@ async def _handle_success(
     # Record success metric
     self.store.record_metric(
         provider=provider,
-        event_type="request_completed",
-        request_id=request.id,
         latency_ms=latency_ms,
         success=True,
     )
@@ -381,30 +398,26 @@ async def _handle_failure(
     """Handle request failure."""
     provider = request.provider
 
-    self.store.update_request_status(request.id, RequestStatus.FAILED)
-
     metadata = result.metadata or {}
     if retry_info:
         metadata["retry_info"] = retry_info
 
-    self.store.save_response(GatewayResponse(
+    gw_response = GatewayResponse(
         request_id=request.id,
         status=RequestStatus.FAILED,
         error=result.error,
         provider=provider,
         latency_ms=latency_ms,
         metadata=metadata,
-    ))
-    self.queue.mark_completed(request.id, error=result.error)
+    )
+    # Sets FAILED in the store and wakes synchronous waiters
+    await _finish_request(self, request.id, gw_response, error=result.error or "Request failed")
 
     # Record failure metric
     self.store.record_metric(
         provider=provider,
-        event_type="request_failed",
-        request_id=request.id,
         latency_ms=latency_ms,
         success=False,
-        error=result.error,
     )
 
     # Broadcast WebSocket event (wrapped in try-except to prevent status overwrite)
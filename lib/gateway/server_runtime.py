@@ -9,6 +9,7 @@ from typing import Optional
 from lib.common.logging import get_logger
 
 from .app import create_app as build_app
+from .http_client import close_http_client
 from .models import ProviderInfo
 from .request_queue import AsyncRequestQueue
 
@@ -102,6 +103,12 @@ async def start(self) -> None:
     if self.backpressure:
         await self.backpressure.start()
 
+    if self.api_key_store:
+        await self.api_key_store.start()
+
+    if self.cache_manager:
+        await self.cache_manager.start()
+
     logger.info("Gateway server started")
     logger.info("Retry: %s", "enabled" if self.config.retry.enabled else "disabled")
     logger.info("Cache: %s", "enabled" if self.config.cache.enabled else "disabled")
@@ -130,12 +137,29 @@ async def stop(self) -> None:
     if self.backpressure:
         await self.backpressure.stop()
 
+    if self.api_key_store:
+        await self.api_key_store.stop()
+
     for backend in self.backends.values():
         try:
             await backend.shutdown()
         except (RuntimeError, ValueError, TypeError, KeyError, AttributeError, OSError):
             logger.debug("Backend shutdown failed", exc_info=True)
 
+    await close_http_client()
+
+    if self.memory_middleware:
+        self.memory_middleware.close()
+
+    if self.cache_manager:
+        try:
+            await self.cache_manager.stop()
+        except (RuntimeError, ValueError, TypeError, KeyError, AttributeError, OSError):
+            logger.debug("Cache hit flush failed", exc_info=True)
+
+    # Drain queued writes and close pooled SQLite connections
+    self.store.close()
+
     logger.info("Gateway server stopped")
 
 
@@ -7,12 +7,15 @@ from __future__ import annotations
 
 import json
 import sqlite3
+import threading
 import time
 from contextlib import contextmanager
 from pathlib import Path
-from typing import Optional, List, Dict, Any, Iterator
+from typing import Optional, List, Dict, Any, Iterator, Sequence
 
+from lib.common.logging import get_logger
 from lib.common.paths import default_gateway_db_path
+from lib.latency_sketch import LatencySketch
 
 from .models import (
     RequestStatus,
@@ -33,6 +36,7 @@ from .state_store_requests import (
     get_request_impl,
     update_request_status_impl,
     list_requests_impl,
+    iter_requests_impl,
     get_pending_requests_impl,
     cancel_request_impl,
     cleanup_old_requests_impl,
@@ -80,6 +84,17 @@ from .state_store_costs import (
     get_latest_results_impl,
     get_result_by_id_impl,
 )
+from .metrics_rollup import MetricsRollup, RollupBucket, default_tiers
+from .state_store_pool import AsyncStateStore, SQLiteConnectionPool, SQLiteWriteQueue
+
+_ROLLUP_UPSERT_SQL = """
+    INSERT OR REPLACE INTO metrics_rollup (
+        resolution_s, provider, bucket_start, count, errors,
+        latency_count, latency_sum, latency_min, latency_max, sketch
+    ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+"""
+
+logger = get_logger("gateway.state_store")
 
 
 class StateStore:
@@ -91,8 +106,19 @@ class StateStore:
     - Responses from providers
     - Provider health/status information
     - Request metrics for analytics
+
+    Connections are pooled per thread, hot-path writes go through a single
+    writer thread with grouped commits, and ``store.aio`` exposes every
+    method as a coroutine for use from async route handlers.
+
+    Provider metrics are kept as 1s/1m/1h rollup buckets (``metrics_rollup``)
+    in memory and flushed as one ``metrics_rollup`` row per changed bucket,
+    so metric queries never scan per-event rows.
     """
 
+    METRICS_RETENTION_HOURS = 168
+    METRICS_FLUSH_INTERVAL_S = 5.0
+
     def __init__(self, db_path: Optional[str] = None):
         """
         Initialize the state store.
@@ -106,20 +132,71 @@ class StateStore:
             self.db_path = default_gateway_db_path()
 
         self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self._pool = SQLiteConnectionPool(self.db_path, timeout=30.0)
+        self._writer = SQLiteWriteQueue(self.db_path, timeout=30.0)
+        self.aio = AsyncStateStore(self)
+        self.metrics_rollup = MetricsRollup(default_tiers(self.METRICS_RETENTION_HOURS * 3600.0))
+        # One-shot timer armed by the first metric after each flush
+        self._metrics_timer: Optional[threading.Timer] = None
+        self._metrics_timer_lock = threading.Lock()
+        self._metrics_closed = False
         self._init_db()
+        self._load_metrics_rollup()
 
     @contextmanager
     def _get_connection(self) -> Iterator[sqlite3.Connection]:
-        """Get a database connection with row factory."""
-        conn = sqlite3.connect(str(self.db_path), timeout=30.0)
-        conn.row_factory = sqlite3.Row
-        conn.execute("PRAGMA journal_mode=WAL")
-        conn.execute("PRAGMA synchronous=NORMAL")
-        try:
+        """Get this thread's pooled database connection (commits on exit)."""
+        with self._pool.connection() as conn:
             yield conn
-            conn.commit()
-        finally:
-            conn.close()
+
+    def _write(
+        self,
+        sql: str,
+        params: Sequence[Any] = (),
+        wait: bool = True,
+        many: bool = False,
+    ) -> int:
+        """
+        Run a write statement through the single-writer queue.
+
+        Args:
+            sql: Statement to execute
+            params: Statement parameters (a sequence of rows when ``many``)
+            wait: Block until committed. Fire-and-forget writes return -1.
+            many: Execute the statement once per parameter row
+
+        Returns:
+            Row count of the statement (or -1 when not waiting)
+        """
+        if not wait:
+            self._writer.submit(sql, params, many=many)
+            return -1
+        return self._writer.execute(sql, params, many=many)
+
+    def flush_writes(self, timeout: Optional[float] = None) -> None:
+        """Block until all queued writes are committed."""
+        self._writer.flush(timeout)
+
+    def get_pool_stats(self) -> Dict[str, Any]:
+        """Get connection pool and writer queue statistics."""
+        return {
+            "connections": self._pool.size(),
+            "pending_writes": self._writer.pending(),
+            "writer": self._writer.stats.to_dict(),
+            "metrics_rollup": self.metrics_rollup.stats(),
+        }
+
+    def close(self) -> None:
+        """Flush pending writes and close all pooled connections."""
+        with self._metrics_timer_lock:
+            self._metrics_closed = True
+            timer, self._metrics_timer = self._metrics_timer, None
+        if timer is not None:
+            timer.cancel()
+        self.flush_metrics()
+        self._writer.stop()
+        self.aio.shutdown()
+        self._pool.close_all()
 
     def _init_db(self) -> None:
         """Initialize the database schema."""
@@ -208,17 +285,158 @@ class StateStore:
             conn.execute("CREATE INDEX IF NOT EXISTS idx_requests_status ON requests(status)")
             conn.execute("CREATE INDEX IF NOT EXISTS idx_requests_provider ON requests(provider)")
             conn.execute("CREATE INDEX IF NOT EXISTS idx_requests_created ON requests(created_at)")
+            # Keyset pagination for streaming exports
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_requests_created_id ON requests(created_at, id)")
             conn.execute("CREATE INDEX IF NOT EXISTS idx_requests_priority ON requests(priority DESC, created_at ASC)")
             conn.execute("CREATE INDEX IF NOT EXISTS idx_responses_request ON responses(request_id)")
             conn.execute("CREATE INDEX IF NOT EXISTS idx_metrics_provider ON metrics(provider)")
             conn.execute("CREATE INDEX IF NOT EXISTS idx_metrics_timestamp ON metrics(timestamp)")
 
+            # Highest legacy ``metrics`` id already folded into the rollup
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS metrics_legacy_import (
+                    id INTEGER PRIMARY KEY CHECK (id = 1),
+                    max_id INTEGER NOT NULL
+                )
+            """)
+
+            # Rolled-up metrics, one row per provider and time bucket
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS metrics_rollup (
+                    resolution_s INTEGER NOT NULL,
+                    provider TEXT NOT NULL,
+                    bucket_start REAL NOT NULL,
+                    count INTEGER NOT NULL,
+                    errors INTEGER NOT NULL,
+                    latency_count INTEGER NOT NULL,
+                    latency_sum REAL NOT NULL,
+                    latency_min REAL,
+                    latency_max REAL,
+                    sketch BLOB NOT NULL,
+                    PRIMARY KEY (resolution_s, provider, bucket_start)
+                ) WITHOUT ROWID
+            """)
+
             # Initialize discussion tables
             self._init_discussion_tables(conn)
 
             # Initialize cost tracking table
             self._init_cost_tracking_table(conn)
 
+    def _load_metrics_rollup(self) -> None:
+        """
+        Rebuild the in-memory rollup from persisted buckets.
+
+        Per-event rows in the legacy ``metrics`` table are folded into the
+        rollup once; ``metrics_legacy_import`` records the last imported id
+        so restarts skip them. The legacy rows themselves are kept.
+        """
+        now = time.time()
+        cutoffs = self.metrics_rollup.prune(now)
+        with self._get_connection() as conn:
+            cursor = conn.execute("SELECT * FROM metrics_rollup")
+            for row in cursor:
+                if row["bucket_start"] < cutoffs.get(row["resolution_s"], now):
+                    continue
+                try:
+                    latency = LatencySketch.from_bytes(row["sketch"])
+                except ValueError:
+                    continue
+                self.metrics_rollup.load(
+                    row["resolution_s"],
+                    row["provider"],
+                    row["bucket_start"],
+                    RollupBucket(row["count"], row["errors"], latency),
+                )
+
+            imported = conn.execute("SELECT max_id FROM metrics_legacy_import WHERE id = 1").fetchone()
+            imported_id = imported["max_id"] if imported else 0
+            legacy = conn.execute(
+                "SELECT MAX(id) AS max_id FROM metrics WHERE id > ?", (imported_id,)
+            ).fetchone()["max_id"]
+            if legacy is None:
+                return
+            cursor = conn.execute("""
+                SELECT provider, latency_ms, success, timestamp FROM metrics
+                WHERE id > ? AND id <= ? AND timestamp > ?
+            """, (imported_id, legacy, now - self.METRICS_RETENTION_HOURS * 3600))
+            folded = 0
+            for row in cursor:
+                folded += 1
+                self.metrics_rollup.record(
+                    row["provider"],
+                    success=bool(row["success"]),
+                    latency_ms=row["latency_ms"],
+                    timestamp=row["timestamp"],
+                )
+            self.metrics_rollup.prune(now)
+            self.metrics_rollup.mark_dirty()
+            self._save_rollup_buckets(conn)
+            conn.execute(
+                "INSERT OR REPLACE INTO metrics_legacy_import (id, max_id) VALUES (1, ?)", (legacy,)
+            )
+        logger.info(
+            "Folded %d legacy metrics rows (ids %d-%d) into the rollup; the rows are kept in %s",
+            folded, imported_id + 1, legacy, self.db_path,
+        )
+
+    def _rollup_rows(self) -> List[tuple]:
+        return [
+            (
+                resolution_s, provider, start, bucket.count, bucket.errors,
+                bucket.latency.count, bucket.latency.sum,
+                bucket.latency.min if bucket.latency.count else None,
+                bucket.latency.max if bucket.latency.count else None,
+                bucket.latency.to_bytes(),
+            )
+            for (resolution_s, provider, start), bucket in self.metrics_rollup.drain_dirty()
+        ]
+
+    def _save_rollup_buckets(self, conn: sqlite3.Connection) -> None:
+        conn.executemany(_ROLLUP_UPSERT_SQL, self._rollup_rows())
+
+    def flush_metrics(self, wait: bool = False) -> None:
+        """
+        Persist rollup buckets changed since the last flush.
+
+        Expired buckets are dropped from memory and from the table in the
+        same pass.
+
+        Args:
+            wait: Block until the rows are committed
+        """
+        now = time.time()
+        cutoffs = self.metrics_rollup.prune(now)
+        rows = self._rollup_rows()
+        if rows:
+            self._write(_ROLLUP_UPSERT_SQL, rows, wait=wait, many=True)
+        self._write(
+            "DELETE FROM metrics_rollup WHERE resolution_s = ? AND bucket_start < ?",
+            list(cutoffs.items()),
+            wait=wait,
+            many=True,
+        )
+
+    def _schedule_metrics_flush(self) -> None:
+        """Arm the flush timer unless one is already pending."""
+        with self._metrics_timer_lock:
+            if self._metrics_timer is not None or self._metrics_closed:
+                return
+            timer = threading.Timer(self.METRICS_FLUSH_INTERVAL_S, self._flush_metrics_timer)
+            timer.daemon = True
+            self._metrics_timer = timer
+        timer.start()
+
+    def _flush_metrics_timer(self) -> None:
+        with self._metrics_timer_lock:
+            if self._metrics_timer is None:
+                return  # Cancelled by close()
+            self._metrics_timer = None
+        try:
+            self.flush_metrics()
+        except sqlite3.Error as e:
+            logger.warning("Metrics flush failed: %s", e)
+
     def _init_cost_tracking_table(self, conn: sqlite3.Connection) -> None:
         """Initialize token cost tracking table."""
         conn.execute("""
@@ -390,6 +608,8 @@ class StateStore:
         return update_request_status_impl(self, *args, **kwargs)
     def list_requests(self, *args, **kwargs):
         return list_requests_impl(self, *args, **kwargs)
+    def iter_requests(self, *args, **kwargs):
+        return iter_requests_impl(self, *args, **kwargs)
     def get_pending_requests(self, *args, **kwargs):
         return get_pending_requests_impl(self, *args, **kwargs)
     def cancel_request(self, *args, **kwargs):
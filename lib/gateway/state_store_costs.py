@@ -38,21 +38,21 @@ def record_token_cost_impl(
         (output_tokens * pricing["output"] / 1_000_000)
     )
 
-    with self._get_connection() as conn:
-        conn.execute("""
-            INSERT INTO token_costs (
-                provider, request_id, input_tokens, output_tokens,
-                cost_usd, model, timestamp
-            ) VALUES (?, ?, ?, ?, ?, ?, ?)
-        """, (
-            provider,
-            request_id,
-            input_tokens,
-            output_tokens,
-            cost_usd,
-            model,
-            time.time(),
-        ))
+    # Queued; cost reports tolerate a few milliseconds of lag
+    self._write("""
+        INSERT INTO token_costs (
+            provider, request_id, input_tokens, output_tokens,
+            cost_usd, model, timestamp
+        ) VALUES (?, ?, ?, ?, ?, ?, ?)
+    """, (
+        provider,
+        request_id,
+        input_tokens,
+        output_tokens,
+        cost_usd,
+        model,
+        time.time(),
+    ), wait=False)
 
 def get_cost_summary_impl(self, days: int = 30) -> Dict[str, Any]:
     """Get cost summary for the specified period."""
@@ -0,0 +1,363 @@
+"""
+SQLite connection pooling for the gateway ``StateStore``.
+
+Provides:
+- ``SQLiteConnectionPool``: long-lived per-thread connections (pragmas run once)
+- ``SQLiteWriteQueue``: a single writer thread that groups queued writes into
+  shared transactions
+- ``AsyncStateStore``: an async facade that runs store calls on a small reader
+  thread pool so route handlers don't block the event loop
+"""
+from __future__ import annotations
+
+import asyncio
+import functools
+import queue
+import sqlite3
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from contextlib import contextmanager
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+from lib.common.logging import get_logger
+
+logger = get_logger("gateway.state_store_pool")
+
+
+def _open_connection(db_path: Path, timeout: float) -> sqlite3.Connection:
+    """Open a connection with the gateway's standard pragmas."""
+    # Connections are only ever used by their owning thread; disabling the
+    # same-thread check lets close_all() run from the shutdown thread.
+    conn = sqlite3.connect(str(db_path), timeout=timeout, check_same_thread=False)
+    conn.row_factory = sqlite3.Row
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    return conn
+
+
+class SQLiteConnectionPool:
+    """
+    Per-thread pool of long-lived SQLite connections.
+
+    Each thread reuses one connection for its lifetime, so the connect and
+    PRAGMA cost is paid once per thread instead of once per query. Nested
+    ``connection()`` blocks on the same thread share the outer transaction.
+    """
+
+    def __init__(self, db_path: Path, timeout: float = 30.0):
+        self.db_path = Path(db_path)
+        self.timeout = timeout
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._connections: Dict[int, Tuple[threading.Thread, sqlite3.Connection]] = {}
+        self._closed = False
+
+    def _thread_connection(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is not None:
+            return conn
+
+        conn = _open_connection(self.db_path, self.timeout)
+        current = threading.current_thread()
+        with self._lock:
+            self._prune_dead_locked()
+            self._connections[current.ident or id(current)] = (current, conn)
+        self._local.conn = conn
+        self._local.depth = 0
+        return conn
+
+    def _prune_dead_locked(self) -> None:
+        """Close connections owned by threads that have exited."""
+        for ident, (thread, conn) in list(self._connections.items()):
+            if not thread.is_alive():
+                self._connections.pop(ident, None)
+                try:
+                    conn.close()
+                except sqlite3.Error:
+                    pass
+
+    @contextmanager
+    def connection(self) -> Iterator[sqlite3.Connection]:
+        """Borrow this thread's connection; commits when the outermost block exits."""
+        if self._closed:
+            raise sqlite3.ProgrammingError("connection pool is closed")
+
+        conn = self._thread_connection()
+        self._local.depth += 1
+        try:
+            yield conn
+        except BaseException:
+            self._local.depth -= 1
+            if self._local.depth == 0 and conn.in_transaction:
+                conn.rollback()
+            raise
+        else:
+            self._local.depth -= 1
+            if self._local.depth == 0 and conn.in_transaction:
+                conn.commit()
+
+    def size(self) -> int:
+        """Number of open pooled connections."""
+        with self._lock:
+            return len(self._connections)
+
+    def close_all(self) -> None:
+        """Close every pooled connection."""
+        with self._lock:
+            self._closed = True
+            connections = list(self._connections.values())
+            self._connections.clear()
+        for _thread, conn in connections:
+            try:
+                conn.close()
+            except sqlite3.Error:
+                pass
+
+
+@dataclass
+class _WriteOp:
+    """A queued write statement."""
+    sql: str
+    params: Sequence[Any]
+    future: Optional[Future] = None
+    many: bool = False
+
+
+@dataclass
+class WriteQueueStats:
+    """Counters for the single-writer queue."""
+    statements: int = 0
+    transactions: int = 0
+    errors: int = 0
+    max_batch: int = 0
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "statements": self.statements,
+            "transactions": self.transactions,
+            "errors": self.errors,
+            "max_batch": self.max_batch,
+            "avg_batch": self.statements / self.transactions if self.transactions else 0.0,
+        }
+
+
+_STOP = object()
+
+
+class SQLiteWriteQueue:
+    """
+    Single writer thread with grouped commits.
+
+    Writes submitted from any thread are drained in FIFO order and committed
+    together (up to ``max_batch`` statements per transaction). Each statement
+    runs inside its own SAVEPOINT so a failing statement only fails its own
+    caller. Callers either wait for the commit (``execute``) or fire and
+    forget (``submit``).
+    """
+
+    def __init__(
+        self,
+        db_path: Path,
+        timeout: float = 30.0,
+        max_batch: int = 256,
+        batch_window_s: float = 0.002,
+    ):
+        self.db_path = Path(db_path)
+        self.timeout = timeout
+        self.max_batch = max_batch
+        self.batch_window_s = batch_window_s
+        self.stats = WriteQueueStats()
+
+        self._queue: "queue.Queue[Any]" = queue.Queue()
+        self._thread: Optional[threading.Thread] = None
+        self._start_lock = threading.Lock()
+        self._stopped = False
+
+    def _ensure_started(self) -> None:
+        if self._thread is not None:
+            return
+        with self._start_lock:
+            if self._thread is None:
+                self._thread = threading.Thread(
+                    target=self._run,
+                    name="gateway-sqlite-writer",
+                    daemon=True,
+                )
+                self._thread.start()
+
+    def submit(self, sql: str, params: Sequence[Any] = (), many: bool = False) -> Future:
+        """Queue a write and return a future resolving to its rowcount."""
+        if self._stopped:
+            raise sqlite3.ProgrammingError("write queue is stopped")
+        self._ensure_started()
+        future: Future = Future()
+        self._queue.put(_WriteOp(sql=sql, params=params, future=future, many=many))
+        return future
+
+    def execute(
+        self,
+        sql: str,
+        params: Sequence[Any] = (),
+        many: bool = False,
+        timeout: Optional[float] = None,
+    ) -> int:
+        """Queue a write and block until it is committed. Returns rowcount."""
+        if threading.current_thread() is self._thread:
+            raise RuntimeError("SQLiteWriteQueue.execute called from the writer thread")
+        return self.submit(sql, params, many=many).result(timeout=timeout or self.timeout)
+
+    def flush(self, timeout: Optional[float] = None) -> None:
+        """Block until every write queued so far is committed."""
+        if self._thread is None:
+            return
+        marker = self.submit("SELECT 1")
+        marker.result(timeout=timeout or self.timeout)
+
+    def pending(self) -> int:
+        """Approximate number of queued writes."""
+        return self._queue.qsize()
+
+    def stop(self, timeout: float = 5.0) -> None:
+        """Drain outstanding writes and stop the writer thread."""
+        self._stopped = True
+        if self._thread is None:
+            return
+        self._queue.put(_STOP)
+        self._thread.join(timeout=timeout)
+
+    def _run(self) -> None:
+        conn = _open_connection(self.db_path, self.timeout)
+        conn.isolation_level = None  # explicit BEGIN/COMMIT below
+        try:
+            while True:
+                first = self._queue.get()
+                if first is _STOP:
+                    return
+                batch: List[_WriteOp] = [first]
+
+                # Take whatever is already queued; only when other writers
+                # are active, give them the batch window to join this commit
+                stop_after = self._gather(batch, None)
+                if not stop_after and len(batch) > 1:
+                    stop_after = self._gather(batch, time.monotonic() + self.batch_window_s)
+
+                self._commit_batch(conn, batch)
+                if stop_after:
+                    return
+        finally:
+            try:
+                conn.close()
+            except sqlite3.Error:
+                pass
+
+    def _gather(self, batch: List[_WriteOp], deadline: Optional[float]) -> bool:
+        """
+        Move queued writes into ``batch`` (up to ``max_batch``).
+
+        Args:
+            batch: Batch being built
+            deadline: Keep waiting for writes until this monotonic time
+                (None = take only what is already queued)
+
+        Returns:
+            True if the stop marker was reached
+        """
+        while len(batch) < self.max_batch:
+            try:
+                if deadline is None:
+                    item = self._queue.get_nowait()
+                else:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    item = self._queue.get(timeout=remaining)
+            except queue.Empty:
+                break
+            if item is _STOP:
+                return True
+            batch.append(item)
+        return False
+
+    def _commit_batch(self, conn: sqlite3.Connection, batch: List[_WriteOp]) -> None:
+        results: List[Tuple[_WriteOp, Any, Optional[BaseException]]] = []
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            for op in batch:
+                conn.execute("SAVEPOINT op")
+                try:
+                    if op.many:
+                        cursor = conn.executemany(op.sql, op.params)
+                    else:
+                        cursor = conn.execute(op.sql, op.params)
+                    conn.execute("RELEASE SAVEPOINT op")
+                    results.append((op, cursor.rowcount, None))
+                except sqlite3.Error as exc:
+                    conn.execute("ROLLBACK TO SAVEPOINT op")
+                    conn.execute("RELEASE SAVEPOINT op")
+                    results.append((op, None, exc))
+            conn.execute("COMMIT")
+        except sqlite3.Error as exc:
+            logger.exception("Gateway write batch failed")
+            try:
+                conn.execute("ROLLBACK")
+            except sqlite3.Error:
+                pass
+            self.stats.errors += len(batch)
+            for op in batch:
+                if op.future is not None and not op.future.done():
+                    op.future.set_exception(exc)
+            return
+
+        self.stats.transactions += 1
+        self.stats.statements += len(batch)
+        self.stats.max_batch = max(self.stats.max_batch, len(batch))
+        for op, rowcount, error in results:
+            if error is not None:
+                self.stats.errors += 1
+                logger.debug("Gateway write failed: %s", error)
+            if op.future is None or op.future.done():
+                continue
+            if error is not None:
+                op.future.set_exception(error)
+            else:
+                op.future.set_result(rowcount)
+
+
+class AsyncStateStore:
+    """
+    Async facade over a ``StateStore``.
+
+    ``await store.aio.get_request(request_id)`` runs the synchronous store
+    method on a dedicated reader thread (each with its own pooled
+    connection) instead of blocking the event loop.
+    """
+
+    def __init__(self, store: Any, max_workers: int = 4):
+        self._store = store
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_workers,
+            thread_name_prefix="gateway-sqlite-reader",
+        )
+
+    async def run(self, func: Callable[..., Any], *args: Any, **kwargs: Any) -> Any:
+        """Run an arbitrary blocking callable on the reader pool."""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, functools.partial(func, *args, **kwargs))
+
+    def __getattr__(self, name: str) -> Callable[..., Any]:
+        method = getattr(self._store, name)
+        if not callable(method):
+            raise AttributeError(name)
+
+        async def _call(*args: Any, **kwargs: Any) -> Any:
+            return await self.run(method, *args, **kwargs)
+
+        _call.__name__ = name
+        return _call
+
+    def shutdown(self) -> None:
+        """Stop the reader pool."""
+        self._executor.shutdown(wait=False)
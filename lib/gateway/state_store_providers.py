@@ -87,79 +87,65 @@ def _row_to_provider_info_impl(self, row: sqlite3.Row) -> ProviderInfo:
 def record_metric_impl(
     self,
     provider: str,
-    event_type: str,
-    request_id: Optional[str] = None,
     latency_ms: Optional[float] = None,
     success: bool = True,
-    error: Optional[str] = None,
 ) -> None:
-    """Record a metric event."""
-    with self._get_connection() as conn:
-        conn.execute("""
-            INSERT INTO metrics (
-                provider, request_id, event_type, latency_ms,
-                success, error, timestamp
-            ) VALUES (?, ?, ?, ?, ?, ?, ?)
-        """, (
-            provider,
-            request_id,
-            event_type,
-            latency_ms,
-            1 if success else 0,
-            error,
-            time.time(),
-        ))
+    """
+    Record a metric event in the in-memory rollup.
+
+    Changed buckets are persisted by a timer within
+    ``METRICS_FLUSH_INTERVAL_S`` (queued; does not wait for the commit).
+    Request IDs and errors are stored with the request, not the metrics.
+    """
+    self.metrics_rollup.record(provider, success=success, latency_ms=latency_ms, timestamp=time.time())
+    self._schedule_metrics_flush()
 
 def get_provider_metrics_impl(
     self,
     provider: str,
     hours: int = 24,
 ) -> Dict[str, Any]:
-    """Get aggregated metrics for a provider."""
-    cutoff = time.time() - (hours * 3600)
-    with self._get_connection() as conn:
-        cursor = conn.execute("""
-            SELECT
-                COUNT(*) as total,
-                SUM(success) as successes,
-                AVG(latency_ms) as avg_latency,
-                MAX(latency_ms) as max_latency,
-                MIN(latency_ms) as min_latency
-            FROM metrics
-            WHERE provider = ? AND timestamp > ?
-        """, (provider, cutoff))
-        row = cursor.fetchone()
-        if row:
-            total = row["total"] or 0
-            successes = row["successes"] or 0
-            return {
-                "provider": provider,
-                "total_requests": total,
-                "successful_requests": successes,
-                "success_rate": successes / total if total > 0 else 1.0,
-                "avg_latency_ms": row["avg_latency"] or 0.0,
-                "max_latency_ms": row["max_latency"] or 0.0,
-                "min_latency_ms": row["min_latency"] or 0.0,
-            }
+    """
+    Get aggregated metrics for a provider.
+
+    Served from the rollup buckets covering the window; the window start is
+    exact to the second for the last 10 minutes, to the minute for the last
+    48 hours, and to the hour beyond that.
+    """
+    summary = self.metrics_rollup.summary(provider, since=time.time() - (hours * 3600))
+    latency = summary.latency
+    p50, p95, p99 = latency.quantiles((0.5, 0.95, 0.99))
+    total = summary.count
+    successes = total - summary.errors
     return {
         "provider": provider,
-        "total_requests": 0,
-        "successful_requests": 0,
-        "success_rate": 1.0,
-        "avg_latency_ms": 0.0,
-        "max_latency_ms": 0.0,
-        "min_latency_ms": 0.0,
+        "total_requests": total,
+        "successful_requests": successes,
+        "success_rate": successes / total if total > 0 else 1.0,
+        "avg_latency_ms": latency.mean,
+        "max_latency_ms": latency.max if latency.count else 0.0,
+        "min_latency_ms": latency.min if latency.count else 0.0,
+        "p50_latency_ms": p50,
+        "p95_latency_ms": p95,
+        "p99_latency_ms": p99,
     }
 
 def cleanup_old_metrics_impl(self, max_age_hours: int = 168) -> int:
-    """Remove metrics older than specified age (default 7 days)."""
-    cutoff = time.time() - (max_age_hours * 3600)
-    with self._get_connection() as conn:
-        cursor = conn.execute(
-            "DELETE FROM metrics WHERE timestamp < ?",
-            (cutoff,)
+    """
+    Remove metrics older than specified age (default 7 days).
+
+    Returns:
+        Number of rollup rows deleted
+    """
+    cutoffs = self.metrics_rollup.prune(max_age_s=max_age_hours * 3600)
+    self.flush_metrics()
+    return sum(
+        self._write(
+            "DELETE FROM metrics_rollup WHERE resolution_s = ? AND bucket_start < ?",
+            (resolution_s, cutoff),
         )
-        return cursor.rowcount
+        for resolution_s, cutoff in cutoffs.items()
+    )
 
 def get_stats_impl(self) -> Dict[str, Any]:
     """Get overall gateway statistics."""
@@ -5,7 +5,7 @@ from __future__ import annotations
 import json
 import sqlite3
 import time
-from typing import Optional, List, Dict, Any
+from typing import Optional, List, Dict, Any, Iterator, Tuple
 
 from .models import (
     RequestStatus,
@@ -24,28 +24,27 @@ from .models import (
 
 def create_request_impl(self, request: GatewayRequest) -> GatewayRequest:
     """Create a new request in the store."""
-    with self._get_connection() as conn:
-        conn.execute("""
-            INSERT INTO requests (
-                id, provider, message, status, priority, timeout_s,
-                created_at, updated_at, backend_type, routed_at,
-                started_at, completed_at, metadata
-            ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-        """, (
-            request.id,
-            request.provider,
-            request.message,
-            request.status.value,
-            request.priority,
-            request.timeout_s,
-            request.created_at,
-            request.updated_at,
-            request.backend_type.value if request.backend_type else None,
-            request.routed_at,
-            request.started_at,
-            request.completed_at,
-            json.dumps(request.metadata) if request.metadata else None,
-        ))
+    self._write("""
+        INSERT INTO requests (
+            id, provider, message, status, priority, timeout_s,
+            created_at, updated_at, backend_type, routed_at,
+            started_at, completed_at, metadata
+        ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+    """, (
+        request.id,
+        request.provider,
+        request.message,
+        request.status.value,
+        request.priority,
+        request.timeout_s,
+        request.created_at,
+        request.updated_at,
+        request.backend_type.value if request.backend_type else None,
+        request.routed_at,
+        request.started_at,
+        request.completed_at,
+        json.dumps(request.metadata) if request.metadata else None,
+    ))
     return request
 
 def get_request_impl(self, request_id: str) -> Optional[GatewayRequest]:
@@ -68,29 +67,28 @@ def update_request_status_impl(
 ) -> bool:
     """Update request status."""
     now = time.time()
-    with self._get_connection() as conn:
-        updates = ["status = ?", "updated_at = ?"]
-        params: List[Any] = [status.value, now]
-
-        if backend_type:
-            updates.append("backend_type = ?")
-            params.append(backend_type.value)
-
-        if status == RequestStatus.PROCESSING:
-            updates.append("started_at = ?")
-            params.append(now)
-            updates.append("routed_at = ?")
-            params.append(now)
-        elif status in (RequestStatus.COMPLETED, RequestStatus.FAILED, RequestStatus.TIMEOUT):
-            updates.append("completed_at = ?")
-            params.append(now)
-
-        params.append(request_id)
-        cursor = conn.execute(
-            f"UPDATE requests SET {', '.join(updates)} WHERE id = ?",
-            params
-        )
-        return cursor.rowcount > 0
+    updates = ["status = ?", "updated_at = ?"]
+    params: List[Any] = [status.value, now]
+
+    if backend_type:
+        updates.append("backend_type = ?")
+        params.append(backend_type.value)
+
+    if status == RequestStatus.PROCESSING:
+        updates.append("started_at = ?")
+        params.append(now)
+        updates.append("routed_at = ?")
+        params.append(now)
+    elif status in (RequestStatus.COMPLETED, RequestStatus.FAILED, RequestStatus.TIMEOUT):
+        updates.append("completed_at = ?")
+        params.append(now)
+
+    params.append(request_id)
+    rowcount = self._write(
+        f"UPDATE requests SET {', '.join(updates)} WHERE id = ?",
+        params
+    )
+    return rowcount > 0
 
 def list_requests_impl(
     self,
@@ -135,6 +133,71 @@ def list_requests_impl(
         cursor = conn.execute(query, params)
         return [self._row_to_request(row) for row in cursor.fetchall()]
 
+def iter_requests_impl(
+    self,
+    status: Optional[RequestStatus] = None,
+    provider: Optional[str] = None,
+    since: Optional[float] = None,
+    until: Optional[float] = None,
+    after: Optional[Tuple[float, str]] = None,
+    batch_size: int = 500,
+) -> Iterator[GatewayRequest]:
+    """Iterate requests newest first without loading them all.
+
+    Rows are read in keyset-paginated batches ordered by ``(created_at, id)``,
+    so memory stays bounded by ``batch_size`` and no read transaction is held
+    between batches.
+
+    Args:
+        status: Filter by request status
+        provider: Filter by provider name
+        since: Only requests created at or after this timestamp
+        until: Only requests created before this timestamp
+        after: ``(created_at, id)`` of the last request already seen;
+            iteration resumes with the next older one
+        batch_size: Rows fetched per query
+    """
+    clauses = []
+    params: List[Any] = []
+
+    if status:
+        clauses.append("status = ?")
+        params.append(status.value)
+
+    if provider:
+        clauses.append("provider = ?")
+        params.append(provider)
+
+    if since is not None:
+        clauses.append("created_at >= ?")
+        params.append(since)
+
+    if until is not None:
+        clauses.append("created_at < ?")
+        params.append(until)
+
+    position = after
+    while True:
+        where = list(clauses)
+        query_params = list(params)
+        if position is not None:
+            where.append("(created_at, id) < (?, ?)")
+            query_params.extend(position)
+        query = "SELECT * FROM requests"
+        if where:
+            query += " WHERE " + " AND ".join(where)
+        query += " ORDER BY created_at DESC, id DESC LIMIT ?"
+        query_params.append(batch_size)
+
+        with self._get_connection() as conn:
+            rows = conn.execute(query, query_params).fetchall()
+
+        for row in rows:
+            yield self._row_to_request(row)
+        if len(rows) < batch_size:
+            return
+        position = (rows[-1]["created_at"], rows[-1]["id"])
+
 def get_pending_requests_impl(self, limit: int = 10) -> List[GatewayRequest]:
     """Get pending requests ordered by priority."""
     return self.list_requests(status=RequestStatus.QUEUED, limit=limit)
@@ -192,26 +255,25 @@ def _row_to_request_impl(self, row: sqlite3.Row) -> GatewayRequest:
 
 def save_response_impl(self, response: GatewayResponse) -> None:
     """Save a response."""
-    with self._get_connection() as conn:
-        conn.execute("""
-            INSERT OR REPLACE INTO responses (
-                request_id, status, response, error, provider,
-                latency_ms, tokens_used, created_at, metadata,
-                thinking, raw_output
-            ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-        """, (
-            response.request_id,
-            response.status.value,
-            response.response,
-            response.error,
-            response.provider,
-            response.latency_ms,
-            response.tokens_used,
-            time.time(),
-            json.dumps(response.metadata) if response.metadata else None,
-            response.thinking,
-            response.raw_output,
-        ))
+    self._write("""
+        INSERT OR REPLACE INTO responses (
+            request_id, status, response, error, provider,
+            latency_ms, tokens_used, created_at, metadata,
+            thinking, raw_output
+        ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+    """, (
+        response.request_id,
+        response.status.value,
+        response.response,
+        response.error,
+        response.provider,
+        response.latency_ms,
+        response.tokens_used,
+        time.time(),
+        json.dumps(response.metadata) if response.metadata else None,
+        response.thinking,
+        response.raw_output,
+    ))
 
 def get_response_impl(self, request_id: str) -> Optional[GatewayResponse]:
     """Get response for a request."""
@@ -0,0 +1,339 @@
+"""
+In-memory pub/sub bus for live StreamOutput events.
+
+``StreamOutput`` publishes every entry here as it is written, so SSE and
+WebSocket clients of ``/api/stream/{request_id}`` see queued requests'
+output as it is produced instead of polling the JSONL log. Each request
+keeps a bounded replay ring for late joiners; subscribers that fall more
+than ``max_queue`` events behind are dropped with a final ``dropped``
+event carrying the last delivered ``seq`` so they can reconnect and resume.
+"""
+from __future__ import annotations
+
+import asyncio
+import threading
+import time
+from collections import OrderedDict, deque
+from typing import TYPE_CHECKING, Any, AsyncIterator, Deque, Dict, Optional, Set, Tuple
+
+from lib.common.logging import get_logger
+
+if TYPE_CHECKING:  # pragma: no cover - typing only (stream_output imports this module)
+    from .stream_output import StreamEntry
+
+logger = get_logger("gateway.stream_bus")
+
+
+class StreamSubscription:
+    """
+    One subscriber's view of a request's stream.
+
+    Iterate with ``async for`` to receive event dicts (the log entry format
+    plus ``seq``) until the ``complete`` entry, or a ``dropped`` event if
+    the subscriber fell too far behind.
+    """
+
+    def __init__(
+        self,
+        bus: "StreamBus",
+        request_id: str,
+        loop: asyncio.AbstractEventLoop,
+        max_queue: int,
+        after_seq: int,
+    ):
+        self.request_id = request_id
+        self.max_queue = max_queue
+        # Seq of the oldest event still in the replay ring when subscribing,
+        # or None if the ring covered everything after ``after_seq``
+        self.gap_until: Optional[int] = None
+        self.dropped = False
+        self.last_seq = after_seq
+
+        self._bus = bus
+        self._loop = loop
+        self._queue: Deque[Dict[str, Any]] = deque()
+        self._ready = asyncio.Event()
+        self._closed = False
+
+    def _deliver(self, event: Dict[str, Any]) -> bool:
+        """Queue an event (bus lock held). Returns False if the subscriber was dropped."""
+        if self._closed:
+            return False
+        if len(self._queue) >= self.max_queue:
+            self.dropped = True
+            self._queue.clear()
+            self._wake()
+            return False
+        self._queue.append(event)
+        if len(self._queue) == 1:
+            self._wake()
+        return True
+
+    def _wake(self) -> None:
+        try:
+            running = asyncio.get_running_loop()
+        except RuntimeError:
+            running = None
+        if running is self._loop:
+            self._ready.set()
+        else:
+            try:
+                self._loop.call_soon_threadsafe(self._ready.set)
+            except RuntimeError:
+                # Subscriber's loop is closed
+                self._closed = True
+
+    async def get(self, timeout: Optional[float] = None) -> Optional[Dict[str, Any]]:
+        """
+        Wait for the next event.
+
+        Returns:
+            Event dict, or None on timeout or once the subscription is closed
+        """
+        while not self._queue:
+            if self.dropped:
+                self.close()
+                return {"type": "dropped", "seq": self.last_seq, "request_id": self.request_id}
+            if self._closed:
+                return None
+            self._ready.clear()
+            if self._queue or self.dropped:
+                continue
+            try:
+                await asyncio.wait_for(self._ready.wait(), timeout)
+            except asyncio.TimeoutError:
+                return None
+        event = self._queue.popleft()
+        self.last_seq = event.get("seq", self.last_seq)
+        return event
+
+    def __aiter__(self):
+        return self._iterate()
+
+    async def _iterate(self):
+        try:
+            while True:
+                event = await self.get()
+                if event is None:
+                    return
+                yield event
+                if event.get("type") in ("complete", "dropped"):
+                    return
+        finally:
+            self.close()
+
+    @property
+    def closed(self) -> bool:
+        return self._closed
+
+    def close(self) -> None:
+        """Stop receiving events."""
+        if not self._closed:
+            self._closed = True
+            self._bus.unsubscribe(self)
+
+
+class _Topic:
+    __slots__ = ("seq", "ring", "subscribers", "finished_at")
+
+    def __init__(self, replay_size: int):
+        self.seq = -1
+        self.ring: Deque[Tuple[int, "StreamEntry"]] = deque(maxlen=replay_size)
+        self.subscribers: Set[StreamSubscription] = set()
+        self.finished_at: Optional[float] = None
+
+
+def _event(request_id: str, seq: int, entry: "StreamEntry") -> Dict[str, Any]:
+    event = entry.to_dict()
+    event["seq"] = seq
+    event["request_id"] = request_id
+    return event
+
+
+class StreamBus:
+    """Fan-out of stream entries to any number of async subscribers."""
+
+    def __init__(
+        self,
+        replay_size: int = 256,
+        max_queue: int = 1024,
+        max_topics: int = 1024,
+        linger_s: float = 300.0,
+    ):
+        """
+        Initialize the bus.
+
+        Args:
+            replay_size: Recent events kept per request for late joiners
+            max_queue: Undelivered events per subscriber before it is dropped
+            max_topics: Requests tracked at once (finished ones evicted first)
+            linger_s: How long a finished request stays replayable
+        """
+        self.replay_size = replay_size
+        self.max_queue = max_queue
+        self.max_topics = max_topics
+        self.linger_s = linger_s
+
+        self._topics: "OrderedDict[str, _Topic]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.published = 0
+        self.dropped_subscribers = 0
+
+    def publish(self, request_id: str, entry: "StreamEntry") -> int:
+        """
+        Publish a stream entry. Safe to call from any thread.
+
+        Returns:
+            The entry's sequence number within the request
+        """
+        with self._lock:
+            topic = self._topic_locked(request_id)
+            topic.seq += 1
+            seq = topic.seq
+            topic.ring.append((seq, entry))
+            if entry.type == "complete":
+                topic.finished_at = time.time()
+            self.published += 1
+            if topic.subscribers:
+                event = _event(request_id, seq, entry)
+                for sub in list(topic.subscribers):
+                    if not sub._deliver(event):
+                        topic.subscribers.discard(sub)
+                        if sub.dropped:
+                            self.dropped_subscribers += 1
+                            logger.debug("Dropped slow stream subscriber for %s", request_id)
+        return seq
+
+    def subscribe(self, request_id: str, after_seq: int = -1) -> StreamSubscription:
+        """
+        Subscribe to a request's events after ``after_seq``.
+
+        Must be called from the event loop the subscriber will consume on.
+        Events still in the replay ring are queued immediately; if older
+        events were already evicted, ``gap_until`` is set to the first
+        replayed seq so the caller can backfill from the log file.
+        """
+        sub = StreamSubscription(
+            self, request_id, asyncio.get_running_loop(), self.max_queue, after_seq
+        )
+        with self._lock:
+            topic = self._topic_locked(request_id)
+            replay = [(seq, entry) for seq, entry in topic.ring if seq > after_seq]
+            if replay and replay[0][0] > after_seq + 1:
+                sub.gap_until = replay[0][0]
+            elif not replay and topic.seq > after_seq:
+                sub.gap_until = topic.seq + 1
+            # Leave room for the replay on top of the live backlog
+            sub.max_queue = self.max_queue + len(replay)
+            for seq, entry in replay:
+                sub._deliver(_event(request_id, seq, entry))
+            topic.subscribers.add(sub)
+        return sub
+
+    def unsubscribe(self, sub: StreamSubscription) -> None:
+        with self._lock:
+            topic = self._topics.get(sub.request_id)
+            if topic is not None:
+                topic.subscribers.discard(sub)
+
+    def last_seq(self, request_id: str) -> Optional[int]:
+        """Latest published seq of a request, or None if not tracked."""
+        with self._lock:
+            topic = self._topics.get(request_id)
+            return topic.seq if topic is not None and topic.seq >= 0 else None
+
+    def is_finished(self, request_id: str) -> bool:
+        with self._lock:
+            topic = self._topics.get(request_id)
+            return topic is not None and topic.finished_at is not None
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "topics": len(self._topics),
+                "active_topics": sum(1 for t in self._topics.values() if t.finished_at is None),
+                "subscribers": sum(len(t.subscribers) for t in self._topics.values()),
+                "published": self.published,
+                "dropped_subscribers": self.dropped_subscribers,
+            }
+
+    def _topic_locked(self, request_id: str) -> _Topic:
+        topic = self._topics.get(request_id)
+        if topic is None:
+            self._evict_locked()
+            topic = _Topic(self.replay_size)
+            self._topics[request_id] = topic
+        return topic
+
+    def _evict_locked(self) -> None:
+        """Drop lingering finished topics, then the oldest if still over bound."""
+        cutoff = time.time() - self.linger_s
+        for request_id in [
+            rid for rid, t in self._topics.items()
+            if t.finished_at is not None and t.finished_at < cutoff and not t.subscribers
+        ]:
+            del self._topics[request_id]
+        while len(self._topics) >= self.max_topics:
+            victim = next(
+                (rid for rid, t in self._topics.items() if t.finished_at is not None),
+                next(iter(self._topics)),
+            )
+            del self._topics[victim]
+
+
+async def iter_stream_events(
+    bus: StreamBus,
+    request_id: str,
+    after_seq: int = -1,
+    stream_manager: Any = None,
+    heartbeat_s: Optional[float] = None,
+) -> AsyncIterator[Optional[Dict[str, Any]]]:
+    """
+    Yield a request's events after ``after_seq``, then follow it live.
+
+    Events no longer in the replay ring (or from before the bus saw the
+    request) are backfilled from the log via ``stream_manager``. Yields
+    None every ``heartbeat_s`` seconds without events so transports can
+    send keepalives. Ends after ``complete`` or ``dropped``.
+    """
+    known = bus.last_seq(request_id) is not None
+    sub = bus.subscribe(request_id, after_seq)
+    try:
+        if stream_manager is not None and (not known or sub.gap_until is not None):
+            start = after_seq + 1
+            for line, entry in enumerate(stream_manager.read_stream(request_id, start), start):
+                if known and line >= sub.gap_until:
+                    break
+                entry["seq"] = line
+                entry["request_id"] = request_id
+                yield entry
+                if entry.get("type") == "complete":
+                    return
+
+        while True:
+            event = await sub.get(timeout=heartbeat_s)
+            if event is None:
+                if sub.closed:
+                    return
+                yield None
+                continue
+            yield event
+            if event.get("type") in ("complete", "dropped"):
+                return
+    finally:
+        sub.close()
+
+
+# Global instance
+_bus: Optional[StreamBus] = None
+_bus_lock = threading.Lock()
+
+
+def get_stream_bus() -> StreamBus:
+    """Get the global stream bus instance."""
+    global _bus
+    if _bus is None:
+        with _bus_lock:
+            if _bus is None:
+                _bus = StreamBus()
+    return _bus
@@ -12,13 +12,17 @@ import os
 import time
 import json
 import sqlite3
+import threading
 from pathlib import Path
-from typing import Optional, Dict, Any, Callable, List
+from collections import OrderedDict
+from typing import Optional, Dict, Any, Callable, List, Tuple
 from dataclasses import dataclass, field
 from datetime import datetime
 
 from lib.common.logging import get_logger
 
+from .stream_bus import get_stream_bus
+
 # Default stream directory
 STREAM_DIR = Path(os.path.expanduser("~/.ccb/streams"))
 
@@ -28,6 +32,25 @@ DB_PATH = Path(os.path.expanduser("~/.ccb/ccb_memory.db"))
 
 logger = get_logger("gateway.stream_output")
 
+# Sidecar suffix; must not match the "*.jsonl" log glob
+INDEX_SUFFIX = ".idx.json"
+
+
+def _write_index(index_path: Path, index: Dict[str, Any]) -> None:
+    """Atomically replace a stream's sidecar index."""
+    tmp_path = index_path.with_name(index_path.name + ".tmp")
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(index, f)
+    os.replace(tmp_path, index_path)
+
+
+def _count_lines(path: Path) -> int:
+    count = 0
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            count += block.count(b"\n")
+    return count
+
 
 @dataclass
 class StreamEntry:
@@ -37,14 +60,106 @@ class StreamEntry:
     content: str
     metadata: Dict[str, Any] = field(default_factory=dict)
 
-    def to_json(self) -> str:
-        return json.dumps({
+    def to_dict(self) -> Dict[str, Any]:
+        return {
             "ts": self.timestamp,
             "time": datetime.fromtimestamp(self.timestamp).strftime("%H:%M:%S.%f")[:-3],
             "type": self.type,
             "content": self.content,
             "meta": self.metadata,
-        }, ensure_ascii=False)
+        }
+
+    def to_json(self) -> str:
+        return json.dumps(self.to_dict(), ensure_ascii=False)
+
+
+class _StreamFlusher:
+    """
+    Background flusher shared by all streams writing to one database.
+
+    Every ``interval`` seconds it flushes each registered stream's file
+    buffer and inserts the DB entries buffered by all streams in a single
+    transaction over one long-lived connection.
+    """
+
+    def __init__(self, db_path: Path, interval: float = 0.25):
+        self.db_path = db_path
+        self.interval = interval
+        self.db_enabled = db_path.exists()
+
+        self._streams: Dict[int, "StreamOutput"] = {}
+        self._lock = threading.Lock()
+        self._db_lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+        self._wakeup = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def register(self, stream: "StreamOutput") -> None:
+        with self._lock:
+            self._streams[id(stream)] = stream
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(
+                    target=self._run, name="stream-output-flusher", daemon=True
+                )
+                self._thread.start()
+
+    def unregister(self, stream: "StreamOutput") -> None:
+        with self._lock:
+            self._streams.pop(id(stream), None)
+
+    def _run(self) -> None:
+        while True:
+            self._wakeup.wait(self.interval)
+            self._wakeup.clear()
+            with self._lock:
+                streams = list(self._streams.values())
+            rows: List[tuple] = []
+            for stream in streams:
+                rows.extend(stream._drain(file_only=False))
+            if rows:
+                self.insert(rows)
+
+    def insert(self, rows: List[tuple]) -> bool:
+        """Insert ``stream_entries`` rows in one transaction."""
+        if not rows or not self.db_enabled:
+            return False
+        with self._db_lock:
+            try:
+                if self._conn is None:
+                    self._conn = sqlite3.connect(
+                        str(self.db_path), timeout=5.0, check_same_thread=False
+                    )
+                with self._conn:
+                    self._conn.executemany(
+                        """INSERT INTO stream_entries
+                           (request_id, entry_type, timestamp, content, metadata)
+                           VALUES (?, ?, ?, ?, ?)""",
+                        rows,
+                    )
+                return True
+            except sqlite3.OperationalError as e:
+                # Table might not exist yet, disable DB sync
+                if "no such table" in str(e):
+                    logger.warning("stream_entries table not found, disabling DB sync")
+                    self.db_enabled = False
+                else:
+                    logger.error("DB sync error: %s", e)
+            except (RuntimeError, ValueError, TypeError, KeyError, AttributeError, OSError) as e:
+                logger.error("DB sync error: %s", e)
+            return False
+
+
+_flushers: Dict[str, _StreamFlusher] = {}
+_flushers_lock = threading.Lock()
+
+
+def _get_flusher(db_path: Path) -> _StreamFlusher:
+    with _flushers_lock:
+        flusher = _flushers.get(str(db_path))
+        if flusher is None:
+            flusher = _StreamFlusher(db_path)
+            _flushers[str(db_path)] = flusher
+        return flusher
 
 
 class StreamOutput:
@@ -52,11 +167,21 @@ class StreamOutput:
     Manages streaming output for a single request.
 
     Writes to a log file that can be tailed for real-time updates.
-    Also syncs entries to SQLite database for persistence.
+    Also syncs entries to SQLite database for persistence, and publishes
+    each entry to the in-memory stream bus for live subscribers.
+
+    The log file stays open for the life of the stream. Entries are
+    buffered in memory and written once ``flush_bytes`` accumulate, or by
+    the shared background flusher within ``flush_interval`` seconds, so a
+    tail lags by at most that long. ``complete()`` and ``close()`` write,
+    fsync and insert everything still pending.
+
+    After each write a ``<request_id>.idx.json`` sidecar records the entry
+    count, byte size and last entry, so status lookups never parse the log.
     """
 
     def __init__(self, request_id: str, provider: str, stream_dir: Optional[Path] = None,
-                 db_path: Optional[Path] = None, buffer_size: int = 10):
+                 db_path: Optional[Path] = None, flush_bytes: int = 64 * 1024):
         self.request_id = request_id
         self.provider = provider
         self.stream_dir = stream_dir or STREAM_DIR
@@ -64,14 +189,24 @@ class StreamOutput:
 
         # Log file path: ~/.ccb/streams/{request_id}.jsonl
         self.log_path = self.stream_dir / f"{request_id}.jsonl"
+        self.index_path = self.stream_dir / f"{request_id}{INDEX_SUFFIX}"
         self.started_at = time.time()
         self._closed = False
 
-        # Database sync configuration
+        # Buffered file writes
+        self._lock = threading.Lock()
+        self._file = None
+        self._lines: List[StreamEntry] = []
+        self._pending_bytes = 0
+        self._flush_bytes = flush_bytes
+        self._entry_count = 0
+        self._size = 0
+
+        # Database sync configuration (batched by the shared flusher)
         self._db_path = db_path or DB_PATH
         self._entries_buffer: List[StreamEntry] = []
-        self._buffer_size = buffer_size
-        self._db_enabled = self._db_path.exists()
+        self._flusher = _get_flusher(self._db_path)
+        self._flusher.register(self)
 
         # Write initial entry
         self._write_entry(StreamEntry(
@@ -81,50 +216,112 @@ class StreamOutput:
             metadata={"provider": provider, "request_id": request_id}
         ))
 
+    @property
+    def _db_enabled(self) -> bool:
+        return self._flusher.db_enabled
+
     def _write_entry(self, entry: StreamEntry) -> None:
-        """Write an entry to the log file and buffer for DB sync."""
+        """Buffer an entry for the log file and DB sync."""
         if self._closed:
             return
         try:
-            # 1. Write to JSONL file (original behavior)
-            with open(self.log_path, "a", encoding="utf-8") as f:
-                f.write(entry.to_json() + "\n")
-                f.flush()
-
-            # 2. Buffer for database sync
-            if self._db_enabled:
-                self._entries_buffer.append(entry)
-                if len(self._entries_buffer) >= self._buffer_size:
-                    self._flush_to_db()
+            get_stream_bus().publish(self.request_id, entry)
+            with self._lock:
+                # Serialized at flush time, off the caller's path
+                self._lines.append(entry)
+                self._pending_bytes += len(entry.content)
+                if self._db_enabled:
+                    self._entries_buffer.append(entry)
+                if self._pending_bytes >= self._flush_bytes:
+                    self._write_lines_locked()
         except (RuntimeError, ValueError, TypeError, KeyError, AttributeError, OSError) as e:
             logger.error("Error writing to %s: %s", self.log_path, e)
 
-    def _flush_to_db(self) -> None:
-        """Batch write buffered entries to database."""
-        if not self._entries_buffer or not self._db_enabled:
+    def _write_lines_locked(self) -> None:
+        """Write buffered lines to the (lazily opened) log file."""
+        if not self._lines:
             return
-        try:
-            conn = sqlite3.connect(str(self._db_path), timeout=5.0)
-            cursor = conn.cursor()
-            cursor.executemany(
-                """INSERT INTO stream_entries
-                   (request_id, entry_type, timestamp, content, metadata)
-                   VALUES (?, ?, ?, ?, ?)""",
-                [(self.request_id, e.type, e.timestamp, e.content,
-                  json.dumps(e.metadata, ensure_ascii=False)) for e in self._entries_buffer]
-            )
-            conn.commit()
-            conn.close()
-            self._entries_buffer = []
-        except sqlite3.OperationalError as e:
-            # Table might not exist yet, disable DB sync
-            if "no such table" in str(e):
-                logger.warning("stream_entries table not found, disabling DB sync")
-                self._db_enabled = False
+        if self._file is None:
+            self._open_log_locked()
+        data = "".join(entry.to_json() + "\n" for entry in self._lines).encode("utf-8")
+        self._file.write(data)
+        self._file.flush()
+        self._entry_count += len(self._lines)
+        self._size += len(data)
+        last = self._lines[-1]
+        self._lines = []
+        self._pending_bytes = 0
+        self._write_index_locked(last)
+
+    def _open_log_locked(self) -> None:
+        """Open the log for appending, picking up counts of an existing file."""
+        self._file = open(self.log_path, "ab")
+        self._size = self._file.tell()
+        if self._size:
+            existing = StreamOutputManager.load_index(self.index_path)
+            if existing and existing.get("bytes") == self._size:
+                self._entry_count = int(existing.get("entries", 0))
             else:
-                logger.error("DB sync error: %s", e)
+                self._entry_count = _count_lines(self.log_path)
+
+    def _write_index_locked(self, last: StreamEntry) -> None:
+        completed = last.type == "complete"
+        try:
+            _write_index(self.index_path, {
+                "request_id": self.request_id,
+                "provider": self.provider,
+                "entries": self._entry_count,
+                "bytes": self._size,
+                "last_type": last.type,
+                "last_time": datetime.fromtimestamp(last.timestamp).strftime("%H:%M:%S.%f")[:-3],
+                "completed": completed,
+                "success": last.metadata.get("success") if completed else None,
+                "updated_at": time.time(),
+            })
         except (RuntimeError, ValueError, TypeError, KeyError, AttributeError, OSError) as e:
-            logger.error("DB sync error: %s", e)
+            logger.error("Error writing index %s: %s", self.index_path, e)
+
+    def _drain(self, file_only: bool = True) -> List[tuple]:
+        """
+        Flush the file buffer and take pending DB rows.
+
+        Returns:
+            ``stream_entries`` rows (empty when ``file_only``)
+        """
+        with self._lock:
+            try:
+                self._write_lines_locked()
+            except (RuntimeError, ValueError, TypeError, KeyError, AttributeError, OSError) as e:
+                logger.error("Error writing to %s: %s", self.log_path, e)
+            if file_only or not self._entries_buffer:
+                return []
+            entries = self._entries_buffer
+            self._entries_buffer = []
+        return [
+            (self.request_id, e.type, e.timestamp, e.content,
+             json.dumps(e.metadata, ensure_ascii=False))
+            for e in entries
+        ]
+
+    def _flush_to_db(self) -> None:
+        """Write buffered entries to the log file and database now."""
+        rows = self._drain(file_only=False)
+        if rows:
+            self._flusher.insert(rows)
+
+    def _finish(self) -> None:
+        """Flush everything, fsync the log and release the file handle."""
+        self._flush_to_db()
+        with self._lock:
+            self._closed = True
+            if self._file is not None:
+                try:
+                    os.fsync(self._file.fileno())
+                    self._file.close()
+                except (RuntimeError, ValueError, TypeError, KeyError, AttributeError, OSError) as e:
+                    logger.error("Error closing %s: %s", self.log_path, e)
+                self._file = None
+        self._flusher.unregister(self)
 
     def status(self, message: str, **meta) -> None:
         """Write a status update."""
@@ -186,15 +383,13 @@ class StreamOutput:
                 **meta
             }
         ))
-        # Force flush remaining entries to DB on completion
-        self._flush_to_db()
-        self._closed = True
+        # Force flush remaining entries on completion
+        self._finish()
 
     def close(self) -> None:
         """Close the stream without completion marker."""
-        # Flush any remaining entries before closing
-        self._flush_to_db()
-        self._closed = True
+        if not self._closed:
+            self._finish()
 
 
 class StreamOutputManager:
@@ -212,6 +407,9 @@ class StreamOutputManager:
         self.stream_dir.mkdir(parents=True, exist_ok=True)
         self.retention_hours = retention_hours
         self._streams: Dict[str, StreamOutput] = {}
+        # request_id -> (line number, byte offset) after the last read
+        self._line_cursors: "OrderedDict[str, Tuple[int, int]]" = OrderedDict()
+        self.max_cursors = 256
 
     def create_stream(self, request_id: str, provider: str) -> StreamOutput:
         """Create a new stream for a request."""
@@ -231,41 +429,140 @@ class StreamOutputManager:
         """Check if a stream log file exists."""
         return self.get_stream_path(request_id).exists()
 
+    def get_index_path(self, request_id: str) -> Path:
+        """Get the sidecar index path for a request."""
+        return self.stream_dir / f"{request_id}{INDEX_SUFFIX}"
+
+    @staticmethod
+    def load_index(index_path: Path) -> Optional[Dict[str, Any]]:
+        """Load a sidecar index, or None if missing or unreadable."""
+        try:
+            with open(index_path, "r", encoding="utf-8") as f:
+                index = json.load(f)
+            return index if isinstance(index, dict) else None
+        except (OSError, ValueError):
+            return None
+
+    def read_stream_from(self, request_id: str, offset: int = 0) -> Tuple[List[Dict[str, Any]], int]:
+        """
+        Read complete entries starting at a byte offset.
+
+        Args:
+            request_id: Stream request ID
+            offset: Byte offset returned by a previous read (0 = start)
+
+        Returns:
+            (entries, next_offset); a partially written last line is left
+            for the next call
+        """
+        path = self.get_stream_path(request_id)
+        entries: List[Dict[str, Any]] = []
+        try:
+            with open(path, "rb") as f:
+                f.seek(offset)
+                data = f.read()
+        except (RuntimeError, ValueError, TypeError, KeyError, AttributeError, OSError) as e:
+            if path.exists():
+                logger.error("Error reading %s: %s", path, e)
+            return entries, offset
+
+        end = data.rfind(b"\n") + 1
+        for line in data[:end].splitlines():
+            try:
+                entries.append(json.loads(line))
+            except (json.JSONDecodeError, UnicodeDecodeError):
+                continue
+        return entries, offset + end
+
     def read_stream(self, request_id: str, from_line: int = 0) -> list:
-        """Read stream entries from a log file."""
+        """
+        Read stream entries from a log file.
+
+        Sequential readers (``from_line`` = previous ``next_line``) resume
+        from a remembered byte offset instead of re-reading the file.
+        """
         path = self.get_stream_path(request_id)
         if not path.exists():
             return []
 
-        entries = []
+        line, offset = self._line_cursors.get(request_id, (0, 0))
         try:
-            with open(path, "r", encoding="utf-8") as f:
-                for i, line in enumerate(f):
-                    if i < from_line:
-                        continue
-                    try:
-                        entries.append(json.loads(line.strip()))
-                    except json.JSONDecodeError:
-                        continue
+            if line > from_line or offset > path.stat().st_size:
+                line, offset = 0, 0
+        except OSError:
+            return []
+
+        entries, next_offset = self.read_stream_from(request_id, offset)
+        total_line = line + len(entries)
+        self._line_cursors[request_id] = (total_line, next_offset)
+        self._line_cursors.move_to_end(request_id)
+        while len(self._line_cursors) > self.max_cursors:
+            self._line_cursors.popitem(last=False)
+        return entries[from_line - line:]
+
+    def read_stream_tail(self, request_id: str, lines: int = 20) -> List[Dict[str, Any]]:
+        """Read the last ``lines`` entries by scanning backwards from EOF."""
+        path = self.get_stream_path(request_id)
+        if lines <= 0 or not path.exists():
+            return []
+
+        block_size = 64 * 1024
+        try:
+            with open(path, "rb") as f:
+                f.seek(0, os.SEEK_END)
+                position = f.tell()
+                data = b""
+                while position > 0 and data.count(b"\n") <= lines:
+                    step = min(block_size, position)
+                    position -= step
+                    f.seek(position)
+                    data = f.read(step) + data
         except (RuntimeError, ValueError, TypeError, KeyError, AttributeError, OSError) as e:
             logger.error("Error reading %s: %s", path, e)
+            return []
 
+        # Drop a trailing partial line and a leading partial line (unless at BOF)
+        data = data[:data.rfind(b"\n") + 1]
+        raw_lines = data.splitlines()
+        if position > 0 and raw_lines:
+            raw_lines = raw_lines[1:]
+        entries = []
+        for line in raw_lines[-lines:]:
+            try:
+                entries.append(json.loads(line))
+            except (json.JSONDecodeError, UnicodeDecodeError):
+                continue
         return entries
 
     def get_stream_status(self, request_id: str) -> Dict[str, Any]:
-        """Get status of a stream."""
+        """Get status of a stream from its sidecar index."""
         path = self.get_stream_path(request_id)
         if not path.exists():
             return {"exists": False}
 
-        entries = self.read_stream(request_id)
-        if not entries:
+        index = self.load_index(self.get_index_path(request_id))
+        if index is None:
+            return self._scan_stream_status(request_id)
+
+        return {
+            "exists": True,
+            "entries": index.get("entries", 0),
+            "completed": bool(index.get("completed")),
+            "success": index.get("success"),
+            "last_type": index.get("last_type"),
+            "last_time": index.get("last_time"),
+        }
+
+    def _scan_stream_status(self, request_id: str) -> Dict[str, Any]:
+        """Status of a stream without a sidecar (older logs)."""
+        tail = self.read_stream_tail(request_id, 1)
+        if not tail:
             return {"exists": True, "entries": 0}
 
-        last_entry = entries[-1]
+        last_entry = tail[-1]
         return {
             "exists": True,
-            "entries": len(entries),
+            "entries": _count_lines(self.get_stream_path(request_id)),
             "completed": last_entry.get("type") == "complete",
             "success": last_entry.get("meta", {}).get("success") if last_entry.get("type") == "complete" else None,
             "last_type": last_entry.get("type"),
@@ -281,6 +578,8 @@ class StreamOutputManager:
             try:
                 if path.stat().st_mtime < cutoff:
                     path.unlink()
+                    self.get_index_path(path.stem).unlink(missing_ok=True)
+                    self._line_cursors.pop(path.stem, None)
                     removed += 1
             except (RuntimeError, ValueError, TypeError, KeyError, AttributeError, OSError):
                 continue
@@ -288,24 +587,29 @@ class StreamOutputManager:
         return removed
 
     def list_recent_streams(self, limit: int = 20) -> list:
-        """List recent streams sorted by modification time."""
-        streams = []
+        """
+        List recent streams sorted by modification time.
+
+        Only the newest ``limit`` logs have their sidecar index loaded.
+        """
+        stats = []
         for path in self.stream_dir.glob("*.jsonl"):
             try:
-                stat = path.stat()
-                request_id = path.stem
-                streams.append({
-                    "request_id": request_id,
-                    "path": str(path),
-                    "size": stat.st_size,
-                    "mtime": stat.st_mtime,
-                    "status": self.get_stream_status(request_id),
-                })
+                stats.append((path, path.stat()))
             except (RuntimeError, ValueError, TypeError, KeyError, AttributeError, OSError):
                 continue
 
-        streams.sort(key=lambda x: x["mtime"], reverse=True)
-        return streams[:limit]
+        stats.sort(key=lambda item: item[1].st_mtime, reverse=True)
+        return [
+            {
+                "request_id": path.stem,
+                "path": str(path),
+                "size": stat.st_size,
+                "mtime": stat.st_mtime,
+                "status": self.get_stream_status(path.stem),
+            }
+            for path, stat in stats[:limit]
+        ]
 
 
 # Global instance
@@ -0,0 +1,192 @@
+"""
+Compiled multi-keyword matcher shared by the CCB routers.
+
+All keywords of a rule set are compiled into one trie-shaped regular
+expression, so a message is scanned once no matter how many rules there
+are. At each position the expression yields the longest keyword starting
+there; every shorter keyword that also starts there is a prefix of it, so
+all (overlapping) occurrences are recovered from precomputed prefix lists.
+Matching is case-insensitive via ``str.lower()`` and works for CJK and
+ASCII keywords alike.
+"""
+from __future__ import annotations
+
+import re
+from dataclasses import dataclass
+from typing import Any, Dict, Hashable, Iterable, List, Optional, Set, Tuple
+
+
+@dataclass(frozen=True)
+class KeywordHit:
+    """One keyword occurrence; offsets index into ``text.lower()``."""
+    keyword: str
+    start: int
+    end: int
+    tags: Tuple[Hashable, ...]
+
+
+@dataclass(frozen=True)
+class _Entry:
+    keyword: str  # As registered
+    tag: Hashable
+    whole_word: bool
+
+
+def _is_word_char(ch: str) -> bool:
+    return ch.isalnum() or ch == "_"
+
+
+def _trie_pattern(node: Dict[str, Any]) -> str:
+    """Regex for the keywords below a trie node (longest match first)."""
+    branches = [re.escape(ch) + _trie_pattern(child) for ch, child in sorted(node.items()) if ch]
+    if not branches:
+        return ""
+    body = branches[0] if len(branches) == 1 else "(?:" + "|".join(branches) + ")"
+    return f"(?:{body})?" if "" in node else body
+
+
+class KeywordMatcher:
+    """
+    Finds every registered keyword in a text in a single pass.
+
+    Each keyword carries a tag (a rule, task type, ...) and may require
+    whole-word matching. The expression is compiled lazily and rebuilt
+    only after keywords are added or cleared.
+    """
+
+    def __init__(self, keywords: Iterable[Tuple[str, Hashable]] = ()):
+        """
+        Initialize the matcher.
+
+        Args:
+            keywords: Initial ``(keyword, tag)`` pairs
+        """
+        self._entries: List[_Entry] = []
+        self._by_keyword: Dict[str, List[int]] = {}
+        self._pattern: Optional[re.Pattern] = None
+        self._prefixes: Dict[str, List[str]] = {}
+        for keyword, tag in keywords:
+            self.add(keyword, tag)
+
+    def add(self, keyword: str, tag: Hashable = None, whole_word: bool = False) -> None:
+        """
+        Register a keyword.
+
+        Args:
+            keyword: Keyword (matched case-insensitively); empty ones are ignored
+            tag: Value reported with hits of this keyword
+            whole_word: Only match when not surrounded by word characters
+        """
+        normalized = keyword.lower()
+        if not normalized:
+            return
+        self._by_keyword.setdefault(normalized, []).append(len(self._entries))
+        self._entries.append(_Entry(keyword, tag, whole_word))
+        self._pattern = None
+
+    def clear(self) -> None:
+        """Remove all keywords."""
+        self._entries.clear()
+        self._by_keyword.clear()
+        self._pattern = None
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def compile(self) -> None:
+        """Build the expression now instead of on the next match."""
+        trie: Dict[str, Any] = {}
+        for keyword in self._by_keyword:
+            node = trie
+            for ch in keyword:
+                node = node.setdefault(ch, {})
+            node[""] = True
+
+        # Keywords that are prefixes of each keyword (itself included)
+        self._prefixes = {}
+        for keyword in self._by_keyword:
+            node, prefixes = trie, []
+            for i, ch in enumerate(keyword, 1):
+                node = node[ch]
+                if "" in node:
+                    prefixes.append(keyword[:i])
+            self._prefixes[keyword] = prefixes
+
+        body = _trie_pattern(trie)
+        if not body:
+            self._pattern = re.compile(r"(?!)")
+            return
+        # Lookahead so overlapping occurrences at every position are seen;
+        # the leading character class lets the engine skip positions fast
+        first = "".join(re.escape(ch) for ch in sorted(trie) if ch)
+        self._pattern = re.compile(f"(?=[{first}])(?=({body}))")
+
+    def _spans(self, lowered: str) -> List[Tuple[str, int, int]]:
+        if self._pattern is None:
+            self.compile()
+        prefixes = self._prefixes
+        return [
+            (keyword, match.start(), match.start() + len(keyword))
+            for match in self._pattern.finditer(lowered)
+            for keyword in prefixes[match.group(1)]
+        ]
+
+    def _entry_matches(self, entry: _Entry, lowered: str, start: int, end: int) -> bool:
+        if not entry.whole_word:
+            return True
+        if start > 0 and _is_word_char(lowered[start - 1]):
+            return False
+        return not (end < len(lowered) and _is_word_char(lowered[end]))
+
+    def find_all(self, text: str) -> List[KeywordHit]:
+        """
+        Find every keyword occurrence, ordered by position.
+
+        Returns:
+            Hits; a keyword registered under several tags yields one hit
+            listing the tags whose whole-word requirement is met
+        """
+        lowered = text.lower()
+        hits = []
+        for keyword, start, end in self._spans(lowered):
+            tags = tuple(
+                self._entries[i].tag for i in self._by_keyword[keyword]
+                if self._entry_matches(self._entries[i], lowered, start, end)
+            )
+            if tags:
+                hits.append(KeywordHit(keyword, start, end, tags))
+        return hits
+
+    def matches(self, text: str) -> Dict[Hashable, List[str]]:
+        """
+        Group the registered keywords found in ``text`` by tag.
+
+        Returns:
+            ``{tag: [keyword, ...]}`` with keywords as registered, each
+            registration reported once, in registration order (tags are
+            ordered by their first matching registration)
+        """
+        lowered = text.lower()
+        found: Set[int] = set()
+        entries, by_keyword = self._entries, self._by_keyword
+        for keyword, start, end in self._spans(lowered):
+            for i in by_keyword[keyword]:
+                if i not in found and (
+                    not entries[i].whole_word or self._entry_matches(entries[i], lowered, start, end)
+                ):
+                    found.add(i)
+
+        grouped: Dict[Hashable, List[str]] = {}
+        for i in sorted(found):
+            entry = self._entries[i]
+            grouped.setdefault(entry.tag, []).append(entry.keyword)
+        return grouped
+
+    def contained(self, text: str) -> Set[str]:
+        """Lowercased keywords that occur in ``text``."""
+        lowered = text.lower()
+        return {
+            keyword for keyword, start, end in self._spans(lowered)
+            if any(self._entry_matches(self._entries[i], lowered, start, end)
+                   for i in self._by_keyword[keyword])
+        }
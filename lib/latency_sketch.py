@@ -0,0 +1,297 @@
+"""
+Mergeable latency quantile sketches for CCB.
+
+``LatencySketch`` is a DDSketch-style histogram with logarithmically sized
+bins: every quantile it reports is within ``relative_accuracy`` (1% by
+default) of the true value, its size depends on the spread of latencies
+rather than on the number of samples, and two sketches merge by adding bin
+counts. ``SketchWindow`` keeps one sketch per key and time bucket so a
+percentile over any window is a merge of a few buckets instead of a sort
+over every sample.
+"""
+from __future__ import annotations
+
+import math
+import struct
+import threading
+import time
+import zlib
+from typing import Dict, Iterable, List, Optional, Tuple
+
+_HEADER = struct.Struct("<BdQdddQI")
+_BIN = struct.Struct("<iQ")
+_FORMAT_VERSION = 1
+
+# Values at or below this (ms) are counted in the zero bucket
+_MIN_INDEXABLE = 1e-3
+
+
+class LatencySketch:
+    """
+    Relative-error quantile sketch (DDSketch-style).
+
+    Exact count, sum, min and max are tracked alongside the bins.
+    """
+
+    __slots__ = (
+        "relative_accuracy", "max_bins", "bins", "zero_count",
+        "count", "sum", "min", "max", "_gamma", "_log_gamma",
+    )
+
+    def __init__(self, relative_accuracy: float = 0.01, max_bins: int = 2048):
+        """
+        Initialize an empty sketch.
+
+        Args:
+            relative_accuracy: Maximum relative error of reported quantiles
+            max_bins: Bin cap; past it the lowest bins are collapsed
+        """
+        if not 0.0 < relative_accuracy < 1.0:
+            raise ValueError("relative_accuracy must be between 0 and 1")
+        self.relative_accuracy = relative_accuracy
+        self.max_bins = max_bins
+        self.bins: Dict[int, int] = {}
+        self.zero_count = 0
+        self.count = 0
+        self.sum = 0.0
+        self.min = math.inf
+        self.max = -math.inf
+        self._gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+        self._log_gamma = math.log(self._gamma)
+
+    def add(self, value: float, weight: int = 1) -> None:
+        """Add ``weight`` observations of ``value``."""
+        if weight <= 0:
+            return
+        self.count += weight
+        self.sum += value * weight
+        if value < self.min:
+            self.min = value
+        if value > self.max:
+            self.max = value
+        if value <= _MIN_INDEXABLE:
+            self.zero_count += weight
+            return
+        index = math.ceil(math.log(value) / self._log_gamma)
+        bins = self.bins
+        if index in bins:
+            bins[index] += weight
+        else:
+            bins[index] = weight
+            if len(bins) > self.max_bins:
+                self._collapse()
+
+    def merge(self, other: "LatencySketch") -> None:
+        """Fold another sketch with the same accuracy into this one."""
+        if other.relative_accuracy != self.relative_accuracy:
+            raise ValueError("Cannot merge sketches with different relative accuracy")
+        if not other.count:
+            return
+        bins = self.bins
+        for index, n in other.bins.items():
+            bins[index] = bins.get(index, 0) + n
+        self.zero_count += other.zero_count
+        self.count += other.count
+        self.sum += other.sum
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+        if len(bins) > self.max_bins:
+            self._collapse()
+
+    def _collapse(self) -> None:
+        """Fold the lowest bins together until under ``max_bins``."""
+        keys = sorted(self.bins)
+        excess = len(keys) - self.max_bins
+        if excess <= 0:
+            return
+        target = keys[excess]
+        self.bins[target] += sum(self.bins.pop(k) for k in keys[:excess])
+
+    def quantile(self, q: float) -> float:
+        """
+        Estimate the ``q``-quantile (0 <= q <= 1).
+
+        Returns:
+            Estimated value, or 0.0 for an empty sketch
+        """
+        if not self.count:
+            return 0.0
+        if q <= 0:
+            return self.min
+        if q >= 1:
+            return self.max
+        rank = q * (self.count - 1)
+        seen = self.zero_count
+        if rank < seen:
+            return max(self.min, 0.0)
+        for index in sorted(self.bins):
+            seen += self.bins[index]
+            if seen > rank:
+                value = 2 * self._gamma ** index / (self._gamma + 1)
+                return min(max(value, self.min), self.max)
+        return self.max
+
+    def quantiles(self, qs: Iterable[float]) -> List[float]:
+        """Estimate several quantiles in one pass over the bins."""
+        qs = list(qs)
+        results = [0.0] * len(qs)
+        if not self.count:
+            return results
+        ranked = sorted(self.bins.items())
+        pos = 0
+        seen = self.zero_count
+        for i in sorted(range(len(qs)), key=lambda i: qs[i]):
+            q = qs[i]
+            rank = q * (self.count - 1)
+            if q <= 0 or q >= 1 or rank < self.zero_count:
+                results[i] = self.quantile(q)
+                continue
+            while pos < len(ranked) and seen <= rank:
+                seen += ranked[pos][1]
+                pos += 1
+            if seen > rank:
+                value = 2 * self._gamma ** ranked[pos - 1][0] / (self._gamma + 1)
+                results[i] = min(max(value, self.min), self.max)
+            else:
+                results[i] = self.max
+        return results
+
+    @property
+    def mean(self) -> float:
+        return self.sum / self.count if self.count else 0.0
+
+    def copy(self) -> "LatencySketch":
+        clone = LatencySketch(self.relative_accuracy, self.max_bins)
+        clone.merge(self)
+        return clone
+
+    def to_bytes(self) -> bytes:
+        """Serialize to a compact, zlib-compressed binary form."""
+        parts = [_HEADER.pack(
+            _FORMAT_VERSION,
+            self.relative_accuracy,
+            self.count,
+            self.sum,
+            self.min if self.count else 0.0,
+            self.max if self.count else 0.0,
+            self.zero_count,
+            len(self.bins),
+        )]
+        parts.extend(_BIN.pack(index, n) for index, n in sorted(self.bins.items()))
+        return zlib.compress(b"".join(parts))
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> "LatencySketch":
+        """
+        Deserialize a sketch produced by ``to_bytes``.
+
+        Raises:
+            ValueError: If the data is not a valid sketch
+        """
+        try:
+            raw = zlib.decompress(data)
+            version, accuracy, count, total, lo, hi, zero_count, nbins = _HEADER.unpack_from(raw)
+            if version != _FORMAT_VERSION:
+                raise ValueError(f"Unsupported latency sketch version: {version}")
+            sketch = cls(accuracy)
+            sketch.bins = dict(_BIN.iter_unpack(raw[_HEADER.size:_HEADER.size + nbins * _BIN.size]))
+        except (zlib.error, struct.error, TypeError) as e:
+            raise ValueError(f"Invalid latency sketch: {e}") from e
+        sketch.count = count
+        sketch.sum = total
+        sketch.zero_count = zero_count
+        if count:
+            sketch.min = lo
+            sketch.max = hi
+        return sketch
+
+
+class SketchWindow:
+    """
+    Thread-safe rolling latency sketches per key, bucketed by time.
+
+    Percentiles over a window merge the buckets overlapping it, so the
+    window edge is rounded out to whole buckets.
+    """
+
+    def __init__(
+        self,
+        bucket_s: float = 3600.0,
+        retention_s: Optional[float] = None,
+        relative_accuracy: float = 0.01,
+    ):
+        """
+        Initialize the window.
+
+        Args:
+            bucket_s: Width of one time bucket in seconds
+            retention_s: Buckets older than this are dropped (None = keep all)
+            relative_accuracy: Accuracy of each bucket's sketch
+        """
+        self.bucket_s = bucket_s
+        self.retention_s = retention_s
+        self.relative_accuracy = relative_accuracy
+        self._buckets: Dict[str, Dict[float, LatencySketch]] = {}
+        self._lock = threading.Lock()
+        self._last_prune = 0.0
+
+    def bucket_start(self, timestamp: float) -> float:
+        return math.floor(timestamp / self.bucket_s) * self.bucket_s
+
+    def add(self, key: str, value: float, timestamp: Optional[float] = None) -> None:
+        """Record one latency observation for ``key``."""
+        now = time.time()
+        start = self.bucket_start(now if timestamp is None else timestamp)
+        with self._lock:
+            buckets = self._buckets.setdefault(key, {})
+            sketch = buckets.get(start)
+            if sketch is None:
+                sketch = buckets[start] = LatencySketch(self.relative_accuracy)
+            sketch.add(value)
+            if self.retention_s is not None and now - self._last_prune >= self.bucket_s:
+                self._prune_locked(now - self.retention_s)
+                self._last_prune = now
+
+    def merged(self, key: str, since: Optional[float] = None) -> LatencySketch:
+        """
+        Merge ``key``'s buckets that overlap ``[since, now]``.
+
+        Returns:
+            A new sketch (empty if nothing was recorded)
+        """
+        result = LatencySketch(self.relative_accuracy)
+        first = None if since is None else self.bucket_start(since)
+        with self._lock:
+            for start, sketch in self._buckets.get(key, {}).items():
+                if first is None or start >= first:
+                    result.merge(sketch)
+        return result
+
+    def keys(self) -> List[str]:
+        with self._lock:
+            return list(self._buckets)
+
+    def buckets(self, key: str) -> List[Tuple[float, LatencySketch]]:
+        """Snapshot of ``key``'s buckets, oldest first."""
+        with self._lock:
+            return [(s, b.copy()) for s, b in sorted(self._buckets.get(key, {}).items())]
+
+    def prune(self, before: float) -> None:
+        """Drop buckets that ended before ``before``."""
+        with self._lock:
+            self._prune_locked(before)
+
+    def _prune_locked(self, before: float) -> None:
+        for key in list(self._buckets):
+            buckets = self._buckets[key]
+            for start in [s for s in buckets if s + self.bucket_s <= before]:
+                del buckets[start]
+            if not buckets:
+                del self._buckets[key]
+
+    def clear(self, key: Optional[str] = None) -> None:
+        with self._lock:
+            if key is None:
+                self._buckets.clear()
+            else:
+                self._buckets.pop(key, None)
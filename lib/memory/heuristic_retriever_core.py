@@ -6,10 +6,19 @@ import math
 import sqlite3
 from datetime import datetime
 from pathlib import Path
-from typing import Any, Dict, List, Optional, Tuple
+from typing import TYPE_CHECKING, Any, Dict, List, Optional, Tuple
 
 from .heuristic_retriever_shared import logger
 
+if TYPE_CHECKING:
+    from .heuristic_retriever import ScoredMemory
+
+try:
+    import numpy as np
+    HAS_NUMPY = True
+except ImportError:  # pragma: no cover - optional dependency
+    np = None
+    HAS_NUMPY = False
 
 try:
     from .heuristic_retriever import RetrievalConfig
@@ -125,65 +134,101 @@ class HeuristicRetrieverCoreMixin:
 
         candidates: List[ScoredMemory] = []
 
-        # Step 1: FTS5 search for messages
-        if 'message' in memory_types:
-            message_candidates = self._search_messages_fts(
-                query,
-                limit=self.config.candidate_pool_size,
-                provider=provider,
-                session_id=session_id
-            )
-            candidates.extend(message_candidates)
+        # One connection for the whole retrieval; importance data is joined
+        # into the FTS queries instead of looked up per candidate
+        conn = sqlite3.connect(self.db_path)
+        try:
+            # Step 1: FTS5 search for messages
+            if 'message' in memory_types:
+                message_candidates = self._search_messages_fts(
+                    query,
+                    limit=self.config.candidate_pool_size,
+                    provider=provider,
+                    session_id=session_id,
+                    conn=conn
+                )
+                candidates.extend(message_candidates)
+
+            # Step 2: FTS5 search for observations
+            if 'observation' in memory_types:
+                observation_candidates = self._search_observations_fts(
+                    query,
+                    limit=self.config.candidate_pool_size,
+                    conn=conn
+                )
+                candidates.extend(observation_candidates)
+
+            # Step 3: Calculate heuristic scores
+            scored = self._score_candidates(candidates, min_importance)
+
+            # Step 4: Sort by final score
+            scored.sort(key=lambda x: x.final_score, reverse=True)
+
+            # Step 5: Take top results
+            results = scored[:limit]
+
+            # Step 6: Track access for retrieved memories
+            if track_access and results:
+                self._log_access_batch(
+                    results,
+                    query=query,
+                    request_id=request_id,
+                    context='retrieval',
+                    conn=conn
+                )
+        finally:
+            conn.close()
 
-        # Step 2: FTS5 search for observations
-        if 'observation' in memory_types:
-            observation_candidates = self._search_observations_fts(
-                query,
-                limit=self.config.candidate_pool_size
-            )
-            candidates.extend(observation_candidates)
+        return results
 
-        # Step 3: Calculate heuristic scores
-        scored = []
-        for memory in candidates:
-            # Get importance and recency data
-            importance_data = self._get_importance_data(memory.memory_id, memory.memory_type)
+    def _score_candidates(
+        self,
+        candidates: List[ScoredMemory],
+        min_importance: Optional[float] = None
+    ) -> List[ScoredMemory]:
+        """Compute recency and αR + βI + γT for all candidates at once."""
+        if not candidates:
+            return []
 
-            # Update scores
-            memory.importance_score = importance_data.get('importance_score', self.config.default_importance)
-            memory.access_count = importance_data.get('access_count', 0)
-            memory.last_accessed_at = importance_data.get('last_accessed_at')
+        now = datetime.now()
+        hours = [self._hours_since(m.last_accessed_at, now) for m in candidates]
 
-            # Calculate recency
-            memory.recency_score = self._calculate_recency(memory.last_accessed_at)
+        if HAS_NUMPY:
+            relevance = np.fromiter((m.relevance_score for m in candidates), dtype=float, count=len(candidates))
+            importance = np.fromiter((m.importance_score for m in candidates), dtype=float, count=len(candidates))
+            recency = np.maximum(
+                self.config.min_recency,
+                np.exp(-self.config.decay_lambda * np.asarray(hours, dtype=float))
+            )
+            final = (
+                self.config.alpha * relevance +
+                self.config.beta * importance +
+                self.config.gamma * recency
+            )
+            keep = np.ones(len(candidates), dtype=bool)
+            if min_importance is not None:
+                keep = importance >= min_importance
+
+            scored = []
+            for i in np.flatnonzero(keep):
+                memory = candidates[i]
+                memory.recency_score = float(recency[i])
+                memory.final_score = float(final[i])
+                scored.append(memory)
+            return scored
 
-            # Calculate final score: αR + βI + γT
+        scored = []
+        for memory, hours_since in zip(candidates, hours):
+            memory.recency_score = max(
+                self.config.min_recency,
+                math.exp(-self.config.decay_lambda * hours_since)
+            )
             memory.final_score = (
                 self.config.alpha * memory.relevance_score +
                 self.config.beta * memory.importance_score +
                 self.config.gamma * memory.recency_score
             )
-
-            # Apply minimum importance filter
             if min_importance is not None and memory.importance_score < min_importance:
                 continue
-
             scored.append(memory)
-
-        # Step 4: Sort by final score
-        scored.sort(key=lambda x: x.final_score, reverse=True)
-
-        # Step 5: Take top results
-        results = scored[:limit]
-
-        # Step 6: Track access for retrieved memories
-        if track_access and results:
-            self._log_access_batch(
-                results,
-                query=query,
-                request_id=request_id,
-                context='retrieval'
-            )
-
-        return results
-
+        return scored
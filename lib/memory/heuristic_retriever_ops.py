@@ -19,38 +19,45 @@ class HeuristicRetrieverOpsMixin:
         memories: List[ScoredMemory],
         query: str,
         request_id: Optional[str],
-        context: str
+        context: str,
+        conn: Optional[sqlite3.Connection] = None
     ):
         """Log access for a batch of memories."""
         if not memories:
             return
 
-        conn = sqlite3.connect(self.db_path)
+        own_conn = conn is None
+        if own_conn:
+            conn = sqlite3.connect(self.db_path)
         cursor = conn.cursor()
 
         try:
             now = datetime.now().isoformat()
-
-            for memory in memories:
-                cursor.execute("""
-                    INSERT INTO memory_access_log
-                    (memory_id, memory_type, accessed_at, access_context, request_id, query_text, relevance_score)
-                    VALUES (?, ?, ?, ?, ?, ?, ?)
-                """, (
+            query_text = query[:500] if query else None  # Truncate long queries
+
+            cursor.executemany("""
+                INSERT INTO memory_access_log
+                (memory_id, memory_type, accessed_at, access_context, request_id, query_text, relevance_score)
+                VALUES (?, ?, ?, ?, ?, ?, ?)
+            """, [
+                (
                     memory.memory_id,
                     memory.memory_type,
                     now,
                     context,
                     request_id,
-                    query[:500] if query else None,  # Truncate long queries
+                    query_text,
                     memory.relevance_score
-                ))
+                )
+                for memory in memories
+            ])
 
             conn.commit()
         except sqlite3.OperationalError as e:
             logger.warning("Access logging error: %s", e)
         finally:
-            conn.close()
+            if own_conn:
+                conn.close()
 
     def set_importance(
         self,
@@ -6,7 +6,7 @@ import math
 import sqlite3
 from datetime import datetime
 from pathlib import Path
-from typing import Any, Dict, List, Optional, Tuple
+from typing import List, Optional, Tuple
 
 from .heuristic_retriever_shared import logger
 
@@ -20,20 +20,51 @@ except ImportError:  # pragma: no cover - script mode
 class HeuristicRetrieverSearchMixin:
     """Mixin methods extracted from HeuristicRetriever."""
 
+    def _has_importance_table(self, conn: sqlite3.Connection) -> bool:
+        """Whether memory_importance exists (positive result is cached)."""
+        if getattr(self, "_importance_table_ok", False):
+            return True
+        row = conn.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'memory_importance'"
+        ).fetchone()
+        self._importance_table_ok = row is not None
+        return self._importance_table_ok
+
+    def _importance_sql(self, conn: sqlite3.Connection, id_column: str, memory_type: str) -> Tuple[str, str]:
+        """Select columns and LEFT JOIN clause pulling importance data inline."""
+        if not self._has_importance_table(conn):
+            return ", NULL, NULL, NULL", ""
+        return (
+            ", mi.importance_score, mi.access_count, mi.last_accessed_at",
+            f"LEFT JOIN memory_importance mi ON mi.memory_id = {id_column} "
+            f"AND mi.memory_type = '{memory_type}'",
+        )
+
+    def _apply_importance_columns(self, memory: ScoredMemory, importance_score, access_count, last_accessed_at):
+        """Fill importance/access fields from joined columns (NULL -> defaults)."""
+        memory.importance_score = importance_score or self.config.default_importance
+        memory.access_count = access_count or 0
+        memory.last_accessed_at = last_accessed_at
+
     def _search_messages_fts(
         self,
         query: str,
         limit: int = 50,
         provider: Optional[str] = None,
-        session_id: Optional[str] = None
+        session_id: Optional[str] = None,
+        conn: Optional[sqlite3.Connection] = None
     ) -> List[ScoredMemory]:
-        """Search messages using FTS5."""
-        conn = sqlite3.connect(self.db_path)
+        """Search messages using FTS5, joining importance data in the same query."""
+        own_conn = conn is None
+        if own_conn:
+            conn = sqlite3.connect(self.db_path)
         cursor = conn.cursor()
 
         try:
+            importance_cols, importance_join = self._importance_sql(conn, "m.message_id", "message")
+
             # Build query with optional filters
-            sql = """
+            sql = f"""
                 SELECT
                     m.message_id,
                     m.session_id,
@@ -42,9 +73,10 @@ class HeuristicRetrieverSearchMixin:
                     m.provider,
                     m.timestamp,
                     m.tokens,
-                    bm25(messages_fts) as fts_rank
+                    bm25(messages_fts) as fts_rank{importance_cols}
                 FROM messages m
                 JOIN messages_fts fts ON m.rowid = fts.rowid
+                {importance_join}
                 WHERE messages_fts MATCH ?
             """
             params = [query]
@@ -84,6 +116,7 @@ class HeuristicRetrieverSearchMixin:
                         'fts_rank': fts_rank
                     }
                 )
+                self._apply_importance_columns(memory, row[8], row[9], row[10])
                 results.append(memory)
 
             return results
@@ -92,19 +125,25 @@ class HeuristicRetrieverSearchMixin:
             logger.warning("FTS search error: %s", e)
             return []
         finally:
-            conn.close()
+            if own_conn:
+                conn.close()
 
     def _search_observations_fts(
         self,
         query: str,
-        limit: int = 50
+        limit: int = 50,
+        conn: Optional[sqlite3.Connection] = None
     ) -> List[ScoredMemory]:
-        """Search observations using FTS5."""
-        conn = sqlite3.connect(self.db_path)
+        """Search observations using FTS5, joining importance data in the same query."""
+        own_conn = conn is None
+        if own_conn:
+            conn = sqlite3.connect(self.db_path)
         cursor = conn.cursor()
 
         try:
-            sql = """
+            importance_cols, importance_join = self._importance_sql(conn, "o.observation_id", "observation")
+
+            sql = f"""
                 SELECT
                     o.observation_id,
                     o.category,
@@ -113,9 +152,10 @@ class HeuristicRetrieverSearchMixin:
                     o.source,
                     o.confidence,
                     o.created_at,
-                    bm25(observations_fts) as fts_rank
+                    bm25(observations_fts) as fts_rank{importance_cols}
                 FROM observations o
                 JOIN observations_fts fts ON o.rowid = fts.rowid
+                {importance_join}
                 WHERE observations_fts MATCH ?
                 ORDER BY fts_rank
                 LIMIT ?
@@ -148,6 +188,7 @@ class HeuristicRetrieverSearchMixin:
                         'fts_rank': fts_rank
                     }
                 )
+                self._apply_importance_columns(memory, row[8], row[9], row[10])
                 results.append(memory)
 
             return results
@@ -156,45 +197,8 @@ class HeuristicRetrieverSearchMixin:
             logger.warning("Observations FTS error: %s", e)
             return []
         finally:
-            conn.close()
-
-    def _get_importance_data(self, memory_id: str, memory_type: str) -> Dict[str, Any]:
-        """Get importance and access data for a memory."""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-
-        try:
-            cursor.execute("""
-                SELECT importance_score, access_count, last_accessed_at, decay_rate
-                FROM memory_importance
-                WHERE memory_id = ? AND memory_type = ?
-            """, (memory_id, memory_type))
-
-            row = cursor.fetchone()
-            if row:
-                return {
-                    'importance_score': row[0] or self.config.default_importance,
-                    'access_count': row[1] or 0,
-                    'last_accessed_at': row[2],
-                    'decay_rate': row[3] or self.config.decay_lambda
-                }
-
-            return {
-                'importance_score': self.config.default_importance,
-                'access_count': 0,
-                'last_accessed_at': None,
-                'decay_rate': self.config.decay_lambda
-            }
-
-        except sqlite3.OperationalError:
-            return {
-                'importance_score': self.config.default_importance,
-                'access_count': 0,
-                'last_accessed_at': None,
-                'decay_rate': self.config.decay_lambda
-            }
-        finally:
-            conn.close()
+            if own_conn:
+                conn.close()
 
     def _calculate_recency(self, last_accessed_at: Optional[str]) -> float:
         """
@@ -208,21 +212,7 @@ class HeuristicRetrieverSearchMixin:
         Returns:
             Recency score between min_recency and 1.0
         """
-        if not last_accessed_at:
-            # Never accessed - treat as 1 week old
-            hours_since = 168
-        else:
-            try:
-                # Parse timestamp
-                if 'T' in last_accessed_at:
-                    dt = datetime.fromisoformat(last_accessed_at.replace('Z', '+00:00'))
-                else:
-                    dt = datetime.strptime(last_accessed_at, "%Y-%m-%d %H:%M:%S")
-
-                delta = datetime.now() - dt.replace(tzinfo=None)
-                hours_since = delta.total_seconds() / 3600
-            except (ValueError, TypeError):
-                hours_since = 168  # Default to 1 week
+        hours_since = self._hours_since(last_accessed_at)
 
         # Apply Ebbinghaus decay
         recency = math.exp(-self.config.decay_lambda * hours_since)
@@ -230,3 +220,21 @@ class HeuristicRetrieverSearchMixin:
         # Clamp to minimum
         return max(self.config.min_recency, recency)
 
+    @staticmethod
+    def _hours_since(last_accessed_at: Optional[str], now: Optional[datetime] = None) -> float:
+        """Hours since an access timestamp (1 week when unknown)."""
+        if not last_accessed_at:
+            # Never accessed - treat as 1 week old
+            return 168.0
+        try:
+            # Parse timestamp
+            if 'T' in last_accessed_at:
+                dt = datetime.fromisoformat(last_accessed_at.replace('Z', '+00:00'))
+            else:
+                dt = datetime.strptime(last_accessed_at, "%Y-%m-%d %H:%M:%S")
+
+            delta = (now or datetime.now()) - dt.replace(tzinfo=None)
+            return delta.total_seconds() / 3600
+        except (ValueError, TypeError):
+            return 168.0  # Default to 1 week
+
@@ -4,9 +4,8 @@ import hashlib
 from pathlib import Path
 from typing import Any, Dict, List, Optional
 
-import numpy as np
-
 try:
+    from .vector_search_index import DenseVectorIndex
     from .vector_search_models import VectorConfig, VectorSearchResult
     from .vector_search_shared import (
         HAS_CHROMA,
@@ -24,6 +23,7 @@ try:
         logger,
     )
 except ImportError:  # pragma: no cover - script mode
+    from vector_search_index import DenseVectorIndex
     from vector_search_models import VectorConfig, VectorSearchResult
     from vector_search_shared import (
         HAS_CHROMA,
@@ -257,76 +257,75 @@ class ChromaBackend(VectorBackend):
 
 
 class InMemoryBackend(VectorBackend):
-    """Simple in-memory vector backend for testing."""
+    """
+    Local vector backend on a contiguous NumPy matrix.
+
+    Used when Qdrant/Chroma are unavailable. Large indexes switch to IVF
+    partitioning, and with ``config.index_path`` set the vectors persist to
+    an ``.npy`` file that is memory-mapped on restart.
+    """
 
     def __init__(self, config: VectorConfig):
         self.config = config
-        self.vectors: Dict[str, Dict[str, Any]] = {}
+        self.index_path = getattr(config, "index_path", None)
+        self._index = DenseVectorIndex(
+            ann_min_vectors=getattr(config, "ann_min_vectors", 100_000),
+            nprobe=getattr(config, "ann_nprobe", 8),
+        )
+        if self.index_path and self._index.load(Path(self.index_path)):
+            logger.info("Loaded %s vectors from %s", len(self._index), self.index_path)
 
     def index(self, memory_id: str, memory_type: str, content: str,
               embedding: List[float], metadata: Dict[str, Any]) -> bool:
         """Index a memory in memory."""
-        self.vectors[memory_id] = {
-            "memory_type": memory_type,
-            "content": content,
-            "embedding": np.array(embedding),
-            "metadata": metadata
-        }
-        return True
+        try:
+            self._index.add(memory_id, embedding, {
+                "memory_type": memory_type,
+                "content": content,
+                "metadata": metadata,
+            })
+            return True
+        except (ValueError, TypeError) as e:
+            logger.warning("In-memory index error: %s", e)
+            return False
 
     def search(self, embedding: List[float], limit: int = 10,
                filters: Optional[Dict[str, Any]] = None) -> List[VectorSearchResult]:
         """Search for similar vectors using cosine similarity."""
-        query_vec = np.array(embedding)
-        query_norm = np.linalg.norm(query_vec)
-
-        if query_norm == 0:
-            return []
-
-        scores = []
-        for memory_id, data in self.vectors.items():
-            # Apply filters
-            if filters:
-                skip = False
-                for key, value in filters.items():
-                    if data.get("metadata", {}).get(key) != value and data.get(key) != value:
-                        skip = True
-                        break
-                if skip:
-                    continue
-
-            # Calculate cosine similarity
-            vec = data["embedding"]
-            vec_norm = np.linalg.norm(vec)
-            if vec_norm == 0:
-                continue
-
-            similarity = np.dot(query_vec, vec) / (query_norm * vec_norm)
-            scores.append((memory_id, data, similarity))
-
-        # Sort by similarity
-        scores.sort(key=lambda x: x[2], reverse=True)
-
         return [
             VectorSearchResult(
                 memory_id=memory_id,
-                memory_type=data["memory_type"],
-                content=data["content"],
-                vector_score=float(score),
-                metadata=data.get("metadata", {})
+                memory_type=record.get("memory_type", ""),
+                content=record.get("content", ""),
+                vector_score=score,
+                metadata=record.get("metadata") or {},
             )
-            for memory_id, data, score in scores[:limit]
+            for memory_id, record, score in self._index.search(embedding, limit=limit, filters=filters)
         ]
 
     def delete(self, memory_id: str) -> bool:
         """Delete a memory from the index."""
-        if memory_id in self.vectors:
-            del self.vectors[memory_id]
-            return True
-        return False
+        return self._index.remove(memory_id)
+
+    def contains(self, memory_id: str) -> bool:
+        """Whether a memory is already indexed."""
+        return memory_id in self._index
+
+    def is_current(self, memory_id: str, content: str, metadata: Dict[str, Any]) -> bool:
+        """Whether a memory is indexed with exactly this content and metadata."""
+        record = self._index.get(memory_id)
+        return (
+            record is not None
+            and record.get("content") == content
+            and (record.get("metadata") or {}) == metadata
+        )
+
+    def persist(self) -> bool:
+        """Save the index to ``config.index_path`` (no-op when unset)."""
+        if not self.index_path:
+            return False
+        return self._index.save(Path(self.index_path))
 
     def count(self) -> int:
         """Get total indexed vectors."""
-        return len(self.vectors)
-
-
+        return len(self._index)
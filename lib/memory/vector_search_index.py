@@ -0,0 +1,349 @@
+from __future__ import annotations
+
+import json
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+try:
+    from .vector_search_shared import logger
+except ImportError:  # pragma: no cover - script mode
+    from vector_search_shared import logger
+
+
+class DenseVectorIndex:
+    """
+    Contiguous float32 matrix of unit-normalized embeddings.
+
+    Rows are kept dense (deletes swap the last row into the hole) so a query
+    is one matrix-vector product plus ``argpartition`` for top-k. Metadata
+    filters are evaluated as boolean masks over lazily built columns.
+
+    Above ``ann_min_vectors`` rows an IVF-style partitioning (k-means
+    centroids, ``nprobe`` lists scanned per query) replaces the full scan.
+    The matrix can be saved to ``<path>.npy`` and memory-mapped on load.
+    """
+
+    def __init__(
+        self,
+        ann_min_vectors: int = 100_000,
+        nprobe: int = 8,
+        initial_capacity: int = 256,
+    ):
+        self.ann_min_vectors = ann_min_vectors
+        self.nprobe = nprobe
+
+        self._initial_capacity = initial_capacity
+        self._matrix: Optional[np.ndarray] = None
+        self._valid = np.zeros(0, dtype=bool)
+        self._size = 0
+        self._readonly = False
+
+        self._ids: List[Optional[str]] = []
+        self._records: List[Optional[Dict[str, Any]]] = []
+        self._rows: Dict[str, int] = {}
+        # (source, field) -> object column; source is "metadata" or "record"
+        self._columns: Dict[Tuple[str, str], np.ndarray] = {}
+
+        # IVF partitioning (built lazily for large indexes)
+        self._centroids: Optional[np.ndarray] = None
+        self._assignments = np.zeros(0, dtype=np.int32)
+        self._ivf_built_size = 0
+
+    # ------------------------------------------------------------------
+    # Mutation
+    # ------------------------------------------------------------------
+
+    def add(self, item_id: str, vector: Sequence[float], record: Dict[str, Any]) -> None:
+        """Insert or replace a vector and its record."""
+        vec = np.asarray(vector, dtype=np.float32).ravel()
+        norm = float(np.linalg.norm(vec))
+
+        if self._matrix is None:
+            self._allocate(vec.shape[0], self._initial_capacity)
+        elif vec.shape[0] != self._matrix.shape[1]:
+            raise ValueError(
+                f"Embedding dimension {vec.shape[0]} does not match index dimension {self._matrix.shape[1]}"
+            )
+        self._ensure_writable()
+
+        row = self._rows.get(item_id)
+        if row is None:
+            if self._size == self._matrix.shape[0]:
+                self._grow()
+            row = self._size
+            self._size += 1
+            self._rows[item_id] = row
+            self._ids.append(item_id)
+            self._records.append(record)
+        else:
+            self._records[row] = record
+
+        if norm > 0:
+            self._matrix[row] = vec / norm
+        else:
+            self._matrix[row] = 0.0
+        # Zero vectors have no direction; keep them but never return them
+        self._valid[row] = norm > 0
+        self._set_columns(row, record)
+
+        if self._centroids is not None:
+            self._assignments[row] = int(np.argmax(self._centroids @ self._matrix[row]))
+
+    def remove(self, item_id: str) -> bool:
+        """Delete a vector. Returns False if it was not indexed."""
+        row = self._rows.pop(item_id, None)
+        if row is None:
+            return False
+        self._ensure_writable()
+
+        last = self._size - 1
+        if row != last:
+            moved_id = self._ids[last]
+            self._matrix[row] = self._matrix[last]
+            self._valid[row] = self._valid[last]
+            self._assignments[row] = self._assignments[last]
+            self._ids[row] = moved_id
+            self._records[row] = self._records[last]
+            for column in self._columns.values():
+                column[row] = column[last]
+            self._rows[moved_id] = row
+
+        self._ids.pop()
+        self._records.pop()
+        self._valid[last] = False
+        self._size = last
+        return True
+
+    def get(self, item_id: str) -> Optional[Dict[str, Any]]:
+        """Record stored with a vector, or None if it is not indexed."""
+        row = self._rows.get(item_id)
+        return self._records[row] if row is not None else None
+
+    def __contains__(self, item_id: str) -> bool:
+        return item_id in self._rows
+
+    def __len__(self) -> int:
+        return self._size
+
+    # ------------------------------------------------------------------
+    # Query
+    # ------------------------------------------------------------------
+
+    def search(
+        self,
+        query: Sequence[float],
+        limit: int = 10,
+        filters: Optional[Dict[str, Any]] = None,
+    ) -> List[Tuple[str, Dict[str, Any], float]]:
+        """
+        Return up to ``limit`` ``(id, record, cosine)`` tuples, best first.
+
+        Filters match a record's top-level field or its ``metadata`` entry.
+        """
+        if self._size == 0 or limit <= 0:
+            return []
+
+        q = np.asarray(query, dtype=np.float32).ravel()
+        q_norm = float(np.linalg.norm(q))
+        if q_norm == 0 or q.shape[0] != self._matrix.shape[1]:
+            return []
+        q = q / q_norm
+
+        mask = self._valid[:self._size].copy()
+        if filters:
+            for key, value in filters.items():
+                mask &= (self._column("metadata", key) == value) | (self._column("record", key) == value)
+
+        candidates = self._ivf_candidates(q, mask)
+        if candidates is None:
+            candidates = np.flatnonzero(mask)
+        if candidates.size == 0:
+            return []
+
+        scores = self._matrix[candidates] @ q
+        k = min(limit, candidates.size)
+        if k < candidates.size:
+            top = np.argpartition(-scores, k - 1)[:k]
+        else:
+            top = np.arange(candidates.size)
+        top = top[np.argsort(-scores[top], kind="stable")]
+
+        results = []
+        for i in top:
+            row = int(candidates[i])
+            results.append((self._ids[row], self._records[row], float(scores[i])))
+        return results
+
+    def _column(self, source: str, key: str) -> np.ndarray:
+        """Object column of a filterable field, built on first use."""
+        column = self._columns.get((source, key))
+        if column is None:
+            column = np.empty(max(len(self._valid), 1), dtype=object)
+            for row in range(self._size):
+                column[row] = self._field_value(self._records[row], source, key)
+            self._columns[(source, key)] = column
+        return column[:self._size]
+
+    @staticmethod
+    def _field_value(record: Optional[Dict[str, Any]], source: str, key: str) -> Any:
+        if not record:
+            return None
+        if source == "metadata":
+            return (record.get("metadata") or {}).get(key)
+        return record.get(key)
+
+    def _set_columns(self, row: int, record: Dict[str, Any]) -> None:
+        for (source, key), column in self._columns.items():
+            column[row] = self._field_value(record, source, key)
+
+    # ------------------------------------------------------------------
+    # IVF partitioning
+    # ------------------------------------------------------------------
+
+    def _ivf_candidates(self, q: np.ndarray, mask: np.ndarray) -> Optional[np.ndarray]:
+        """Rows in the ``nprobe`` nearest partitions, or None for a full scan."""
+        if self._size < self.ann_min_vectors:
+            return None
+        if self._centroids is None or self._size > 2 * self._ivf_built_size:
+            self.build_ivf()
+        if self._centroids is None:
+            return None
+
+        nprobe = min(self.nprobe, self._centroids.shape[0])
+        centroid_scores = self._centroids @ q
+        probes = np.argpartition(-centroid_scores, nprobe - 1)[:nprobe]
+        in_probes = np.isin(self._assignments[:self._size], probes)
+        return np.flatnonzero(mask & in_probes)
+
+    def build_ivf(self, n_lists: Optional[int] = None, iterations: int = 8, seed: int = 0) -> None:
+        """(Re)build IVF centroids with spherical k-means on a sample."""
+        valid_rows = np.flatnonzero(self._valid[:self._size])
+        if valid_rows.size == 0:
+            return
+
+        n_lists = n_lists or max(1, int(np.sqrt(valid_rows.size)))
+        rng = np.random.default_rng(seed)
+        sample_size = min(valid_rows.size, max(n_lists * 64, 10_000))
+        sample = self._matrix[rng.choice(valid_rows, size=sample_size, replace=False)]
+        centroids = sample[rng.choice(sample_size, size=min(n_lists, sample_size), replace=False)].copy()
+
+        for _ in range(iterations):
+            labels = np.argmax(sample @ centroids.T, axis=1)
+            for c in range(centroids.shape[0]):
+                members = sample[labels == c]
+                if len(members):
+                    centroid = members.sum(axis=0)
+                    norm = np.linalg.norm(centroid)
+                    if norm > 0:
+                        centroids[c] = centroid / norm
+
+        assignments = np.zeros(len(self._valid), dtype=np.int32)
+        chunk = 65_536
+        for start in range(0, self._size, chunk):
+            stop = min(start + chunk, self._size)
+            assignments[start:stop] = np.argmax(self._matrix[start:stop] @ centroids.T, axis=1)
+
+        self._centroids = centroids.astype(np.float32)
+        self._assignments = assignments
+        self._ivf_built_size = self._size
+        logger.info("Built IVF index: %s lists over %s vectors", centroids.shape[0], self._size)
+
+    # ------------------------------------------------------------------
+    # Persistence
+    # ------------------------------------------------------------------
+
+    def save(self, path: Path) -> bool:
+        """Write ``<path>.npy`` (vectors) and ``<path>.json`` (ids/records)."""
+        path = Path(path).expanduser()
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            matrix = self._matrix[:self._size] if self._matrix is not None else np.zeros((0, 0), np.float32)
+            matrix_tmp = path.with_name(path.name + ".npy.tmp")
+            with open(matrix_tmp, "wb") as f:
+                np.save(f, matrix)
+            sidecar_tmp = path.with_name(path.name + ".json.tmp")
+            with open(sidecar_tmp, "w", encoding="utf-8") as f:
+                json.dump({
+                    "ids": self._ids,
+                    "records": self._records,
+                    "valid": self._valid[:self._size].tolist(),
+                }, f)
+            matrix_tmp.replace(path.with_suffix(path.suffix + ".npy"))
+            sidecar_tmp.replace(path.with_suffix(path.suffix + ".json"))
+            return True
+        except (OSError, TypeError, ValueError) as e:
+            logger.warning("Vector index save error: %s", e)
+            return False
+
+    def load(self, path: Path, mmap: bool = True) -> bool:
+        """Load a saved index; the matrix is memory-mapped until first write."""
+        path = Path(path).expanduser()
+        matrix_path = path.with_suffix(path.suffix + ".npy")
+        sidecar_path = path.with_suffix(path.suffix + ".json")
+        if not matrix_path.exists() or not sidecar_path.exists():
+            return False
+        try:
+            matrix = np.load(matrix_path, mmap_mode="r" if mmap else None)
+            with open(sidecar_path, encoding="utf-8") as f:
+                sidecar = json.load(f)
+            ids = sidecar["ids"]
+            if matrix.ndim != 2 or matrix.shape[0] != len(ids):
+                raise ValueError("vector index sidecar does not match matrix")
+        except (OSError, KeyError, TypeError, ValueError) as e:
+            logger.warning("Vector index load error: %s", e)
+            return False
+
+        if matrix.shape[0] == 0:
+            # Saved before anything was added: stay unallocated so the first
+            # add sets the dimension
+            self._matrix = None
+            self._readonly = False
+        else:
+            self._matrix = matrix if mmap else np.array(matrix, dtype=np.float32)
+            self._readonly = mmap
+        self._size = matrix.shape[0]
+        self._ids = list(ids)
+        self._records = list(sidecar.get("records") or [{} for _ in ids])
+        self._valid = np.asarray(sidecar.get("valid") or [True] * self._size, dtype=bool)
+        self._rows = {item_id: row for row, item_id in enumerate(self._ids)}
+        self._columns = {}
+        self._centroids = None
+        self._assignments = np.zeros(self._size, dtype=np.int32)
+        self._ivf_built_size = 0
+        return True
+
+    # ------------------------------------------------------------------
+    # Storage helpers
+    # ------------------------------------------------------------------
+
+    def _allocate(self, dimension: int, capacity: int) -> None:
+        self._matrix = np.zeros((capacity, dimension), dtype=np.float32)
+        self._valid = np.zeros(capacity, dtype=bool)
+        self._assignments = np.zeros(capacity, dtype=np.int32)
+        self._readonly = False
+
+    def _ensure_writable(self) -> None:
+        """Copy a memory-mapped matrix into RAM before the first mutation."""
+        if self._readonly:
+            self._resize(max(self._size * 2, self._initial_capacity))
+            self._readonly = False
+
+    def _grow(self) -> None:
+        self._resize(max(self._initial_capacity, self._matrix.shape[0] * 2))
+
+    def _resize(self, capacity: int) -> None:
+        matrix = np.zeros((capacity, self._matrix.shape[1]), dtype=np.float32)
+        matrix[:self._size] = self._matrix[:self._size]
+        valid = np.zeros(capacity, dtype=bool)
+        valid[:self._size] = self._valid[:self._size]
+        assignments = np.zeros(capacity, dtype=np.int32)
+        assignments[:self._size] = self._assignments[:self._size]
+        for column_key, column in list(self._columns.items()):
+            grown = np.empty(capacity, dtype=object)
+            grown[:self._size] = column[:self._size]
+            self._columns[column_key] = grown
+        self._matrix = matrix
+        self._valid = valid
+        self._assignments = assignments
@@ -36,6 +36,11 @@ class VectorConfig:
     batch_size: int = 100
     auto_index: bool = True
 
+    # In-memory backend settings
+    index_path: Optional[str] = None  # e.g. "~/.ccb/vector_index" -> .npy + .json
+    ann_min_vectors: int = 100_000  # Switch to IVF partitions above this size
+    ann_nprobe: int = 8  # IVF partitions scanned per query
+
     @classmethod
     def from_file(cls, config_path: Optional[Path] = None) -> 'VectorConfig':
         """Load configuration from JSON file."""
@@ -74,6 +79,9 @@ class VectorConfig:
                 'bm25_weight': self.bm25_weight,
                 'batch_size': self.batch_size,
                 'auto_index': self.auto_index,
+                'index_path': self.index_path,
+                'ann_min_vectors': self.ann_min_vectors,
+                'ann_nprobe': self.ann_nprobe,
             }, f, indent=2)
 
 
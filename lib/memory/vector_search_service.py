@@ -1,6 +1,8 @@
 from __future__ import annotations
 
+import atexit
 import sqlite3
+import threading
 from pathlib import Path
 from typing import Any, Dict, List, Optional, Tuple
 
@@ -25,8 +27,13 @@ class VectorSearch:
     - Multiple backend support (Qdrant, ChromaDB, in-memory)
     - Hybrid search combining vector + BM25
     - Batch indexing for efficiency
+
+    A persistent local index is saved after each batch, and at most
+    ``PERSIST_DELAY_S`` after single-memory changes.
     """
 
+    PERSIST_DELAY_S = 5.0
+
     def __init__(self, config: Optional[VectorConfig] = None):
         """Initialize vector search.
 
@@ -36,6 +43,9 @@ class VectorSearch:
         self.config = config or VectorConfig.from_file()
         self.embedding_provider = EmbeddingProvider(self.config.embedding_model)
         self.backend: Optional[VectorBackend] = None
+        # One-shot timer armed by the first unsaved single-memory change
+        self._persist_timer: Optional[threading.Timer] = None
+        self._persist_lock = threading.Lock()
 
         if self.config.enabled:
             self._init_backend()
@@ -82,13 +92,16 @@ class VectorSearch:
         if embedding is None:
             return False
 
-        return self.backend.index(
+        indexed = self.backend.index(
             memory_id=memory_id,
             memory_type=memory_type,
             content=content,
             embedding=embedding,
             metadata=metadata or {}
         )
+        if indexed:
+            self._schedule_persist()
+        return indexed
 
     def index_batch(
         self,
@@ -128,8 +141,46 @@ class VectorSearch:
             else:
                 failure += 1
 
+        self.persist()
         return success, failure
 
+    def persist(self) -> bool:
+        """Save the local index to disk if the backend supports it."""
+        with self._persist_lock:
+            timer, self._persist_timer = self._persist_timer, None
+        if timer is not None:
+            timer.cancel()
+        persist = getattr(self.backend, "persist", None)
+        return bool(persist and persist())
+
+    def _schedule_persist(self) -> None:
+        """Arm the persist timer unless one is already pending."""
+        if getattr(self.backend, "persist", None) is None:
+            return
+        with self._persist_lock:
+            if self._persist_timer is not None:
+                return
+            timer = threading.Timer(self.PERSIST_DELAY_S, self._persist_from_timer)
+            timer.daemon = True
+            self._persist_timer = timer
+        timer.start()
+
+    def _persist_from_timer(self) -> None:
+        with self._persist_lock:
+            if self._persist_timer is None:
+                return  # Persisted or closed meanwhile
+            self._persist_timer = None
+        persist = getattr(self.backend, "persist", None)
+        if persist:
+            persist()
+
+    def close(self) -> None:
+        """Save any unsaved changes now."""
+        with self._persist_lock:
+            pending = self._persist_timer is not None
+        if pending:
+            self.persist()
+
     def search(
         self,
         query: str,
@@ -161,7 +212,10 @@ class VectorSearch:
         """Delete a memory from the vector index."""
         if not self.backend:
             return False
-        return self.backend.delete(memory_id)
+        deleted = self.backend.delete(memory_id)
+        if deleted:
+            self._schedule_persist()
+        return deleted
 
     def get_stats(self) -> Dict[str, Any]:
         """Get vector search statistics."""
@@ -243,6 +297,15 @@ class VectorSearch:
         finally:
             conn.close()
 
+        # Skip memories a persisted local index holds unchanged (avoids
+        # re-embedding); edited ones are embedded again
+        is_current = getattr(self.backend, "is_current", None)
+        if is_current:
+            memories = [
+                m for m in memories
+                if not is_current(m["memory_id"], m["content"], m["metadata"])
+            ]
+
         if not memories:
             return 0, 0
 
@@ -260,6 +323,7 @@ def get_vector_search(config: Optional[VectorConfig] = None) -> VectorSearch:
     global _vector_search
     if _vector_search is None:
         _vector_search = VectorSearch(config)
+        atexit.register(_vector_search.close)
     return _vector_search
 
 
@@ -3,17 +3,22 @@ Provider Performance Tracking System for CCB
 
 Tracks response times, success rates, and token usage for each AI provider.
 Persists data to SQLite for analysis and routing optimization.
+
+Besides the raw rows, each provider keeps one compact row per time bucket
+(hourly by default) holding counters and a latency sketch, so window stats
+and percentiles merge a few bucket rows instead of sorting every sample.
 """
 from __future__ import annotations
 
 from dataclasses import dataclass, asdict
-from typing import Optional, List, Dict, Any
+from typing import Optional, List, Dict, Any, Iterable
 import sqlite3
 import time
 from pathlib import Path
 from contextlib import contextmanager
 
 from lib.common.paths import default_gateway_db_path, default_performance_db_path
+from lib.latency_sketch import LatencySketch
 
 
 @dataclass
@@ -47,6 +52,7 @@ class ProviderStats:
     p95_latency_ms: float
     total_tokens: int
     period_hours: int
+    p99_latency_ms: float = 0.0
 
 
 HANDLED_EXCEPTIONS = (Exception,)
@@ -59,13 +65,15 @@ class PerformanceTracker:
     Tracks latency, success rate, and token usage for routing optimization.
     """
 
-    def __init__(self, db_path: Optional[str] = None):
+    def __init__(self, db_path: Optional[str] = None, bucket_seconds: int = 3600):
         """
         Initialize the performance tracker.
 
         Args:
             db_path: Path to SQLite database. Defaults to data/performance.db
+            bucket_seconds: Width of the per-provider sketch buckets
         """
+        self.bucket_seconds = bucket_seconds
         if db_path:
             self.db_path = Path(db_path)
         else:
@@ -117,6 +125,79 @@ class PerformanceTracker:
                 CREATE INDEX IF NOT EXISTS idx_perf_provider_timestamp
                 ON performance_metrics(provider, timestamp)
             """)
+            # Per-provider rollups with a latency sketch per time bucket
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS performance_buckets (
+                    provider TEXT NOT NULL,
+                    bucket_start REAL NOT NULL,
+                    successful INTEGER NOT NULL,
+                    total_tokens INTEGER NOT NULL,
+                    sketch BLOB NOT NULL,
+                    PRIMARY KEY (provider, bucket_start)
+                )
+            """)
+            conn.execute("""
+                CREATE INDEX IF NOT EXISTS idx_perf_buckets_start
+                ON performance_buckets(bucket_start)
+            """)
+            has_buckets = conn.execute("SELECT 1 FROM performance_buckets LIMIT 1").fetchone()
+            has_metrics = conn.execute("SELECT 1 FROM performance_metrics LIMIT 1").fetchone()
+
+        # Databases written before buckets existed: build them once
+        if has_metrics and not has_buckets:
+            self.rebuild_buckets()
+
+    def _bucket_start(self, timestamp: float) -> float:
+        return float(int(timestamp // self.bucket_seconds) * self.bucket_seconds)
+
+    def _add_to_buckets(self, conn: sqlite3.Connection, metrics: Iterable[PerformanceMetric]) -> None:
+        """Fold metrics into their bucket rows (caller holds a write transaction)."""
+        pending: Dict[tuple, List[Any]] = {}
+        for metric in metrics:
+            key = (metric.provider, self._bucket_start(metric.timestamp))
+            entry = pending.get(key)
+            if entry is None:
+                row = conn.execute("""
+                    SELECT successful, total_tokens, sketch FROM performance_buckets
+                    WHERE provider = ? AND bucket_start = ?
+                """, key).fetchone()
+                if row:
+                    entry = [row["successful"], row["total_tokens"], LatencySketch.from_bytes(row["sketch"])]
+                else:
+                    entry = [0, 0, LatencySketch()]
+                pending[key] = entry
+            entry[0] += 1 if metric.success else 0
+            entry[1] += metric.token_count or 0
+            entry[2].add(metric.latency_ms)
+
+        conn.executemany("""
+            INSERT OR REPLACE INTO performance_buckets
+            (provider, bucket_start, successful, total_tokens, sketch)
+            VALUES (?, ?, ?, ?, ?)
+        """, [
+            (provider, start, successful, tokens, sketch.to_bytes())
+            for (provider, start), (successful, tokens, sketch) in pending.items()
+        ])
+
+    def rebuild_buckets(self) -> None:
+        """Recompute all bucket rows from the raw metrics table."""
+        with self._get_connection() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            conn.execute("DELETE FROM performance_buckets")
+            cursor = conn.execute("""
+                SELECT provider, latency_ms, success, token_count, timestamp
+                FROM performance_metrics
+            """)
+            self._add_to_buckets(conn, (
+                PerformanceMetric(
+                    provider=row["provider"],
+                    latency_ms=row["latency_ms"],
+                    success=bool(row["success"]),
+                    token_count=row["token_count"],
+                    timestamp=row["timestamp"],
+                )
+                for row in cursor
+            ))
 
     def record_metric(self, metric: PerformanceMetric) -> None:
         """
@@ -126,6 +207,8 @@ class PerformanceTracker:
             metric: The performance metric to record
         """
         with self._get_connection() as conn:
+            # Take the write lock up front: the bucket row is read-modify-write
+            conn.execute("BEGIN IMMEDIATE")
             conn.execute("""
                 INSERT INTO performance_metrics
                 (provider, latency_ms, success, token_count, timestamp, task_id, error)
@@ -139,6 +222,7 @@ class PerformanceTracker:
                 metric.task_id,
                 metric.error,
             ))
+            self._add_to_buckets(conn, [metric])
 
     def record(
         self,
@@ -170,68 +254,120 @@ class PerformanceTracker:
         )
         self.record_metric(metric)
 
-    def get_provider_stats(self, provider: str, hours: int = 24) -> Optional[ProviderStats]:
+    def _window_start(self, hours: int) -> float:
+        """First bucket overlapping the last ``hours`` hours."""
+        return self._bucket_start(time.time() - (hours * 3600))
+
+    def _stats_from_buckets(
+        self,
+        conn: sqlite3.Connection,
+        hours: int,
+        provider: Optional[str] = None,
+    ) -> Dict[str, ProviderStats]:
         """
-        Get aggregated statistics for a provider.
+        Per-provider stats for the window.
+
+        Counts, tokens and min/avg/max latency are exact over the raw rows;
+        only the percentiles come from the bucket sketches, whose window is
+        rounded out to whole buckets.
+        """
+        query = """
+            SELECT
+                provider,
+                COUNT(*) as total,
+                SUM(success) as successful,
+                AVG(latency_ms) as avg_latency,
+                MIN(latency_ms) as min_latency,
+                MAX(latency_ms) as max_latency,
+                SUM(COALESCE(token_count, 0)) as total_tokens
+            FROM performance_metrics
+            WHERE timestamp >= ?
+        """
+        params: List[Any] = [time.time() - (hours * 3600)]
+        if provider:
+            query += " AND provider = ?"
+            params.append(provider)
+        query += " GROUP BY provider"
+        totals = {row["provider"]: row for row in conn.execute(query, params)}
+        if not totals:
+            return {}
+
+        query = """
+            SELECT provider, sketch
+            FROM performance_buckets
+            WHERE bucket_start >= ?
+        """
+        params = [self._window_start(hours)]
+        if provider:
+            query += " AND provider = ?"
+            params.append(provider)
+
+        sketches: Dict[str, LatencySketch] = {}
+        for row in conn.execute(query, params):
+            if row["provider"] in totals:
+                sketch = sketches.setdefault(row["provider"], LatencySketch())
+                sketch.merge(LatencySketch.from_bytes(row["sketch"]))
+
+        stats = {}
+        for name, row in totals.items():
+            total = row["total"]
+            successful = row["successful"] or 0
+            p50, p95, p99 = sketches.get(name, LatencySketch()).quantiles((0.5, 0.95, 0.99))
+            stats[name] = ProviderStats(
+                provider=name,
+                total_requests=total,
+                successful_requests=successful,
+                failed_requests=total - successful,
+                success_rate=successful / total,
+                avg_latency_ms=row["avg_latency"],
+                min_latency_ms=row["min_latency"],
+                max_latency_ms=row["max_latency"],
+                p50_latency_ms=p50,
+                p95_latency_ms=p95,
+                total_tokens=row["total_tokens"],
+                period_hours=hours,
+                p99_latency_ms=p99,
+            )
+        return stats
+
+    def get_latency_sketch(self, provider: str, hours: int = 24) -> LatencySketch:
+        """
+        Get a provider's merged latency sketch for a time window.
 
         Args:
             provider: Provider name
-            hours: Time window in hours (default: 24)
+            hours: Time window in hours (rounded out to whole buckets)
 
         Returns:
-            ProviderStats or None if no data
+            LatencySketch (empty if no data)
         """
-        cutoff = time.time() - (hours * 3600)
-
+        sketch = LatencySketch()
         with self._get_connection() as conn:
-            # Get basic stats
             cursor = conn.execute("""
-                SELECT
-                    COUNT(*) as total,
-                    SUM(CASE WHEN success = 1 THEN 1 ELSE 0 END) as successful,
-                    SUM(CASE WHEN success = 0 THEN 1 ELSE 0 END) as failed,
-                    AVG(latency_ms) as avg_latency,
-                    MIN(latency_ms) as min_latency,
-                    MAX(latency_ms) as max_latency,
-                    SUM(COALESCE(token_count, 0)) as total_tokens
-                FROM performance_metrics
-                WHERE provider = ? AND timestamp >= ?
-            """, (provider, cutoff))
-
-            row = cursor.fetchone()
-            if not row or row["total"] == 0:
-                return None
+                SELECT sketch FROM performance_buckets
+                WHERE provider = ? AND bucket_start >= ?
+            """, (provider, self._window_start(hours)))
+            for row in cursor:
+                sketch.merge(LatencySketch.from_bytes(row["sketch"]))
+        return sketch
 
-            total = row["total"]
-            successful = row["successful"]
-            failed = row["failed"]
+    def get_provider_stats(self, provider: str, hours: int = 24) -> Optional[ProviderStats]:
+        """
+        Get aggregated statistics for a provider.
 
-            # Get percentiles (p50, p95)
-            cursor = conn.execute("""
-                SELECT latency_ms
-                FROM performance_metrics
-                WHERE provider = ? AND timestamp >= ?
-                ORDER BY latency_ms
-            """, (provider, cutoff))
+        Percentiles come from the merged bucket sketches (within 1% of the
+        exact value, window rounded out to whole buckets); all other fields
+        are exact.
 
-            latencies = [r["latency_ms"] for r in cursor.fetchall()]
-            p50_idx = int(len(latencies) * 0.5)
-            p95_idx = int(len(latencies) * 0.95)
+        Args:
+            provider: Provider name
+            hours: Time window in hours (default: 24)
 
-            return ProviderStats(
-                provider=provider,
-                total_requests=total,
-                successful_requests=successful,
-                failed_requests=failed,
-                success_rate=successful / total if total > 0 else 0.0,
-                avg_latency_ms=row["avg_latency"] or 0.0,
-                min_latency_ms=row["min_latency"] or 0.0,
-                max_latency_ms=row["max_latency"] or 0.0,
-                p50_latency_ms=latencies[p50_idx] if latencies else 0.0,
-                p95_latency_ms=latencies[p95_idx] if p95_idx < len(latencies) else (latencies[-1] if latencies else 0.0),
-                total_tokens=row["total_tokens"] or 0,
-                period_hours=hours,
-            )
+        Returns:
+            ProviderStats or None if no data
+        """
+        with self._get_connection() as conn:
+            return self._stats_from_buckets(conn, hours, provider).get(provider)
 
     def get_all_stats(self, hours: int = 24) -> List[ProviderStats]:
         """
@@ -243,24 +379,9 @@ class PerformanceTracker:
         Returns:
             List of ProviderStats for all providers with data
         """
-        cutoff = time.time() - (hours * 3600)
-
         with self._get_connection() as conn:
-            cursor = conn.execute("""
-                SELECT DISTINCT provider
-                FROM performance_metrics
-                WHERE timestamp >= ?
-            """, (cutoff,))
-
-            providers = [row["provider"] for row in cursor.fetchall()]
-
-        stats = []
-        stats_providers = set()
-        for provider in providers:
-            provider_stats = self.get_provider_stats(provider, hours)
-            if provider_stats:
-                stats.append(provider_stats)
-                stats_providers.add(provider)
+            stats = list(self._stats_from_buckets(conn, hours).values())
+        stats_providers = {s.provider for s in stats}
 
         # Also get stats from gateway.db and merge (for providers not in performance.db)
         if self.gateway_db_path.exists():
@@ -325,6 +446,7 @@ class PerformanceTracker:
                     p95_latency_ms=row["max_latency"] or 0.0,  # Approximate
                     total_tokens=0,  # Not tracked in gateway.db
                     period_hours=hours,
+                    p99_latency_ms=row["max_latency"] or 0.0,  # Approximate
                 ))
 
             conn.close()
@@ -439,6 +561,10 @@ class PerformanceTracker:
                 "DELETE FROM performance_metrics WHERE timestamp < ?",
                 (cutoff,)
             )
+            conn.execute(
+                "DELETE FROM performance_buckets WHERE bucket_start + ? <= ?",
+                (self.bucket_seconds, cutoff)
+            )
             return cursor.rowcount
 
     def get_summary(self, hours: int = 24) -> Dict[str, Any]:
@@ -479,7 +605,9 @@ class PerformanceTracker:
                     "requests": s.total_requests,
                     "success_rate": s.success_rate,
                     "avg_latency_ms": s.avg_latency_ms,
+                    "p50_latency_ms": s.p50_latency_ms,
                     "p95_latency_ms": s.p95_latency_ms,
+                    "p99_latency_ms": s.p99_latency_ms,
                     "tokens": s.total_tokens,
                 }
                 for s in all_stats
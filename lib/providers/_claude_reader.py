@@ -13,6 +13,9 @@ from .base import BaseCommReader, CommMessage
 class ClaudeCommReader(BaseCommReader):
     """Reader for Claude CLI session logs."""
 
+    # Sessions live at <projects>/<project-key>/<session>.jsonl
+    watch_file_depth = 2
+
     def __init__(self, home_dir: Optional[str] = None, work_dir: Optional[Path] = None):
         super().__init__("claude", home_dir=home_dir)
         self.work_dir = Path(work_dir).expanduser() if work_dir else Path.cwd()
@@ -80,11 +83,19 @@ class ClaudeCommReader(BaseCommReader):
 
         return None
 
+    def _indexed_watcher(self):
+        watcher = self._session_watcher()
+        return watcher if watcher is not None and watcher.ready else None
+
     def _scan_latest_session(self) -> Optional[Path]:
         project_dir = self._project_dir()
         if not project_dir.exists():
             return None
 
+        watcher = self._indexed_watcher()
+        if watcher is not None:
+            return watcher.latest_in(project_dir)
+
         try:
             sessions = sorted(
                 (path for path in project_dir.glob("*.jsonl") if path.is_file() and not path.name.startswith(".")),
@@ -99,6 +110,10 @@ class ClaudeCommReader(BaseCommReader):
         if not self.home_dir.exists():
             return None
 
+        watcher = self._indexed_watcher()
+        if watcher is not None:
+            return watcher.latest()
+
         try:
             sessions = sorted(
                 (path for path in self.home_dir.glob("*/*.jsonl") if path.is_file() and not path.name.startswith(".")),
@@ -13,6 +13,10 @@ from .base import BaseCommReader, CommMessage
 class GeminiCommReader(BaseCommReader):
     """Reader for Gemini CLI session files."""
 
+    # Sessions are a single JSON document, not JSONL
+    incremental_reads = False
+    watch_suffixes = (".json",)
+
     def __init__(self, home_dir: Optional[str] = None, work_dir: Optional[Path] = None):
         super().__init__("gemini", home_dir=home_dir)
         self.work_dir = Path(work_dir).expanduser() if work_dir else Path.cwd()
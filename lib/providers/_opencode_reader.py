@@ -12,6 +12,8 @@ from .base import BaseCommReader, CommMessage
 class OpenCodeCommReader(BaseCommReader):
     """Reader for OpenCode storage-backed session logs."""
 
+    watch_suffixes = (".json",)
+
     def __init__(self, home_dir: Optional[str] = None, work_dir: Optional[Path] = None):
         super().__init__("opencode", home_dir=home_dir)
         self.work_dir = Path(work_dir).expanduser() if work_dir else Path.cwd()
@@ -0,0 +1,636 @@
+"""Filesystem watcher and mtime index for provider session directories.
+
+One ``SessionWatcher`` is shared per watched root. It listens for
+create/append/delete events (Linux inotify via ctypes, or a polling scan
+elsewhere), keeps an mtime-ordered index of session files so the newest
+session of a directory is a dictionary lookup, and wakes threads blocked
+in ``wait`` whenever something under the root changes.
+
+The polling backend only runs while some thread is in ``wait`` (and for
+``POLL_LINGER_S`` after). It stats directories, lists the ones whose mtime
+changed plus the ones callers are waiting on, and re-syncs the whole tree
+only when it wakes up again; its index is not ``ready`` while idle.
+
+The inotify backend switches to polling for good when a watch cannot be
+added (e.g. ``fs.inotify.max_user_watches`` is exhausted), since events in
+the unwatched directories would be missed.
+
+Set ``CCB_SESSION_WATCHER=0`` to disable watching or ``=poll`` to force the
+polling backend.
+"""
+from __future__ import annotations
+
+import errno
+import os
+import select
+import stat
+import struct
+import sys
+import threading
+import time
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from lib.common.logging import get_logger
+
+logger = get_logger("providers.watcher")
+
+# inotify(7) constants
+_IN_MODIFY = 0x00000002
+_IN_CLOSE_WRITE = 0x00000008
+_IN_MOVED_FROM = 0x00000040
+_IN_MOVED_TO = 0x00000080
+_IN_CREATE = 0x00000100
+_IN_DELETE = 0x00000200
+_IN_DELETE_SELF = 0x00000400
+_IN_MOVE_SELF = 0x00000800
+_IN_Q_OVERFLOW = 0x00004000
+_IN_IGNORED = 0x00008000
+_IN_ONLYDIR = 0x01000000
+_IN_ISDIR = 0x40000000
+_IN_NONBLOCK = 0o4000
+_IN_CLOEXEC = 0o2000000
+
+_WATCH_MASK = (
+    _IN_MODIFY | _IN_CLOSE_WRITE | _IN_MOVED_FROM | _IN_MOVED_TO
+    | _IN_CREATE | _IN_DELETE | _IN_DELETE_SELF | _IN_MOVE_SELF | _IN_ONLYDIR
+)
+_EVENT_HEADER = struct.Struct("iIII")
+
+# How long the polling backend keeps scanning after the last waiter left
+POLL_LINGER_S = 5.0
+
+_libc = None
+
+
+def _load_libc():
+    """Return libc with the inotify symbols, or None where unsupported."""
+    global _libc
+    if _libc is None:
+        _libc = False
+        if sys.platform.startswith("linux"):
+            try:
+                import ctypes
+                import ctypes.util
+
+                libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+                libc.inotify_init1.argtypes = [ctypes.c_int]
+                libc.inotify_add_watch.argtypes = [ctypes.c_int, ctypes.c_char_p, ctypes.c_uint32]
+                libc.inotify_rm_watch.argtypes = [ctypes.c_int, ctypes.c_int]
+                _libc = libc
+            except (OSError, AttributeError):
+                pass
+    return _libc or None
+
+
+class _DirIndex:
+    """mtimes of the session files in one directory, with a cached newest."""
+
+    __slots__ = ("files", "latest")
+
+    def __init__(self) -> None:
+        self.files: Dict[str, int] = {}
+        self.latest: Optional[Tuple[int, str]] = None
+
+    def update(self, name: str, mtime_ns: int) -> None:
+        self.files[name] = mtime_ns
+        if self.latest is None or mtime_ns >= self.latest[0]:
+            self.latest = (mtime_ns, name)
+        elif self.latest[1] == name:
+            # The newest file went back in time; recompute on next lookup
+            self.latest = None
+
+    def remove(self, name: str) -> None:
+        if self.files.pop(name, None) is not None and self.latest and self.latest[1] == name:
+            self.latest = None
+
+    def newest(self) -> Optional[Tuple[int, str]]:
+        if self.latest is None and self.files:
+            name = max(self.files, key=self.files.__getitem__)
+            self.latest = (self.files[name], name)
+        return self.latest
+
+
+class SessionWatcher:
+    """
+    Watch a provider home directory for session file activity.
+
+    Only files ending in one of ``suffixes`` (and not starting with ``.``)
+    are indexed. With ``file_depth`` set, only files exactly that many
+    levels below the root are indexed and deeper directories are not
+    watched; otherwise the whole tree is.
+    """
+
+    def __init__(
+        self,
+        root: Path,
+        suffixes: Tuple[str, ...] = (".jsonl",),
+        file_depth: Optional[int] = None,
+        poll_interval: float = 1.0,
+        force_polling: bool = False,
+    ):
+        """
+        Initialize the watcher (call ``start`` to begin watching).
+
+        Args:
+            root: Directory to watch
+            suffixes: File suffixes tracked in the mtime index
+            file_depth: Depth of indexed files below root (None = any)
+            poll_interval: Scan period of the polling backend, and retry
+                period for a root that does not exist yet
+            force_polling: Skip inotify even where it is available
+        """
+        self.root = Path(root).expanduser()
+        self.suffixes = tuple(suffixes)
+        self.file_depth = file_depth
+        self.poll_interval = max(0.05, poll_interval)
+        self.force_polling = force_polling
+
+        self._lock = threading.Lock()
+        self._changed = threading.Condition(self._lock)
+        self._generation = 0
+        self._dirs: Dict[str, _DirIndex] = {}
+        self._global_latest: Optional[Tuple[int, str]] = None
+        self._ready = False
+
+        self._thread: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+        self._fd = -1
+        self._wd_paths: Dict[int, str] = {}
+        self._watch_failed = False
+        self.backend = "none"
+
+        # Polling backend: active waiters, the directories they named
+        # (refcounted), and the mtime of every watched directory
+        self._waiters = 0
+        self._wait_dirs: Dict[str, int] = {}
+        self._active_until = 0.0
+        self._wanted = threading.Event()
+        self._dir_mtimes: Dict[str, int] = {}
+
+    # ------------------------------------------------------------------
+    # Public API
+    # ------------------------------------------------------------------
+
+    @property
+    def generation(self) -> int:
+        """Counter bumped on every observed change under the root."""
+        with self._lock:
+            return self._generation
+
+    @property
+    def ready(self) -> bool:
+        """Whether the initial scan finished and the index can be trusted."""
+        return self._ready
+
+    def start(self) -> "SessionWatcher":
+        """Start the background watcher thread (idempotent)."""
+        if self._thread is not None:
+            return self
+        libc = None if self.force_polling else _load_libc()
+        if libc is not None:
+            fd = libc.inotify_init1(_IN_NONBLOCK | _IN_CLOEXEC)
+            if fd >= 0:
+                self._fd = fd
+                self.backend = "inotify"
+        if self._fd < 0:
+            self.backend = "poll"
+
+        target = self._run_inotify if self.backend == "inotify" else self._run_polling
+        self._thread = threading.Thread(
+            target=target, name=f"session-watcher:{self.root.name}", daemon=True
+        )
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        """Stop the watcher thread and release the inotify descriptor."""
+        self._stop.set()
+        self._wanted.set()
+        if self._thread is not None:
+            self._thread.join(timeout=2.0)
+        if self._fd >= 0:
+            try:
+                os.close(self._fd)
+            except OSError:
+                pass
+            self._fd = -1
+
+    def wait(self, generation: int, timeout: float, directories: Optional[Iterable[Path]] = None) -> bool:
+        """
+        Block until the generation moves past ``generation`` or timeout.
+
+        Args:
+            generation: Generation read before checking for changes
+            timeout: Maximum time to block
+            directories: Directories whose files the caller cares about;
+                the polling backend re-stats their files on every scan
+                (elsewhere it only notices created and deleted entries)
+
+        Returns:
+            True if a change was observed
+        """
+        deadline = time.monotonic() + max(0.0, timeout)
+        dirs = [str(Path(d).expanduser()) for d in directories or ()]
+        with self._changed:
+            self._waiters += 1
+            for dir_path in dirs:
+                self._wait_dirs[dir_path] = self._wait_dirs.get(dir_path, 0) + 1
+            self._wanted.set()
+            try:
+                while self._generation == generation:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        return False
+                    self._changed.wait(remaining)
+                return True
+            finally:
+                self._waiters -= 1
+                for dir_path in dirs:
+                    if self._wait_dirs[dir_path] <= 1:
+                        del self._wait_dirs[dir_path]
+                    else:
+                        self._wait_dirs[dir_path] -= 1
+                self._active_until = time.monotonic() + POLL_LINGER_S
+
+    def latest_in(self, directory: Path) -> Optional[Path]:
+        """Newest indexed session file directly inside ``directory``."""
+        directory = Path(directory).expanduser()
+        with self._lock:
+            index = self._dirs.get(str(directory))
+            newest = index.newest() if index else None
+        return directory / newest[1] if newest else None
+
+    def latest(self) -> Optional[Path]:
+        """Newest indexed session file anywhere under the root."""
+        with self._lock:
+            if self._global_latest is None:
+                best: Optional[Tuple[int, str]] = None
+                for dir_path, index in self._dirs.items():
+                    newest = index.newest()
+                    if newest and (best is None or newest[0] > best[0]):
+                        best = (newest[0], os.path.join(dir_path, newest[1]))
+                self._global_latest = best
+            latest = self._global_latest
+        return Path(latest[1]) if latest else None
+
+    # ------------------------------------------------------------------
+    # Index maintenance
+    # ------------------------------------------------------------------
+
+    def _depth(self, path: str) -> int:
+        rel = os.path.relpath(path, str(self.root))
+        return 0 if rel == "." else rel.count(os.sep) + 1
+
+    def _tracks_file(self, path: str) -> bool:
+        name = os.path.basename(path)
+        if name.startswith(".") or not name.endswith(self.suffixes):
+            return False
+        return self.file_depth is None or self._depth(path) == self.file_depth
+
+    def _watches_dir(self, path: str) -> bool:
+        return self.file_depth is None or self._depth(path) < self.file_depth
+
+    def _record_file(self, path: str) -> None:
+        """Re-stat one file and update (or drop) its index entry."""
+        if not self._tracks_file(path):
+            return
+        dir_path, name = os.path.split(path)
+        try:
+            st = os.stat(path)
+            mtime_ns = st.st_mtime_ns if stat.S_ISREG(st.st_mode) else None
+        except OSError:
+            mtime_ns = None
+        with self._lock:
+            if mtime_ns is None:
+                index = self._dirs.get(dir_path)
+                if index is not None:
+                    index.remove(name)
+                    if not index.files:
+                        del self._dirs[dir_path]
+                if self._global_latest and self._global_latest[1] == path:
+                    self._global_latest = None
+                return
+            self._dirs.setdefault(dir_path, _DirIndex()).update(name, mtime_ns)
+            if self._global_latest is None or mtime_ns >= self._global_latest[0]:
+                self._global_latest = (mtime_ns, path)
+            elif self._global_latest[1] == path:
+                self._global_latest = None
+
+    def _forget_dir(self, dir_path: str) -> None:
+        prefix = dir_path.rstrip(os.sep) + os.sep
+        with self._lock:
+            for key in [k for k in self._dirs if k == dir_path or k.startswith(prefix)]:
+                del self._dirs[key]
+            for key in [k for k in self._dir_mtimes if k == dir_path or k.startswith(prefix)]:
+                del self._dir_mtimes[key]
+            self._global_latest = None
+
+    def _scan(self, dir_path: str, on_dir=None) -> Dict[str, Dict[str, int]]:
+        """Walk ``dir_path`` and return ``{dir: {name: mtime_ns}}`` of tracked files."""
+        found: Dict[str, Dict[str, int]] = {}
+        stack = [dir_path]
+        while stack:
+            current = stack.pop()
+            if on_dir is not None:
+                on_dir(current)
+            try:
+                with os.scandir(current) as it:
+                    for entry in it:
+                        try:
+                            if entry.is_dir(follow_symlinks=False):
+                                if self._watches_dir(entry.path):
+                                    stack.append(entry.path)
+                            elif entry.is_file() and self._tracks_file(entry.path):
+                                found.setdefault(current, {})[entry.name] = entry.stat().st_mtime_ns
+                        except OSError:
+                            continue
+            except OSError:
+                continue
+        return found
+
+    def _merge_scan(self, dir_path: str, found: Dict[str, Dict[str, int]], replace: bool) -> bool:
+        """Fold a scan result into the index. Returns True if anything changed."""
+        changed = False
+        prefix = dir_path.rstrip(os.sep) + os.sep
+        with self._lock:
+            if replace:
+                for key in [k for k in self._dirs if (k == dir_path or k.startswith(prefix)) and k not in found]:
+                    del self._dirs[key]
+                    changed = True
+            for key, files in found.items():
+                index = self._dirs.get(key)
+                if index is None:
+                    index = self._dirs[key] = _DirIndex()
+                if replace:
+                    for name in [n for n in index.files if n not in files]:
+                        index.remove(name)
+                        changed = True
+                for name, mtime_ns in files.items():
+                    if index.files.get(name) != mtime_ns:
+                        index.update(name, mtime_ns)
+                        changed = True
+            if changed:
+                self._global_latest = None
+        return changed
+
+    def _notify(self) -> None:
+        with self._changed:
+            self._generation += 1
+            self._changed.notify_all()
+
+    # ------------------------------------------------------------------
+    # inotify backend
+    # ------------------------------------------------------------------
+
+    def _add_watch(self, dir_path: str) -> None:
+        import ctypes
+
+        libc = _load_libc()
+        wd = libc.inotify_add_watch(self._fd, os.fsencode(dir_path), _WATCH_MASK)
+        if wd >= 0:
+            self._wd_paths[wd] = dir_path
+            return
+        err = ctypes.get_errno()
+        if err in (errno.ENOENT, errno.ENOTDIR, errno.EACCES):
+            return  # Gone or unreadable; the scan skips it as well
+        if not self._watch_failed:
+            logger.warning(
+                "Cannot watch %s (%s); session watcher for %s falls back to polling",
+                dir_path, os.strerror(err) if err else "unknown error", self.root,
+            )
+        # Changes in this directory would go unseen: stop trusting the index
+        self._watch_failed = True
+        self._ready = False
+
+    def _fall_back_to_polling(self) -> None:
+        """Replace the inotify backend with the polling one for good."""
+        fd, self._fd = self._fd, -1
+        try:
+            os.close(fd)
+        except OSError:
+            pass
+        self._wd_paths.clear()
+        self.backend = "poll"
+        self._run_polling()
+
+    def _watch_tree(self, dir_path: str, replace: bool = False) -> None:
+        """Watch a directory (and its watched subdirectories) and index it."""
+        found = self._scan(dir_path, on_dir=self._add_watch)
+        self._merge_scan(dir_path, found, replace=replace)
+
+    def _run_inotify(self) -> None:
+        root = str(self.root)
+        root_watched = False
+        while not self._stop.is_set():
+            if not root_watched:
+                if os.path.isdir(root):
+                    self._watch_tree(root)
+                    root_watched = True
+                    if self._watch_failed:
+                        break
+                    self._ready = True
+                    self._notify()
+                else:
+                    self._ready = True
+            try:
+                readable, _, _ = select.select([self._fd], [], [], self.poll_interval)
+            except (OSError, ValueError):
+                break
+            if not readable:
+                continue
+            try:
+                data = os.read(self._fd, 64 * 1024)
+            except OSError as e:
+                if e.errno in (errno.EAGAIN, errno.EINTR):
+                    continue
+                break
+            if self._handle_events(data):
+                root_watched = False
+            if self._watch_failed:
+                break
+        if self._watch_failed and not self._stop.is_set():
+            self._fall_back_to_polling()
+            return
+        logger.debug("Session watcher for %s stopped", self.root)
+
+    def _handle_events(self, data: bytes) -> bool:
+        """Apply a batch of inotify events. Returns True if the root went away."""
+        root_lost = False
+        changed = False
+        offset = 0
+        while offset + _EVENT_HEADER.size <= len(data):
+            wd, mask, _cookie, length = _EVENT_HEADER.unpack_from(data, offset)
+            raw_name = data[offset + _EVENT_HEADER.size: offset + _EVENT_HEADER.size + length]
+            offset += _EVENT_HEADER.size + length
+            name = os.fsdecode(raw_name.rstrip(b"\0"))
+
+            if mask & _IN_Q_OVERFLOW:
+                # Events were dropped, including any for new directories;
+                # re-add watches (existing ones are unchanged) and resync
+                self._watch_tree(str(self.root), replace=True)
+                changed = True
+                continue
+
+            dir_path = self._wd_paths.get(wd)
+            if dir_path is None:
+                continue
+            if mask & _IN_IGNORED:
+                self._wd_paths.pop(wd, None)
+                continue
+            if mask & (_IN_DELETE_SELF | _IN_MOVE_SELF):
+                self._forget_dir(dir_path)
+                if dir_path == str(self.root):
+                    root_lost = True
+                changed = True
+                continue
+            if not name:
+                continue
+
+            path = os.path.join(dir_path, name)
+            if mask & _IN_ISDIR:
+                if mask & (_IN_CREATE | _IN_MOVED_TO) and self._watches_dir(path):
+                    self._watch_tree(path)
+                elif mask & (_IN_DELETE | _IN_MOVED_FROM):
+                    self._forget_dir(path)
+            else:
+                self._record_file(path)
+            changed = True
+
+        if changed:
+            self._notify()
+        return root_lost
+
+    # ------------------------------------------------------------------
+    # Polling backend
+    # ------------------------------------------------------------------
+
+    def _run_polling(self) -> None:
+        root = str(self.root)
+        while not self._stop.is_set():
+            with self._lock:
+                idle = self._waiters == 0 and time.monotonic() >= self._active_until
+                if idle:
+                    self._wanted.clear()
+            if idle:
+                # Nothing keeps the index fresh until a caller waits again
+                self._ready = False
+                self._wanted.wait()
+                continue
+
+            if not self._ready or root not in self._dir_mtimes:
+                found = self._scan(root, on_dir=self._record_dir_mtime)
+                changed = self._merge_scan(root, found, replace=True)
+                if not self._ready:
+                    self._ready = True
+                    changed = True
+            else:
+                changed = self._poll_changes()
+            if changed:
+                self._notify()
+            self._stop.wait(self.poll_interval)
+
+    def _record_dir_mtime(self, dir_path: str) -> None:
+        # Taken before the directory is listed, so later changes are seen
+        try:
+            self._dir_mtimes[dir_path] = os.stat(dir_path).st_mtime_ns
+        except OSError:
+            self._dir_mtimes.pop(dir_path, None)
+
+    def _poll_changes(self) -> bool:
+        """Relist changed and waited-on directories. Returns True if anything changed."""
+        with self._lock:
+            wait_dirs = set(self._wait_dirs)
+        changed = False
+        for dir_path, mtime_ns in list(self._dir_mtimes.items()):
+            if dir_path not in self._dir_mtimes:
+                continue  # Forgotten along with a removed parent
+            try:
+                current = os.stat(dir_path).st_mtime_ns
+            except OSError:
+                self._forget_dir(dir_path)
+                changed = True
+                continue
+            if current != mtime_ns or dir_path in wait_dirs:
+                changed = self._rescan_dir(dir_path) or changed
+        return changed
+
+    def _rescan_dir(self, dir_path: str) -> bool:
+        """List one directory, re-stat its files and scan new subdirectories."""
+        self._record_dir_mtime(dir_path)
+        files: Dict[str, int] = {}
+        new_dirs: List[str] = []
+        try:
+            with os.scandir(dir_path) as it:
+                for entry in it:
+                    try:
+                        if entry.is_dir(follow_symlinks=False):
+                            if self._watches_dir(entry.path) and entry.path not in self._dir_mtimes:
+                                new_dirs.append(entry.path)
+                        elif entry.is_file() and self._tracks_file(entry.path):
+                            files[entry.name] = entry.stat().st_mtime_ns
+                    except OSError:
+                        continue
+        except OSError:
+            return False
+
+        changed = False
+        with self._lock:
+            index = self._dirs.get(dir_path)
+            if index is None and files:
+                index = self._dirs[dir_path] = _DirIndex()
+            if index is not None:
+                for name in [n for n in index.files if n not in files]:
+                    index.remove(name)
+                    changed = True
+                for name, mtime_ns in files.items():
+                    if index.files.get(name) != mtime_ns:
+                        index.update(name, mtime_ns)
+                        changed = True
+                if not index.files:
+                    del self._dirs[dir_path]
+            if changed:
+                self._global_latest = None
+        for sub in new_dirs:
+            self._merge_scan(sub, self._scan(sub, on_dir=self._record_dir_mtime), replace=False)
+            changed = True
+        return changed
+
+
+_WATCHERS: Dict[Tuple[str, Tuple[str, ...], Optional[int]], SessionWatcher] = {}
+_WATCHERS_LOCK = threading.Lock()
+
+
+def get_session_watcher(
+    root: Path,
+    suffixes: Tuple[str, ...] = (".jsonl",),
+    file_depth: Optional[int] = None,
+) -> Optional[SessionWatcher]:
+    """
+    Return the shared, started watcher for a root, or None when disabled.
+
+    Args:
+        root: Provider home directory
+        suffixes: File suffixes tracked in the mtime index
+        file_depth: Depth of indexed files below root (None = any)
+
+    Returns:
+        SessionWatcher or None if ``CCB_SESSION_WATCHER`` disables watching
+    """
+    mode = os.environ.get("CCB_SESSION_WATCHER", "").strip().lower()
+    if mode in {"0", "false", "no", "off"}:
+        return None
+
+    root = Path(root).expanduser()
+    key = (str(root), tuple(suffixes), file_depth)
+    with _WATCHERS_LOCK:
+        watcher = _WATCHERS.get(key)
+        if watcher is None:
+            watcher = SessionWatcher(root, suffixes, file_depth, force_polling=mode == "poll")
+            try:
+                watcher.start()
+            except (RuntimeError, OSError) as e:
+                logger.warning("Session watcher unavailable for %s: %s", root, e)
+                return None
+            _WATCHERS[key] = watcher
+        return watcher
@@ -2,14 +2,18 @@
 from __future__ import annotations
 
 import hashlib
+import threading
 import time
 from abc import ABC, abstractmethod
+from collections import OrderedDict, deque
 from dataclasses import dataclass, field
 from pathlib import Path
-from typing import Any, Dict, List, Optional
+from typing import Any, Deque, Dict, List, Optional, Tuple
 
 from lib.common.logging import get_logger
 
+from ._watcher import SessionWatcher, get_session_watcher
+
 
 @dataclass
 class CommState:
@@ -31,14 +35,59 @@ class CommMessage:
     metadata: Dict[str, Any] = field(default_factory=dict)
 
 
+# Prefix compared on each read to detect in-place rewrites
+_HEAD_BYTES = 64
+
+
+@dataclass
+class _SessionTail:
+    """Incremental read position and parsed tail of one session file."""
+
+    inode: int = 0
+    offset: int = 0
+    mtime_ns: int = 0
+    # First bytes of the file, to spot rewrites that reuse the inode
+    head: bytes = b""
+    # Bytes after the last newline (a line still being written)
+    pending: bytes = b""
+    messages: Deque[CommMessage] = field(default_factory=deque)
+    total_count: int = 0
+
+
 class BaseCommReader(ABC):
-    """Base class for provider communication log readers."""
+    """
+    Base class for provider communication log readers.
+
+    Line-oriented (JSONL) session files are read incrementally: each file
+    remembers its inode and byte offset, only appended bytes are parsed,
+    and a bounded tail of messages is kept in memory. Truncation or
+    rotation (smaller size or new inode) restarts from the beginning.
+    Readers whose files are a single JSON document set
+    ``incremental_reads = False`` and are re-parsed only when the file's
+    size or mtime changes.
+
+    ``wait_for_message`` blocks on a shared ``SessionWatcher`` for the home
+    directory (inotify where available) instead of sleeping between polls.
+    """
+
+    # Whether _parse_messages works on any run of complete lines
+    incremental_reads: bool = True
+    # Parsed messages kept per session file
+    tail_limit: int = 1000
+    # Session files tracked per reader
+    max_tracked_sessions: int = 16
+    # Session file suffixes indexed by the home directory watcher
+    watch_suffixes: Tuple[str, ...] = (".jsonl",)
+    # Depth of session files below home_dir (None = anywhere in the tree)
+    watch_file_depth: Optional[int] = None
 
     def __init__(self, provider_name: str, home_dir: Optional[str] = None):
         self.provider = provider_name
         self.home_dir = Path(home_dir or self._default_home()).expanduser()
         self.logger = get_logger(f"providers.{provider_name}")
         self._preferred_session: Optional[str] = None
+        self._tails: "OrderedDict[str, _SessionTail]" = OrderedDict()
+        self._tails_lock = threading.Lock()
 
     @abstractmethod
     def _default_home(self) -> str:
@@ -53,13 +102,95 @@ class BaseCommReader(ABC):
         """Parse provider session content into unified messages."""
 
     def _read_session_messages(self, session_file: Path) -> List[CommMessage]:
+        """Return the (bounded) tail of parsed messages for a session file."""
         try:
-            content = session_file.read_text(encoding="utf-8")
-            return self._parse_messages(content)
+            with self._tails_lock:
+                tail = self._sync_tail(session_file)
+                return list(tail.messages) + self._parse_pending(tail)
         except (RuntimeError, ValueError, TypeError, KeyError, AttributeError, OSError) as exc:
             self.logger.debug("Failed reading session file %s: %s", session_file, exc)
             return []
 
+    def _session_message_count(self, session_file: Path, messages: List[CommMessage]) -> int:
+        """Total messages in a session file, including ones beyond the tail."""
+        with self._tails_lock:
+            tail = self._tails.get(str(session_file))
+            if tail is None:
+                # Reader overrides _read_session_messages; count what it returned
+                return len(messages)
+            return tail.total_count + len(self._parse_pending(tail))
+
+    def _reset_tail(self, session_file: Path) -> _SessionTail:
+        """Forget a session's read position and re-read it from the start."""
+        self._tails.pop(str(session_file), None)
+        return self._sync_tail(session_file)
+
+    def _sync_tail(self, session_file: Path) -> _SessionTail:
+        """Bring a session's tail up to date with the file. Caller holds the lock."""
+        key = str(session_file)
+        stat = session_file.stat()
+        tail = self._tails.get(key)
+
+        rotated = tail is None or stat.st_ino != tail.inode or stat.st_size < tail.offset
+        if not self.incremental_reads and tail is not None and not rotated:
+            rotated = stat.st_size != tail.offset or stat.st_mtime_ns != tail.mtime_ns
+
+        if rotated:
+            tail = _SessionTail(inode=stat.st_ino, messages=deque(maxlen=self.tail_limit))
+            self._tails[key] = tail
+            while len(self._tails) > self.max_tracked_sessions:
+                self._tails.popitem(last=False)
+        self._tails.move_to_end(key)
+
+        if stat.st_size == tail.offset and not rotated:
+            return tail
+
+        with open(session_file, "rb") as handle:
+            if tail.head and handle.read(len(tail.head)) != tail.head:
+                # Replaced in place (same inode, different content)
+                return self._reset_tail(session_file)
+            handle.seek(tail.offset)
+            chunk = handle.read(stat.st_size - tail.offset)
+        if not tail.head:
+            tail.head = chunk[:_HEAD_BYTES]
+        tail.offset += len(chunk)
+        tail.mtime_ns = stat.st_mtime_ns
+
+        if not self.incremental_reads:
+            # Whole-document formats: re-parse the full file on change
+            tail.pending = b""
+            self._append_messages(tail, self._parse_messages(chunk.decode("utf-8", errors="replace")))
+            return tail
+
+        data = tail.pending + chunk
+        cut = data.rfind(b"\n") + 1
+        tail.pending = data[cut:]
+        if cut:
+            self._append_messages(tail, self._parse_messages(data[:cut].decode("utf-8", errors="replace")))
+        return tail
+
+    @staticmethod
+    def _append_messages(tail: _SessionTail, messages: List[CommMessage]) -> None:
+        tail.messages.extend(messages)
+        tail.total_count += len(messages)
+
+    def _parse_pending(self, tail: _SessionTail) -> List[CommMessage]:
+        """Parse an unterminated last line without consuming it."""
+        if not tail.pending.strip():
+            return []
+        return self._parse_messages(tail.pending.decode("utf-8", errors="replace"))
+
+    def _session_watcher(self) -> Optional[SessionWatcher]:
+        """Shared watcher for this reader's home directory, if enabled."""
+        return get_session_watcher(self.home_dir, self.watch_suffixes, self.watch_file_depth)
+
+    def _wait_directories(self, watcher: SessionWatcher) -> List[Path]:
+        """Directories whose appends must wake ``wait_for_message``."""
+        if watcher.backend != "poll":
+            return []  # inotify reports appends anywhere
+        session_file = self._find_session_file()
+        return [session_file.parent] if session_file else []
+
     def project_hash(self, path: str) -> str:
         """Compute stable project hash (SHA256/16)."""
         return hashlib.sha256(path.encode("utf-8")).hexdigest()[:16]
@@ -84,7 +215,7 @@ class BaseCommReader(ABC):
             session_id=session_file.stem,
             last_mtime=stat.st_mtime,
             last_size=stat.st_size,
-            message_count=len(messages),
+            message_count=self._session_message_count(session_file, messages),
         )
 
     def latest_message(self) -> Optional[str]:
@@ -94,12 +225,10 @@ class BaseCommReader(ABC):
             return None
 
         messages = self._read_session_messages(session_file)
-        assistant_messages = [message for message in messages if message.role.lower() == "assistant"]
-        if not assistant_messages:
-            return None
-
-        content = assistant_messages[-1].content.strip()
-        return content or None
+        for message in reversed(messages):
+            if message.role.lower() == "assistant":
+                return message.content.strip() or None
+        return None
 
     def latest_conversations(self, n: int = 5) -> List[CommMessage]:
         """Return the latest n messages."""
@@ -125,14 +254,26 @@ class BaseCommReader(ABC):
         timeout: float = 300.0,
         poll_interval: float = 2.0,
     ) -> Optional[str]:
-        """Wait until a new message arrives or timeout."""
+        """
+        Wait until a new message arrives or timeout.
+
+        Wakes on watcher events; ``poll_interval`` only bounds how long a
+        missed event can delay detection.
+        """
         deadline = time.time() + max(0.0, timeout)
         effective_poll = max(0.02, poll_interval)
+        watcher = self._session_watcher()
 
-        while time.time() < deadline:
+        while True:
+            # Read the generation first so changes during the check still wake us
+            generation = watcher.generation if watcher is not None else 0
             new_message = self.try_get_message(state)
             if new_message:
                 return new_message
-            time.sleep(effective_poll)
-
-        return None
+            remaining = deadline - time.time()
+            if remaining <= 0:
+                return None
+            if watcher is not None:
+                watcher.wait(generation, min(effective_poll, remaining), self._wait_directories(watcher))
+            else:
+                time.sleep(min(effective_poll, remaining))
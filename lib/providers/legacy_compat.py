@@ -116,10 +116,12 @@ class LegacyLogReaderAdapter:
             except OSError:
                 offset = 0
 
+        # ``messages`` is only the bounded tail; compare against the full count
+        count = self._reader._session_message_count(session_file, messages) if session_file else 0
         state: Dict[str, Any] = {
             self._path_key: session_file,
-            self._count_key: len(messages),
-            "message_count": len(messages),
+            self._count_key: count,
+            "message_count": count,
             "offset": offset,
             "session_path": session_file,
             "session_id": session_file.stem if session_file else None,
@@ -2,13 +2,15 @@
 Rate Limiting System for CCB
 
 Provides per-provider rate limiting with Token Bucket and Sliding Window algorithms.
-Uses SQLite for persistent state storage.
+Uses SQLite for persistent state storage, written in batches.
 """
 from __future__ import annotations
 
+import asyncio
 import sqlite3
 import time
 import threading
+import weakref
 from dataclasses import dataclass, field
 from enum import Enum
 from pathlib import Path
@@ -56,11 +58,40 @@ class TokenBucketState:
     refill_rate: float  # tokens per second
 
 
+class _ProviderBucket:
+    """A provider's token bucket plus request counters not yet persisted."""
+
+    __slots__ = ("state", "lock", "counters", "dirty", "last_request_at")
+
+    def __init__(self, state: TokenBucketState):
+        self.state = state
+        self.lock = threading.Lock()
+        # epoch second -> [requests, tokens, limited]
+        self.counters: Dict[int, List[int]] = {}
+        self.dirty = False
+        self.last_request_at: Optional[float] = None
+
+    def count(self, tokens: int, was_limited: bool) -> None:
+        """Account one request (lock held)."""
+        now = time.time()
+        counter = self.counters.get(int(now))
+        if counter is None:
+            counter = self.counters[int(now)] = [0, 0, 0]
+        counter[0] += 1
+        counter[1] += tokens
+        counter[2] += int(was_limited)
+        self.last_request_at = now
+
+
 class RateLimiter:
     """
     Rate limiter with support for multiple providers and algorithms.
 
-    Uses SQLite for persistent state storage across restarts.
+    Each provider has its own bucket and lock, so acquisitions for
+    different providers never wait on each other, and blocking waits sleep
+    without holding any lock. Bucket state and per-second request counters
+    are kept in memory and written to SQLite in batches by a background
+    flusher every ``flush_interval_s`` seconds.
     """
 
     # Default rate limits per provider
@@ -80,6 +111,7 @@ class RateLimiter:
         self,
         db_path: Optional[str] = None,
         config: Optional[Dict[str, RateLimitConfig]] = None,
+        flush_interval_s: float = 1.0,
     ):
         """
         Initialize the rate limiter.
@@ -87,28 +119,50 @@ class RateLimiter:
         Args:
             db_path: Path to SQLite database for persistent state
             config: Optional custom rate limit configurations
+            flush_interval_s: Period of the background state/counter flush
         """
         if db_path is None:
             db_path = str(Path.home() / ".ccb_config" / "ratelimit.db")
 
         self.db_path = db_path
+        self.flush_interval_s = flush_interval_s
         self.configs: Dict[str, RateLimitConfig] = {**self.DEFAULT_LIMITS}
         if config:
             self.configs.update(config)
 
-        # In-memory state for token buckets
-        self._buckets: Dict[str, TokenBucketState] = {}
-        self._lock = threading.RLock()  # Use RLock to allow reentrant locking
+        # In-memory state for token buckets; the lock only guards creation
+        self._buckets: Dict[str, _ProviderBucket] = {}
+        self._lock = threading.RLock()
+
+        # One long-lived connection, shared by the flusher and admin calls
+        self._db_lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+        self._stop = threading.Event()
 
         # Initialize database
         self._init_db()
         self._load_state()
 
+        self._flusher = threading.Thread(
+            target=_flush_loop,
+            args=(weakref.ref(self), self._stop, flush_interval_s),
+            name="rate-limiter-flush",
+            daemon=True,
+        )
+        self._flusher.start()
+
+    def _connect(self) -> sqlite3.Connection:
+        """Shared connection (call with ``_db_lock`` held)."""
+        if self._conn is None:
+            self._conn = sqlite3.connect(self.db_path, check_same_thread=False)
+        return self._conn
+
     def _init_db(self) -> None:
         """Initialize the SQLite database."""
         Path(self.db_path).parent.mkdir(parents=True, exist_ok=True)
 
-        with sqlite3.connect(self.db_path) as conn:
+        with self._db_lock:
+            conn = self._connect()
             conn.execute("""
                 CREATE TABLE IF NOT EXISTS rate_limit_state (
                     provider TEXT PRIMARY KEY,
@@ -119,21 +173,18 @@ class RateLimiter:
                 )
             """)
 
+            # Requests aggregated per provider and second
             conn.execute("""
-                CREATE TABLE IF NOT EXISTS rate_limit_requests (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                CREATE TABLE IF NOT EXISTS rate_limit_counters (
                     provider TEXT NOT NULL,
-                    timestamp REAL NOT NULL,
-                    tokens_used INTEGER DEFAULT 1,
-                    was_limited INTEGER DEFAULT 0
+                    second INTEGER NOT NULL,
+                    requests INTEGER NOT NULL DEFAULT 0,
+                    tokens_used INTEGER NOT NULL DEFAULT 0,
+                    limited INTEGER NOT NULL DEFAULT 0,
+                    PRIMARY KEY (provider, second)
                 )
             """)
 
-            conn.execute("""
-                CREATE INDEX IF NOT EXISTS idx_requests_provider_time
-                ON rate_limit_requests(provider, timestamp)
-            """)
-
             conn.execute("""
                 CREATE TABLE IF NOT EXISTS rate_limit_config (
                     provider TEXT PRIMARY KEY,
@@ -149,19 +200,20 @@ class RateLimiter:
 
     def _load_state(self) -> None:
         """Load state from database."""
-        with sqlite3.connect(self.db_path) as conn:
+        with self._db_lock:
+            conn = self._connect()
             # Load bucket states
             cursor = conn.execute(
                 "SELECT provider, tokens, last_update, max_tokens, refill_rate FROM rate_limit_state"
             )
             for row in cursor:
                 provider, tokens, last_update, max_tokens, refill_rate = row
-                self._buckets[provider] = TokenBucketState(
+                self._buckets[provider] = _ProviderBucket(TokenBucketState(
                     tokens=tokens,
                     last_update=last_update,
                     max_tokens=max_tokens,
                     refill_rate=refill_rate,
-                )
+                ))
 
             # Load custom configs
             cursor = conn.execute(
@@ -177,29 +229,25 @@ class RateLimiter:
                     enabled=bool(enabled),
                 )
 
-    def _save_bucket_state(self, provider: str, state: TokenBucketState) -> None:
-        """Save bucket state to database."""
-        with sqlite3.connect(self.db_path) as conn:
-            conn.execute("""
-                INSERT OR REPLACE INTO rate_limit_state
-                (provider, tokens, last_update, max_tokens, refill_rate)
-                VALUES (?, ?, ?, ?, ?)
-            """, (provider, state.tokens, state.last_update, state.max_tokens, state.refill_rate))
-            conn.commit()
-
-    def _get_or_create_bucket(self, provider: str) -> TokenBucketState:
+    def _new_bucket_state(self, provider: str) -> TokenBucketState:
+        config = self.configs.get(provider, RateLimitConfig())
+        # refill_rate = rpm / 60 (tokens per second)
+        return TokenBucketState(
+            tokens=float(config.burst_size),
+            last_update=time.time(),
+            max_tokens=float(config.burst_size),
+            refill_rate=config.rpm / 60.0,
+        )
+
+    def _get_or_create_bucket(self, provider: str) -> _ProviderBucket:
         """Get or create a token bucket for a provider."""
-        if provider not in self._buckets:
-            config = self.configs.get(provider, RateLimitConfig())
-            # refill_rate = rpm / 60 (tokens per second)
-            refill_rate = config.rpm / 60.0
-            self._buckets[provider] = TokenBucketState(
-                tokens=float(config.burst_size),
-                last_update=time.time(),
-                max_tokens=float(config.burst_size),
-                refill_rate=refill_rate,
-            )
-        return self._buckets[provider]
+        bucket = self._buckets.get(provider)
+        if bucket is None:
+            with self._lock:
+                bucket = self._buckets.get(provider)
+                if bucket is None:
+                    bucket = self._buckets[provider] = _ProviderBucket(self._new_bucket_state(provider))
+        return bucket
 
     def _refill_bucket(self, bucket: TokenBucketState) -> None:
         """Refill tokens based on elapsed time."""
@@ -209,6 +257,35 @@ class RateLimiter:
         bucket.tokens = min(bucket.max_tokens, bucket.tokens + tokens_to_add)
         bucket.last_update = now
 
+    @staticmethod
+    def _wait_for(state: TokenBucketState, tokens: int) -> float:
+        """Seconds until ``tokens`` are available (bucket refilled)."""
+        if state.tokens >= tokens:
+            return 0.0
+        if state.refill_rate <= 0:
+            return float("inf")
+        return (tokens - state.tokens) / state.refill_rate
+
+    def _try_acquire(self, bucket: _ProviderBucket, tokens: int) -> float:
+        """
+        Take ``tokens`` if available.
+
+        Returns:
+            0.0 if acquired, otherwise the seconds until they would be
+        """
+        with bucket.lock:
+            self._refill_bucket(bucket.state)
+            wait = self._wait_for(bucket.state, tokens)
+            if wait == 0.0:
+                bucket.state.tokens -= tokens
+                bucket.dirty = True
+                bucket.count(tokens, was_limited=False)
+            return wait
+
+    def _record_limited(self, bucket: _ProviderBucket, tokens: int) -> None:
+        with bucket.lock:
+            bucket.count(tokens, was_limited=True)
+
     def acquire(
         self,
         provider: str,
@@ -234,50 +311,51 @@ class RateLimiter:
         if not config.enabled:
             return True
 
-        with self._lock:
-            bucket = self._get_or_create_bucket(provider)
-            self._refill_bucket(bucket)
-
-            start_time = time.time()
-
-            while True:
-                if bucket.tokens >= tokens:
-                    bucket.tokens -= tokens
-                    self._save_bucket_state(provider, bucket)
-                    self._record_request(provider, tokens, was_limited=False)
-                    return True
-
-                if not block:
-                    self._record_request(provider, tokens, was_limited=True)
-                    return False
-
-                # Calculate wait time
-                tokens_needed = tokens - bucket.tokens
-                wait_time = tokens_needed / bucket.refill_rate
+        bucket = self._get_or_create_bucket(provider)
+        deadline = time.time() + timeout_s
+        while True:
+            wait_time = self._try_acquire(bucket, tokens)
+            if wait_time == 0.0:
+                return True
+            if not block or time.time() + wait_time > deadline:
+                self._record_limited(bucket, tokens)
+                return False
+            # Sleep without holding the bucket lock, then retry
+            time.sleep(min(wait_time, 0.1))
+
+    async def acquire_async(
+        self,
+        provider: str,
+        tokens: int = 1,
+        block: bool = True,
+        timeout_s: float = 30.0,
+    ) -> bool:
+        """
+        Asyncio counterpart of ``acquire`` that waits without blocking the loop.
 
-                # Check timeout
-                elapsed = time.time() - start_time
-                if elapsed + wait_time > timeout_s:
-                    self._record_request(provider, tokens, was_limited=True)
-                    return False
+        Args:
+            provider: The provider to acquire tokens for
+            tokens: Number of tokens to acquire (default: 1)
+            block: If True, wait until tokens are available
+            timeout_s: Maximum time to wait if blocking
 
-                # Wait and refill
-                time.sleep(min(wait_time, 0.1))
-                self._refill_bucket(bucket)
+        Returns:
+            True if tokens were acquired, False if rate limited
+        """
+        config = self.configs.get(provider, RateLimitConfig())
+        if not config.enabled:
+            return True
 
-    def _record_request(
-        self,
-        provider: str,
-        tokens: int,
-        was_limited: bool,
-    ) -> None:
-        """Record a request in the database."""
-        with sqlite3.connect(self.db_path) as conn:
-            conn.execute("""
-                INSERT INTO rate_limit_requests (provider, timestamp, tokens_used, was_limited)
-                VALUES (?, ?, ?, ?)
-            """, (provider, time.time(), tokens, int(was_limited)))
-            conn.commit()
+        bucket = self._get_or_create_bucket(provider)
+        deadline = time.time() + timeout_s
+        while True:
+            wait_time = self._try_acquire(bucket, tokens)
+            if wait_time == 0.0:
+                return True
+            if not block or time.time() + wait_time > deadline:
+                self._record_limited(bucket, tokens)
+                return False
+            await asyncio.sleep(wait_time)
 
     def get_wait_time(self, provider: str, tokens: int = 1) -> float:
         """
@@ -294,15 +372,10 @@ class RateLimiter:
         if not config.enabled:
             return 0.0
 
-        with self._lock:
-            bucket = self._get_or_create_bucket(provider)
-            self._refill_bucket(bucket)
-
-            if bucket.tokens >= tokens:
-                return 0.0
-
-            tokens_needed = tokens - bucket.tokens
-            return tokens_needed / bucket.refill_rate
+        bucket = self._get_or_create_bucket(provider)
+        with bucket.lock:
+            self._refill_bucket(bucket.state)
+            return self._wait_for(bucket.state, tokens)
 
     def reset(self, provider: str) -> None:
         """
@@ -311,23 +384,63 @@ class RateLimiter:
         Args:
             provider: The provider to reset
         """
-        with self._lock:
-            config = self.configs.get(provider, RateLimitConfig())
-            refill_rate = config.rpm / 60.0
-
-            self._buckets[provider] = TokenBucketState(
-                tokens=float(config.burst_size),
-                last_update=time.time(),
-                max_tokens=float(config.burst_size),
-                refill_rate=refill_rate,
-            )
-            self._save_bucket_state(provider, self._buckets[provider])
+        bucket = self._get_or_create_bucket(provider)
+        with bucket.lock:
+            bucket.state = self._new_bucket_state(provider)
+            bucket.dirty = True
+        self.flush()
 
     def reset_all(self) -> None:
         """Reset rate limit state for all providers."""
         for provider in self.configs:
             self.reset(provider)
 
+    def flush(self) -> None:
+        """Write dirty bucket states and pending request counters to SQLite."""
+        states = []
+        counters = []
+        for provider, bucket in list(self._buckets.items()):
+            with bucket.lock:
+                if bucket.dirty:
+                    state = bucket.state
+                    states.append((provider, state.tokens, state.last_update, state.max_tokens, state.refill_rate))
+                    bucket.dirty = False
+                if bucket.counters:
+                    pending, bucket.counters = bucket.counters, {}
+                    counters.extend(
+                        (provider, second, c[0], c[1], c[2]) for second, c in pending.items()
+                    )
+        if not states and not counters:
+            return
+
+        with self._db_lock:
+            conn = self._connect()
+            if states:
+                conn.executemany("""
+                    INSERT OR REPLACE INTO rate_limit_state
+                    (provider, tokens, last_update, max_tokens, refill_rate)
+                    VALUES (?, ?, ?, ?, ?)
+                """, states)
+            if counters:
+                conn.executemany("""
+                    INSERT INTO rate_limit_counters (provider, second, requests, tokens_used, limited)
+                    VALUES (?, ?, ?, ?, ?)
+                    ON CONFLICT(provider, second) DO UPDATE SET
+                        requests = requests + excluded.requests,
+                        tokens_used = tokens_used + excluded.tokens_used,
+                        limited = limited + excluded.limited
+                """, counters)
+            conn.commit()
+
+    def close(self) -> None:
+        """Stop the background flusher, flush, and close the connection."""
+        self._stop.set()
+        self.flush()
+        with self._db_lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
     def get_stats(self, provider: str) -> RateLimitStats:
         """
         Get rate limit statistics for a provider.
@@ -339,49 +452,51 @@ class RateLimiter:
             RateLimitStats with current state
         """
         config = self.configs.get(provider, RateLimitConfig())
-
-        with self._lock:
-            bucket = self._get_or_create_bucket(provider)
-            self._refill_bucket(bucket)
-
-            # Get request counts from last minute
-            with sqlite3.connect(self.db_path) as conn:
-                one_minute_ago = time.time() - 60
-
-                cursor = conn.execute("""
-                    SELECT COUNT(*), SUM(tokens_used), SUM(was_limited)
-                    FROM rate_limit_requests
-                    WHERE provider = ? AND timestamp > ?
-                """, (provider, one_minute_ago))
-                row = cursor.fetchone()
-                current_rpm = row[0] or 0
-                current_tpm = row[1] or 0
-                total_limited = row[2] or 0
-
-                cursor = conn.execute("""
-                    SELECT COUNT(*), MAX(timestamp)
-                    FROM rate_limit_requests
-                    WHERE provider = ?
-                """, (provider,))
-                row = cursor.fetchone()
-                total_requests = row[0] or 0
-                last_request_at = row[1]
-
-            wait_time = self.get_wait_time(provider)
-
-            return RateLimitStats(
-                provider=provider,
-                current_rpm=current_rpm,
-                current_tpm=current_tpm,
-                limit_rpm=config.rpm,
-                limit_tpm=config.tpm,
-                available_tokens=bucket.tokens,
-                is_limited=bucket.tokens < 1,
-                wait_time_s=wait_time,
-                total_requests=total_requests,
-                total_limited=total_limited,
-                last_request_at=last_request_at,
-            )
+        bucket = self._get_or_create_bucket(provider)
+        self.flush()
+
+        # Get request counts from last minute
+        with self._db_lock:
+            conn = self._connect()
+            one_minute_ago = int(time.time()) - 60
+
+            cursor = conn.execute("""
+                SELECT SUM(requests), SUM(tokens_used), SUM(limited)
+                FROM rate_limit_counters
+                WHERE provider = ? AND second > ?
+            """, (provider, one_minute_ago))
+            row = cursor.fetchone()
+            current_rpm = row[0] or 0
+            current_tpm = row[1] or 0
+            total_limited = row[2] or 0
+
+            cursor = conn.execute("""
+                SELECT SUM(requests), MAX(second)
+                FROM rate_limit_counters
+                WHERE provider = ?
+            """, (provider,))
+            row = cursor.fetchone()
+            total_requests = row[0] or 0
+            last_request_at = bucket.last_request_at or row[1]
+
+        with bucket.lock:
+            self._refill_bucket(bucket.state)
+            available_tokens = bucket.state.tokens
+        wait_time = self.get_wait_time(provider)
+
+        return RateLimitStats(
+            provider=provider,
+            current_rpm=current_rpm,
+            current_tpm=current_tpm,
+            limit_rpm=config.rpm,
+            limit_tpm=config.tpm,
+            available_tokens=available_tokens,
+            is_limited=available_tokens < 1,
+            wait_time_s=wait_time,
+            total_requests=total_requests,
+            total_limited=total_limited,
+            last_request_at=last_request_at,
+        )
 
     def get_all_stats(self) -> List[RateLimitStats]:
         """Get rate limit statistics for all providers."""
@@ -419,7 +534,8 @@ class RateLimiter:
         self.configs[provider] = config
 
         # Save to database
-        with sqlite3.connect(self.db_path) as conn:
+        with self._db_lock:
+            conn = self._connect()
             conn.execute("""
                 INSERT OR REPLACE INTO rate_limit_config
                 (provider, rpm, tpm, burst_size, algorithm, enabled)
@@ -447,17 +563,32 @@ class RateLimiter:
         Returns:
             Number of records deleted
         """
-        cutoff = time.time() - (hours * 3600)
+        cutoff = int(time.time() - (hours * 3600))
+        self.flush()
 
-        with sqlite3.connect(self.db_path) as conn:
+        with self._db_lock:
+            conn = self._connect()
             cursor = conn.execute(
-                "DELETE FROM rate_limit_requests WHERE timestamp < ?",
+                "DELETE FROM rate_limit_counters WHERE second < ?",
                 (cutoff,)
             )
             conn.commit()
             return cursor.rowcount
 
 
+def _flush_loop(limiter_ref: "weakref.ref[RateLimiter]", stop: threading.Event, interval: float) -> None:
+    """Periodically flush a limiter until it is closed or garbage collected."""
+    while not stop.wait(interval):
+        limiter = limiter_ref()
+        if limiter is None:
+            return
+        try:
+            limiter.flush()
+        except sqlite3.Error:
+            pass  # Only accounting is lost; limiting itself is in memory
+        del limiter
+
+
 # Singleton instance
 _rate_limiter: Optional[RateLimiter] = None
 
@@ -132,11 +132,12 @@ class SkillsDiscoveryCoreMixin:
             logger.exception("Error scanning local skills: %s", e)
             return []
 
-    def search_remote_skills(self, keywords: List[str]) -> List[Dict]:
+    def search_remote_skills(self, keywords: List[str], timeout_s: float = 30.0) -> List[Dict]:
         """Search remote skills using Vercel Skills CLI (npx skills find)
 
         Args:
             keywords: List of search keywords
+            timeout_s: Seconds before the npx search is killed
 
         Returns:
             List of skill metadata dictionaries
@@ -153,7 +154,7 @@ class SkillsDiscoveryCoreMixin:
                 ["npx", "skills", "find", query, "--no-color"],
                 capture_output=True,
                 text=True,
-                timeout=30,
+                timeout=timeout_s,
                 env={**os.environ, "NO_COLOR": "1"}  # Force no color
             )
 
@@ -218,13 +219,20 @@ class SkillsDiscoveryCoreMixin:
             logger.exception("Error searching remote skills: %s", e)
             return []
 
-    def match_skills(self, task_description: str, top_k: int = 5, search_remote: bool = True) -> List[Dict]:
+    def match_skills(
+        self,
+        task_description: str,
+        top_k: int = 5,
+        search_remote: bool = True,
+        remote_timeout_s: float = 30.0,
+    ) -> List[Dict]:
         """Match skills based on task description
 
         Args:
             task_description: User's task description
             top_k: Number of top skills to return
             search_remote: Whether to search remote skills via npx skills find
+            remote_timeout_s: Time limit for the remote search
 
         Returns:
             List of matched skill dictionaries with relevance scores
@@ -244,7 +252,7 @@ class SkillsDiscoveryCoreMixin:
         # Optionally search remote skills
         remote_skills = []
         if search_remote and keywords:
-            remote_skills = self.search_remote_skills(keywords)
+            remote_skills = self.search_remote_skills(keywords, timeout_s=remote_timeout_s)
 
             # Cache remote skills for future use
             if remote_skills:
@@ -164,17 +164,25 @@ class SkillsDiscoveryStatsMixin:
         finally:
             conn.close()
 
-    def get_recommendations(self, task_description: str, auto_install: bool = False) -> Dict:
+    def get_recommendations(
+        self,
+        task_description: str,
+        auto_install: bool = False,
+        remote_timeout_s: float = 30.0,
+    ) -> Dict:
         """Get skill recommendations with installation instructions
 
         Args:
             task_description: User's task description
             auto_install: Whether to automatically install recommended remote skills
+            remote_timeout_s: Time limit for the remote skills search
 
         Returns:
             Dictionary with recommendations and installation info
         """
-        matched_skills = self.match_skills(task_description, top_k=3, search_remote=True)
+        matched_skills = self.match_skills(
+            task_description, top_k=3, search_remote=True, remote_timeout_s=remote_timeout_s
+        )
 
         recommendations = {
             'found': len(matched_skills) > 0,
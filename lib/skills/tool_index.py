@@ -9,8 +9,10 @@ from typing import Any, Dict, List, Optional
 
 try:
     from lib.common.logging import get_logger
+    from lib.keyword_matcher import KeywordMatcher
 except ImportError:  # pragma: no cover - script mode fallback
     from common.logging import get_logger  # type: ignore
+    from keyword_matcher import KeywordMatcher  # type: ignore
 
 logger = get_logger("skills.tool_index")
 
@@ -36,6 +38,8 @@ ZH_EN_KEYWORDS = {
     "笔记": ["notes", "notebook", "obsidian"],
 }
 
+_ZH_EN_MATCHER = KeywordMatcher((zh_word, zh_word) for zh_word in ZH_EN_KEYWORDS)
+
 
 class ToolIndex:
     """Unified index for discovering tools across all sources."""
@@ -44,6 +48,8 @@ class ToolIndex:
         self._path = Path(index_path) if index_path else INDEX_PATH
         self._entries: List[Dict[str, Any]] = []
         self._built_at: Optional[str] = None
+        # Every entry's triggers and keywords; rebuilt when entries change
+        self._term_matcher: Optional[KeywordMatcher] = None
         self._load()
 
     def _load(self) -> None:
@@ -59,6 +65,7 @@ class ToolIndex:
             entries = payload.get("entries", []) if isinstance(payload, dict) else []
             if isinstance(entries, list):
                 self._entries = [entry for entry in entries if isinstance(entry, dict)]
+                self._term_matcher = None
             self._built_at = payload.get("built_at") if isinstance(payload, dict) else None
         except (json.JSONDecodeError, OSError, TypeError, ValueError):
             logger.warning("Failed to load tool index at %s", self._path, exc_info=True)
@@ -93,6 +100,7 @@ class ToolIndex:
 
     def set_entries(self, entries: List[Dict[str, Any]]) -> None:
         self._entries = [entry for entry in entries if isinstance(entry, dict)]
+        self._term_matcher = None
         self.save()
 
     def add_entry(self, entry: Dict[str, Any]) -> None:
@@ -101,6 +109,7 @@ class ToolIndex:
             return
         self._entries = [existing for existing in self._entries if existing.get("id") != entry_id]
         self._entries.append(entry)
+        self._term_matcher = None
 
     def get_entry(self, entry_id: str) -> Optional[Dict[str, Any]]:
         for entry in self._entries:
@@ -111,6 +120,16 @@ class ToolIndex:
     def list_entries(self) -> List[Dict[str, Any]]:
         return list(self._entries)
 
+    def _terms(self) -> KeywordMatcher:
+        if self._term_matcher is None:
+            matcher = KeywordMatcher()
+            for entry in self._entries:
+                for item in [*entry.get("triggers", []), *entry.get("keywords", [])]:
+                    if item:
+                        matcher.add(str(item))
+            self._term_matcher = matcher
+        return self._term_matcher
+
     def search(
         self,
         query: str,
@@ -125,9 +144,11 @@ class ToolIndex:
         query_words = {word for word in re.split(r"[\s,;/]+", query_lower) if word}
         expanded_words = set(query_words)
 
-        for zh_word, en_words in ZH_EN_KEYWORDS.items():
-            if zh_word in query_lower:
-                expanded_words.update(en_words)
+        for zh_word in _ZH_EN_MATCHER.matches(query_lower):
+            expanded_words.update(ZH_EN_KEYWORDS[zh_word])
+
+        # Triggers and keywords of all entries that occur in the query
+        present_terms = self._terms().contained(query_lower)
 
         allowed_types = {item.strip() for item in types} if types else None
         results: List[Dict[str, Any]] = []
@@ -143,6 +164,7 @@ class ToolIndex:
                 query_lower=query_lower,
                 query_words=query_words,
                 expanded_words=expanded_words,
+                present_terms=present_terms,
             )
             if score > 0:
                 results.append({**entry, "_score": round(score, 4)})
@@ -157,6 +179,7 @@ class ToolIndex:
         query_lower: str,
         query_words: set[str],
         expanded_words: set[str],
+        present_terms: set[str],
     ) -> float:
         score = 0.0
 
@@ -166,7 +189,7 @@ class ToolIndex:
         triggers = [str(item).lower() for item in entry.get("triggers", []) if item]
 
         for trigger in triggers:
-            if trigger and (trigger in query_lower or query_lower in trigger):
+            if trigger and (trigger in present_terms or query_lower in trigger):
                 score += 3.0
                 break
 
@@ -174,7 +197,7 @@ class ToolIndex:
         for keyword in keywords:
             if keyword in expanded_words:
                 keyword_matches += 1
-            elif keyword and keyword in query_lower:
+            elif keyword and keyword in present_terms:
                 keyword_matches += 1
             elif any(word in keyword for word in expanded_words if len(word) >= 2):
                 keyword_matches += 1
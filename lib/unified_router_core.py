@@ -43,6 +43,11 @@ except ImportError:  # pragma: no cover - script mode
         _warn,
     )
 
+try:
+    from .keyword_matcher import KeywordMatcher
+except ImportError:  # pragma: no cover - script mode
+    from keyword_matcher import KeywordMatcher
+
 
 class UnifiedRouterCoreMixin:
     """Mixin methods extracted from UnifiedRouter."""
@@ -59,6 +64,10 @@ class UnifiedRouterCoreMixin:
         self.custom_rules: List[RoutingRule] = []
         self._provider_health: Dict[str, ProviderHealth] = {}
         self._rate_limiter = rate_limiter
+        # Compiled keyword matchers, rebuilt lazily after config loads
+        self._rule_matcher: Optional[KeywordMatcher] = None
+        self._task_matcher: Optional[KeywordMatcher] = None
+        self._magic_matcher: Optional[KeywordMatcher] = None
 
         if config_path:
             self._load_config(config_path)
@@ -87,6 +96,8 @@ class UnifiedRouterCoreMixin:
 
             # Sort by priority (higher first)
             self.custom_rules.sort(key=lambda r: r.priority, reverse=True)
+            self._rule_matcher = None
+            self._magic_matcher = None
         except HANDLED_EXCEPTIONS as e:
             _warn(f"Warning: Failed to load config from {config_path}: {e}")
 
@@ -186,26 +197,18 @@ class UnifiedRouterCoreMixin:
         files: Optional[List[str]] = None,
     ) -> Optional[RoutingDecision]:
         """Check if any custom routing rules match."""
-        msg_lower = message.lower()
-        # Split message into words for whole-word matching
-        import re
-        words = set(re.findall(r'\b\w+\b', msg_lower))
-
-        for rule in self.custom_rules:
-            # Check keyword match - use word boundary matching for short keywords
-            keyword_match = False
-            for kw in rule.keywords:
-                kw_lower = kw.lower()
-                # For short keywords (<=3 chars), require whole word match
-                # For longer keywords, allow substring match
-                if len(kw_lower) <= 3:
-                    if kw_lower in words:
-                        keyword_match = True
-                        break
-                else:
-                    if kw_lower in msg_lower:
-                        keyword_match = True
-                        break
+        if self._rule_matcher is None:
+            matcher = KeywordMatcher()
+            for index, rule in enumerate(self.custom_rules):
+                for kw in rule.keywords:
+                    # Short keywords (<=3 chars) need a whole-word match,
+                    # longer ones may match as a substring
+                    matcher.add(kw, index, whole_word=len(kw) <= 3)
+            self._rule_matcher = matcher
+        hits = self._rule_matcher.matches(message)
+
+        for index, rule in enumerate(self.custom_rules):
+            keyword_match = index in hits
 
             # Check file pattern match
             pattern_match = False
@@ -246,15 +249,17 @@ class UnifiedRouterCoreMixin:
 
     def _infer_task_type(self, message: str) -> TaskType:
         """Infer the task type from the message content."""
-        msg_lower = message.lower()
+        if self._task_matcher is None:
+            self._task_matcher = KeywordMatcher(
+                (keyword, task_type)
+                for task_type, keywords in self.TASK_KEYWORDS.items()
+                for keyword in keywords
+            )
 
         # Score each task type
         scores: Dict[TaskType, int] = {t: 0 for t in TaskType}
-
-        for task_type, keywords in self.TASK_KEYWORDS.items():
-            for keyword in keywords:
-                if keyword.lower() in msg_lower:
-                    scores[task_type] += 1
+        for task_type, keywords in self._task_matcher.matches(message).items():
+            scores[task_type] += len(keywords)
 
         # Find the highest scoring task type
         best_type = max(scores, key=lambda t: scores[t])
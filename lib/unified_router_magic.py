@@ -43,6 +43,11 @@ except ImportError:  # pragma: no cover - script mode
         _warn,
     )
 
+try:
+    from .keyword_matcher import KeywordMatcher
+except ImportError:  # pragma: no cover - script mode
+    from keyword_matcher import KeywordMatcher
+
 
 class UnifiedRouterMagicMixin:
     """Mixin methods extracted from UnifiedRouter."""
@@ -57,36 +62,31 @@ class UnifiedRouterMagicMixin:
         Returns:
             MagicKeywordMatch if a keyword is found, None otherwise
         """
-        msg_lower = message.lower()
-
-        # Check configured magic keywords first
         magic_config = self.config.get("magic_keywords", {})
-        if magic_config.get("enabled", True):
-            for kw_config in magic_config.get("keywords", []):
-                keyword = kw_config.get("keyword", "")
-                if keyword and keyword.lower() in msg_lower:
-                    return MagicKeywordMatch(
-                        keyword=keyword,
-                        action=kw_config.get("action", ""),
-                        provider=kw_config.get("provider"),
-                        providers=kw_config.get("providers"),
-                        features=kw_config.get("features"),
-                        description=kw_config.get("description", ""),
-                    )
-
-        # Fall back to built-in magic keywords
-        for keyword, config in self.MAGIC_KEYWORDS.items():
-            if keyword.lower() in msg_lower:
-                return MagicKeywordMatch(
-                    keyword=keyword,
-                    action=config.get("action", ""),
-                    provider=config.get("provider"),
-                    providers=config.get("providers"),
-                    features=config.get("features"),
-                    description=config.get("description", ""),
-                )
-
-        return None
+        configured = magic_config.get("keywords", []) if magic_config.get("enabled", True) else []
+        if self._magic_matcher is None:
+            # Configured keywords are registered first so they win over built-ins
+            matcher = KeywordMatcher()
+            for index, kw_config in enumerate(configured):
+                matcher.add(kw_config.get("keyword", ""), ("config", index))
+            for keyword in self.MAGIC_KEYWORDS:
+                matcher.add(keyword, ("builtin", keyword))
+            self._magic_matcher = matcher
+
+        hits = self._magic_matcher.matches(message)
+        if not hits:
+            return None
+
+        (source, key), keywords = next(iter(hits.items()))
+        config = configured[key] if source == "config" else self.MAGIC_KEYWORDS[key]
+        return MagicKeywordMatch(
+            keyword=keywords[0],
+            action=config.get("action", ""),
+            provider=config.get("provider"),
+            providers=config.get("providers"),
+            features=config.get("features"),
+            description=config.get("description", ""),
+        )
 
     def _handle_magic_keyword(
         self,
@@ -0,0 +1,137 @@
+"""Tests for the APIKeyStore validation cache and deferred last_used_at writes."""
+
+from __future__ import annotations
+
+import time
+
+import pytest
+
+from gateway.auth import APIKeyStore
+
+
+@pytest.fixture
+def key_store(store, monkeypatch):
+    key_store = APIKeyStore(store, cache_ttl_s=60.0, flush_interval_s=3600.0)
+    key_store.db_reads = 0
+    original = key_store._load_enabled_key
+
+    def load_enabled_key(key_hash):
+        key_store.db_reads += 1
+        return original(key_hash)
+
+    monkeypatch.setattr(key_store, "_load_enabled_key", load_enabled_key)
+    return key_store
+
+
+def _stored_last_used(key_store: APIKeyStore, key_id: str):
+    with key_store.store._get_connection() as conn:
+        return conn.execute(
+            "SELECT last_used_at FROM api_keys WHERE key_id = ?", (key_id,)
+        ).fetchone()[0]
+
+
+def test_repeated_validation_is_served_from_cache(key_store):
+    api_key, raw_key = key_store.create_key("ci")
+
+    results = [key_store.validate_key(raw_key) for _ in range(5)]
+
+    assert [r.key_id for r in results] == [api_key.key_id] * 5
+    assert key_store.db_reads == 1
+    assert key_store.cache_stats()["hits"] == 4
+    # Callers get copies, so mutating one does not leak into the cache
+    results[0].name = "changed"
+    assert key_store.validate_key(raw_key).name == "ci"
+
+
+def test_rejections_are_cached(key_store):
+    assert key_store.validate_key("ccb_unknown") is None
+    assert key_store.validate_key("ccb_unknown") is None
+    assert key_store.db_reads == 1
+    assert key_store.get_cached_key("ccb_unknown") is None
+
+
+@pytest.mark.parametrize("mutation", ["delete_key", "disable_key"])
+def test_revoking_a_key_takes_effect_immediately(key_store, mutation):
+    api_key, raw_key = key_store.create_key("ci")
+    other, other_raw = key_store.create_key("other")
+    assert key_store.validate_key(raw_key) is not None
+    assert key_store.validate_key(other_raw) is not None
+
+    assert getattr(key_store, mutation)(api_key.key_id)
+
+    assert key_store.get_cached_key(raw_key) is None
+    assert key_store.validate_key(raw_key) is None
+    # Only the revoked key was dropped from the cache
+    assert key_store.get_cached_key(other_raw).key_id == other.key_id
+
+
+def test_reenabled_key_is_not_stuck_behind_a_cached_rejection(key_store):
+    api_key, raw_key = key_store.create_key("ci")
+    key_store.disable_key(api_key.key_id)
+    assert key_store.validate_key(raw_key) is None
+
+    assert key_store.enable_key(api_key.key_id)
+
+    assert key_store.validate_key(raw_key).key_id == api_key.key_id
+
+
+def test_cache_entries_expire_after_ttl(store):
+    key_store = APIKeyStore(store, cache_ttl_s=0.05, flush_interval_s=3600.0)
+    api_key, raw_key = key_store.create_key("ci")
+    key_store.validate_key(raw_key)
+    assert key_store.get_cached_key(raw_key) is not None
+
+    time.sleep(0.1)
+
+    assert key_store.get_cached_key(raw_key) is None
+    key_store.validate_key(raw_key)
+    assert key_store.cache_stats()["misses"] == 2
+
+
+def test_cache_is_bounded_lru(store):
+    key_store = APIKeyStore(store, max_cached_keys=2, flush_interval_s=3600.0)
+    raws = [key_store.create_key(name)[1] for name in ("a", "b", "c")]
+    for raw_key in raws:
+        key_store.validate_key(raw_key)
+
+    assert key_store.cache_stats()["cached_keys"] == 2
+    assert key_store.get_cached_key(raws[0]) is None
+    assert key_store.get_cached_key(raws[2]) is not None
+
+
+def test_last_used_is_written_in_one_deferred_batch(key_store):
+    first, first_raw = key_store.create_key("a")
+    second, second_raw = key_store.create_key("b")
+    for _ in range(3):
+        key_store.validate_key(first_raw)
+        key_store.validate_key(second_raw)
+
+    assert _stored_last_used(key_store, first.key_id) is None
+    # Reads overlay the pending timestamp before it is flushed
+    assert key_store.get_key(first.key_id).last_used_at is not None
+
+    assert key_store.flush_last_used() == 2
+    assert _stored_last_used(key_store, first.key_id) is not None
+    assert _stored_last_used(key_store, second.key_id) is not None
+    assert key_store.flush_last_used() == 0
+
+
+def test_deleted_key_drops_its_pending_last_used(key_store):
+    api_key, raw_key = key_store.create_key("ci")
+    key_store.validate_key(raw_key)
+
+    key_store.delete_key(api_key.key_id)
+
+    assert key_store.cache_stats()["pending_last_used"] == 0
+    assert key_store.flush_last_used() == 0
+
+
+@pytest.mark.asyncio
+async def test_stop_flushes_outstanding_updates(key_store):
+    api_key, raw_key = key_store.create_key("ci")
+    await key_store.start()
+    key_store.validate_key(raw_key)
+
+    await key_store.stop()
+
+    assert _stored_last_used(key_store, api_key.key_id) is not None
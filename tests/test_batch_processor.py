@@ -0,0 +1,164 @@
+"""Tests for BatchProcessor cancellation and resume."""
+
+from __future__ import annotations
+
+import asyncio
+import threading
+from typing import List, Optional
+
+import pytest
+
+from batch_processor import BatchProcessor, BatchStatus, BatchTask
+from batch_runners import BatchTaskRunner, SubmittedCallback, TaskOutcome
+from gateway.batch_runner import QueueTaskRunner
+from gateway.models import GatewayRequest, GatewayResponse, RequestStatus
+from gateway.request_queue import RequestQueue
+
+
+class _StubRunner(BatchTaskRunner):
+    """Answers instantly, except messages starting with "slow" block until cancelled."""
+
+    name = "stub"
+
+    def __init__(self) -> None:
+        self.seen: List[str] = []
+        self.started = asyncio.Event()
+
+    async def run(
+        self,
+        task: BatchTask,
+        provider: str,
+        timeout_s: float,
+        on_submitted: Optional[SubmittedCallback] = None,
+    ) -> TaskOutcome:
+        self.seen.append(task.message)
+        if on_submitted is not None:
+            on_submitted(f"req-{task.id}")
+        if task.message.startswith("slow"):
+            self.started.set()
+            await asyncio.sleep(60)
+        return TaskOutcome(True, output=task.message.upper())
+
+
+@pytest.fixture
+def processor(tmp_path):
+    return BatchProcessor(max_concurrent=1, db_path=str(tmp_path / "batch.db"), runner=_StubRunner())
+
+
+def _reload(processor: BatchProcessor, job_id: str):
+    processor._jobs.clear()
+    return processor.get_job(job_id)
+
+
+@pytest.mark.asyncio
+async def test_batch_writes_run_off_the_event_loop(processor, monkeypatch):
+    loop_thread = threading.get_ident()
+    writer_threads = set()
+    original = processor._save_task
+
+    def save_task(conn, task):
+        writer_threads.add(threading.get_ident())
+        original(conn, task)
+
+    monkeypatch.setattr(processor, "_save_task", save_task)
+    job = processor.create_batch(["a", "b"], provider="stub")
+
+    result = await processor.execute_batch_async(job)
+
+    assert result.status == BatchStatus.COMPLETED
+    assert writer_threads and loop_thread not in writer_threads
+    stored = _reload(processor, job.id)
+    assert [task.result for task in stored.tasks] == ["A", "B"]
+    assert [task.request_id for task in stored.tasks] == [f"req-{job.id}-0", f"req-{job.id}-1"]
+
+
+@pytest.mark.asyncio
+async def test_cancel_stops_in_flight_and_pending_tasks(processor):
+    job = processor.create_batch(["slow one", "never"], provider="stub")
+    running = asyncio.ensure_future(processor.execute_batch_async(job))
+    await asyncio.wait_for(processor.runner.started.wait(), timeout=5.0)
+
+    assert processor.cancel_batch(job.id)
+    result = await asyncio.wait_for(running, timeout=5.0)
+
+    assert result.status == BatchStatus.CANCELLED
+    assert processor.runner.seen == ["slow one"]
+    stored = _reload(processor, job.id)
+    assert stored.status == BatchStatus.CANCELLED
+    assert [task.status for task in stored.tasks] == [BatchStatus.CANCELLED, BatchStatus.CANCELLED]
+    assert not processor.is_running(job.id)
+
+
+@pytest.mark.asyncio
+async def test_interrupted_batch_resumes_unfinished_tasks(processor):
+    job = processor.create_batch(["done", "slow", "later"], provider="stub")
+    running = asyncio.ensure_future(processor.execute_batch_async(job))
+    await asyncio.wait_for(processor.runner.started.wait(), timeout=5.0)
+
+    # Tear the run down as a process shutdown would, without cancelling the job
+    running.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await running
+    stored = _reload(processor, job.id)
+    assert [task.status for task in stored.tasks] == [
+        BatchStatus.COMPLETED, BatchStatus.RUNNING, BatchStatus.PENDING,
+    ]
+    assert stored.tasks[1].request_id == f"req-{job.id}-1"
+
+    resumed_runner = _StubRunner()
+    stored.tasks[1].message = "resumed"
+    result = await processor.execute_batch_async(stored, runner=resumed_runner)
+
+    assert result.status == BatchStatus.COMPLETED
+    assert resumed_runner.seen == ["resumed", "later"]
+    assert [task.result for task in _reload(processor, job.id).tasks] == ["DONE", "RESUMED", "LATER"]
+
+
+async def _serve(queue: RequestQueue) -> None:
+    """Minimal gateway worker: answers every request with its message upper-cased."""
+    while True:
+        request = queue.dequeue()
+        if request is None:
+            await asyncio.sleep(0.01)
+            continue
+        queue.mark_processing(request.id)
+        result = GatewayResponse(
+            request_id=request.id,
+            status=RequestStatus.COMPLETED,
+            response=request.message.upper(),
+            provider=request.provider,
+        )
+        queue.store.save_response(result)
+        queue.mark_completed(request.id, response=result.response, result=result)
+
+
+@pytest.mark.asyncio
+async def test_queue_runner_resubmits_requests_lost_in_a_restart(processor, store):
+    lost = GatewayRequest.create(provider="claude", message="lost")
+    store.create_request(lost)
+    store.update_request_status(lost.id, RequestStatus.PROCESSING)
+    kept = GatewayRequest.create(provider="claude", message="kept")
+    store.create_request(kept)
+    # A fresh gateway process only reloads QUEUED rows
+    queue = RequestQueue(store)
+    job = processor.create_batch(["lost", "kept"], provider="claude")
+    job.tasks[0].request_id = lost.id
+    job.tasks[1].request_id = kept.id
+
+    server = asyncio.ensure_future(_serve(queue))
+    try:
+        result = await asyncio.wait_for(
+            processor.execute_batch_async(job, runner=QueueTaskRunner(queue), timeout_s=5.0),
+            timeout=5.0,
+        )
+    finally:
+        server.cancel()
+
+    assert result.status == BatchStatus.COMPLETED
+    assert [task.result for task in result.tasks] == ["LOST", "KEPT"]
+    assert result.tasks[0].request_id not in (None, lost.id)
+    assert result.tasks[1].request_id == kept.id
+    assert store.get_request(lost.id).status == RequestStatus.FAILED
+    assert [task.request_id for task in _reload(processor, job.id).tasks] == [
+        result.tasks[0].request_id, kept.id,
+    ]
@@ -0,0 +1,52 @@
+"""Tests for the gateway CacheManager tiers."""
+
+from __future__ import annotations
+
+import pytest
+
+from gateway.cache import CacheConfig, CacheManager
+
+
+RESPONSE = "a cached answer that is long enough"
+
+
+def _hit_count(store, entry) -> int:
+    with store._get_connection() as conn:
+        row = conn.execute(
+            "SELECT hit_count FROM response_cache WHERE cache_key = ?", (entry.cache_key,)
+        ).fetchone()
+    return row["hit_count"]
+
+
+def test_get_never_waits_on_hit_flush(store):
+    manager = CacheManager(store, CacheConfig(hit_flush_interval_s=0.0))
+    entry = manager.put("claude", "question", RESPONSE)
+    waits = []
+    original = store._write
+
+    def _write(sql, params=(), wait=True, many=False):
+        waits.append(wait)
+        return original(sql, params, wait=wait, many=many)
+
+    store._write = _write
+    manager.get("claude", "question")
+    store.flush_writes()
+
+    assert waits == [False]
+    assert _hit_count(store, entry) == 1
+
+
+@pytest.mark.asyncio
+async def test_background_flush_persists_hits(store):
+    manager = CacheManager(store, CacheConfig(hit_flush_interval_s=0.05))
+    entry = manager.put("claude", "question", RESPONSE)
+    await manager.start()
+    try:
+        for _ in range(3):
+            manager.get("claude", "question")
+        # Hits stay in memory until the flush loop runs
+        assert _hit_count(store, entry) == 0
+    finally:
+        await manager.stop()
+
+    assert _hit_count(store, entry) == 3
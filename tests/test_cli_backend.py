@@ -0,0 +1,140 @@
+"""Tests for line-by-line streaming of the one-shot CLI backend."""
+
+from __future__ import annotations
+
+import json
+import logging
+import os
+import sys
+import time
+from pathlib import Path
+
+import pytest
+
+import gateway.stream_output as stream_output_module
+from gateway.backends.cli import CLIBackend
+from gateway.backends.executors import cli_process
+from gateway.gateway_config import ProviderConfig
+from gateway.models import BackendType, GatewayRequest
+from gateway.stream_output import StreamOutputManager
+
+
+# The CLI receives the prompt as its last argument; the script is read from it
+STUB_CLI = """
+import json, os, sys, time
+exec(sys.argv[-1])
+"""
+
+
+def _event(text: str) -> str:
+    return json.dumps({"type": "item.completed", "item": {"type": "agent_message", "text": text}})
+
+
+@pytest.fixture(autouse=True)
+def streams(tmp_path, monkeypatch) -> StreamOutputManager:
+    manager = StreamOutputManager(tmp_path / "streams")
+    monkeypatch.setattr(stream_output_module, "_manager", manager)
+    monkeypatch.setattr(stream_output_module, "DB_PATH", tmp_path / "missing.db")
+    return manager
+
+
+@pytest.fixture
+def backend(tmp_path) -> CLIBackend:
+    script = tmp_path / "stub_cli.py"
+    script.write_text(STUB_CLI, encoding="utf-8")
+    return CLIBackend(ProviderConfig(
+        name="codex",
+        backend_type=BackendType.CLI_EXEC,
+        cli_command=sys.executable,
+        cli_args=["-u", str(script)],
+        timeout_s=10.0,
+    ))
+
+
+def _request(program: str, timeout_s: float = 5.0) -> GatewayRequest:
+    return GatewayRequest.create(provider="codex", message=program, timeout_s=timeout_s)
+
+
+def _alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    return True
+
+
+@pytest.mark.asyncio
+async def test_text_events_are_yielded_while_the_cli_runs(backend, tmp_path, streams):
+    gate = tmp_path / "gate"
+    program = (
+        f"print({_event('first')!r})\n"
+        f"while not os.path.exists({str(gate)!r}): time.sleep(0.01)\n"
+        f"print({_event('second')!r})\n"
+    )
+    request = _request(program)
+    chunks = backend.execute_stream(request)
+
+    first = await chunks.__anext__()
+    # The CLI is still blocked on the gate file
+    assert first.content == "first" and not gate.exists()
+    gate.touch()
+    rest = [chunk async for chunk in chunks]
+
+    assert [c.content for c in rest] == ["\nsecond", ""]
+    assert [c.chunk_index for c in [first, *rest]] == [0, 1, 2]
+    assert rest[-1].is_final and rest[-1].metadata is None
+    status = streams.get_stream_status(request.id)
+    assert status["completed"] and status["success"]
+
+
+@pytest.mark.asyncio
+async def test_closing_the_stream_kills_the_cli_immediately(backend, tmp_path, streams):
+    pid_file = tmp_path / "pid"
+    program = (
+        f"open({str(pid_file)!r}, 'w').write(str(os.getpid()))\n"
+        f"print({_event('partial')!r})\n"
+        "time.sleep(30)\n"
+    )
+    request = _request(program, timeout_s=60.0)
+    chunks = backend.execute_stream(request)
+
+    assert (await chunks.__anext__()).content == "partial"
+    pid = int(pid_file.read_text())
+    assert _alive(pid)
+    await chunks.aclose()
+
+    # Closed and reaped before aclose() returned, not at garbage collection
+    assert not _alive(pid)
+    status = streams.get_stream_status(request.id)
+    assert status["completed"] and not status["success"]
+
+
+@pytest.mark.asyncio
+async def test_timeout_ends_the_stream_with_an_error(backend):
+    started = time.monotonic()
+
+    chunks = [c async for c in backend.execute_stream(_request("time.sleep(30)", timeout_s=0.3))]
+
+    assert time.monotonic() - started < 5.0
+    assert len(chunks) == 1 and chunks[0].is_final
+    assert "timed out" in chunks[0].metadata["error"]
+
+
+@pytest.mark.asyncio
+async def test_plain_output_is_cleaned_once_the_cli_exits(backend):
+    chunks = [c async for c in backend.execute_stream(_request("print('plain answer')"))]
+
+    assert [c.content for c in chunks] == ["plain answer", ""]
+    assert chunks[-1].is_final and chunks[-1].metadata is None
+
+
+@pytest.mark.asyncio
+async def test_overlong_lines_are_logged_and_skipped(backend, monkeypatch, caplog):
+    monkeypatch.setattr(cli_process, "_LINE_LIMIT", 1024)
+    program = f"print('{{' + 'x' * 5000)\nprint({_event('after')!r})\n"
+
+    with caplog.at_level(logging.WARNING):
+        chunks = [c async for c in backend.execute_stream(_request(program))]
+
+    assert [c.content for c in chunks] == ["after", ""]
+    assert any("over 1024 bytes" in record.getMessage() for record in caplog.records)
@@ -0,0 +1,98 @@
+"""Tests for the gateway CompletionRegistry."""
+
+from __future__ import annotations
+
+import asyncio
+import threading
+import time
+
+import pytest
+
+from gateway.completion import CompletionRegistry
+from gateway.models import GatewayResponse, RequestStatus
+
+
+@pytest.mark.asyncio
+async def test_wait_times_out_and_drops_waiter():
+    registry = CompletionRegistry()
+
+    start = time.monotonic()
+    result = await registry.wait("req-1", timeout=0.05)
+
+    assert result is None
+    assert time.monotonic() - start < 1.0
+    assert registry.waiter_count() == 0
+    assert registry.stats()["pending_requests"] == 0
+
+
+@pytest.mark.asyncio
+async def test_resolve_wakes_all_waiters():
+    registry = CompletionRegistry()
+    waiters = [asyncio.ensure_future(registry.wait("req-1", timeout=5.0)) for _ in range(3)]
+    await asyncio.sleep(0)
+    assert registry.waiter_count("req-1") == 3
+
+    registry.resolve("req-1", RequestStatus.COMPLETED)
+    results = await asyncio.wait_for(asyncio.gather(*waiters), timeout=1.0)
+
+    assert [r.status for r in results] == [RequestStatus.COMPLETED] * 3
+    assert registry.waiter_count() == 0
+
+
+@pytest.mark.asyncio
+async def test_resolve_from_another_thread():
+    registry = CompletionRegistry()
+    waiter = asyncio.ensure_future(registry.wait("req-1", timeout=5.0))
+    await asyncio.sleep(0)
+
+    thread = threading.Thread(target=registry.resolve, args=("req-1", RequestStatus.FAILED))
+    thread.start()
+    result = await asyncio.wait_for(waiter, timeout=1.0)
+    thread.join()
+
+    assert result.status == RequestStatus.FAILED
+
+
+@pytest.mark.asyncio
+async def test_late_waiter_gets_retained_result():
+    registry = CompletionRegistry()
+    response = GatewayResponse(request_id="req-1", status=RequestStatus.COMPLETED, response="done")
+    registry.resolve("req-1", RequestStatus.COMPLETED, response)
+    # Status-only bookkeeping must not drop the full response
+    registry.resolve("req-1", RequestStatus.COMPLETED)
+
+    result = await registry.wait("req-1", timeout=0.0)
+
+    assert result.response is response
+
+
+@pytest.mark.asyncio
+async def test_timeout_then_resolve_is_still_retained():
+    registry = CompletionRegistry()
+    assert await registry.wait("req-1", timeout=0.01) is None
+
+    registry.resolve("req-1", RequestStatus.TIMEOUT)
+
+    assert registry.get_result("req-1").status == RequestStatus.TIMEOUT
+
+
+def test_results_expire_by_ttl_and_size():
+    registry = CompletionRegistry(max_results=2, result_ttl_s=0.05)
+    for request_id in ("a", "b", "c"):
+        registry.resolve(request_id, RequestStatus.COMPLETED)
+
+    assert registry.get_result("a") is None
+    assert registry.get_result("c") is not None
+
+    time.sleep(0.1)
+    assert registry.get_result("c") is None
+
+
+@pytest.mark.asyncio
+async def test_wait_ignores_expired_results():
+    registry = CompletionRegistry(result_ttl_s=0.05)
+    registry.resolve("req-1", RequestStatus.COMPLETED)
+    time.sleep(0.1)
+
+    assert await registry.wait("req-1", timeout=0.01) is None
+    assert registry.stats()["retained_results"] == 0
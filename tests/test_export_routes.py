@@ -0,0 +1,159 @@
+"""Tests for the streaming request export route."""
+
+from __future__ import annotations
+
+import csv
+import io
+import json
+import time
+from typing import List
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from gateway.models import GatewayRequest, RequestStatus
+from gateway.routes import export as export_routes
+
+
+ROWS = 1203
+CSV_MESSAGE = export_routes.CSV_COLUMNS.index("message_preview")
+
+
+@pytest.fixture
+def exported(store) -> List[str]:
+    """Store ``ROWS`` requests; return their ids newest first."""
+    now = time.time()
+    requests = []
+    for i in range(ROWS):
+        # Groups of three share a timestamp, so ties are broken by id
+        created_at = now - 60 - (i // 3)
+        requests.append(GatewayRequest(
+            id=f"req-{i:05d}",
+            provider="claude" if i % 4 else "gemini",
+            message=f"message {i}, with a comma",
+            status=RequestStatus.COMPLETED if i % 2 else RequestStatus.FAILED,
+            created_at=created_at,
+            updated_at=created_at,
+            metadata={"n": i},
+        ))
+    for request in requests:
+        store.create_request(request)
+    return [r.id for r in sorted(requests, key=lambda r: (r.created_at, r.id), reverse=True)]
+
+
+@pytest.fixture
+def client(store) -> TestClient:
+    app = FastAPI()
+    app.state.store = store
+    app.include_router(export_routes.router)
+    return TestClient(app)
+
+
+def _ndjson(response) -> List[dict]:
+    return [json.loads(line) for line in response.text.splitlines()]
+
+
+def test_json_export_streams_every_row(client, exported):
+    response = client.get("/api/export/requests", params={"format": "json"})
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("application/json")
+    body = response.json()
+    assert body["total_count"] == ROWS
+    assert [row["id"] for row in body["requests"]] == exported
+    assert body["requests"][0]["metadata"] == {"n": int(exported[0][4:])}
+    assert body["filters"] == {"status": None, "provider": None}
+
+
+def test_ndjson_export_with_filters(client, exported):
+    response = client.get(
+        "/api/export/requests",
+        params={"format": "ndjson", "provider": "gemini", "status": "failed"},
+    )
+
+    assert response.status_code == 200
+    rows = _ndjson(response)
+    expected = [i for i in exported if int(i[4:]) % 4 == 0 and int(i[4:]) % 2 == 0]
+    assert [row["id"] for row in rows] == expected
+    assert {(row["provider"], row["status"]) for row in rows} == {("gemini", "failed")}
+
+
+def test_csv_export_has_header_and_every_row(client, exported):
+    response = client.get("/api/export/requests", params={"format": "csv"})
+
+    assert response.status_code == 200
+    rows = list(csv.reader(io.StringIO(response.text)))
+    assert rows[0] == export_routes.CSV_COLUMNS
+    assert [row[0] for row in rows[1:]] == exported
+    assert rows[1][CSV_MESSAGE] == f"message {int(exported[0][4:])}, with a comma"
+
+
+@pytest.mark.parametrize("fmt", ["ndjson", "csv"])
+def test_limit_and_cursor_resume_without_gaps_or_repeats(client, exported, fmt):
+    seen: List[str] = []
+    cursor = None
+    pages = 0
+    while True:
+        params = {"format": fmt, "limit": 500}
+        if cursor:
+            params["cursor"] = cursor
+        response = client.get("/api/export/requests", params=params)
+        assert response.status_code == 200
+        if fmt == "ndjson":
+            rows = [(row["id"], row["cursor"]) for row in _ndjson(response)]
+        else:
+            rows = [(row[0], row[-1]) for row in list(csv.reader(io.StringIO(response.text)))[1:]]
+        if not rows:
+            break
+        pages += 1
+        assert len(rows) <= 500
+        seen.extend(request_id for request_id, _cursor in rows)
+        cursor = rows[-1][1]
+
+    assert pages == 3
+    assert seen == exported
+
+
+def test_cursor_round_trip():
+    request = GatewayRequest(
+        id="abc", provider="claude", message="", status=RequestStatus.QUEUED,
+        created_at=1700000000.25, updated_at=1700000000.25,
+    )
+
+    token = export_routes.encode_export_cursor(request)
+
+    assert "=" not in token
+    assert export_routes.decode_export_cursor(token) == (1700000000.25, "abc")
+
+
+@pytest.mark.parametrize("cursor", ["not-a-cursor", "e30", "WzFd", "!!!"])
+def test_bad_cursor_is_rejected(client, cursor):
+    response = client.get("/api/export/requests", params={"cursor": cursor})
+
+    assert response.status_code == 400
+    assert response.json()["detail"] == "Invalid export cursor"
+
+
+def test_unknown_format_is_rejected(client):
+    assert client.get("/api/export/requests", params={"format": "xml"}).status_code == 400
+
+
+@pytest.mark.parametrize("fmt", ["parquet", "arrow"])
+def test_columnar_export(client, exported, fmt):
+    pa = pytest.importorskip("pyarrow")
+    import pyarrow.parquet as pq
+
+    response = client.get("/api/export/requests", params={"format": fmt})
+
+    assert response.status_code == 200
+    if fmt == "parquet":
+        parquet = pq.ParquetFile(io.BytesIO(response.content))
+        # One row group per streamed chunk
+        assert parquet.num_row_groups == -(-ROWS // export_routes.EXPORT_CHUNK_ROWS)
+        table = parquet.read()
+    else:
+        table = pa.ipc.open_stream(response.content).read_all()
+    assert table.column("id").to_pylist() == exported
+    assert table.schema == export_routes._arrow_schema()
+    assert json.loads(table.column("metadata")[0].as_py()) == {"n": int(exported[0][4:])}
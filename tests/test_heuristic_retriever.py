@@ -0,0 +1,155 @@
+"""Ranking equivalence of the joined, vectorized HeuristicRetriever scoring."""
+
+from __future__ import annotations
+
+import random
+import sqlite3
+from datetime import datetime, timedelta
+from typing import List, Optional
+
+import pytest
+
+from memory.heuristic_retriever import HeuristicRetriever, RetrievalConfig, ScoredMemory
+# The mixin modules import heuristic_retriever, so they load after it
+from memory import heuristic_retriever_core as retriever_core
+
+
+def _memory_db(path) -> str:
+    rng = random.Random(7)
+    now = datetime.now()
+    words = ["deploy", "rollback", "cache", "schema", "latency"]
+
+    def access_time(i: int) -> Optional[str]:
+        when = now - timedelta(hours=rng.uniform(0, 200))
+        return [
+            None,
+            when.isoformat(),
+            when.strftime("%Y-%m-%d %H:%M:%S"),
+            when.isoformat() + "Z",
+            "not a timestamp",
+        ][i % 5]
+
+    with sqlite3.connect(path) as conn:
+        conn.execute(
+            "CREATE TABLE messages (message_id TEXT, session_id TEXT, role TEXT, content TEXT, "
+            "provider TEXT, timestamp TEXT, tokens INTEGER)"
+        )
+        conn.execute(
+            "CREATE TABLE observations (observation_id TEXT, category TEXT, content TEXT, tags TEXT, "
+            "source TEXT, confidence REAL, created_at TEXT)"
+        )
+        conn.execute("CREATE VIRTUAL TABLE messages_fts USING fts5(content)")
+        conn.execute("CREATE VIRTUAL TABLE observations_fts USING fts5(content)")
+        conn.execute(
+            "CREATE TABLE memory_importance (memory_id TEXT PRIMARY KEY, memory_type TEXT NOT NULL, "
+            "importance_score REAL DEFAULT 0.5, score_source TEXT DEFAULT 'default', "
+            "last_accessed_at TEXT, access_count INTEGER DEFAULT 0, decay_rate REAL DEFAULT 0.1, "
+            "created_at TEXT, updated_at TEXT)"
+        )
+        conn.execute(
+            "CREATE TABLE memory_access_log (id INTEGER PRIMARY KEY AUTOINCREMENT, memory_id TEXT NOT NULL, "
+            "memory_type TEXT NOT NULL, accessed_at TEXT, access_context TEXT, request_id TEXT, "
+            "query_text TEXT, relevance_score REAL)"
+        )
+        for i in range(80):
+            content = " ".join(rng.choice(words) for _ in range(rng.randint(3, 30)))
+            if i < 60:
+                memory_id, memory_type = f"m{i}", "message"
+                cursor = conn.execute(
+                    "INSERT INTO messages VALUES (?, 's1', 'assistant', ?, 'claude', '2026-01-01', 10)",
+                    (memory_id, content),
+                )
+                conn.execute("INSERT INTO messages_fts (rowid, content) VALUES (?, ?)", (cursor.lastrowid, content))
+            else:
+                memory_id, memory_type = f"o{i}", "observation"
+                cursor = conn.execute(
+                    "INSERT INTO observations VALUES (?, 'fact', ?, '[]', 'test', 1.0, '2026-01-01')",
+                    (memory_id, content),
+                )
+                conn.execute(
+                    "INSERT INTO observations_fts (rowid, content) VALUES (?, ?)", (cursor.lastrowid, content)
+                )
+            if i % 4 == 3:
+                continue  # No importance row at all
+            importance = None if i % 7 == 0 else round(rng.uniform(0.0, 1.0), 3)
+            conn.execute(
+                "INSERT INTO memory_importance (memory_id, memory_type, importance_score, "
+                "last_accessed_at, access_count) VALUES (?, ?, ?, ?, ?)",
+                (memory_id, memory_type, importance, access_time(i), i % 3),
+            )
+    return str(path)
+
+
+def _per_row_ranking(
+    retriever: HeuristicRetriever, query: str, limit: int, min_importance: Optional[float] = None
+) -> List[ScoredMemory]:
+    """The scoring retrieve() did before importance was joined: one lookup per candidate."""
+    config = retriever.config
+    candidates = retriever._search_messages_fts(query, limit=config.candidate_pool_size)
+    candidates += retriever._search_observations_fts(query, limit=config.candidate_pool_size)
+
+    scored = []
+    conn = sqlite3.connect(retriever.db_path)
+    try:
+        for memory in candidates:
+            row = conn.execute(
+                "SELECT importance_score, access_count, last_accessed_at FROM memory_importance "
+                "WHERE memory_id = ? AND memory_type = ?",
+                (memory.memory_id, memory.memory_type),
+            ).fetchone()
+            memory.importance_score = (row[0] if row else None) or config.default_importance
+            memory.access_count = (row[1] if row else None) or 0
+            memory.last_accessed_at = row[2] if row else None
+            memory.recency_score = retriever._calculate_recency(memory.last_accessed_at)
+            memory.final_score = (
+                config.alpha * memory.relevance_score
+                + config.beta * memory.importance_score
+                + config.gamma * memory.recency_score
+            )
+            if min_importance is not None and memory.importance_score < min_importance:
+                continue
+            scored.append(memory)
+    finally:
+        conn.close()
+    scored.sort(key=lambda m: m.final_score, reverse=True)
+    return scored[:limit]
+
+
+@pytest.fixture
+def retriever(tmp_path) -> HeuristicRetriever:
+    return HeuristicRetriever(_memory_db(tmp_path / "memory.db"), config=RetrievalConfig(candidate_pool_size=40))
+
+
+@pytest.mark.parametrize("use_numpy", [True, False])
+@pytest.mark.parametrize("query,min_importance", [
+    ("deploy", None),
+    ("cache OR latency", None),
+    ("schema", 0.4),
+])
+def test_ranking_matches_per_row_scoring(retriever, monkeypatch, use_numpy, query, min_importance):
+    if use_numpy:
+        pytest.importorskip("numpy")
+    monkeypatch.setattr(retriever_core, "HAS_NUMPY", use_numpy)
+
+    results = retriever.retrieve(query, limit=25, min_importance=min_importance, track_access=False)
+    expected = _per_row_ranking(retriever, query, limit=25, min_importance=min_importance)
+
+    assert len(results) == len(expected) > 5
+    assert [(m.memory_id, m.memory_type) for m in results] == [(m.memory_id, m.memory_type) for m in expected]
+    for got, want in zip(results, expected):
+        assert got.final_score == pytest.approx(want.final_score, rel=1e-6)
+        assert got.recency_score == pytest.approx(want.recency_score, rel=1e-6)
+        assert (got.importance_score, got.access_count, got.last_accessed_at) == (
+            want.importance_score, want.access_count, want.last_accessed_at,
+        )
+        assert isinstance(got.final_score, float)
+
+
+def test_access_is_logged_once_per_result(retriever):
+    results = retriever.retrieve("deploy", limit=5, request_id="req-1")
+
+    with sqlite3.connect(retriever.db_path) as conn:
+        logged = conn.execute(
+            "SELECT memory_id, request_id, query_text FROM memory_access_log ORDER BY id"
+        ).fetchall()
+    assert logged == [(m.memory_id, "req-1", "deploy") for m in results]
@@ -0,0 +1,98 @@
+"""Tests for the shared HTTP client pool against a local stub server."""
+
+from __future__ import annotations
+
+import asyncio
+
+import pytest
+import pytest_asyncio
+
+web = pytest.importorskip("aiohttp.web")
+
+from gateway.gateway_config import HTTPClientConfig
+from gateway.http_client import HTTPClientPool
+from gateway.metrics import GatewayMetrics
+
+
+@pytest_asyncio.fixture
+async def stub_server():
+    state = {"in_flight": 0, "max_in_flight": 0, "peers": set()}
+
+    async def handle(request):
+        state["peers"].add(request.transport.get_extra_info("peername"))
+        state["in_flight"] += 1
+        state["max_in_flight"] = max(state["max_in_flight"], state["in_flight"])
+        try:
+            await asyncio.sleep(float(request.query.get("delay", "0")))
+        finally:
+            state["in_flight"] -= 1
+        return web.json_response({"ok": True})
+
+    app = web.Application()
+    app.router.add_get("/", handle)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+    port = site._server.sockets[0].getsockname()[1]
+    state["url"] = f"http://127.0.0.1:{port}/"
+    yield state
+    await runner.cleanup()
+
+
+async def _get(pool: HTTPClientPool, url: str) -> dict:
+    session = await pool.get_session()
+    async with session.get(url, timeout=pool.timeout(5.0)) as resp:
+        return await resp.json()
+
+
+@pytest.mark.asyncio
+async def test_sequential_requests_reuse_one_connection(stub_server):
+    metrics = GatewayMetrics(use_prometheus_client=False)
+    pool = HTTPClientPool(HTTPClientConfig(), metrics=metrics)
+    try:
+        for _ in range(5):
+            assert await _get(pool, stub_server["url"]) == {"ok": True}
+        stats = pool.stats()
+    finally:
+        await pool.close()
+
+    assert stats["requests"] == 5
+    assert stats["connections_created"] == 1
+    assert stats["connections_reused"] == 4
+    assert stats["reuse_ratio"] == pytest.approx(0.8)
+    assert len(stub_server["peers"]) == 1
+    counters = metrics._counters["http_connections_total"]
+    assert counters[("127.0.0.1", "new")] == 1
+    assert counters[("127.0.0.1", "reused")] == 4
+
+
+@pytest.mark.asyncio
+async def test_concurrent_requests_respect_the_per_host_limit(stub_server):
+    pool = HTTPClientPool(HTTPClientConfig(max_connections_per_host=2))
+    url = stub_server["url"] + "?delay=0.05"
+    try:
+        results = await asyncio.gather(*(_get(pool, url) for _ in range(8)))
+        stats = pool.stats()
+    finally:
+        await pool.close()
+
+    assert results == [{"ok": True}] * 8
+    assert stub_server["max_in_flight"] == 2
+    assert stats["connections_created"] == 2
+    assert stats["connections_reused"] == 6
+    assert len(stub_server["peers"]) == 2
+
+
+@pytest.mark.asyncio
+async def test_force_close_disables_reuse(stub_server):
+    pool = HTTPClientPool(HTTPClientConfig(force_close=True))
+    try:
+        for _ in range(3):
+            await _get(pool, stub_server["url"])
+        stats = pool.stats()
+    finally:
+        await pool.close()
+
+    assert stats["connections_created"] == 3
+    assert stats["connections_reused"] == 0
@@ -0,0 +1,120 @@
+"""Tests for the pooled interactive CLI backend against a stub REPL."""
+
+from __future__ import annotations
+
+from pathlib import Path
+import sys
+import time
+
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+import pytest
+
+from gateway.backends.interactive_cli_backend import InteractiveCLIBackend
+from gateway.gateway_config import GatewayConfig, ProviderConfig
+from gateway.models import BackendType, GatewayRequest
+
+
+STUB_REPL = """
+import sys, time
+sys.stdout.write("stub repl v1\\n> ")
+sys.stdout.flush()
+for line in sys.stdin:
+    msg = line.strip()
+    if msg == "slow":
+        time.sleep(5)
+    sys.stdout.write("answer: %s\\nsecond line\\n> " % msg)
+    sys.stdout.flush()
+"""
+
+
+@pytest.fixture
+def repl_config(tmp_path: Path) -> ProviderConfig:
+    script = tmp_path / "stub_repl.py"
+    script.write_text(STUB_REPL, encoding="utf-8")
+    return ProviderConfig(
+        name="stub",
+        backend_type=BackendType.CLI_EXEC,
+        cli_command=sys.executable,
+        cli_args=["--one-shot"],
+        cli_workers=1,
+        interactive_args=["-u", str(script)],
+        timeout_s=10.0,
+    )
+
+
+def _request(message: str, timeout_s: float = 2.0) -> GatewayRequest:
+    return GatewayRequest.create(provider="stub", message=message, timeout_s=timeout_s)
+
+
+@pytest.mark.asyncio
+async def test_response_ends_at_prompt_and_worker_is_reused(repl_config: ProviderConfig) -> None:
+    backend = InteractiveCLIBackend(repl_config)
+    try:
+        start = time.monotonic()
+        first = await backend.execute(_request("hi"))
+        second = await backend.execute(_request("again"))
+        elapsed = time.monotonic() - start
+
+        assert first.success, first.error
+        assert first.response == "answer: hi\nsecond line"
+        assert second.response == "answer: again\nsecond line"
+        assert elapsed < 1.5
+        stats = backend.pool_stats()
+        assert stats["recycled"] == 0
+        assert stats["workers"] == 1
+    finally:
+        await backend.shutdown()
+
+
+@pytest.mark.asyncio
+async def test_timeout_fails_and_recycles_worker(repl_config: ProviderConfig) -> None:
+    backend = InteractiveCLIBackend(repl_config)
+    try:
+        result = await backend.execute(_request("slow", timeout_s=0.5))
+
+        assert not result.success
+        assert "did not finish" in result.error
+        assert backend.pool_stats()["recycled"] == 1
+
+        # The replacement worker answers cleanly, without the stale output
+        follow_up = await backend.execute(_request("next"))
+        assert follow_up.success, follow_up.error
+        assert follow_up.response == "answer: next\nsecond line"
+    finally:
+        await backend.shutdown()
+
+
+@pytest.mark.asyncio
+async def test_stream_yields_response_lines(repl_config: ProviderConfig) -> None:
+    backend = InteractiveCLIBackend(repl_config)
+    try:
+        chunks = [chunk async for chunk in backend.execute_stream(_request("stream"))]
+
+        assert chunks[-1].is_final
+        assert "answer: stream" in "".join(c.content for c in chunks)
+        assert backend.pool_stats()["recycled"] == 0
+    finally:
+        await backend.shutdown()
+
+
+def test_backend_requires_interactive_args(repl_config: ProviderConfig) -> None:
+    repl_config.interactive_args = None
+    with pytest.raises(ValueError, match="interactive_args"):
+        InteractiveCLIBackend(repl_config)
+
+
+def test_config_ignores_cli_workers_without_interactive_args() -> None:
+    config = GatewayConfig()
+    one_shot = config._parse_provider_config(
+        "codex", {"cli_command": "codex", "cli_args": ["exec"], "cli_workers": 4}
+    )
+    interactive = config._parse_provider_config(
+        "codex", {"cli_command": "codex", "cli_workers": 4, "interactive_args": []}
+    )
+
+    assert one_shot.cli_workers == 0
+    assert interactive.cli_workers == 4
+    assert interactive.interactive_args == []
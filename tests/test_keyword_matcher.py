@@ -0,0 +1,134 @@
+"""Tests for the compiled multi-keyword matcher in lib/keyword_matcher.py."""
+
+from __future__ import annotations
+
+import random
+from typing import Dict, Hashable, List, Tuple
+
+from keyword_matcher import KeywordHit, KeywordMatcher
+
+
+def _is_word_char(ch: str) -> bool:
+    return ch.isalnum() or ch == "_"
+
+
+def _naive_spans(whole_word: bool, needle: str, lowered: str) -> List[int]:
+    """Start offsets where one registration matches."""
+    starts = []
+    for start in range(len(lowered)):
+        end = start + len(needle)
+        if not lowered.startswith(needle, start):
+            continue
+        if whole_word and (
+            (start > 0 and _is_word_char(lowered[start - 1]))
+            or (end < len(lowered) and _is_word_char(lowered[end]))
+        ):
+            continue
+        starts.append(start)
+    return starts
+
+
+def _naive_hits(entries: List[Tuple[str, Hashable, bool]], text: str) -> List[KeywordHit]:
+    """Reference search: try every registration at every position."""
+    lowered = text.lower()
+    found: Dict[Tuple[int, str], List[Hashable]] = {}
+    for keyword, tag, whole_word in entries:
+        needle = keyword.lower()
+        for start in _naive_spans(whole_word, needle, lowered):
+            found.setdefault((start, needle), []).append(tag)
+    # Ordered by position, shorter keywords first at a shared start
+    return [
+        KeywordHit(needle, start, start + len(needle), tuple(tags))
+        for (start, needle), tags in sorted(found.items(), key=lambda item: (item[0][0], len(item[0][1])))
+    ]
+
+
+def _naive_matches(entries: List[Tuple[str, Hashable, bool]], text: str) -> Dict[Hashable, List[str]]:
+    lowered = text.lower()
+    grouped: Dict[Hashable, List[str]] = {}
+    for keyword, tag, whole_word in entries:
+        if _naive_spans(whole_word, keyword.lower(), lowered):
+            grouped.setdefault(tag, []).append(keyword)
+    return grouped
+
+
+def test_overlapping_and_nested_keywords_are_all_found():
+    matcher = KeywordMatcher([("ab", "x"), ("abc", "y"), ("bc", "z"), ("c", "w")])
+
+    hits = matcher.find_all("xABCabc")
+
+    assert [(h.keyword, h.start, h.end) for h in hits] == [
+        ("ab", 1, 3), ("abc", 1, 4), ("bc", 2, 4), ("c", 3, 4),
+        ("ab", 4, 6), ("abc", 4, 7), ("bc", 5, 7), ("c", 6, 7),
+    ]
+    assert matcher.contained("xABCabc") == {"ab", "abc", "bc", "c"}
+    # Self-overlapping keyword: every start position counts
+    assert [h.start for h in KeywordMatcher([("aa", None)]).find_all("aaaa")] == [0, 1, 2]
+
+
+def test_whole_word_rules_apply_per_registration():
+    matcher = KeywordMatcher()
+    matcher.add("test", "strict", whole_word=True)
+    matcher.add("Test", "loose")
+    matcher.add("_id", "ident", whole_word=True)
+
+    assert matcher.matches("run the test.") == {"strict": ["test"], "loose": ["Test"]}
+    assert matcher.matches("pytest testing") == {"loose": ["Test"]}
+    assert [h.tags for h in matcher.find_all("Test latest")] == [("strict", "loose"), ("loose",)]
+    # Underscore counts as a word character on both sides
+    assert matcher.matches("user_id") == {}
+    assert matcher.matches("the _id field") == {"ident": ["_id"]}
+    assert matcher.contained("attested") == {"test"}
+
+
+def test_cjk_keywords_and_case_folding():
+    matcher = KeywordMatcher([("代码", "code"), ("代码审查", "review"), ("API", "api")])
+
+    assert matcher.matches("请帮我做代码审查, api 也看看") == {
+        "code": ["代码"], "review": ["代码审查"], "api": ["API"],
+    }
+    # CJK text has no spaces, so whole-word rules treat neighbours as word characters
+    matcher.add("审查", "strict", whole_word=True)
+    assert "strict" not in matcher.matches("代码审查一下")
+    assert "strict" in matcher.matches("审查")
+
+
+def test_add_and_clear_rebuild_the_pattern():
+    matcher = KeywordMatcher([("alpha", 1)])
+    assert matcher.matches("alpha beta") == {1: ["alpha"]}
+
+    matcher.add("beta", 2)
+    matcher.add("", 3)  # Ignored
+    assert matcher.matches("alpha beta") == {1: ["alpha"], 2: ["beta"]}
+    assert len(matcher) == 2
+
+    matcher.clear()
+    assert matcher.find_all("alpha beta") == []
+    assert matcher.matches("alpha beta") == {}
+
+
+def test_special_characters_are_literal():
+    matcher = KeywordMatcher([("c++", "cpp"), ("a.b", "dot"), ("(x)", "paren")])
+
+    assert matcher.matches("c++ and (x)") == {"cpp": ["c++"], "paren": ["(x)"]}
+    assert matcher.matches("axb") == {}
+
+
+def test_fuzz_against_naive_search():
+    rng = random.Random(1234)
+    alphabet = "ab_ 中.A"
+    for _ in range(300):
+        entries = []
+        for _ in range(rng.randint(1, 8)):
+            keyword = "".join(rng.choice(alphabet) for _ in range(rng.randint(1, 4)))
+            entries.append((keyword, rng.choice("xyz"), rng.random() < 0.4))
+        matcher = KeywordMatcher()
+        for keyword, tag, whole_word in entries:
+            matcher.add(keyword, tag, whole_word=whole_word)
+        text = "".join(rng.choice(alphabet) for _ in range(rng.randint(0, 40)))
+
+        hits = matcher.find_all(text)
+
+        assert hits == _naive_hits(entries, text), (entries, text)
+        assert matcher.matches(text) == _naive_matches(entries, text), (entries, text)
+        assert matcher.contained(text) == {h.keyword for h in hits}
@@ -0,0 +1,132 @@
+"""Tests for the mergeable latency sketches in lib/latency_sketch.py."""
+
+from __future__ import annotations
+
+import random
+
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from latency_sketch import LatencySketch, SketchWindow
+
+
+QUANTILES = [0.5, 0.75, 0.9, 0.95, 0.99]
+
+
+def _latencies(n: int, seed: int) -> np.ndarray:
+    return np.random.default_rng(seed).lognormal(mean=6.0, sigma=1.0, size=n)
+
+
+def _sketch(values) -> LatencySketch:
+    sketch = LatencySketch()
+    for value in values:
+        sketch.add(float(value))
+    return sketch
+
+
+def _assert_close(sketch: LatencySketch, values: np.ndarray, tolerance: float = 0.01) -> None:
+    for q, estimate in zip(QUANTILES, sketch.quantiles(QUANTILES)):
+        # The sketch ranks at q * (n - 1) without interpolating between samples
+        exact = np.quantile(values, q, method="lower")
+        assert abs(estimate - exact) / exact <= tolerance, (q, estimate, exact)
+        assert sketch.quantile(q) == estimate
+
+
+def test_quantiles_within_relative_accuracy():
+    values = _latencies(20000, seed=1)
+
+    sketch = _sketch(values)
+
+    _assert_close(sketch, values)
+    assert sketch.count == len(values)
+    assert sketch.min == values.min() and sketch.max == values.max()
+    assert sketch.mean == pytest.approx(values.mean())
+    assert len(sketch.bins) < 1000  # Size follows the spread, not the sample count
+
+
+def test_merged_sketches_match_combined_data():
+    fast, slow = _latencies(8000, seed=2), _latencies(4000, seed=3) * 5
+    combined = np.concatenate([fast, slow])
+
+    merged = _sketch(fast)
+    merged.merge(_sketch(slow))
+
+    _assert_close(merged, combined)
+    assert merged.count == len(combined)
+    assert merged.max == combined.max()
+
+
+def test_serialization_round_trip_after_merge():
+    parts = [_latencies(3000, seed=seed) for seed in (4, 5, 6)]
+    merged = LatencySketch()
+    for part in parts:
+        merged.merge(_sketch(part))
+
+    restored = LatencySketch.from_bytes(merged.to_bytes())
+
+    _assert_close(restored, np.concatenate(parts))
+    assert restored.bins == merged.bins
+    assert (restored.count, restored.sum, restored.min, restored.max) == (
+        merged.count, merged.sum, merged.min, merged.max,
+    )
+
+
+def test_empty_and_invalid_sketches():
+    empty = LatencySketch.from_bytes(LatencySketch().to_bytes())
+    assert empty.count == 0
+    assert empty.quantiles(QUANTILES) == [0.0] * len(QUANTILES)
+
+    with pytest.raises(ValueError):
+        LatencySketch.from_bytes(b"not a sketch")
+    with pytest.raises(ValueError):
+        LatencySketch().merge(LatencySketch(relative_accuracy=0.02))
+
+
+def test_zero_latencies_and_bin_cap():
+    sketch = LatencySketch(max_bins=16)
+    for _ in range(10):
+        sketch.add(0.0)
+    for value in np.geomspace(1, 1e6, 200):
+        sketch.add(float(value))
+
+    assert len(sketch.bins) <= 16
+    assert sketch.quantile(0.01) == 0.0
+    # Collapsing only folds the lowest bins, so the tail stays accurate
+    assert sketch.quantile(0.99) == pytest.approx(np.quantile(np.geomspace(1, 1e6, 200), 0.99), rel=0.1)
+    assert sketch.quantile(1.0) == pytest.approx(1e6)
+
+
+def test_window_merges_overlapping_buckets_only():
+    window = SketchWindow(bucket_s=60.0)
+    rng = random.Random(7)
+    recent = []
+    for minute in range(5):
+        for _ in range(200):
+            value = rng.lognormvariate(5.0, 0.5) * (minute + 1)
+            window.add("claude", value, timestamp=1_000_020.0 + minute * 60)
+            if minute >= 3:
+                recent.append(value)
+    window.add("gemini", 1.0, timestamp=1_000_020.0)
+
+    # ``since`` is rounded down to its bucket, so the last two minutes are merged
+    since = window.bucket_start(1_000_020.0 + 3 * 60) + 30
+    merged = window.merged("claude", since=since)
+
+    assert merged.count == len(recent)
+    _assert_close(merged, np.array(recent))
+    assert window.merged("claude").count == 1000
+    assert len(window.buckets("claude")) == 5
+    assert sorted(window.keys()) == ["claude", "gemini"]
+
+
+def test_window_prune_drops_old_buckets():
+    window = SketchWindow(bucket_s=60.0)
+    for minute in range(3):
+        window.add("claude", 100.0, timestamp=600.0 + minute * 60)
+    window.add("gemini", 100.0, timestamp=600.0)
+
+    window.prune(before=720.0)
+
+    assert [start for start, _sketch in window.buckets("claude")] == [720.0]
+    assert window.keys() == ["claude"]
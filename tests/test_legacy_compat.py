@@ -0,0 +1,67 @@
+"""Tests for the legacy log-reader adapter over BaseCommReader."""
+
+from __future__ import annotations
+
+import json
+from pathlib import Path
+from typing import List, Optional
+
+from lib.providers.base import BaseCommReader, CommMessage
+from lib.providers.legacy_compat import LegacyLogReaderAdapter
+
+
+class _JsonlReader(BaseCommReader):
+    """One JSON object per line, in a fixed session file."""
+
+    tail_limit = 10
+
+    def __init__(self, session_file: Path):
+        super().__init__("test", home_dir=str(session_file.parent))
+        self.session_file = session_file
+
+    def _default_home(self) -> str:
+        return str(self.session_file.parent)
+
+    def _find_session_file(self) -> Optional[Path]:
+        return self.session_file
+
+    def _parse_messages(self, content: str) -> List[CommMessage]:
+        return [
+            CommMessage(role=row["role"], content=row["content"], timestamp=0.0)
+            for row in map(json.loads, content.splitlines()) if row
+        ]
+
+
+def _append(session_file: Path, *contents: str) -> None:
+    with open(session_file, "a", encoding="utf-8") as handle:
+        for content in contents:
+            handle.write(json.dumps({"role": "assistant", "content": content}) + "\n")
+
+
+def test_state_counts_messages_beyond_the_tail(tmp_path):
+    session_file = tmp_path / "session.jsonl"
+    _append(session_file, *(f"m{i}" for i in range(25)))
+    adapter = LegacyLogReaderAdapter(_JsonlReader(session_file))
+
+    state = adapter.capture_state()
+
+    assert state["message_count"] == 25
+    # Nothing new was written, so the previous reply must not be returned again
+    message, state = adapter.try_get_message(state)
+    assert message is None
+    message, _ = adapter.wait_for_message(state, timeout=0.0, poll_interval=0.01)
+    assert message is None
+
+    _append(session_file, "m25")
+    message, state = adapter.try_get_message(state)
+    assert message == "m25"
+    assert state["message_count"] == 26
+
+
+def test_state_without_session_file(tmp_path):
+    adapter = LegacyLogReaderAdapter(_JsonlReader(tmp_path / "missing.jsonl"))
+
+    state = adapter.capture_state()
+
+    assert state["message_count"] == 0
+    assert state["session_path"] is None
@@ -0,0 +1,165 @@
+"""Tests for the staged pre_request pipeline of MemoryMiddleware."""
+
+from __future__ import annotations
+
+import threading
+import time
+
+import pytest
+
+from lib.gateway.middleware import memory_middleware_core as core
+from lib.gateway.middleware.memory_middleware import MemoryMiddleware
+
+
+class _Memory:
+    def get_stats(self):
+        return {}
+
+    def search_conversations(self, query, limit=5):
+        return [{"provider": "claude", "question": query, "answer": "remembered answer"}]
+
+
+class _Registry:
+    def recommend_provider(self, keywords):
+        return [{"provider": "claude", "reason": "best"}]
+
+
+class _Skills:
+    def get_recommendations(self, message, remote_timeout_s=None):
+        return {"found": False}
+
+
+class _SystemContext:
+    def get_stats(self):
+        return {}
+
+    def get_relevant_context(self, keywords, provider):
+        return "system context"
+
+
+@pytest.fixture
+def middleware(monkeypatch):
+    monkeypatch.setattr(core, "CCBLightMemory", _Memory)
+    monkeypatch.setattr(core, "CCBRegistry", _Registry)
+    monkeypatch.setattr(core, "SkillsDiscoveryService", _Skills)
+    monkeypatch.setattr(core, "SystemContextBuilder", _SystemContext)
+    monkeypatch.setattr(core, "HAS_HEURISTIC", False)
+    created = []
+
+    def build(**memory_config) -> MemoryMiddleware:
+        config = {
+            "memory": {"injection_budget_ms": 400, **memory_config},
+            "skills": {"auto_discover": True},
+        }
+        instance = MemoryMiddleware(config)
+        created.append(instance)
+        return instance
+
+    yield build
+    for instance in created:
+        instance.close()
+
+
+def _slow(seconds: float, result):
+    def stage(*args, **kwargs):
+        time.sleep(seconds)
+        return result
+    return stage
+
+
+@pytest.mark.asyncio
+async def test_all_stages_contribute_when_on_time(middleware):
+    mw = middleware()
+    mw._extract_keywords = lambda text, timeout_s=None: ["react"]
+
+    request = await mw.pre_request({"provider": "claude", "message": "use react"})
+
+    assert request["_memory_injected"] and request["_memory_count"] == 1
+    assert "system context" in request["message"] and "remembered answer" in request["message"]
+    assert "_injection_skipped_stages" not in request
+    assert mw.get_stats()["stage_timeouts"] == {} and mw.get_stats()["stage_shed"] == {}
+
+
+@pytest.mark.asyncio
+async def test_slow_keyword_stage_falls_back_to_regex(middleware):
+    mw = middleware(stage_timeouts_ms={"keywords": 50})
+    mw._extract_keywords = _slow(0.5, ["never"])
+    seen = []
+    mw._search_relevant_memories = lambda keywords, request_id: seen.append(keywords) or []
+
+    started = time.monotonic()
+    request = await mw.pre_request({"provider": "claude", "message": "frontend react hooks"})
+
+    assert time.monotonic() - started < 0.3
+    assert request["_injection_skipped_stages"] == ["keywords"]
+    assert seen == [["frontend", "react", "hooks"]]
+    assert mw.get_stats()["stage_timeouts"] == {"keywords": 1}
+
+
+@pytest.mark.asyncio
+async def test_total_budget_bounds_injection(middleware):
+    mw = middleware(injection_budget_ms=150, stage_timeouts_ms={"retrieval": 5000})
+    mw._extract_keywords = lambda text, timeout_s=None: ["react"]
+    mw._search_relevant_memories = _slow(1.0, [{"answer": "late"}])
+
+    started = time.monotonic()
+    request = await mw.pre_request({"provider": "claude", "message": "react"})
+
+    assert time.monotonic() - started < 0.5
+    assert request["_injection_skipped_stages"] == ["retrieval"]
+    # Stages that finished in time are still injected
+    assert "system context" in request["message"] and "late" not in request["message"]
+
+
+@pytest.mark.asyncio
+async def test_busy_external_pool_sheds_instead_of_queueing(middleware):
+    mw = middleware(external_stage_workers=1, stage_timeouts_ms={"keywords": 50})
+    release = threading.Event()
+    calls = []
+
+    def stuck_keywords(text, timeout_s=None):
+        calls.append(text)
+        release.wait(5.0)
+        return ["stuck"]
+
+    mw._extract_keywords = stuck_keywords
+    mw.enable_skill_discovery = False
+    try:
+        first = await mw.pre_request({"provider": "claude", "message": "first"})
+        # The abandoned stage still holds the only external worker
+        second = await mw.pre_request({"provider": "claude", "message": "second"})
+    finally:
+        release.set()
+
+    assert first["_injection_skipped_stages"] == ["keywords"]
+    assert second["_injection_skipped_stages"] == ["keywords"]
+    assert calls == ["first"]
+    stats = mw.get_stats()
+    assert stats["stage_timeouts"] == {"keywords": 1}
+    assert stats["stage_shed"] == {"keywords": 1}
+
+    # Once the worker returns its slot, the stage runs again
+    mw._extract_keywords = lambda text, timeout_s=None: ["react"]
+    deadline = time.monotonic() + 2.0
+    while not mw._external_slots.acquire(blocking=False):
+        assert time.monotonic() < deadline
+        time.sleep(0.01)
+    mw._external_slots.release()
+    third = await mw.pre_request({"provider": "claude", "message": "third"})
+    assert "_injection_skipped_stages" not in third
+
+
+@pytest.mark.asyncio
+async def test_failing_stage_is_ignored(middleware):
+    mw = middleware()
+    mw._extract_keywords = lambda text, timeout_s=None: ["react"]
+
+    def broken(keywords, provider):
+        raise RuntimeError("boom")
+
+    mw.system_context.get_relevant_context = broken
+
+    request = await mw.pre_request({"provider": "claude", "message": "react"})
+
+    assert "system context" not in request["message"] and "remembered answer" in request["message"]
+    assert "_injection_skipped_stages" not in request
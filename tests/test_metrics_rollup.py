@@ -0,0 +1,171 @@
+"""Tests for the provider metrics rollup and its StateStore persistence."""
+
+from __future__ import annotations
+
+import random
+import sqlite3
+import time
+
+import pytest
+
+from gateway.metrics_rollup import MetricsRollup, RollupTier, default_tiers
+from gateway.state_store import StateStore
+
+
+NOW = 1_700_000_123.4
+
+
+def _expected_count(rollup: MetricsRollup, events, since: float) -> int:
+    """Window start rounded down to the finest tier still retaining it."""
+    finest = next(t for t in rollup.tiers if since >= NOW - t.retention_s)
+    start = finest.bucket_start(since)
+    return sum(1 for ts, _latency in events if ts >= start)
+
+
+def test_window_covers_each_event_exactly_once():
+    rollup = MetricsRollup()
+    rng = random.Random(42)
+    events = [(NOW - rng.uniform(0, 72 * 3600), rng.uniform(10, 5000)) for _ in range(3000)]
+    # Dense traffic near the leading edge, where the 1s tier is used
+    events += [(NOW - rng.uniform(0, 900), rng.uniform(10, 5000)) for _ in range(1000)]
+    for ts, latency in events:
+        rollup.record("claude", latency_ms=latency, timestamp=ts)
+    rollup.prune(NOW)
+
+    for age in [5, 59.5, 300, 601, 3599, 3600.5, 7200, 47 * 3600, 49 * 3600, 71 * 3600]:
+        since = NOW - age
+        summary = rollup.summary("claude", since=since, now=NOW)
+        assert summary.count == _expected_count(rollup, events, since), age
+        assert summary.latency.count == summary.count
+
+
+def test_window_start_precision_per_tier():
+    hour = 1_699_999_200.0
+    now = hour + 45 * 60 + 30
+    rollup = MetricsRollup()
+    for offset in (300.5, 299.5, 30 * 60 + 30, 29 * 60, 50 * 3600 + 1800, 49 * 3600 + 60):
+        rollup.record("claude", timestamp=now - offset)
+    rollup.prune(now)
+
+    # Last 10 minutes: exact to the second
+    assert rollup.summary("claude", since=now - 300, now=now).count == 1
+    # Last 48 hours: rounded down to the minute (the 30m30s event is on a boundary)
+    assert rollup.summary("claude", since=now - 30 * 60, now=now).count == 4
+    assert rollup.summary("claude", since=hour + 15 * 60 + 59, now=now).count == 4
+    assert rollup.summary("claude", since=hour + 16 * 60 + 1, now=now).count == 3
+    # Beyond 48 hours: rounded down to the hour
+    assert rollup.summary("claude", since=now - 50 * 3600, now=now).count == 6
+    assert rollup.summary("claude", since=now - 49 * 3600, now=now).count == 5
+    assert rollup.summary("claude", since=now - 48.5 * 3600, now=now).count == 4
+    assert rollup.summary("claude", now=now).count == 6
+
+
+def test_errors_and_latency_are_merged_across_tiers():
+    rollup = MetricsRollup()
+    latencies = [float(ms) for ms in range(100, 1100)]
+    for i, latency in enumerate(latencies):
+        rollup.record("claude", success=i % 4 != 0, latency_ms=latency, timestamp=NOW - i * 60)
+    rollup.record("gemini", latency_ms=1.0, timestamp=NOW)
+
+    summary = rollup.summary("claude", since=NOW - 24 * 3600, now=NOW)
+
+    window = latencies[: 24 * 60 + 1]
+    assert summary.count == len(window)
+    assert summary.errors == sum(1 for i in range(len(window)) if i % 4 == 0)
+    assert summary.latency.min == min(window) and summary.latency.max == max(window)
+    assert summary.latency.quantile(0.5) == pytest.approx(sorted(window)[len(window) // 2], rel=0.01)
+    assert rollup.providers() == ["claude", "gemini"]
+
+
+def test_old_buckets_are_downsampled_by_prune():
+    rollup = MetricsRollup(default_tiers(hourly_retention_s=72 * 3600.0))
+    for i in range(4 * 3600):
+        rollup.record("claude", timestamp=NOW - i)
+
+    cutoffs = rollup.prune(NOW)
+
+    buckets = rollup.stats()["buckets"]
+    assert buckets["1s"] <= 601
+    assert buckets["60s"] == 4 * 60 + 1
+    assert cutoffs[1] == int(NOW - 600)
+    # The dropped seconds are still counted by the coarser tiers
+    start = rollup.tiers[1].bucket_start(NOW - 2 * 3600)
+    assert rollup.summary("claude", since=NOW - 2 * 3600, now=NOW).count == int(NOW - start) + 1
+    assert rollup.summary("claude", now=NOW).count == 4 * 3600
+
+
+def test_unknown_tiers_are_ignored_on_load():
+    rollup = MetricsRollup([RollupTier(60, 3600.0)])
+    rollup.record("claude", timestamp=NOW)
+    (key, bucket), = rollup.drain_dirty()
+
+    rollup.load(1, "claude", NOW, bucket)
+    rollup.load(60, "claude", key[2], bucket)
+
+    assert rollup.summary("claude", now=NOW).count == 2
+    assert rollup.drain_dirty() == []
+
+
+def _rollup_rows(db_path) -> int:
+    with sqlite3.connect(str(db_path)) as conn:
+        return conn.execute("SELECT COUNT(*) FROM metrics_rollup").fetchone()[0]
+
+
+def test_store_metrics_are_flushed_by_timer_and_reloaded(tmp_path):
+    db_path = tmp_path / "gateway.db"
+    store = StateStore(str(db_path))
+    store.METRICS_FLUSH_INTERVAL_S = 0.05
+    for latency in (100.0, 200.0, 300.0):
+        store.record_metric("claude", latency_ms=latency)
+    store.record_metric("claude", success=False)
+    timer = store._metrics_timer
+    assert timer is not None and _rollup_rows(db_path) == 0
+
+    timer.join(timeout=2.0)
+    store.flush_writes()
+
+    assert store._metrics_timer is None
+    # One row per changed bucket, not per event
+    assert _rollup_rows(db_path) == sum(store.metrics_rollup.stats()["buckets"].values()) < 8
+    store.close()
+
+    reopened = StateStore(str(db_path))
+    try:
+        metrics = reopened.get_provider_metrics("claude", hours=1)
+    finally:
+        reopened.close()
+    assert metrics["total_requests"] == 4
+    assert metrics["successful_requests"] == 3
+    assert metrics["max_latency_ms"] == 300.0
+    assert metrics["p50_latency_ms"] == pytest.approx(200.0, rel=0.01)
+
+
+def test_legacy_rows_are_folded_once_and_kept(tmp_path):
+    db_path = tmp_path / "gateway.db"
+    StateStore(str(db_path)).close()
+    now = time.time()
+
+    def insert_legacy(count: int) -> None:
+        with sqlite3.connect(str(db_path)) as conn:
+            conn.executemany(
+                "INSERT INTO metrics (provider, event_type, latency_ms, success, timestamp) "
+                "VALUES (?, 'request', ?, ?, ?)",
+                [("claude", 100.0 + i, 1, now - 120 - i) for i in range(count)],
+            )
+
+    def reopen_total() -> int:
+        store = StateStore(str(db_path))
+        try:
+            return store.get_provider_metrics("claude", hours=1)["total_requests"]
+        finally:
+            store.close()
+
+    insert_legacy(5)
+    assert reopen_total() == 5
+    assert reopen_total() == 5  # Not folded a second time
+
+    insert_legacy(2)
+    assert reopen_total() == 7
+
+    with sqlite3.connect(str(db_path)) as conn:
+        assert conn.execute("SELECT COUNT(*) FROM metrics").fetchone()[0] == 7
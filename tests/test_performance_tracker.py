@@ -0,0 +1,26 @@
+"""Tests for PerformanceTracker window statistics."""
+
+from __future__ import annotations
+
+import time
+
+from performance_tracker import PerformanceMetric, PerformanceTracker
+
+
+def test_counts_are_exact_while_buckets_round_the_window_out(tmp_path):
+    # One huge bucket, so the sketch window always covers the stale metric
+    tracker = PerformanceTracker(str(tmp_path / "perf.db"), bucket_seconds=10 ** 9)
+    now = time.time()
+    tracker.record_metric(PerformanceMetric("claude", 900.0, False, 500, timestamp=now - 2 * 3600))
+    tracker.record_metric(PerformanceMetric("claude", 100.0, True, 10, timestamp=now - 60))
+    tracker.record_metric(PerformanceMetric("claude", 300.0, True, None, timestamp=now - 30))
+
+    stats = tracker.get_provider_stats("claude", hours=1)
+
+    assert (stats.total_requests, stats.successful_requests, stats.failed_requests) == (2, 2, 0)
+    assert stats.success_rate == 1.0 and stats.total_tokens == 10
+    assert (stats.min_latency_ms, stats.avg_latency_ms, stats.max_latency_ms) == (100.0, 200.0, 300.0)
+    # Percentiles still come from the whole bucket
+    assert tracker.get_latency_sketch("claude", hours=1).count == 3
+    assert tracker.get_provider_stats("gemini", hours=1) is None
+    assert [s.provider for s in tracker.get_all_stats(hours=1)] == ["claude"]
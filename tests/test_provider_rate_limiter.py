@@ -0,0 +1,120 @@
+"""Tests for the per-provider RateLimiter in lib/rate_limiter.py."""
+
+from __future__ import annotations
+
+import asyncio
+import sqlite3
+import threading
+import time
+
+import pytest
+
+from rate_limiter import RateLimitConfig, RateLimiter
+
+
+@pytest.fixture
+def limiter(tmp_path):
+    limiter = RateLimiter(
+        db_path=str(tmp_path / "ratelimit.db"),
+        config={
+            "fast": RateLimitConfig(rpm=600, burst_size=2),
+            "slow": RateLimitConfig(rpm=60, burst_size=1),
+            "off": RateLimitConfig(rpm=1, burst_size=1, enabled=False),
+        },
+        flush_interval_s=60.0,
+    )
+    yield limiter
+    limiter.close()
+
+
+def _counter_rows(limiter: RateLimiter) -> int:
+    with sqlite3.connect(limiter.db_path) as conn:
+        return conn.execute("SELECT COUNT(*) FROM rate_limit_counters").fetchone()[0]
+
+
+def test_burst_then_refill(limiter):
+    assert [limiter.acquire("fast") for _ in range(3)] == [True, True, False]
+    assert 0.0 < limiter.get_wait_time("fast") <= 0.1
+
+    time.sleep(0.12)
+    assert limiter.acquire("fast")
+    assert all(limiter.acquire("off") for _ in range(5))
+
+
+def test_blocking_wait_does_not_hold_other_providers(limiter):
+    assert limiter.acquire("slow")
+    started = threading.Event()
+
+    def blocked() -> None:
+        started.set()
+        limiter.acquire("slow", block=True, timeout_s=5.0)
+
+    thread = threading.Thread(target=blocked, daemon=True)
+    thread.start()
+    started.wait()
+    time.sleep(0.05)
+
+    start = time.monotonic()
+    assert limiter.acquire("fast")
+    assert time.monotonic() - start < 0.05
+    assert thread.is_alive()
+
+
+def test_blocking_acquire_gives_up_past_timeout(limiter):
+    assert limiter.acquire("slow")
+
+    start = time.monotonic()
+    assert not limiter.acquire("slow", block=True, timeout_s=0.2)
+    assert time.monotonic() - start < 0.1  # The 1s refill cannot fit, so no sleep
+
+
+@pytest.mark.asyncio
+async def test_acquire_async_waits_without_blocking_the_loop(limiter):
+    limiter.acquire("fast")
+    limiter.acquire("fast")
+    ticks = 0
+
+    async def ticker() -> None:
+        nonlocal ticks
+        while True:
+            ticks += 1
+            await asyncio.sleep(0.01)
+
+    task = asyncio.ensure_future(ticker())
+    try:
+        assert await limiter.acquire_async("fast", timeout_s=1.0)
+    finally:
+        task.cancel()
+
+    assert ticks >= 3
+    assert await limiter.acquire_async("slow", block=False)
+    assert not await limiter.acquire_async("slow", block=False)
+
+
+def test_accounting_is_batched_until_flush(limiter):
+    for _ in range(50):
+        limiter.acquire("fast")
+    assert _counter_rows(limiter) == 0
+
+    limiter.flush()
+
+    # One row per provider and second, not per request
+    assert 1 <= _counter_rows(limiter) <= 2
+    stats = limiter.get_stats("fast")
+    assert stats.total_requests == 50
+    assert stats.total_limited == 48
+    assert stats.current_rpm == 50
+
+
+def test_bucket_state_survives_restart(tmp_path):
+    db_path = str(tmp_path / "ratelimit.db")
+    config = {"slow": RateLimitConfig(rpm=6, burst_size=1)}
+    first = RateLimiter(db_path=db_path, config=config, flush_interval_s=60.0)
+    assert first.acquire("slow")
+    first.close()
+
+    second = RateLimiter(db_path=db_path, config=config, flush_interval_s=60.0)
+    try:
+        assert not second.acquire("slow")
+    finally:
+        second.close()
@@ -0,0 +1,207 @@
+"""Tests for the gateway rate limiter and its middleware."""
+
+from __future__ import annotations
+
+import secrets
+
+import pytest
+from fastapi import FastAPI, Request
+from fastapi.testclient import TestClient
+
+import gateway.rate_limiter as rate_limiter_module
+from gateway.auth import APIKeyStore, AuthConfig, AuthMiddleware
+from gateway.rate_limiter import RateLimitConfig, RateLimiter, RateLimitMiddleware, TimingWheel
+
+
+def _app(store, burst_size: int = 3):
+    """App wired like ``create_app``: rate limiting runs before auth."""
+    key_store = APIKeyStore(store)
+    limiter = RateLimiter(RateLimitConfig(requests_per_minute=1, burst_size=burst_size, endpoint_limits={}))
+    auth_config = AuthConfig(enabled=True, allow_localhost=False, public_paths=["/api/health"])
+    auth = AuthMiddleware(auth_config, key_store)
+    rate_limit = RateLimitMiddleware(limiter, key_store=key_store)
+
+    app = FastAPI()
+
+    @app.get("/api/thing")
+    async def thing():
+        return {"ok": True}
+
+    @app.middleware("http")
+    async def auth_handler(request: Request, call_next):
+        return await auth(request, call_next)
+
+    @app.middleware("http")
+    async def rate_limit_handler(request: Request, call_next):
+        return await rate_limit(request, call_next)
+
+    return app, key_store, limiter
+
+
+def test_bad_keys_are_throttled_per_ip_before_lookup(store):
+    app, key_store, _limiter = _app(store)
+    client = TestClient(app)
+
+    statuses = [
+        client.get("/api/thing", headers={"X-API-Key": secrets.token_hex(8)}).status_code
+        for _ in range(6)
+    ]
+
+    assert statuses == [401, 401, 401, 429, 429, 429]
+    # Throttled requests never reached the key table
+    assert key_store.cache_misses == 3
+
+
+def test_missing_key_is_throttled_per_ip(store):
+    app, _key_store, _limiter = _app(store, burst_size=2)
+    client = TestClient(app)
+
+    statuses = [client.get("/api/thing").status_code for _ in range(3)]
+
+    assert statuses == [401, 401, 429]
+
+
+def test_valid_key_uses_its_own_bucket(store):
+    app, key_store, limiter = _app(store, burst_size=2)
+    _api_key, raw_key = key_store.create_key("client", rate_limit_rpm=1)
+    client = TestClient(app)
+
+    statuses = [client.get("/api/thing", headers={"X-API-Key": raw_key}).status_code for _ in range(3)]
+
+    assert statuses == [200, 200, 429]
+    # Verifying the uncached key did not charge the client IP
+    assert [key.split(":")[0] for key in _bucket_keys(limiter)] == ["key"]
+
+
+def test_verifying_a_valid_key_leaves_the_ip_budget_alone(store):
+    app, key_store, _limiter = _app(store, burst_size=2)
+    client = TestClient(app)
+    assert client.get("/api/thing", headers={"X-API-Key": "ccb_bad"}).status_code == 401
+    _api_key, raw_key = key_store.create_key("client")
+
+    assert client.get("/api/thing", headers={"X-API-Key": raw_key}).status_code == 200
+
+    # One IP token is still left for the next unauthenticated request
+    statuses = [client.get("/api/thing", headers={"X-API-Key": "ccb_bad"}).status_code for _ in range(2)]
+    assert statuses == [401, 429]
+
+
+def _bucket_keys(limiter: RateLimiter):
+    keys = []
+    for shard in limiter._shards:
+        keys.extend(shard.buckets)
+    return keys
+
+
+class _Clock:
+    def __init__(self, now: float = 1_000_000.0):
+        self.now = now
+
+    def time(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = _Clock()
+    monkeypatch.setattr(rate_limiter_module, "time", clock)
+    return clock
+
+
+def test_bucket_refills_lazily(clock):
+    limiter = RateLimiter(RateLimitConfig(requests_per_minute=60, burst_size=2, endpoint_limits={}))
+
+    assert [limiter.check(ip_address="1.1.1.1").allowed for _ in range(3)] == [True, True, False]
+    denied = limiter.check(ip_address="1.1.1.1")
+    assert denied.reset_after_s == pytest.approx(1.0)
+    assert denied.to_headers()["Retry-After"] == "1"
+
+    clock.now += 0.5
+    assert not limiter.check(ip_address="1.1.1.1").allowed
+    clock.now += 0.5
+    assert limiter.check(ip_address="1.1.1.1").allowed
+    # Refill never exceeds the burst size
+    clock.now += 3600
+    assert limiter.check(ip_address="1.1.1.1").remaining == 1
+
+
+def test_per_key_limits_and_endpoint_classes(clock):
+    limiter = RateLimiter(RateLimitConfig(
+        requests_per_minute=60,
+        burst_size=1,
+        endpoint_limits={"/api/ask": 30, "/api/ask/stream": 6},
+    ))
+
+    assert limiter.check(api_key_id="k1", endpoint="/api/ask").allowed
+    assert not limiter.check(api_key_id="k1", endpoint="/api/ask").allowed
+    # Other keys, endpoint classes and the IP path have their own buckets
+    assert limiter.check(api_key_id="k2", endpoint="/api/ask").allowed
+    assert limiter.check(api_key_id="k1", endpoint="/api/status").allowed
+    assert limiter.check(ip_address="1.1.1.1", endpoint="/api/ask").allowed
+
+    stream = limiter.check(api_key_id="k3", endpoint="/api/ask/stream")
+    assert stream.limit == 6 and stream.key == "key:k3:ep:/api/ask/stream"
+
+    # The key's own rpm overrides the endpoint limit, and follows changes
+    assert limiter.check(api_key_id="k4", endpoint="/api/ask", key_rate_limit=120).limit == 120
+    clock.now += 0.5
+    assert limiter.check(api_key_id="k4", endpoint="/api/ask", key_rate_limit=120).allowed
+    assert limiter.check(api_key_id="k4", endpoint="/api/ask", key_rate_limit=6).limit == 6
+
+
+def test_idle_buckets_are_evicted_by_the_wheel(clock):
+    limiter = RateLimiter(RateLimitConfig(
+        requests_per_minute=60, burst_size=5, endpoint_limits={}, shards=1, idle_ttl_s=320.0,
+    ))
+    for i in range(100):
+        limiter.check(ip_address=f"10.0.0.{i}")
+    assert limiter.get_stats()["total_buckets"] == 100
+
+    clock.now += 200
+    limiter.check(ip_address="10.0.0.0")  # Keeps this one alive
+    clock.now += 200
+    limiter.check(ip_address="10.0.1.1")
+
+    stats = limiter.get_stats()
+    assert stats["evicted_buckets"] == 99
+    assert sorted(_bucket_keys(limiter)) == ["ip:10.0.0.0:ep:*", "ip:10.0.1.1:ep:*"]
+
+
+def test_bucket_is_kept_until_it_has_refilled(clock):
+    # A full refill takes 600s, longer than the idle TTL
+    limiter = RateLimiter(RateLimitConfig(
+        requests_per_minute=1, burst_size=10, endpoint_limits={}, shards=1, idle_ttl_s=60.0,
+    ))
+    for _ in range(10):
+        limiter.check(ip_address="1.1.1.1")
+    assert not limiter.check(ip_address="1.1.1.1").allowed
+
+    clock.now += 120
+    limiter.check(ip_address="2.2.2.2")
+    assert limiter.get_stats()["evicted_buckets"] == 0
+    # Two tokens refilled since; a re-created bucket would start full
+    assert limiter.check(ip_address="1.1.1.1").remaining == 1
+
+    clock.now += 700
+    limiter.check(ip_address="2.2.2.2")
+    assert "ip:1.1.1.1:ep:*" not in _bucket_keys(limiter)
+
+
+def test_timing_wheel_fires_wrapped_deadlines_early():
+    wheel = TimingWheel(tick_s=1.0, size=4, now=0.0)
+    wheel.schedule("soon", 2.0)
+    wheel.schedule("later", 10.0)  # Past the wheel's span: shares slot 2
+
+    # Callers re-check the real deadline of every fired key
+    assert sorted(wheel.advance(2.0)) == ["later", "soon"]
+    assert len(wheel) == 0
+
+
+def test_timing_wheel_visits_each_slot_once_after_long_idle():
+    wheel = TimingWheel(tick_s=1.0, size=4, now=0.0)
+    for i in range(4):
+        wheel.schedule(f"k{i}", 1.0 + i)
+
+    assert sorted(wheel.advance(1000.0)) == ["k0", "k1", "k2", "k3"]
+    assert wheel.advance(1001.0) == []
+    assert wheel.next_advance == 1002.0
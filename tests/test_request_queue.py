@@ -0,0 +1,167 @@
+"""Tests for the gateway RequestQueue."""
+
+from __future__ import annotations
+
+import asyncio
+import threading
+
+import pytest
+
+from gateway.models import GatewayRequest, GatewayResponse, RequestStatus
+from gateway.request_queue import AsyncRequestQueue, RequestQueue
+
+
+def _request(message: str = "hello", provider: str = "claude", **kwargs) -> GatewayRequest:
+    return GatewayRequest.create(provider=provider, message=message, **kwargs)
+
+
+@pytest.fixture
+def queue(store):
+    yield RequestQueue(store, max_size=3, max_concurrent=10)
+    store.close()
+
+
+@pytest.mark.asyncio
+async def test_enqueue_persists_row_before_dequeue(queue, store):
+    request = _request()
+
+    assert await queue.enqueue(request)
+
+    assert store.get_request(request.id).status == RequestStatus.QUEUED
+    assert queue.dequeue().id == request.id
+
+
+@pytest.mark.asyncio
+async def test_enqueue_writes_off_the_event_loop(queue, store):
+    loop_thread = threading.get_ident()
+    writer_callers = []
+    original = store.create_request
+
+    def create_request(request, *args, **kwargs):
+        writer_callers.append(threading.get_ident())
+        return original(request, *args, **kwargs)
+
+    store.create_request = create_request
+
+    assert await queue.enqueue(_request())
+    assert writer_callers and loop_thread not in writer_callers
+
+
+@pytest.mark.asyncio
+async def test_concurrent_enqueues_respect_max_size(queue):
+    results = await asyncio.gather(*(queue.enqueue(_request(f"m{i}")) for i in range(5)))
+
+    assert results.count(True) == 3
+    assert queue.get_queue_depth() == 3
+
+
+@pytest.mark.asyncio
+async def test_process_loop_dispatches_and_completes(queue, store):
+    async_queue = AsyncRequestQueue(queue)
+    handled = []
+
+    async def handler(request: GatewayRequest) -> None:
+        handled.append(request.id)
+        await store.aio.run(queue.mark_completed, request.id)
+
+    request = _request()
+    await queue.enqueue(request)
+    await async_queue.start(handler)
+    try:
+        async_queue.notify()
+        result = await queue.completions.wait(request.id, timeout=5.0)
+    finally:
+        await async_queue.stop()
+
+    assert handled == [request.id]
+    assert result.status == RequestStatus.COMPLETED
+    assert store.get_request(request.id).status == RequestStatus.COMPLETED
+
+
+@pytest.mark.asyncio
+async def test_duplicate_prompt_completes_with_leader_response(queue, store):
+    leader, follower = _request("same"), _request("same")
+    await queue.enqueue(leader)
+    await queue.enqueue(follower)
+
+    assert queue.get_queue_depth() == 1
+    assert follower.metadata["coalesced_with"] == leader.id
+    assert queue.dequeue().id == leader.id
+
+    queue.mark_processing(leader.id)
+    queue.mark_completed(
+        leader.id,
+        result=GatewayResponse(request_id=leader.id, status=RequestStatus.COMPLETED, response="answer"),
+    )
+
+    result = await queue.completions.wait(follower.id, timeout=1.0)
+    assert result.status == RequestStatus.COMPLETED
+    assert result.response.response == "answer"
+    assert result.response.metadata["coalesced_from"] == leader.id
+    assert store.get_response(follower.id).response == "answer"
+    assert queue.stats()["coalesced_total"] == 1
+
+
+@pytest.mark.asyncio
+async def test_distinct_prompts_and_bypass_are_not_coalesced(queue):
+    await queue.enqueue(_request("one"))
+    await queue.enqueue(_request("one", provider="gemini"))
+    await queue.enqueue(_request("one", metadata={"cache_bypass": True}))
+
+    assert queue.get_queue_depth() == 3
+    assert queue.stats()["coalesced_total"] == 0
+
+
+@pytest.mark.asyncio
+async def test_followers_count_against_max_size(queue):
+    assert await queue.enqueue(_request("same"))
+    assert await queue.enqueue(_request("same"))
+    assert await queue.enqueue(_request("other"))
+
+    assert not await queue.enqueue(_request("same"))
+    assert not await queue.enqueue(_request("third"))
+
+
+@pytest.mark.asyncio
+async def test_follower_priority_promotes_queued_leader(queue):
+    low = _request("same", priority=10)
+    await queue.enqueue(_request("other", priority=50))
+    await queue.enqueue(low)
+
+    await queue.enqueue(_request("same", priority=90))
+
+    assert low.priority == 90
+    assert queue.dequeue().id == low.id
+
+
+@pytest.mark.asyncio
+async def test_follower_times_out_on_its_own_timeout(queue, store):
+    leader = _request("same", timeout_s=300.0)
+    follower = _request("same", timeout_s=0.05)
+    await queue.enqueue(leader)
+    await queue.enqueue(follower)
+    queue.dequeue()
+    queue.mark_processing(leader.id)
+
+    await asyncio.sleep(0.1)
+    timed_out = queue.check_timeouts()
+
+    assert timed_out == [follower.id]
+    result = await queue.completions.wait(follower.id, timeout=1.0)
+    assert result.status == RequestStatus.TIMEOUT
+    assert store.get_request(follower.id).status == RequestStatus.TIMEOUT
+    assert store.get_request(leader.id).status == RequestStatus.PROCESSING
+    assert queue.stats()["coalesced_waiting"] == 0
+
+
+@pytest.mark.asyncio
+async def test_cancelled_leader_promotes_follower(queue, store):
+    leader, follower = _request("same"), _request("same")
+    await queue.enqueue(leader)
+    await queue.enqueue(follower)
+
+    assert queue.cancel(leader.id)
+
+    assert "coalesced_with" not in follower.metadata
+    assert queue.dequeue().id == follower.id
+    assert store.get_request(follower.id).status == RequestStatus.QUEUED
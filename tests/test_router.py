@@ -0,0 +1,14 @@
+"""Tests for SmartRouter provider performance scoring."""
+
+from __future__ import annotations
+
+from gateway.router import ProviderPerformance
+
+
+def test_from_metrics_keeps_zero_success_rate():
+    failing = ProviderPerformance.from_metrics("p", {"success_rate": 0.0, "total_requests": 20})
+    unknown = ProviderPerformance.from_metrics("p", {"success_rate": None})
+
+    assert failing.success_rate == 0.0
+    assert unknown.success_rate == 1.0
+    assert failing.calculate_score() < unknown.calculate_score()
@@ -0,0 +1,98 @@
+"""Tests for the semantic tier of the gateway response cache."""
+
+from __future__ import annotations
+
+import time
+from typing import Dict, List
+
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from gateway.cache import CacheConfig, CacheManager
+
+
+RESPONSE = "a cached answer that is long enough"
+
+
+class _BagOfWordsEmbedder:
+    """Deterministic stand-in for the sentence-transformers model."""
+
+    def __init__(self, dimension: int = 64):
+        self.dimension = dimension
+        self.vocabulary: Dict[str, int] = {}
+
+    def embed(self, text: str) -> List[float]:
+        vector = [0.0] * self.dimension
+        for word in text.replace("?", "").replace(",", "").split():
+            index = self.vocabulary.setdefault(word, len(self.vocabulary) % self.dimension)
+            vector[index] += 1.0
+        return vector
+
+
+@pytest.fixture
+def manager(store):
+    manager = CacheManager(store, CacheConfig(semantic_enabled=True, semantic_threshold=0.9))
+    manager._semantic._embedder = _BagOfWordsEmbedder()
+    return manager
+
+
+def test_reworded_prompt_hits(manager):
+    manager.put("claude", "how do I sort a python list", RESPONSE)
+
+    hit = manager.get_semantic("claude", "How do I sort a Python list?")
+    reordered = manager.get_semantic("claude", "python list, how do I sort a")
+
+    assert hit is not None and reordered is not None
+    entry, similarity = hit
+    assert entry.response == RESPONSE
+    assert similarity >= 0.9
+    assert manager.get_stats().semantic_hits == 2
+
+
+def test_related_but_different_prompt_misses(manager):
+    manager.put("claude", "how do I sort a python list", RESPONSE)
+
+    # Shares most words but asks something else; must stay below the threshold
+    assert manager.get_semantic("claude", "how do I reverse a python dict") is None
+    assert manager.get_semantic("claude", "explain monads in haskell") is None
+
+    stats = manager.get_stats()
+    assert stats.semantic_hits == 0
+    assert stats.semantic_misses == 2
+
+
+def test_matches_stay_within_provider_and_model(manager):
+    manager.put("claude", "how do I sort a python list", RESPONSE, model="opus")
+
+    assert manager.get_semantic("gemini", "how do I sort a python list") is None
+    assert manager.get_semantic("claude", "how do I sort a python list", model="haiku") is None
+    assert manager.get_semantic("claude", "how do I sort a python list", model="opus") is not None
+
+
+def test_reported_false_positive_stops_matching(manager):
+    entry = manager.put("claude", "how do I sort a python list", RESPONSE)
+    assert manager.get_semantic("claude", "how do I sort a python list quickly") is not None
+
+    assert manager.report_semantic_false_positive(entry.cache_key)
+
+    assert manager.get_semantic("claude", "how do I sort a python list quickly") is None
+    # The exact-match entry is kept
+    assert manager.get("claude", "how do I sort a python list").response == RESPONSE
+    assert manager.get_stats().semantic_false_positives == 1
+
+
+def test_expired_entries_never_match(manager):
+    manager.put("claude", "how do I sort a python list", RESPONSE, ttl_s=0.05)
+    time.sleep(0.1)
+
+    assert manager.get_semantic("claude", "how do I sort a python list") is None
+
+
+def test_invalidated_entry_is_dropped_from_index(manager):
+    entry = manager.put("claude", "how do I sort a python list", RESPONSE)
+
+    manager.invalidate(entry.cache_key)
+
+    assert manager.get_semantic("claude", "how do I sort a python list") is None
+    assert len(manager._semantic) == 0
@@ -0,0 +1,163 @@
+"""Tests for the provider session watcher (inotify and polling backends)."""
+
+from __future__ import annotations
+
+import ctypes
+import errno
+import os
+import threading
+import time
+from pathlib import Path
+
+import pytest
+
+from lib.providers import _watcher
+from lib.providers._watcher import SessionWatcher
+
+
+def _touch(path: Path, text: str = "{}\n", mtime_ns: int = None) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, "a", encoding="utf-8") as handle:
+        handle.write(text)
+    if mtime_ns is not None:
+        os.utime(path, ns=(mtime_ns, mtime_ns))
+
+
+def _settle(condition, timeout: float = 3.0) -> None:
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "condition not reached"
+        time.sleep(0.01)
+
+
+@pytest.fixture
+def watch(tmp_path):
+    watchers = []
+
+    def start(**kwargs) -> SessionWatcher:
+        watcher = SessionWatcher(tmp_path, poll_interval=0.05, **kwargs).start()
+        watchers.append(watcher)
+        return watcher
+
+    yield start
+    for watcher in watchers:
+        watcher.stop()
+
+
+def _wait_in_background(watcher: SessionWatcher, directories=None):
+    generation = watcher.generation
+    result = {}
+    thread = threading.Thread(
+        target=lambda: result.setdefault("woke", watcher.wait(generation, 3.0, directories)),
+        daemon=True,
+    )
+    thread.start()
+    return thread, result
+
+
+def test_inotify_indexes_new_sessions_and_wakes_waiters(tmp_path, watch):
+    _touch(tmp_path / "a" / "old.jsonl", mtime_ns=1_000_000_000)
+    watcher = watch()
+    if watcher.backend != "inotify":
+        pytest.skip("inotify is not available")
+    _settle(lambda: watcher.ready)
+    assert watcher.latest_in(tmp_path / "a") == tmp_path / "a" / "old.jsonl"
+
+    thread, result = _wait_in_background(watcher)
+    _touch(tmp_path / "a" / "b" / "new.jsonl")
+    thread.join(timeout=3.0)
+
+    assert result == {"woke": True}
+    _settle(lambda: watcher.latest() == tmp_path / "a" / "b" / "new.jsonl")
+    _touch(tmp_path / "a" / "ignored.txt")
+    _touch(tmp_path / "a" / ".hidden.jsonl")
+    time.sleep(0.1)
+    assert watcher.latest_in(tmp_path / "a") == tmp_path / "a" / "old.jsonl"
+
+
+def test_polling_sees_appends_in_waited_directories(tmp_path, watch):
+    session = tmp_path / "project" / "s1.jsonl"
+    _touch(session, mtime_ns=1_000_000_000)
+    _touch(tmp_path / "project" / "s2.jsonl", mtime_ns=2_000_000_000)
+    watcher = watch(force_polling=True)
+    assert watcher.backend == "poll"
+
+    thread, result = _wait_in_background(watcher, [session.parent])
+    _settle(lambda: watcher.ready)
+    assert watcher.latest_in(session.parent) == tmp_path / "project" / "s2.jsonl"
+    # An append does not change the directory mtime; only the waited-on
+    # directory's files are re-stated
+    generation = watcher.generation
+    thread.join(timeout=3.0)
+    thread, result = _wait_in_background(watcher, [session.parent])
+    time.sleep(0.1)
+    _touch(session)
+    thread.join(timeout=3.0)
+
+    assert result == {"woke": True} and watcher.generation > generation
+    assert watcher.latest_in(session.parent) == session
+
+
+def test_polling_goes_idle_without_waiters(tmp_path, watch, monkeypatch):
+    monkeypatch.setattr(_watcher, "POLL_LINGER_S", 0.05)
+    watcher = watch(force_polling=True)
+
+    # The first scan bumps the generation once the index is ready
+    watcher.wait(watcher.generation, 1.0)
+    assert watcher.ready
+
+    _settle(lambda: not watcher.ready)
+    _touch(tmp_path / "late.jsonl")
+    # Waking up again re-syncs the whole tree
+    watcher.wait(watcher.generation, 1.0)
+    _settle(lambda: watcher.latest() == tmp_path / "late.jsonl")
+
+
+class _ExhaustedLibc:
+    """Real inotify, but ``inotify_add_watch`` fails after ``allowed`` watches."""
+
+    def __init__(self, libc, allowed: int):
+        self._libc = libc
+        self.allowed = allowed
+
+    def inotify_init1(self, flags):
+        return self._libc.inotify_init1(flags)
+
+    def inotify_add_watch(self, fd, path, mask):
+        if self.allowed <= 0:
+            ctypes.set_errno(errno.ENOSPC)
+            return -1
+        self.allowed -= 1
+        return self._libc.inotify_add_watch(fd, path, mask)
+
+
+def test_failed_watch_falls_back_to_polling(tmp_path, watch, monkeypatch):
+    libc = _watcher._load_libc()
+    if libc is None:
+        pytest.skip("inotify is not available")
+    exhausted = _ExhaustedLibc(libc, allowed=1)
+    monkeypatch.setattr(_watcher, "_load_libc", lambda: exhausted)
+    _touch(tmp_path / "a" / "s1.jsonl", mtime_ns=1_000_000_000)
+
+    watcher = watch()
+
+    _settle(lambda: watcher.backend == "poll")
+    # The unwatched directory is still tracked, now by polling
+    watcher.wait(watcher.generation, 1.0, [tmp_path / "a"])
+    _settle(lambda: watcher.ready)
+    thread, result = _wait_in_background(watcher, [tmp_path / "a"])
+    _touch(tmp_path / "a" / "s2.jsonl")
+    thread.join(timeout=3.0)
+    assert result == {"woke": True}
+    _settle(lambda: watcher.latest_in(tmp_path / "a") == tmp_path / "a" / "s2.jsonl")
+
+
+def test_index_is_not_trusted_after_a_failed_watch(tmp_path, monkeypatch):
+    watcher = SessionWatcher(tmp_path)
+    watcher._ready = True
+    monkeypatch.setattr(_watcher, "_load_libc", lambda: _ExhaustedLibc(None, allowed=0))
+
+    watcher._add_watch(str(tmp_path))
+
+    assert not watcher.ready
+    assert watcher._watch_failed
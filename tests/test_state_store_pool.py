@@ -0,0 +1,100 @@
+"""Tests for the gateway StateStore write queue."""
+
+from __future__ import annotations
+
+import sqlite3
+import threading
+
+import pytest
+
+from gateway.state_store_pool import SQLiteWriteQueue
+
+
+@pytest.fixture
+def writer(tmp_path):
+    queue = SQLiteWriteQueue(tmp_path / "writes.db")
+    queue.execute("CREATE TABLE items (seq INTEGER PRIMARY KEY, value TEXT NOT NULL)")
+    yield queue
+    queue.stop()
+
+
+def _rows(writer):
+    conn = sqlite3.connect(str(writer.db_path))
+    try:
+        return conn.execute("SELECT seq, value FROM items ORDER BY rowid").fetchall()
+    finally:
+        conn.close()
+
+
+def test_writes_commit_in_submission_order(writer):
+    futures = [
+        writer.submit("INSERT INTO items (seq, value) VALUES (?, ?)", (i, f"v{i}"))
+        for i in range(200)
+    ]
+    writer.submit("UPDATE items SET value = 'last' WHERE seq = 199")
+    writer.flush()
+
+    assert all(f.done() for f in futures)
+    rows = _rows(writer)
+    assert [seq for seq, _ in rows] == list(range(200))
+    assert rows[-1] == (199, "last")
+
+
+def test_failing_statement_only_fails_its_caller(writer):
+    ok_before = writer.submit("INSERT INTO items (seq, value) VALUES (1, 'a')")
+    duplicate = writer.submit("INSERT INTO items (seq, value) VALUES (1, 'b')")
+    not_null = writer.submit("INSERT INTO items (seq, value) VALUES (2, NULL)")
+    ok_after = writer.submit("INSERT INTO items (seq, value) VALUES (3, 'c')")
+    writer.flush()
+
+    assert ok_before.result() == 1
+    assert ok_after.result() == 1
+    with pytest.raises(sqlite3.IntegrityError):
+        duplicate.result()
+    with pytest.raises(sqlite3.IntegrityError):
+        not_null.result()
+    assert _rows(writer) == [(1, "a"), (3, "c")]
+    assert writer.stats.errors == 2
+
+
+def test_executemany_rolls_back_as_a_unit(writer):
+    failed = writer.submit(
+        "INSERT INTO items (seq, value) VALUES (?, ?)",
+        [(1, "a"), (2, "b"), (1, "dup")],
+        many=True,
+    )
+    writer.flush()
+
+    with pytest.raises(sqlite3.IntegrityError):
+        failed.result()
+    assert _rows(writer) == []
+
+
+def test_flush_waits_for_fire_and_forget_writes(writer):
+    threads = [
+        threading.Thread(
+            target=lambda base=base: [
+                writer.submit("INSERT INTO items (seq, value) VALUES (?, 'x')", (base + i,))
+                for i in range(50)
+            ]
+        )
+        for base in range(0, 400, 100)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    writer.flush()
+
+    assert len(_rows(writer)) == 200
+    assert writer.pending() == 0
+
+
+def test_stop_drains_queue_and_rejects_new_writes(writer):
+    for i in range(20):
+        writer.submit("INSERT INTO items (seq, value) VALUES (?, 'x')", (i,))
+    writer.stop()
+
+    assert len(_rows(writer)) == 20
+    with pytest.raises(sqlite3.ProgrammingError):
+        writer.submit("INSERT INTO items (seq, value) VALUES (99, 'x')")
@@ -0,0 +1,278 @@
+"""Tests for the live stream bus, its SSE/WebSocket routes and ccb-tail."""
+
+from __future__ import annotations
+
+import json
+import shutil
+import subprocess
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from urllib.parse import parse_qs, urlparse
+
+import pytest
+from fastapi import APIRouter, FastAPI
+from fastapi.testclient import TestClient
+
+import gateway.stream_bus as stream_bus_module
+import gateway.stream_output as stream_output_module
+from gateway.gateway_config import GatewayConfig
+from gateway.routes.runtime_management import register_runtime_management_routes
+from gateway.stream_bus import StreamBus, iter_stream_events
+from gateway.stream_output import StreamEntry, StreamOutput, StreamOutputManager
+
+
+CCB_TAIL = Path(__file__).resolve().parent.parent / "bin" / "ccb-tail"
+
+
+def _entry(content: str, type: str = "chunk") -> StreamEntry:
+    return StreamEntry(timestamp=time.time(), type=type, content=content)
+
+
+async def _collect(events, limit: int = 100) -> list:
+    collected = []
+    async for event in events:
+        collected.append(event)
+        if len(collected) >= limit:
+            break
+    return collected
+
+
+@pytest.fixture
+def bus(monkeypatch) -> StreamBus:
+    bus = StreamBus(replay_size=4)
+    monkeypatch.setattr(stream_bus_module, "_bus", bus)
+    return bus
+
+
+@pytest.fixture
+def manager(tmp_path, monkeypatch) -> StreamOutputManager:
+    manager = StreamOutputManager(tmp_path / "streams")
+    monkeypatch.setattr(stream_output_module, "_manager", manager)
+    return manager
+
+
+def _write_stream(manager: StreamOutputManager, request_id: str, chunks: int) -> None:
+    stream = StreamOutput(request_id, "claude", manager.stream_dir, db_path=manager.stream_dir / "missing.db")
+    for i in range(chunks):
+        stream.chunk(f"c{i}")
+    stream.complete("done")
+
+
+@pytest.mark.asyncio
+async def test_late_subscriber_gets_the_replay_then_live_events(bus):
+    for i in range(3):
+        bus.publish("r", _entry(f"c{i}"))
+
+    sub = bus.subscribe("r", after_seq=0)
+    assert sub.gap_until is None
+    threading.Thread(target=lambda: bus.publish("r", _entry("done", "complete"))).start()
+    events = await _collect(sub)
+
+    assert [(e["seq"], e["content"]) for e in events] == [(1, "c1"), (2, "c2"), (3, "done")]
+    assert sub.closed and bus.stats()["subscribers"] == 0
+    assert bus.is_finished("r") and bus.last_seq("r") == 3
+
+
+@pytest.mark.asyncio
+async def test_slow_subscriber_is_dropped_with_its_last_seq(bus):
+    bus.max_queue = 2
+    sub = bus.subscribe("r")
+    for i in range(5):
+        bus.publish("r", _entry(f"c{i}"))
+
+    assert await sub.get() == {"type": "dropped", "seq": -1, "request_id": "r"}
+    assert sub.closed
+    stats = bus.stats()
+    assert stats["subscribers"] == 0 and stats["dropped_subscribers"] == 1
+
+
+@pytest.mark.asyncio
+async def test_events_evicted_from_the_ring_are_backfilled_from_the_log(bus, manager):
+    _write_stream(manager, "r", 8)  # start, c0..c7, complete = seq 0..9
+
+    events = await _collect(iter_stream_events(bus, "r", after_seq=1, stream_manager=manager))
+
+    # seq 2..5 come from the log, 6..9 from the replay ring
+    assert [e["seq"] for e in events] == list(range(2, 10))
+    assert [e["content"] for e in events][:2] == ["c1", "c2"]
+    assert events[-1]["type"] == "complete"
+
+
+@pytest.mark.asyncio
+async def test_requests_unknown_to_the_bus_are_read_from_the_log(bus, manager):
+    _write_stream(manager, "r", 2)
+    restarted = StreamBus()
+
+    events = await _collect(iter_stream_events(restarted, "r", after_seq=0, stream_manager=manager))
+
+    assert [(e["seq"], e["type"]) for e in events] == [(1, "chunk"), (2, "chunk"), (3, "complete")]
+
+
+@pytest.mark.asyncio
+async def test_heartbeats_are_yielded_while_idle(bus):
+    bus.publish("r", _entry("c0"))
+    events = iter_stream_events(bus, "r", heartbeat_s=0.02)
+
+    assert (await events.__anext__())["content"] == "c0"
+    assert await events.__anext__() is None
+    bus.publish("r", _entry("done", "complete"))
+    assert (await events.__anext__())["type"] == "complete"
+    with pytest.raises(StopAsyncIteration):
+        await events.__anext__()
+
+
+@pytest.fixture
+def client(bus, manager) -> TestClient:
+    config = GatewayConfig()
+    router = APIRouter()
+    register_runtime_management_routes(
+        router=router, get_config=lambda: config, get_store=lambda: None, get_queue=lambda: None,
+    )
+    app = FastAPI()
+    app.state.config = config
+    app.include_router(router)
+    return TestClient(app)
+
+
+def _sse_events(text: str) -> list:
+    events = []
+    for frame in text.strip().split("\n\n"):
+        lines = dict(line.split(": ", 1) for line in frame.splitlines() if not line.startswith(":"))
+        event = json.loads(lines["data"])
+        assert int(lines["id"]) == event["seq"]
+        events.append(event)
+    return events
+
+
+def test_sse_replays_and_resumes_from_last_event_id(client, manager):
+    _write_stream(manager, "r", 3)  # seq 0..4
+    headers = {"Accept": "text/event-stream"}
+
+    response = client.get("/api/stream/r", headers=headers)
+    assert response.headers["content-type"].startswith("text/event-stream")
+    assert [e["seq"] for e in _sse_events(response.text)] == [0, 1, 2, 3, 4]
+
+    resumed = client.get("/api/stream/r", headers={**headers, "Last-Event-ID": "2"})
+    assert [e["seq"] for e in _sse_events(resumed.text)] == [3, 4]
+    # Last-Event-ID wins over the query parameter
+    resumed = client.get("/api/stream/r?after_seq=0", headers={**headers, "Last-Event-ID": "3"})
+    assert [e["seq"] for e in _sse_events(resumed.text)] == [4]
+
+    assert client.get("/api/stream/missing", headers=headers).status_code == 404
+
+
+def test_sse_after_a_gateway_restart_reads_the_log(client, manager, monkeypatch):
+    _write_stream(manager, "r", 2)
+    monkeypatch.setattr(stream_bus_module, "_bus", StreamBus())
+
+    response = client.get("/api/stream/r?after_seq=1", headers={"Accept": "text/event-stream"})
+
+    assert [(e["seq"], e["type"]) for e in _sse_events(response.text)] == [(2, "chunk"), (3, "complete")]
+
+
+def test_websocket_feed(client, manager):
+    _write_stream(manager, "r", 3)
+
+    with client.websocket_connect("/api/stream/r?after_seq=1") as ws:
+        events = [ws.receive_json() for _ in range(3)]
+
+    assert [e["seq"] for e in events] == [2, 3, 4]
+    assert events[-1]["type"] == "complete"
+
+
+def test_json_pages_by_line_and_offset(client, manager):
+    _write_stream(manager, "r", 3)
+
+    page = client.get("/api/stream/r?from_line=2").json()
+    assert page["entry_count"] == 3 and page["next_line"] == 5
+    first = client.get("/api/stream/r?from_offset=0").json()
+    assert first["entry_count"] == 5 and first["status"]["completed"]
+    assert client.get(f"/api/stream/r?from_offset={first['next_offset']}").json()["entries"] == []
+
+
+class _StubGateway(BaseHTTPRequestHandler):
+    """Scripted gateway: ``responses`` maps a path+query to a reply."""
+
+    responses: dict = {}
+    seen: list = []
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        sse = "text/event-stream" in self.headers.get("Accept", "")
+        key = ("sse" if sse else "json", url.path, json.dumps(parse_qs(url.query), sort_keys=True))
+        self.seen.append(key)
+        status, body = self.responses.get(key, (404, {"detail": "Stream not found"}))
+        payload = body if isinstance(body, str) else json.dumps(body)
+        self.send_response(status)
+        self.send_header("Content-Type", "text/event-stream" if sse and status == 200 else "application/json")
+        self.end_headers()
+        self.wfile.write(payload.encode("utf-8"))
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def stub_gateway():
+    if not all(shutil.which(tool) for tool in ("bash", "curl", "jq")):
+        pytest.skip("ccb-tail needs bash, curl and jq")
+    handler = type("Handler", (_StubGateway,), {"responses": {}, "seen": []})
+    server = ThreadingHTTPServer(("127.0.0.1", 0), handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield handler, f"http://127.0.0.1:{server.server_address[1]}"
+    server.shutdown()
+    server.server_close()
+
+
+def _query(**params) -> str:
+    return json.dumps({k: [str(v)] for k, v in params.items()}, sort_keys=True)
+
+
+def _run_tail(url: str, request_id: str = "r") -> list:
+    result = subprocess.run(
+        ["bash", str(CCB_TAIL), "-f", "--json", request_id],
+        env={"PATH": "/usr/bin:/bin", "HOME": "/nonexistent", "CCB_GATEWAY_URL": url},
+        capture_output=True, text=True, timeout=30,
+    )
+    assert result.returncode == 0, result.stderr
+    return [json.loads(line) for line in result.stdout.splitlines() if line.startswith("{")]
+
+
+def _event(seq: int, type: str = "chunk") -> dict:
+    return {"seq": seq, "type": type, "content": f"e{seq}", "time": "00:00:00.000", "meta": {}}
+
+
+def test_ccb_tail_resumes_the_sse_feed_after_a_disconnect(stub_gateway):
+    handler, url = stub_gateway
+
+    def sse(*events):
+        return (200, "".join(f"id: {e['seq']}\ndata: {json.dumps(e)}\n\n" for e in events))
+
+    handler.responses[("sse", "/api/stream/r", _query(after_seq=-1))] = sse(_event(0), _event(1))
+    handler.responses[("sse", "/api/stream/r", _query(after_seq=1))] = sse(_event(2, "complete"))
+
+    events = _run_tail(url)
+
+    assert [e["seq"] for e in events] == [0, 1, 2]
+    assert [key[2] for key in handler.seen] == [_query(after_seq=-1), _query(after_seq=1)]
+
+
+def test_ccb_tail_falls_back_to_offset_polling(stub_gateway):
+    handler, url = stub_gateway
+    status = {"exists": True, "completed": False}
+    handler.responses[("json", "/api/stream/r", _query(from_offset=0))] = (200, {
+        "entries": [_event(0), _event(1)], "entry_count": 2, "next_offset": 120, "status": status,
+    })
+    handler.responses[("json", "/api/stream/r", _query(from_offset=120))] = (200, {
+        "entries": [_event(2, "complete")], "entry_count": 1, "next_offset": 180,
+        "status": {**status, "completed": True},
+    })
+
+    events = _run_tail(url)
+
+    assert [e["seq"] for e in events] == [0, 1, 2]
+    # The SSE request is refused once, then pages are fetched by byte offset
+    assert [key[0] for key in handler.seen] == ["sse", "json", "json"]
+    assert [key[2] for key in handler.seen[1:]] == [_query(from_offset=0), _query(from_offset=120)]
@@ -0,0 +1,244 @@
+"""Tests for buffered stream logs and their offset-indexed readers."""
+
+from __future__ import annotations
+
+import json
+import os
+import sqlite3
+import time
+
+import pytest
+
+from gateway.stream_output import INDEX_SUFFIX, StreamOutput, StreamOutputManager
+
+
+@pytest.fixture
+def stream_dir(tmp_path):
+    return tmp_path / "streams"
+
+
+def _open(stream_dir, request_id: str = "req-1", db_path=None, **kwargs) -> StreamOutput:
+    db_path = db_path or stream_dir.parent / "missing.db"
+    return StreamOutput(request_id, "claude", stream_dir, db_path=db_path, **kwargs)
+
+
+def _log_types(path) -> list:
+    with open(path, encoding="utf-8") as f:
+        return [json.loads(line)["type"] for line in f]
+
+
+def test_writes_are_buffered_until_the_byte_threshold(stream_dir):
+    stream = _open(stream_dir, flush_bytes=200)
+    stream.chunk("x" * 100)
+    stream.chunk("y" * 100)
+    # Crossing the threshold writes synchronously, without the flusher
+    assert _log_types(stream.log_path) == ["start", "chunk", "chunk"]
+
+    stream.complete("done")
+
+    assert _log_types(stream.log_path) == ["start", "chunk", "chunk", "complete"]
+    assert stream._file is None
+    stream.output("after close")
+    assert len(_log_types(stream.log_path)) == 4
+
+
+def test_background_flusher_writes_pending_entries(stream_dir):
+    stream = _open(stream_dir)
+    stream.status("working")
+
+    deadline = time.monotonic() + 3.0
+    while not stream.log_path.exists() or len(_log_types(stream.log_path)) < 2:
+        assert time.monotonic() < deadline, "flusher did not write the log"
+        time.sleep(0.02)
+    stream.close()
+
+
+def test_sidecar_tracks_entries_bytes_and_completion(stream_dir):
+    stream = _open(stream_dir)
+    stream.status("working")
+    stream.complete(error="boom")
+
+    index = StreamOutputManager.load_index(stream.index_path)
+
+    assert stream.index_path.name == "req-1" + INDEX_SUFFIX
+    assert index["entries"] == 3
+    assert index["bytes"] == stream.log_path.stat().st_size
+    assert index["completed"] is True and index["success"] is False
+    assert index["last_type"] == "complete"
+
+
+def test_reopened_stream_continues_the_entry_count(stream_dir):
+    first = _open(stream_dir)
+    first.status("one")
+    first.close()
+
+    second = _open(stream_dir)
+    second.close()
+    assert StreamOutputManager.load_index(second.index_path)["entries"] == 3
+
+    # A stale sidecar is not trusted; the log is counted instead
+    with open(second.log_path, "a", encoding="utf-8") as f:
+        f.write(json.dumps({"type": "status", "content": "external"}) + "\n")
+    third = _open(stream_dir)
+    third.complete("done")
+    assert StreamOutputManager.load_index(third.index_path)["entries"] == 6
+
+
+def test_entries_are_inserted_in_one_batch(stream_dir, tmp_path):
+    db_path = tmp_path / "memory.db"
+    with sqlite3.connect(db_path) as conn:
+        conn.execute(
+            "CREATE TABLE stream_entries "
+            "(request_id TEXT, entry_type TEXT, timestamp REAL, content TEXT, metadata TEXT)"
+        )
+    stream = _open(stream_dir, db_path=db_path)
+    stream.chunk("hello", part=1)
+    stream.complete("done")
+
+    with sqlite3.connect(db_path) as conn:
+        rows = conn.execute(
+            "SELECT entry_type, content, metadata FROM stream_entries WHERE request_id = 'req-1'"
+        ).fetchall()
+    assert [row[0] for row in rows] == ["start", "chunk", "complete"]
+    assert json.loads(rows[1][2]) == {"part": 1}
+
+
+@pytest.fixture
+def manager(stream_dir) -> StreamOutputManager:
+    return StreamOutputManager(stream_dir)
+
+
+def _write_log(manager: StreamOutputManager, request_id: str, count: int, partial: str = "") -> None:
+    with open(manager.get_stream_path(request_id), "a", encoding="utf-8") as f:
+        for i in range(count):
+            f.write(json.dumps({"type": "chunk", "content": f"{request_id}-{i}"}) + "\n")
+        f.write(partial)
+
+
+def _contents(entries) -> list:
+    return [entry["content"] for entry in entries]
+
+
+def test_read_from_offset_leaves_a_partial_line(manager):
+    _write_log(manager, "r", 3, partial='{"type": "chunk", "con')
+
+    entries, offset = manager.read_stream_from("r")
+    assert _contents(entries) == ["r-0", "r-1", "r-2"]
+    assert manager.read_stream_from("r", offset) == ([], offset)
+
+    with open(manager.get_stream_path("r"), "a", encoding="utf-8") as f:
+        f.write('tent": "r-3"}\n')
+    entries, next_offset = manager.read_stream_from("r", offset)
+    assert _contents(entries) == ["r-3"]
+    assert next_offset == manager.get_stream_path("r").stat().st_size
+    assert manager.read_stream_from("missing", 5) == ([], 5)
+
+
+def test_read_stream_resumes_from_the_cached_offset(manager, monkeypatch):
+    _write_log(manager, "r", 5)
+    offsets = []
+    original = manager.read_stream_from
+
+    def read_stream_from(request_id, offset=0):
+        offsets.append(offset)
+        return original(request_id, offset)
+
+    monkeypatch.setattr(manager, "read_stream_from", read_stream_from)
+
+    assert _contents(manager.read_stream("r")) == [f"r-{i}" for i in range(5)]
+    _write_log(manager, "r", 0, partial=json.dumps({"content": "r-5"}) + "\n")
+    assert _contents(manager.read_stream("r", from_line=5)) == ["r-5"]
+    # Skipping ahead of the cursor still starts from the cached offset
+    _write_log(manager, "r", 0, partial="".join(json.dumps({"content": f"r-{i}"}) + "\n" for i in (6, 7)))
+    assert _contents(manager.read_stream("r", from_line=7)) == ["r-7"]
+
+    assert offsets[0] == 0 and offsets[1] > 0 and offsets[2] > offsets[1]
+
+
+def test_read_stream_cursor_resets_when_reading_backwards(manager):
+    _write_log(manager, "r", 5)
+    manager.read_stream("r")
+
+    assert _contents(manager.read_stream("r", from_line=2)) == ["r-2", "r-3", "r-4"]
+    assert manager._line_cursors["r"][0] == 5
+
+
+def test_read_stream_cursor_resets_when_the_file_shrinks(manager):
+    _write_log(manager, "r", 5)
+    manager.read_stream("r")
+
+    manager.get_stream_path("r").unlink()
+    _write_log(manager, "r", 2)
+
+    assert _contents(manager.read_stream("r")) == ["r-0", "r-1"]
+    assert manager._line_cursors["r"] == (2, manager.get_stream_path("r").stat().st_size)
+
+
+def test_read_stream_cursors_are_bounded(manager):
+    manager.max_cursors = 3
+    for i in range(5):
+        _write_log(manager, f"r{i}", 1)
+        manager.read_stream(f"r{i}")
+
+    assert list(manager._line_cursors) == ["r2", "r3", "r4"]
+    assert manager.read_stream("missing") == []
+
+
+def test_tail_reads_across_blocks(manager):
+    _write_log(manager, "r", 3000, partial='{"partial')
+
+    tail = manager.read_stream_tail("r", 5)
+
+    assert _contents(tail) == [f"r-{i}" for i in range(2995, 3000)]
+    assert _contents(manager.read_stream_tail("r", 5000)) == [f"r-{i}" for i in range(3000)]
+
+
+def test_status_uses_the_sidecar_and_falls_back_to_a_scan(manager, stream_dir):
+    stream = _open(stream_dir, "done")
+    stream.complete("ok")
+    _write_log(manager, "legacy", 4)
+
+    assert manager.get_stream_status("done") == {
+        "exists": True, "entries": 2, "completed": True, "success": True,
+        "last_type": "complete", "last_time": StreamOutputManager.load_index(stream.index_path)["last_time"],
+    }
+    legacy = manager.get_stream_status("legacy")
+    assert legacy["entries"] == 4 and legacy["completed"] is False
+    assert manager.get_stream_status("missing") == {"exists": False}
+
+
+def test_recent_streams_load_sidecars_only_for_the_newest(manager, monkeypatch):
+    now = time.time()
+    for i in range(6):
+        _write_log(manager, f"r{i}", 1)
+        mtime = now - 100 + (i * 5) % 6  # Creation order differs from mtime order
+        os.utime(manager.get_stream_path(f"r{i}"), (mtime, mtime))
+    loaded = []
+    original = manager.get_stream_status
+
+    def get_stream_status(request_id):
+        loaded.append(request_id)
+        return original(request_id)
+
+    monkeypatch.setattr(manager, "get_stream_status", get_stream_status)
+
+    recent = manager.list_recent_streams(limit=2)
+
+    assert [s["request_id"] for s in recent] == ["r1", "r2"]
+    assert loaded == ["r1", "r2"]
+    assert recent[0]["status"]["entries"] == 1
+
+
+def test_cleanup_removes_logs_sidecars_and_cursors(manager, stream_dir):
+    stream = _open(stream_dir, "old")
+    stream.complete("ok")
+    manager.read_stream("old")
+    old = time.time() - 48 * 3600
+    os.utime(manager.get_stream_path("old"), (old, old))
+    _write_log(manager, "new", 1)
+
+    assert manager.cleanup_old_streams() == 1
+
+    assert not manager.stream_exists("old") and not manager.get_index_path("old").exists()
+    assert "old" not in manager._line_cursors
+    assert manager.stream_exists("new")
@@ -0,0 +1,197 @@
+"""Tests for the NumPy vector index and the local VectorSearch backend."""
+
+from __future__ import annotations
+
+import sqlite3
+from typing import Dict, List
+
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from memory.vector_search_index import DenseVectorIndex
+from memory.vector_search_models import VectorConfig
+from memory.vector_search_service import VectorSearch
+
+
+def _unit_vectors(n: int, dim: int = 16, seed: int = 0) -> np.ndarray:
+    vectors = np.random.default_rng(seed).normal(size=(n, dim)).astype(np.float32)
+    return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+
+def _brute_force(vectors: Dict[str, np.ndarray], query: np.ndarray, limit: int) -> List[str]:
+    q = query / np.linalg.norm(query)
+    scored = sorted(vectors.items(), key=lambda item: -float(item[1] @ q))
+    return [item_id for item_id, _vector in scored[:limit]]
+
+
+def test_search_matches_brute_force_after_adds_and_removes():
+    index = DenseVectorIndex(initial_capacity=4)
+    vectors = {f"m{i}": v for i, v in enumerate(_unit_vectors(200))}
+    for item_id, vector in vectors.items():
+        index.add(item_id, vector * 3.0, {"content": item_id, "metadata": {}})
+    # Removing rows swaps the last row into each hole
+    for item_id in ["m0", "m57", "m199", "m100"]:
+        assert index.remove(item_id)
+        del vectors[item_id]
+    assert not index.remove("m0")
+
+    query = _unit_vectors(1, seed=1)[0]
+    results = index.search(query, limit=10)
+
+    assert [item_id for item_id, _record, _score in results] == _brute_force(vectors, query, 10)
+    assert [record["content"] for item_id, record, _score in results] == [r[0] for r in results]
+    assert len(index) == 196 and "m57" not in index and "m58" in index
+
+
+def test_replace_filters_and_zero_vectors():
+    index = DenseVectorIndex()
+    index.add("a", [1.0, 0.0, 0.0], {"memory_type": "message", "metadata": {"provider": "claude"}})
+    index.add("b", [0.9, 0.1, 0.0], {"memory_type": "observation", "metadata": {"provider": "gemini"}})
+    index.add("zero", [0.0, 0.0, 0.0], {"memory_type": "message", "metadata": {}})
+
+    assert [r[0] for r in index.search([1.0, 0.0, 0.0], limit=5)] == ["a", "b"]
+    assert [r[0] for r in index.search([1.0, 0.0, 0.0], filters={"memory_type": "observation"})] == ["b"]
+    assert [r[0] for r in index.search([1.0, 0.0, 0.0], filters={"provider": "claude"})] == ["a"]
+
+    # Replacing a vector updates its record and the filter columns
+    index.add("a", [0.0, 1.0, 0.0], {"memory_type": "observation", "metadata": {"provider": "claude"}})
+    assert [r[0] for r in index.search([1.0, 0.0, 0.0], filters={"memory_type": "observation"})] == ["b", "a"]
+    assert index.get("a")["memory_type"] == "observation"
+    assert len(index) == 3
+
+    with pytest.raises(ValueError):
+        index.add("c", [1.0, 0.0], {})
+    assert index.search([0.0, 0.0, 0.0]) == []
+
+
+def test_save_and_memory_mapped_load(tmp_path):
+    path = tmp_path / "index"
+    index = DenseVectorIndex()
+    vectors = {f"m{i}": v for i, v in enumerate(_unit_vectors(50))}
+    for item_id, vector in vectors.items():
+        index.add(item_id, vector, {"content": item_id, "metadata": {"n": item_id}})
+    assert index.save(path)
+
+    loaded = DenseVectorIndex()
+    assert loaded.load(path, mmap=True)
+
+    assert isinstance(loaded._matrix, np.memmap)
+    query = _unit_vectors(1, seed=2)[0]
+    assert loaded.search(query, limit=5) == index.search(query, limit=5)
+    assert [r[0] for r in loaded.search(query, filters={"n": "m3"})] == ["m3"]
+
+    # The first write copies the mapped matrix; the file is left as saved
+    loaded.add("new", query, {"content": "new", "metadata": {}})
+    assert not isinstance(loaded._matrix, np.memmap)
+    assert loaded.search(query, limit=1)[0][0] == "new"
+    reloaded = DenseVectorIndex()
+    assert reloaded.load(path)
+    assert len(reloaded) == 50 and "new" not in reloaded
+
+
+def test_empty_index_round_trip(tmp_path):
+    path = tmp_path / "index"
+    assert DenseVectorIndex().save(path)
+
+    loaded = DenseVectorIndex()
+    assert loaded.load(path)
+    assert len(loaded) == 0
+    assert loaded.search([1.0, 0.0, 0.0]) == []
+
+    loaded.add("a", [1.0, 0.0, 0.0], {"content": "a"})
+    assert [r[0] for r in loaded.search([1.0, 0.0, 0.0])] == ["a"]
+
+
+def test_ivf_search_finds_nearest_within_probed_lists():
+    rng = np.random.default_rng(3)
+    centers = _unit_vectors(20, dim=32, seed=4)
+    points = centers[rng.integers(0, 20, size=2000)] + rng.normal(scale=0.05, size=(2000, 32))
+    index = DenseVectorIndex(ann_min_vectors=1000, nprobe=4)
+    vectors = {}
+    for i, point in enumerate(points):
+        vectors[f"p{i}"] = point / np.linalg.norm(point)
+        index.add(f"p{i}", point, {"content": str(i)})
+
+    queries = points[:50] + rng.normal(scale=0.01, size=(50, 32))
+    hits = sum(
+        index.search(query, limit=1)[0][0] == _brute_force(vectors, query, 1)[0]
+        for query in queries
+    )
+
+    assert index._centroids is not None
+    assert hits >= 48
+    # Rows added after the build are assigned to a list and stay searchable
+    index.add("late", centers[0], {"content": "late"})
+    assert index.search(centers[0], limit=1)[0][0] == "late"
+
+
+class _CountingEmbedder:
+    """Deterministic embeddings; records every text it embeds."""
+
+    def __init__(self):
+        self.embedded: List[str] = []
+
+    def embed(self, text: str) -> List[float]:
+        self.embedded.append(text)
+        rng = np.random.default_rng(abs(hash(text)) % (2 ** 32))
+        return rng.normal(size=8).tolist()
+
+    def embed_batch(self, texts: List[str]) -> List[List[float]]:
+        return [self.embed(text) for text in texts]
+
+
+def _vector_search(index_path) -> VectorSearch:
+    config = VectorConfig()
+    config.backend = "memory"
+    config.index_path = str(index_path)
+    search = VectorSearch(config)
+    search.embedding_provider = _CountingEmbedder()
+    return search
+
+
+def _memory_db(path) -> str:
+    with sqlite3.connect(path) as conn:
+        conn.execute("CREATE TABLE messages (message_id TEXT, content TEXT, provider TEXT, timestamp TEXT)")
+        conn.execute("CREATE TABLE observations (observation_id TEXT, content TEXT, category TEXT, created_at TEXT)")
+        conn.execute("INSERT INTO messages VALUES ('m1', 'first message', 'claude', '2026-01-01')")
+        conn.execute("INSERT INTO observations VALUES ('o1', 'an observation', 'fact', '2026-01-01')")
+    return path
+
+
+def test_sync_reembeds_only_new_or_edited_memories(tmp_path):
+    db_path = _memory_db(tmp_path / "memory.db")
+    search = _vector_search(tmp_path / "index")
+    assert search.sync_from_database(db_path) == (2, 0)
+
+    restarted = _vector_search(tmp_path / "index")
+    assert restarted.sync_from_database(db_path) == (0, 0)
+
+    with sqlite3.connect(db_path) as conn:
+        conn.execute("UPDATE messages SET content = 'edited message' WHERE message_id = 'm1'")
+        conn.execute("UPDATE observations SET category = 'preference' WHERE observation_id = 'o1'")
+    assert restarted.sync_from_database(db_path) == (2, 0)
+
+    assert restarted.embedding_provider.embedded == ["edited message", "an observation"]
+    results = restarted.search("edited message", limit=1)
+    assert results[0].memory_id == "m1" and results[0].content == "edited message"
+
+
+def test_single_index_calls_are_persisted(tmp_path):
+    search = _vector_search(tmp_path / "index")
+    search.PERSIST_DELAY_S = 0.05
+    assert search.index_memory("m1", "message", "hello")
+    timer = search._persist_timer
+    assert timer is not None
+
+    timer.join(timeout=2.0)
+    assert search._persist_timer is None
+    assert _vector_search(tmp_path / "index").get_stats()["indexed_count"] == 1
+
+    # close() writes pending changes without waiting for the timer
+    search.PERSIST_DELAY_S = 60.0
+    assert search.index_memory("m2", "message", "world")
+    assert search.delete_memory("m1")
+    search.close()
+    reloaded = _vector_search(tmp_path / "index")
+    assert reloaded.backend.contains("m2") and not reloaded.backend.contains("m1")
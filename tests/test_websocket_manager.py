@@ -0,0 +1,120 @@
+"""Tests for WebSocketManager fan-out and slow-client handling."""
+
+from __future__ import annotations
+
+import asyncio
+import json
+from typing import List, Optional
+
+import pytest
+
+from gateway.models import WebSocketEvent
+from gateway.routes.websocket import WebSocketManager
+
+
+class _FakeSocket:
+    """Records sent messages; ``send_delay=None`` stalls every send."""
+
+    def __init__(self, send_delay: Optional[float] = 0.0):
+        self.send_delay = send_delay
+        self.sent: List[dict] = []
+        self.closed_with: Optional[int] = None
+
+    async def accept(self) -> None:
+        pass
+
+    async def send_text(self, message: str) -> None:
+        if self.send_delay is None:
+            await asyncio.Event().wait()
+        await asyncio.sleep(self.send_delay)
+        self.sent.append(json.loads(message))
+
+    async def close(self, code: int = 1000) -> None:
+        self.closed_with = code
+
+
+def _event(request_id: str, status: str = "queued") -> WebSocketEvent:
+    return WebSocketEvent(type="request_update", data={"request_id": request_id, "status": status})
+
+
+async def _settle(condition, timeout: float = 2.0) -> None:
+    deadline = asyncio.get_running_loop().time() + timeout
+    while not condition():
+        assert asyncio.get_running_loop().time() < deadline, "condition not reached"
+        await asyncio.sleep(0.01)
+
+
+@pytest.mark.asyncio
+async def test_stalled_client_does_not_delay_others():
+    manager = WebSocketManager(send_timeout_s=5.0)
+    fast, stalled = _FakeSocket(), _FakeSocket(send_delay=None)
+    await manager.connect(fast)
+    await manager.connect(stalled)
+
+    for i in range(5):
+        await asyncio.wait_for(manager.broadcast(_event(f"r{i}")), timeout=0.1)
+    await _settle(lambda: len(fast.sent) == 5)
+
+    assert [m["data"]["request_id"] for m in fast.sent] == ["r0", "r1", "r2", "r3", "r4"]
+    assert stalled.sent == []
+    assert manager.stats()["connections"] == 2
+
+
+@pytest.mark.asyncio
+async def test_full_queue_coalesces_then_drops_oldest():
+    manager = WebSocketManager(max_queue=2, send_timeout_s=5.0)
+    stalled = _FakeSocket(send_delay=None)
+    await manager.connect(stalled)
+    conn = manager._connections[stalled]
+    # Let the writer take the first event and block on it
+    manager.publish(_event("busy"))
+    await _settle(lambda: not conn.queue and not manager._outbox)
+
+    manager.publish(_event("a", "queued"))
+    manager.publish(_event("b", "queued"))
+    manager.publish(_event("a", "processing"))  # Replaces the pending "a"
+    manager.publish(_event("c", "queued"))      # Nothing to replace: drops "b"
+    await _settle(lambda: not manager._outbox)
+
+    pending = [json.loads(message)["data"] for _key, message in conn.queue]
+    assert pending == [
+        {"request_id": "a", "status": "processing"},
+        {"request_id": "c", "status": "queued"},
+    ]
+    assert manager.events_coalesced == 1
+    assert manager.events_dropped == 1
+
+
+@pytest.mark.asyncio
+async def test_stalled_send_disconnects_client():
+    manager = WebSocketManager(send_timeout_s=0.1)
+    fast, stalled = _FakeSocket(), _FakeSocket(send_delay=None)
+    await manager.connect(fast)
+    await manager.connect(stalled)
+
+    manager.publish(_event("r1"))
+    await _settle(lambda: stalled not in manager.active_connections)
+
+    assert stalled.closed_with == 1013
+    assert manager.slow_disconnects == 1
+    manager.publish(_event("r2"))
+    await _settle(lambda: len(fast.sent) == 2)
+
+
+@pytest.mark.asyncio
+async def test_client_lagging_past_timeout_is_evicted():
+    manager = WebSocketManager(max_queue=2, send_timeout_s=0.2)
+    slow = _FakeSocket(send_delay=0.05)
+    await manager.connect(slow)
+
+    # Keep the queue full for longer than send_timeout_s
+    for i in range(40):
+        manager.publish(_event(f"r{i}"))
+        await asyncio.sleep(0.01)
+        if slow not in manager.active_connections:
+            break
+
+    await _settle(lambda: slow.closed_with == 1013)
+    assert manager.slow_disconnects == 1
+    assert manager.events_dropped > 0
+    assert manager.stats()["connections"] == 0